@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark du rendu des e-mails ALORIA AGENCY
+Mesure le nombre de rendus par seconde pour chaque gabarit:
+- "précompilé": gabarit assemblé et compilé une fois à l'import (render_email)
+- "à la volée": mise en page réassemblée et recompilée à chaque rendu, blocs
+  pays/visa/rôle recalculés (équivalent du rendu par f-string d'origine)
+
+Usage: python bench_email_templates.py [--iterations 20000]
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+import email_templates
+from email_templates import (
+    CASE_NOTES_PARTIAL, EmailTemplate, HEADER_PARTIAL, FOOTER_PARTIAL, LAYOUT, BASE_STYLES,
+    country_block, render_email, role_info, status_info, visa_block
+)
+
+
+def build_contexts():
+    """Contextes représentatifs pour chaque gabarit"""
+    now = datetime.now().strftime('%d/%m/%Y à %H:%M')
+    flag, country_html = country_block("Canada")
+    title, welcome, role_html = role_info("EMPLOYEE")
+    icon, bg, border, status_html = status_info(75)
+    return {
+        "prospect_welcome": {
+            "name": "Marie Ngono", "country": "Canada", "visa_type": "Permis de Travail",
+            "urgency": "Normal", "flag": flag, "contact_date": now,
+            "visa_html": visa_block("Permis de Travail"), "country_html": country_html
+        },
+        "user_welcome": {
+            "name": "Paul Eto'o", "role_title": title, "role_welcome": welcome,
+            "login_email": "paul@aloria-agency.com", "default_password": "Aloria2024!",
+            "role_html": role_html
+        },
+        "case_status_update": {
+            "name": "Awa Diallo", "case_id": "c-123", "current_step": "Dépôt du dossier",
+            "status": "En cours", "country": "France", "visa_type": "Passeport Talent",
+            "progress": 75, "manager_name": "Jean Dupont", "manager_email": "jean.dupont@aloria-agency.com",
+            "update_date": now, "status_icon": icon, "status_bg": bg, "status_border": border,
+            "status_html": status_html, "notes_html": CASE_NOTES_PARTIAL.substitute(notes="Pièces reçues")
+        },
+        "prospect_assignment": {
+            "assignee_name": "Employé", "prospect_name": "Marie Ngono", "prospect_email": "marie@example.com",
+            "prospect_phone": "+237 6 00 00 00 00", "prospect_country": "Canada",
+            "prospect_visa": "Permis de Travail", "prospect_message": "Je souhaite partir en 2025 <urgent>",
+            "lead_score": 80
+        },
+        "consultant_appointment": {
+            "name": "Marie Ngono", "country": "Canada", "visa_type": "Permis de Travail",
+            "assigned_by": "Conseiller", "payment_date": now
+        },
+    }
+
+
+def render_uncached(name: str, context: dict):
+    """Rendu sans précompilation: mise en page et blocs reconstruits à chaque appel"""
+    source = email_templates.get_template(name)
+    country_block.__wrapped__("Canada", "fr")
+    visa_block.__wrapped__("Permis de Travail", "fr")
+    role_info.__wrapped__("EMPLOYEE")
+    html_source = LAYOUT.safe_substitute(
+        lang="fr",
+        styles=BASE_STYLES,
+        header=HEADER_PARTIAL.safe_substitute(logo_icon="", header_subtitle=""),
+        body=source.html.template,
+        footer=FOOTER_PARTIAL.safe_substitute(footer_greeting="", team_signature="", footer_note="")
+    )
+    return EmailTemplate(name, "fr", source.subject.template, html_source).render(context)
+
+
+def measure(func, name: str, context: dict, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(name, context)
+    return iterations / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du rendu des e-mails")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"📊 Rendu des e-mails ({args.iterations} itérations par gabarit)")
+    print(f"{'Gabarit':<24}{'précompilé (rendus/s)':>24}{'à la volée (rendus/s)':>24}{'gain':>8}")
+
+    for name, context in build_contexts().items():
+        compiled = measure(render_email, name, context, args.iterations)
+        uncached = measure(render_uncached, name, context, args.iterations)
+        print(f"{name:<24}{compiled:>24,.0f}{uncached:>24,.0f}{compiled / uncached:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
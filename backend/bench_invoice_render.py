@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark du rendu des factures ALORIA AGENCY
+Rend N factures synthétiques (PDF ReportLab ou PNG Pillow) et mesure:
+- le débit (factures/s) du pool de processus (services.render_pool) de 1 à W processus
+- la latence maximale de la boucle d'événements pendant le rendu (un ticker toutes
+  les 10 ms), comparée au rendu "inline" historique dans le gestionnaire async
+
+Usage: python bench_invoice_render.py [--invoices 200] [--max-workers 4] [--kind pdf|png]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from services.render_pool import InvoiceRenderPool, init_render_worker, render_pdf_bytes, render_png_bytes
+
+
+def build_invoice(index: int):
+    return {
+        "invoice_number": f"ALO-20240101-{index:06d}",
+        "date": "01/01/2024",
+        "client_name": f"Client Benchmark {index}",
+        "client_email": f"client{index}@example.com",
+        "client_phone": "+237 600000000",
+        "amount": 150000 + index,
+        "currency": "CFA",
+        "payment_method": "Mobile Money",
+        "description": "Services d'immigration et conseil",
+        "created_at": "2024-01-01T10:00:00+00:00",
+        "status": "Confirmé"
+    }
+
+
+async def _ticker(stop: asyncio.Event, lags: list):
+    """Mesure le retard de réveil de la boucle (blocage par du code CPU-bound)"""
+    interval = 0.01
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - started - interval) * 1000)
+
+
+async def _measure(render_all):
+    stop, lags = asyncio.Event(), []
+    ticker = asyncio.create_task(_ticker(stop, lags))
+    started = time.perf_counter()
+    await render_all()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+    return elapsed, max(lags, default=0.0)
+
+
+async def run(invoice_count: int, max_workers: int, kind: str):
+    invoices = [build_invoice(index) for index in range(invoice_count)]
+    render = render_pdf_bytes if kind == "pdf" else render_png_bytes
+
+    async def inline():
+        # Méthode historique: rendu direct dans le gestionnaire async
+        for invoice in invoices:
+            render(invoice)
+            await asyncio.sleep(0)
+
+    print(f"{'méthode':<18}{'factures/s':>12}{'latence boucle max (ms)':>26}")
+    elapsed, lag = await _measure(inline)
+    print(f"{'inline':<18}{invoice_count / elapsed:>12.1f}{lag:>26.1f}")
+
+    for workers in range(1, max_workers + 1):
+        pool = InvoiceRenderPool(max_workers=workers, max_pending=invoice_count, timeout_seconds=300,
+                                 initializer=init_render_worker)
+        pool.start()
+        try:
+            # Préchauffage: démarrage des processus et imports ReportLab/Pillow
+            await asyncio.gather(*(pool.run(render, invoices[0]) for _ in range(workers)))
+
+            async def pooled():
+                await asyncio.gather(*(pool.run(render, invoice) for invoice in invoices))
+
+            elapsed, lag = await _measure(pooled)
+            print(f"{f'pool ({workers} proc.)':<18}{invoice_count / elapsed:>12.1f}{lag:>26.1f}")
+        finally:
+            pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--invoices", type=int, default=200)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--kind", choices=["pdf", "png"], default="pdf")
+    args = parser.parse_args()
+    asyncio.run(run(args.invoices, args.max_workers, args.kind))
+
+
+if __name__ == "__main__":
+    main()
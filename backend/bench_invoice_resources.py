@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark des ressources de factures ALORIA AGENCY
+Temps de rendu par facture (PDF ReportLab et PNG Pillow) avec:
+- "froid": ressources rechargées à chaque facture (comportement historique:
+  getSampleStyleSheet + ParagraphStyle / 4 polices TrueType par rendu)
+- "chaud": ressources chargées une fois par processus (invoice_resources)
+
+Usage: python bench_invoice_resources.py [--invoices 200]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import invoice_resources
+from invoice_generator_png import generate_invoice_png
+from professional_invoice_generator import generate_professional_invoice_pdf
+
+
+def build_invoice(index: int):
+    return {
+        "invoice_number": f"ALO-20240101-{index:06d}",
+        "date": "01/01/2024",
+        "client_name": f"Client Benchmark {index}",
+        "client_email": f"client{index}@example.com",
+        "client_phone": "+237 600000000",
+        "amount": 150000 + index,
+        "currency": "CFA",
+        "payment_method": "Mobile Money",
+        "description": "Services d'immigration et conseil",
+        "created_at": "2024-01-01T10:00:00+00:00",
+        "status": "Confirmé"
+    }
+
+
+def measure(render, invoices, cold: bool):
+    timings = []
+    for index, invoice in enumerate(invoices):
+        if cold:
+            invoice_resources.reset()
+        started = time.perf_counter()
+        render(index, invoice)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.mean(timings), statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--invoices", type=int, default=200)
+    args = parser.parse_args()
+    invoices = [build_invoice(index) for index in range(args.invoices)]
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        renderers = {
+            "pdf": lambda index, invoice: generate_professional_invoice_pdf(invoice),
+            "png": lambda index, invoice: generate_invoice_png(invoice, os.path.join(output_dir, f"{index}.png")),
+        }
+        print(f"{'rendu':<8}{'ressources':<12}{'moyenne (ms)':>14}{'médiane (ms)':>14}")
+        for kind, render in renderers.items():
+            render(0, invoices[0])  # Imports et caches internes des bibliothèques
+            for label, cold in (("froid", True), ("chaud", False)):
+                invoice_resources.preload()
+                mean, median = measure(render, invoices, cold)
+                print(f"{kind:<8}{label:<12}{mean:>14.2f}{median:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
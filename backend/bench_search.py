@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la recherche globale ALORIA AGENCY
+Génère N entités synthétiques (utilisateurs, clients, dossiers, visiteurs) dans une
+base MongoDB temporaire, construit l'index 'search_index' puis compare par requête:
+- "index": services.search_service.search (préfixes multikey + classement en agrégation)
+- "regex": $regex insensible à la casse non ancré sur les collections sources
+  (méthode historique de /search/global)
+
+La base temporaire est supprimée à la fin.
+
+Usage: python bench_search.py [--records 100000] [--queries 200] [--mongo-url mongodb://localhost:27017]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+import uuid
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from services.index_service import INDEX_REGISTRY
+from services.search_service import rebuild_search_index, search
+
+FIRST_NAMES = ["Hélène", "Marie", "Paul", "Jean", "Aïcha", "Samuel", "Chloé", "Ibrahim", "Joël", "Françoise",
+               "Didier", "Nadège", "Rodrigue", "Estelle", "Boris", "Ingrid", "Cédric", "Mireille"]
+LAST_NAMES = ["Mbarga", "Ngono", "Etoundi", "Biya", "Fotso", "Kamga", "Nkoulou", "Tchoumi", "Ewané", "Abéga",
+              "Manga", "Essomba", "Owona", "Ndjock", "Béyeck", "Simo"]
+COUNTRIES = ["Canada", "France", "Belgique", "Allemagne", "États-Unis"]
+VISAS = ["Permis de travail", "Permis d'études", "Résidence permanente", "Visa visiteur"]
+STATUSES = ["Nouveau", "En cours", "Documents manquants", "Approuvé", "Terminé"]
+
+
+def _name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.randrange(10000)}"
+
+
+def build_dataset(records: int, rng: random.Random):
+    """Jeux de données proportionnés: 25% de chaque type"""
+    per_type = records // 4
+    employees = [str(uuid.uuid4()) for _ in range(50)]
+    users, clients, cases, visitors = [], [], [], []
+    for index in range(per_type):
+        user_id, client_id = str(uuid.uuid4()), str(uuid.uuid4())
+        name = _name(rng)
+        employee = rng.choice(employees)
+        users.append({"id": user_id, "full_name": name, "email": f"user{index}@example.com",
+                      "phone": f"+237 6{rng.randrange(10**8):08d}", "role": "CLIENT", "is_active": True})
+        clients.append({"id": client_id, "user_id": user_id, "assigned_employee_id": employee,
+                        "country": rng.choice(COUNTRIES), "visa_type": rng.choice(VISAS),
+                        "current_status": rng.choice(STATUSES)})
+        cases.append({"id": str(uuid.uuid4()), "client_id": user_id, "assigned_employee_id": employee,
+                      "country": rng.choice(COUNTRIES), "visa_type": rng.choice(VISAS),
+                      "status": rng.choice(STATUSES), "notes": f"Dossier {index}",
+                      "workflow_steps": [{"title": f"Étape {step}", "description": "x" * 200} for step in range(8)]})
+        visitors.append({"id": str(uuid.uuid4()), "name": _name(rng), "company": f"Société {index % 500}",
+                         "purpose": "Consultation initiale", "arrival_time": "2024-01-01T10:00:00+00:00"})
+    return {"users": users, "clients": clients, "cases": cases, "visitors": visitors}, employees
+
+
+async def _create_indexes(db):
+    for collection in ("users", "clients", "cases", "search_index"):
+        for spec in INDEX_REGISTRY.get(collection, []):
+            spec = dict(spec)
+            await db[collection].create_index(spec.pop("keys"), **spec)
+
+
+async def _timed(coroutine_factory, queries):
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        await coroutine_factory(query)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+async def run(records: int, query_count: int, mongo_url: str):
+    rng = random.Random(42)
+    client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=2000)
+    db = client[f"aloria_bench_search_{uuid.uuid4().hex[:8]}"]
+    try:
+        dataset, employees = build_dataset(records, rng)
+        for collection, documents in dataset.items():
+            await db[collection].insert_many(documents)
+        await _create_indexes(db)
+
+        started = time.perf_counter()
+        report = await rebuild_search_index(db)
+        print(f"Index construit en {time.perf_counter() - started:.1f}s: {report}")
+
+        queries = [rng.choice(FIRST_NAMES)[:rng.randint(3, 6)] + " " + rng.choice(LAST_NAMES)[:3]
+                   for _ in range(query_count // 2)]
+        queries += [rng.choice(LAST_NAMES)[:rng.randint(3, 5)] for _ in range(query_count - len(queries))]
+
+        async def index_search_manager(query):
+            return await search(db, query, "MANAGER", "m1", limit=20)
+
+        async def index_search_employee(query):
+            return await search(db, query, "EMPLOYEE", employees[0], limit=20)
+
+        async def regex_search(query):
+            pattern = {"$regex": query, "$options": "i"}
+            await db.users.find({"$or": [{"full_name": pattern}, {"email": pattern}, {"phone": pattern}]},
+                                {"_id": 0, "password": 0}).limit(20).to_list(20)
+            await db.cases.find({"$or": [{"status": pattern}, {"country": pattern}, {"visa_type": pattern},
+                                         {"notes": pattern}]}, {"_id": 0}).limit(20).to_list(20)
+            await db.visitors.find({"$or": [{"name": pattern}, {"company": pattern}, {"purpose": pattern}]},
+                                   {"_id": 0}).limit(20).to_list(20)
+
+        print(f"{'méthode':<22}{'p50 (ms)':>12}{'p95 (ms)':>12}")
+        for label, factory in (("index (manager)", index_search_manager),
+                               ("index (employé)", index_search_employee),
+                               ("regex (historique)", regex_search)):
+            await factory(queries[0])  # Préchauffage
+            p50, p95 = await _timed(factory, queries)
+            print(f"{label:<22}{p50:>12.2f}{p95:>12.2f}")
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    args = parser.parse_args()
+    asyncio.run(run(args.records, args.queries, args.mongo_url))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,678 @@
+#!/usr/bin/env python3
+"""
+ALORIA AGENCY - Gabarits d'e-mails précompilés
+Les gabarits (string.Template) sont assemblés et compilés UNE fois à l'import:
+la mise en page commune (en-tête, styles, pied de page) est fusionnée avec le corps
+de chaque e-mail au chargement, un rendu ne fait donc qu'une substitution.
+
+Les blocs dépendant uniquement de paramètres discrets (pays, type de visa, rôle,
+palier de progression) sont mis en cache (lru_cache).
+
+Variantes par langue: chaque gabarit est enregistré pour une locale ("fr", "en", ...)
+avec repli sur le français si la variante n'existe pas. La locale par défaut est
+configurable (EMAIL_LOCALE).
+
+Les valeurs du contexte sont échappées (HTML), sauf les clés se terminant par
+"_html" qui portent des blocs déjà rendus.
+"""
+
+import os
+import html
+from functools import lru_cache
+from string import Template
+from typing import Any, Dict, Tuple
+
+FALLBACK_LOCALE = "fr"
+DEFAULT_LOCALE = os.getenv("EMAIL_LOCALE", FALLBACK_LOCALE)
+
+# ============================================================================
+# MISE EN PAGE COMMUNE (partiels)
+# ============================================================================
+
+BASE_STYLES = """
+                body { font-family: 'Arial', sans-serif; line-height: 1.6; color: #333; margin: 0; padding: 0; }
+                .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+                .header { background: linear-gradient(135deg, #1E293B 0%, #334155 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }
+                .logo { font-size: 28px; font-weight: bold; margin-bottom: 10px; }
+                .content { background: #f8fafc; padding: 30px; border-radius: 0 0 10px 10px; }
+                .info-box { background: white; border: 1px solid #e2e8f0; border-radius: 8px; padding: 20px; margin: 15px 0; }
+                .btn { background: linear-gradient(135deg, #f97316 0%, #ea580c 100%); color: white; padding: 12px 30px; text-decoration: none; border-radius: 25px; display: inline-block; margin: 10px 0; }
+                .footer { text-align: center; margin-top: 30px; padding: 20px; background: #f1f5f9; border-radius: 8px; }"""
+
+HEADER_PARTIAL = Template("""
+                <div class="header">
+                    <div class="logo">${logo_icon} ALORIA AGENCY</div>
+                    <p>${header_subtitle}</p>
+                </div>""")
+
+FOOTER_PARTIAL = Template("""
+                <div class="footer">
+                    <p>${footer_greeting}<br><strong>${team_signature}</strong></p>
+                    <p style="font-size: 12px; color: #64748b;">
+                        ${footer_note}
+                    </p>
+                </div>""")
+
+LAYOUT = Template("""
+        <!DOCTYPE html>
+        <html lang="${lang}">
+        <head>
+            <meta charset="UTF-8">
+            <style>${styles}
+            </style>
+        </head>
+        <body>
+            <div class="container">${header}
+
+                <div class="content">${body}
+                </div>
+                ${footer}
+            </div>
+        </body>
+        </html>
+        """)
+
+TEAM_SIGNATURE = {
+    "fr": "L'équipe ALORIA AGENCY",
+    "en": "The ALORIA AGENCY team",
+}
+
+
+class EmailTemplate:
+    """Gabarit compilé: sujet + HTML complet (mise en page déjà fusionnée)"""
+
+    def __init__(self, name: str, locale: str, subject: str, html_source: str):
+        self.name = name
+        self.locale = locale
+        self.subject = Template(subject)
+        self.html = Template(html_source)
+
+    def render(self, context: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        Rend le sujet et le HTML.
+
+        Raises:
+            KeyError: Si une variable du gabarit est absente du contexte
+        """
+        safe = {
+            key: value if key.endswith("_html") else html.escape(str(value))
+            for key, value in context.items()
+        }
+        return self.subject.substitute(context), self.html.substitute(safe)
+
+
+_TEMPLATES: Dict[Tuple[str, str], EmailTemplate] = {}
+
+
+def register_template(
+    name: str,
+    locale: str,
+    subject: str,
+    logo_icon: str,
+    header_subtitle: str,
+    body: str,
+    footer_greeting: str,
+    footer_note: str,
+    extra_styles: str = ""
+) -> EmailTemplate:
+    """
+    Assemble la mise en page et le corps, puis compile le gabarit.
+
+    header_subtitle, body, footer_* et extra_styles peuvent contenir des variables
+    ($name, ${progress}, ...) résolues au rendu.
+    """
+    header = HEADER_PARTIAL.safe_substitute(logo_icon=logo_icon, header_subtitle=header_subtitle)
+    footer = FOOTER_PARTIAL.safe_substitute(
+        footer_greeting=footer_greeting,
+        team_signature=TEAM_SIGNATURE.get(locale, TEAM_SIGNATURE[FALLBACK_LOCALE]),
+        footer_note=footer_note
+    )
+    html_source = LAYOUT.safe_substitute(
+        lang=locale,
+        styles=BASE_STYLES + extra_styles,
+        header=header,
+        body=body,
+        footer=footer
+    )
+    template = EmailTemplate(name, locale, subject, html_source)
+    _TEMPLATES[(name, locale)] = template
+    return template
+
+
+def get_template(name: str, locale: str = DEFAULT_LOCALE) -> EmailTemplate:
+    """Gabarit pour la locale demandée, avec repli sur FALLBACK_LOCALE"""
+    template = _TEMPLATES.get((name, locale)) or _TEMPLATES.get((name, FALLBACK_LOCALE))
+    if template is None:
+        raise KeyError(f"Gabarit d'e-mail inconnu: {name}")
+    return template
+
+
+def render_email(name: str, context: Dict[str, Any], locale: str = DEFAULT_LOCALE) -> Tuple[str, str]:
+    """
+    Rend un e-mail enregistré.
+
+    Returns:
+        Tuple (sujet, contenu HTML)
+    """
+    return get_template(name, locale).render(context)
+
+
+def available_templates() -> Dict[str, list]:
+    """Locales disponibles par gabarit"""
+    result: Dict[str, list] = {}
+    for name, locale in _TEMPLATES:
+        result.setdefault(name, []).append(locale)
+    return result
+
+
+# ============================================================================
+# BLOCS DYNAMIQUES MIS EN CACHE
+# ============================================================================
+
+_COUNTRY_BLOCKS = {
+    "fr": {
+        "Canada": ("🇨🇦", """
+                <div class="info-box">
+                    <h3>🇨🇦 Spécificités Canada</h3>
+                    <ul>
+                        <li><strong>Système Entrée Express:</strong> Traitement rapide en 6 mois</li>
+                        <li><strong>Évaluation linguistique:</strong> TEF/IELTS requis</li>
+                        <li><strong>Équivalence diplômes:</strong> ECA obligatoire</li>
+                        <li><strong>Provinces populaires:</strong> Québec, Ontario, Colombie-Britannique</li>
+                    </ul>
+                </div>
+                """),
+        "France": ("🇫🇷", """
+                <div class="info-box">
+                    <h3>🇫🇷 Spécificités France</h3>
+                    <ul>
+                        <li><strong>Passeport Talent:</strong> Profils qualifiés privilégiés</li>
+                        <li><strong>Niveau français:</strong> B2 recommandé minimum</li>
+                        <li><strong>Reconnaissance diplômes:</strong> ENIC-NARIC France</li>
+                        <li><strong>Régions attractives:</strong> Île-de-France, PACA, Rhône-Alpes</li>
+                    </ul>
+                </div>
+                """),
+    },
+    "en": {
+        "Canada": ("🇨🇦", """
+                <div class="info-box">
+                    <h3>🇨🇦 Canada at a glance</h3>
+                    <ul>
+                        <li><strong>Express Entry:</strong> Fast processing in about 6 months</li>
+                        <li><strong>Language test:</strong> TEF/IELTS required</li>
+                        <li><strong>Credential assessment:</strong> ECA mandatory</li>
+                        <li><strong>Popular provinces:</strong> Quebec, Ontario, British Columbia</li>
+                    </ul>
+                </div>
+                """),
+        "France": ("🇫🇷", """
+                <div class="info-box">
+                    <h3>🇫🇷 France at a glance</h3>
+                    <ul>
+                        <li><strong>Talent Passport:</strong> Qualified profiles preferred</li>
+                        <li><strong>French level:</strong> B2 recommended minimum</li>
+                        <li><strong>Diploma recognition:</strong> ENIC-NARIC France</li>
+                        <li><strong>Attractive regions:</strong> Île-de-France, PACA, Rhône-Alpes</li>
+                    </ul>
+                </div>
+                """),
+    },
+}
+
+_VISA_HIGHLIGHTS = {
+    "fr": {
+        "Permis de Travail": "💼 Excellent choix pour une intégration professionnelle rapide !",
+        "Résidence Permanente": "🏠 Parfait pour un projet d'installation durable !",
+        "Visa Étudiant": "🎓 Une excellente porte d'entrée vers l'immigration !",
+        "Passeport Talent": "⭐ Le visa privilégié pour les profils qualifiés !",
+    },
+    "en": {
+        "Permis de Travail": "💼 A great choice for fast professional integration!",
+        "Résidence Permanente": "🏠 Perfect for a long-term settlement plan!",
+        "Visa Étudiant": "🎓 An excellent gateway to immigration!",
+        "Passeport Talent": "⭐ The preferred visa for qualified profiles!",
+    },
+}
+
+_ROLE_INFO = {
+    "MANAGER": ("Gestionnaire", "Bienvenue dans l'équipe de gestion", """
+                <div class="info-box">
+                    <h3>🎯 Vos responsabilités</h3>
+                    <ul>
+                        <li><strong>Gestion d'équipe:</strong> Supervision des employés</li>
+                        <li><strong>Validation dossiers:</strong> Approbation finale des demandes</li>
+                        <li><strong>Relation client:</strong> Suivi des clients premium</li>
+                        <li><strong>Reporting:</strong> Tableaux de bord et statistiques</li>
+                    </ul>
+                </div>
+                """),
+    "EMPLOYEE": ("Conseiller Immigration", "Bienvenue dans l'équipe conseil", """
+                <div class="info-box">
+                    <h3>📋 Vos missions</h3>
+                    <ul>
+                        <li><strong>Accompagnement client:</strong> Suivi personnalisé des dossiers</li>
+                        <li><strong>Expertise visa:</strong> Conseil sur les procédures</li>
+                        <li><strong>Documentation:</strong> Vérification des pièces justificatives</li>
+                        <li><strong>Relation prospects:</strong> Conversion des leads</li>
+                    </ul>
+                </div>
+                """),
+    "CLIENT": ("Client", "Bienvenue chez ALORIA AGENCY", """
+                <div class="info-box">
+                    <h3>🎁 Vos avantages</h3>
+                    <ul>
+                        <li><strong>Suivi temps réel:</strong> Dashboard personnalisé</li>
+                        <li><strong>Expert dédié:</strong> Un conseiller attitré</li>
+                        <li><strong>Support 24/7:</strong> Assistance continue</li>
+                        <li><strong>Garantie succès:</strong> Engagement de résultat</li>
+                    </ul>
+                </div>
+                """),
+}
+
+_STATUS_BANDS = {
+    90: ("🎉", "#dcfce7", "#16a34a", """
+                <div class="info-box" style="background: #dcfce7; border: 1px solid #16a34a;">
+                    <h4>🎊 Félicitations !</h4>
+                    <p>Votre dossier est presque finalisé ! Nous sommes dans la dernière ligne droite. Restez disponible pour les éventuelles demandes finales des autorités.</p>
+                </div>
+                """),
+    70: ("🚀", "#fef3c7", "#f59e0b", """
+                <div class="info-box" style="background: #fef3c7; border: 1px solid #f59e0b;">
+                    <h4>🎯 Excellente progression !</h4>
+                    <p>Votre dossier avance très bien ! Nous sommes maintenant dans les étapes finales de traitement. Patience, le résultat approche !</p>
+                </div>
+                """),
+    40: ("⚡", "#dbeafe", "#3b82f6", """
+                <div class="info-box" style="background: #dbeafe; border: 1px solid #3b82f6;">
+                    <h4>📈 Bonne avancée !</h4>
+                    <p>Votre dossier progresse normalement. Nous travaillons activement sur les étapes suivantes. Tenez-vous prêt pour la prochaine phase !</p>
+                </div>
+                """),
+    0: ("📋", "#f1f5f9", "#64748b", """
+                <div class="info-box" style="background: #f1f5f9; border: 1px solid #64748b;">
+                    <h4>🔄 Traitement en cours</h4>
+                    <p>Votre dossier est en cours de traitement par nos experts. Nous vous tiendrons informé de chaque étape importante !</p>
+                </div>
+                """),
+}
+
+
+@lru_cache(maxsize=64)
+def country_block(country: str, locale: str = DEFAULT_LOCALE) -> Tuple[str, str]:
+    """Drapeau et bloc HTML spécifiques au pays de destination"""
+    blocks = _COUNTRY_BLOCKS.get(locale, _COUNTRY_BLOCKS[FALLBACK_LOCALE])
+    return blocks.get(country, ("🌍", ""))
+
+
+@lru_cache(maxsize=128)
+def visa_block(visa_type: str, locale: str = DEFAULT_LOCALE) -> str:
+    """Bloc HTML mettant en avant le type de visa (vide si type inconnu)"""
+    if not visa_type:
+        return ""
+
+    highlights = _VISA_HIGHLIGHTS.get(locale, _VISA_HIGHLIGHTS[FALLBACK_LOCALE])
+    for key, value in highlights.items():
+        if key in visa_type:
+            return f"""
+                <div class="info-box">
+                    <h4>{value}</h4>
+                </div>
+                """
+    return ""
+
+
+@lru_cache(maxsize=16)
+def role_info(role: str) -> Tuple[str, str, str]:
+    """(titre, message d'accueil, bloc HTML) selon le rôle de l'utilisateur"""
+    return _ROLE_INFO.get(role, ("Utilisateur", "Bienvenue sur la plateforme", ""))
+
+
+def status_info(progress: float) -> Tuple[str, str, str, str]:
+    """(icône, couleur de fond, couleur de bordure, bloc HTML) selon la progression"""
+    for threshold in (90, 70, 40):
+        if progress >= threshold:
+            return _STATUS_BANDS[threshold]
+    return _STATUS_BANDS[0]
+
+
+# ============================================================================
+# GABARITS
+# ============================================================================
+
+register_template(
+    "prospect_welcome", "fr",
+    subject="🌟 Bienvenue chez ALORIA AGENCY - Votre projet d'immigration vers ${country}",
+    logo_icon="🌟",
+    header_subtitle="Votre partenaire de confiance pour l'immigration",
+    extra_styles="""
+                .highlight { background: #fef3c7; border-left: 4px solid #f59e0b; padding: 15px; margin: 20px 0; border-radius: 5px; }
+                .contact-info { background: #1E293B; color: white; padding: 20px; border-radius: 8px; margin: 20px 0; }""",
+    body="""
+                    <h2>Bonjour ${name},</h2>
+
+                    <p>Merci d'avoir choisi <strong>ALORIA AGENCY</strong> pour votre projet d'immigration vers <strong>${country}</strong>. Nous avons bien reçu votre demande concernant <strong>${visa_type}</strong>.</p>
+
+                    <div class="highlight">
+                        <h3>🎯 Prochaines étapes</h3>
+                        <p><strong>Notre équipe d'experts va examiner votre profil et vous contacter dans les 24 heures</strong> pour :</p>
+                        <ul>
+                            <li>Analyser votre éligibilité</li>
+                            <li>Vous proposer un plan d'action personnalisé</li>
+                            <li>Répondre à toutes vos questions</li>
+                        </ul>
+                    </div>
+
+                    <div class="info-box">
+                        <h3>📋 Récapitulatif de votre demande</h3>
+                        <p><strong>Destination:</strong> ${country} ${flag}</p>
+                        <p><strong>Type de visa:</strong> ${visa_type}</p>
+                        <p><strong>Urgence:</strong> ${urgency}</p>
+                        <p><strong>Date de contact:</strong> ${contact_date}</p>
+                    </div>
+
+                    ${visa_html}
+
+                    ${country_html}
+
+                    <div class="contact-info">
+                        <h3>📞 Contacts utiles</h3>
+                        <p><strong>Téléphone:</strong> +33 1 75 43 89 12</p>
+                        <p><strong>E-mail:</strong> contact@aloria-agency.com</p>
+                        <p><strong>Horaires:</strong> Lun-Ven 9h-18h, Sam 9h-13h</p>
+                        <p><strong>Urgences:</strong> +33 6 12 34 56 78 (uniquement pour clients actuels)</p>
+                    </div>
+
+                    <center>
+                        <a href="https://aloria-agency.com/suivi" class="btn">🔍 Suivre mon dossier</a>
+                    </center>""",
+    footer_greeting="Cordialement,",
+    footer_note="Cet e-mail a été envoyé automatiquement. Pour toute question, contactez-nous directement."
+)
+
+register_template(
+    "prospect_welcome", "en",
+    subject="🌟 Welcome to ALORIA AGENCY - Your immigration project to ${country}",
+    logo_icon="🌟",
+    header_subtitle="Your trusted immigration partner",
+    extra_styles="""
+                .highlight { background: #fef3c7; border-left: 4px solid #f59e0b; padding: 15px; margin: 20px 0; border-radius: 5px; }
+                .contact-info { background: #1E293B; color: white; padding: 20px; border-radius: 8px; margin: 20px 0; }""",
+    body="""
+                    <h2>Hello ${name},</h2>
+
+                    <p>Thank you for choosing <strong>ALORIA AGENCY</strong> for your immigration project to <strong>${country}</strong>. We have received your request regarding <strong>${visa_type}</strong>.</p>
+
+                    <div class="highlight">
+                        <h3>🎯 Next steps</h3>
+                        <p><strong>Our experts will review your profile and contact you within 24 hours</strong> to:</p>
+                        <ul>
+                            <li>Assess your eligibility</li>
+                            <li>Propose a personalised action plan</li>
+                            <li>Answer all your questions</li>
+                        </ul>
+                    </div>
+
+                    <div class="info-box">
+                        <h3>📋 Request summary</h3>
+                        <p><strong>Destination:</strong> ${country} ${flag}</p>
+                        <p><strong>Visa type:</strong> ${visa_type}</p>
+                        <p><strong>Urgency:</strong> ${urgency}</p>
+                        <p><strong>Contact date:</strong> ${contact_date}</p>
+                    </div>
+
+                    ${visa_html}
+
+                    ${country_html}
+
+                    <div class="contact-info">
+                        <h3>📞 Useful contacts</h3>
+                        <p><strong>Phone:</strong> +33 1 75 43 89 12</p>
+                        <p><strong>E-mail:</strong> contact@aloria-agency.com</p>
+                        <p><strong>Hours:</strong> Mon-Fri 9am-6pm, Sat 9am-1pm</p>
+                        <p><strong>Emergencies:</strong> +33 6 12 34 56 78 (current clients only)</p>
+                    </div>
+
+                    <center>
+                        <a href="https://aloria-agency.com/suivi" class="btn">🔍 Track my application</a>
+                    </center>""",
+    footer_greeting="Best regards,",
+    footer_note="This e-mail was sent automatically. For any question, please contact us directly."
+)
+
+register_template(
+    "user_welcome", "fr",
+    subject="🎉 Bienvenue dans l'équipe ALORIA AGENCY - Accès ${role_title}",
+    logo_icon="🎉",
+    header_subtitle="${role_welcome}",
+    extra_styles="""
+                .credentials { background: #fef3c7; border: 2px solid #f59e0b; padding: 20px; margin: 20px 0; border-radius: 8px; text-align: center; }
+                .security-note { background: #fecaca; border: 1px solid #f87171; padding: 15px; border-radius: 8px; margin: 15px 0; }""",
+    body="""
+                    <h2>Bienvenue ${name} !</h2>
+
+                    <p>Votre compte <strong>${role_title}</strong> a été créé avec succès. Vous faites désormais partie de l'équipe ALORIA AGENCY !</p>
+
+                    <div class="credentials">
+                        <h3>🔐 Vos informations de connexion</h3>
+                        <p><strong>URL de connexion:</strong> <a href="https://aloria-agency.com/login">aloria-agency.com/login</a></p>
+                        <p><strong>E-mail:</strong> ${login_email}</p>
+                        <p><strong>Mot de passe temporaire:</strong> <code>${default_password}</code></p>
+                    </div>
+
+                    <div class="security-note">
+                        <h4>🔒 Important - Sécurité</h4>
+                        <p><strong>Changez immédiatement votre mot de passe</strong> lors de votre première connexion pour sécuriser votre compte.</p>
+                    </div>
+
+                    ${role_html}
+
+                    <div class="info-box">
+                        <h3>📚 Ressources utiles</h3>
+                        <ul>
+                            <li><strong>Guide d'utilisation:</strong> Documentation complète de la plateforme</li>
+                            <li><strong>Formation:</strong> Sessions de formation disponibles sur demande</li>
+                            <li><strong>Support technique:</strong> support@aloria-agency.com</li>
+                            <li><strong>Assistance:</strong> +33 1 75 43 89 12 (poste technique)</li>
+                        </ul>
+                    </div>
+
+                    <center>
+                        <a href="https://aloria-agency.com/login" class="btn">🚀 Se connecter maintenant</a>
+                    </center>""",
+    footer_greeting="Excellente journée dans l'équipe !",
+    footer_note="Pour toute question sur votre accès, contactez l'administrateur système."
+)
+
+register_template(
+    "case_status_update", "fr",
+    subject="📋 Mise à jour de votre dossier ALORIA - ${current_step}",
+    logo_icon="📋",
+    header_subtitle="Mise à jour de votre dossier d'immigration",
+    extra_styles="""
+                .status-update { background: ${status_bg}; border-left: 6px solid ${status_border}; padding: 20px; margin: 20px 0; border-radius: 8px; }
+                .progress-bar { background: #e2e8f0; border-radius: 10px; height: 20px; margin: 15px 0; overflow: hidden; }
+                .progress-fill { background: linear-gradient(90deg, #f97316 0%, #ea580c 100%); height: 100%; width: ${progress}%; border-radius: 10px; }
+                .contact-box { background: #1E293B; color: white; padding: 20px; border-radius: 8px; margin: 20px 0; }""",
+    body="""
+                    <h2>Bonjour ${name},</h2>
+
+                    <p>Nous avons une excellente nouvelle concernant l'avancement de votre dossier d'immigration !</p>
+
+                    <div class="status-update">
+                        <h3>${status_icon} Nouvelle étape atteinte</h3>
+                        <p><strong>Étape actuelle:</strong> ${current_step}</p>
+                        <p><strong>Statut:</strong> ${status}</p>
+                        <p><strong>Date de mise à jour:</strong> ${update_date}</p>
+                    </div>
+
+                    <div class="info-box">
+                        <h3>📊 Progression de votre dossier</h3>
+                        <div class="progress-bar">
+                            <div class="progress-fill"></div>
+                        </div>
+                        <p style="text-align: center;"><strong>${progress}% complété</strong></p>
+
+                        <p><strong>Dossier:</strong> ${case_id}</p>
+                        <p><strong>Destination:</strong> ${country}</p>
+                        <p><strong>Type de visa:</strong> ${visa_type}</p>
+                        <p><strong>Gestionnaire:</strong> ${manager_name}</p>
+                    </div>
+
+                    ${notes_html}
+
+                    ${status_html}
+
+                    <div class="contact-box">
+                        <h3>💬 Besoin d'aide ou de précisions ?</h3>
+                        <p>Votre gestionnaire <strong>${manager_name}</strong> est là pour vous accompagner :</p>
+                        <p><strong>E-mail direct:</strong> ${manager_email}</p>
+                        <p><strong>Téléphone:</strong> +33 1 75 43 89 12</p>
+                        <p><strong>Rendez-vous:</strong> Disponible sur demande</p>
+                    </div>
+
+                    <center>
+                        <a href="https://aloria-agency.com/client-dashboard" class="btn">👀 Voir mon dossier complet</a>
+                    </center>""",
+    footer_greeting="Nous restons à votre disposition,",
+    footer_note="Cet e-mail est automatique. Connectez-vous à votre espace client pour plus de détails."
+)
+
+# Bloc optionnel des notes du gestionnaire (case_status_update)
+CASE_NOTES_PARTIAL = Template("""
+                    <div class="info-box">
+                        <h4>📝 Notes de votre gestionnaire</h4>
+                        <p style="font-style: italic;">"${notes}"</p>
+                    </div>
+                    """)
+
+register_template(
+    "prospect_assignment", "fr",
+    subject="🎯 Nouveau prospect assigné: ${prospect_name} (${prospect_country})",
+    logo_icon="🎯",
+    header_subtitle="Nouveau prospect à contacter",
+    extra_styles="""
+                .highlight { background: #fef3c7; border-left: 4px solid #f59e0b; padding: 15px; margin: 20px 0; border-radius: 5px; }
+                .score-badge { display: inline-block; background: linear-gradient(135deg, #f97316 0%, #ea580c 100%); color: white; padding: 8px 15px; border-radius: 20px; font-weight: bold; }
+                .action-box { background: #1E293B; color: white; padding: 20px; border-radius: 8px; margin: 20px 0; }""",
+    body="""
+                    <h2>Bonjour ${assignee_name},</h2>
+
+                    <p>Le consultant vous a assigné un nouveau prospect à contacter en priorité :</p>
+
+                    <div class="highlight">
+                        <h3>👤 Informations du prospect</h3>
+                        <p><strong>Nom complet:</strong> ${prospect_name}</p>
+                        <p><strong>E-mail:</strong> <a href="mailto:${prospect_email}">${prospect_email}</a></p>
+                        <p><strong>Téléphone:</strong> ${prospect_phone}</p>
+                        <p><strong>Destination:</strong> ${prospect_country}</p>
+                        <p><strong>Type de visa:</strong> ${prospect_visa}</p>
+                        <p><strong>Score de conversion:</strong> <span class="score-badge">${lead_score}%</span></p>
+                    </div>
+
+                    <div class="info-box">
+                        <h3>💬 Message du prospect</h3>
+                        <p style="font-style: italic; color: #475569;">"${prospect_message}"</p>
+                    </div>
+
+                    <div class="action-box">
+                        <h3>🎯 Actions à réaliser</h3>
+                        <ol>
+                            <li><strong>Contacter le prospect</strong> dans les 24h (appel ou e-mail)</li>
+                            <li><strong>Évaluer son profil</strong> et vérifier son éligibilité</li>
+                            <li><strong>Expliquer la procédure</strong> et informer des frais de consultation (50 000 CFA)</li>
+                            <li><strong>Une fois payé</strong>, affecter le prospect au consultant pour rendez-vous approfondi</li>
+                        </ol>
+                    </div>
+
+                    <div class="info-box">
+                        <h3>💰 Important - Paiement Consultation</h3>
+                        <p>Avant de programmer un rendez-vous avec le consultant, le prospect doit effectuer un <strong>versement de 50 000 CFA</strong> pour la consultation détaillée.</p>
+                        <p><strong>Ce paiement couvre:</strong></p>
+                        <ul>
+                            <li>Évaluation complète du profil par le consultant</li>
+                            <li>Analyse d'éligibilité approfondie</li>
+                            <li>Plan d'action personnalisé</li>
+                            <li>Réponses à toutes les questions</li>
+                        </ul>
+                    </div>
+
+                    <center>
+                        <a href="https://aloria-agency.com/employee-dashboard" class="btn">📋 Voir le prospect</a>
+                    </center>""",
+    footer_greeting="Bonne chance avec ce prospect !",
+    footer_note="Connectez-vous à votre espace pour plus de détails."
+)
+
+register_template(
+    "consultant_appointment", "fr",
+    subject="🎉 Rendez-vous programmé avec le consultant ALORIA AGENCY",
+    logo_icon="🎉",
+    header_subtitle="Votre consultation est confirmée",
+    extra_styles="""
+                .highlight { background: #dcfce7; border-left: 4px solid #16a34a; padding: 20px; margin: 20px 0; border-radius: 5px; text-align: center; }
+                .payment-confirmed { background: #fef3c7; border: 2px solid #f59e0b; padding: 20px; border-radius: 8px; margin: 20px 0; text-align: center; }
+                .action-list { background: #dbeafe; border-left: 4px solid #3b82f6; padding: 15px; border-radius: 5px; margin: 20px 0; }
+                .contact-box { background: #1E293B; color: white; padding: 20px; border-radius: 8px; margin: 20px 0; }""",
+    body="""
+                    <h2>Félicitations ${name} !</h2>
+
+                    <div class="highlight">
+                        <h2 style="margin: 0; color: #16a34a;">✅ Paiement confirmé</h2>
+                        <p style="margin: 10px 0 0 0; font-size: 18px;">Votre rendez-vous avec notre consultant expert est programmé</p>
+                    </div>
+
+                    <p>Nous confirmons la réception de votre paiement de <strong>50 000 CFA</strong> pour la consultation approfondie avec notre consultant spécialisé en immigration.</p>
+
+                    <div class="payment-confirmed">
+                        <h3>💰 Montant payé: 50 000 CFA</h3>
+                        <p>Transaction enregistrée le ${payment_date}</p>
+                    </div>
+
+                    <div class="info-box">
+                        <h3>📋 Détails de votre projet</h3>
+                        <p><strong>Destination:</strong> ${country}</p>
+                        <p><strong>Type de visa:</strong> ${visa_type}</p>
+                        <p><strong>Conseiller référent:</strong> ${assigned_by}</p>
+                        <p><strong>Statut:</strong> En attente de rendez-vous consultant</p>
+                    </div>
+
+                    <div class="action-list">
+                        <h3>🎯 Prochaines étapes</h3>
+                        <ol>
+                            <li><strong>Notre consultant vous contactera</strong> dans les 48h pour fixer un rendez-vous</li>
+                            <li><strong>Consultation approfondie</strong> de votre profil et évaluation complète</li>
+                            <li><strong>Plan d'action personnalisé</strong> avec stratégie d'immigration adaptée</li>
+                            <li><strong>Décision finale</strong> sur votre engagement complet avec ALORIA AGENCY</li>
+                        </ol>
+                    </div>
+
+                    <div class="info-box">
+                        <h3>📝 Préparez votre consultation</h3>
+                        <p>Pour maximiser l'efficacité de votre rendez-vous, préparez les documents suivants :</p>
+                        <ul>
+                            <li>CV détaillé à jour</li>
+                            <li>Diplômes et certificats</li>
+                            <li>Attestations de travail</li>
+                            <li>Résultats tests linguistiques (si disponibles)</li>
+                            <li>Passeport valide</li>
+                        </ul>
+                    </div>
+
+                    <div class="contact-box">
+                        <h3>📞 Contacts</h3>
+                        <p><strong>Bureau Douala:</strong> +237 6 XX XX XX XX</p>
+                        <p><strong>E-mail:</strong> contact@aloria-agency.com</p>
+                        <p><strong>Horaires:</strong> Lun-Ven 8h-17h, Sam 9h-13h</p>
+                        <p><strong>Adresse:</strong> Douala, Cameroun</p>
+                    </div>
+
+                    <center>
+                        <p style="font-size: 16px; color: #475569; margin: 20px 0;">
+                            <strong>Questions ?</strong> N'hésitez pas à nous contacter !
+                        </p>
+                    </center>""",
+    footer_greeting="Nous sommes impatients de vous accompagner,",
+    footer_note="📍 Basés à Douala, Cameroun - Au service des Camerounais vers le monde"
+)
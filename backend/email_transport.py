@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+ALORIA AGENCY - Transports d'e-mails non bloquants
+Abstraction utilisée par AloriaEmailService pour envoyer les e-mails sans bloquer
+la boucle asyncio (API HTTP, Socket.IO).
+
+Transports disponibles (variable EMAIL_TRANSPORT):
+- sendgrid (défaut si SENDGRID_API_KEY est valide): client SendGrid réutilisé,
+  appels HTTPS déportés dans un pool de threads, envoi groupé via personalizations
+- smtp: serveur SMTP (SMTP_HOST, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD, SMTP_USE_TLS)
+  avec connexion réutilisée, pour un relais local (MailHog, Mailpit, ...)
+- file: écrit chaque e-mail en .eml dans EMAIL_SINK_DIR (tests, développement)
+"""
+
+import os
+import asyncio
+import logging
+import smtplib
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from email.message import EmailMessage
+from email.utils import formataddr
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Limite SendGrid: 1000 personalizations par requête
+SENDGRID_MAX_PERSONALIZATIONS = 1000
+
+
+def apply_substitutions(template: Optional[str], substitutions: Dict[str, Any]) -> Optional[str]:
+    """Remplace chaque clé de substitution (ex: -name-) par sa valeur dans le gabarit"""
+    if template is None:
+        return None
+    for key, value in substitutions.items():
+        template = template.replace(key, str(value))
+    return template
+
+
+class EmailTransport(ABC):
+    """Interface commune des transports d'e-mails (send est à implémenter)"""
+
+    name = "base"
+
+    def __init__(self, sender_email: str, sender_name: str, max_workers: int = 4):
+        self.sender_email = sender_email
+        self.sender_name = sender_name
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"email-{self.name}")
+
+    async def _run(self, func, *args):
+        """Exécute un appel bloquant dans le pool de threads du transport"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    @abstractmethod
+    async def send(self, to_email: str, subject: str, html_content: str,
+                   plain_content: Optional[str] = None) -> bool:
+        """Envoie un e-mail; retourne True si accepté par le transport"""
+
+    async def send_batch(self, recipients: List[Dict[str, Any]], subject: str, html_template: str,
+                         plain_template: Optional[str] = None) -> int:
+        """
+        Envoie un même gabarit à plusieurs destinataires.
+
+        Args:
+            recipients: Liste de {"email", "name" (optionnel), "substitutions": {clé: valeur}}
+            subject: Sujet (peut contenir des clés de substitution)
+            html_template: Contenu HTML avec clés de substitution (ex: -name-)
+            plain_template: Version texte optionnelle
+
+        Returns:
+            int: Nombre de destinataires acceptés
+        """
+        sent = 0
+        for recipient in recipients:
+            substitutions = recipient.get("substitutions", {})
+            if await self.send(
+                recipient["email"],
+                apply_substitutions(subject, substitutions),
+                apply_substitutions(html_template, substitutions),
+                apply_substitutions(plain_template, substitutions)
+            ):
+                sent += 1
+        return sent
+
+    def close(self):
+        """Libère le pool de threads"""
+        self._executor.shutdown(wait=False)
+
+
+class SendGridTransport(EmailTransport):
+    """Transport SendGrid: un seul client HTTP réutilisé, appels déportés dans un thread"""
+
+    name = "sendgrid"
+
+    def __init__(self, api_key: str, sender_email: str, sender_name: str, max_workers: int = 4):
+        super().__init__(sender_email, sender_name, max_workers)
+        from sendgrid import SendGridAPIClient
+        self._client = SendGridAPIClient(api_key)
+
+    def _build_mail(self, subject: str, html_content: str, plain_content: Optional[str]):
+        from sendgrid.helpers.mail import Mail, From, Subject, HtmlContent, PlainTextContent
+
+        mail = Mail(from_email=From(self.sender_email, self.sender_name))
+        mail.subject = Subject(subject)
+        if plain_content:
+            mail.add_content(PlainTextContent(plain_content))
+        mail.add_content(HtmlContent(html_content))
+        return mail
+
+    def _post(self, mail) -> bool:
+        response = self._client.send(mail)
+        if response.status_code in (200, 201, 202):
+            return True
+        logger.warning(f"Statut de réponse SendGrid inhabituel: {response.status_code}")
+        return False
+
+    async def send(self, to_email: str, subject: str, html_content: str,
+                   plain_content: Optional[str] = None) -> bool:
+        from sendgrid.helpers.mail import Personalization, To
+
+        try:
+            mail = self._build_mail(subject, html_content, plain_content)
+            personalization = Personalization()
+            personalization.add_to(To(to_email))
+            mail.add_personalization(personalization)
+
+            sent = await self._run(self._post, mail)
+            if sent:
+                logger.info(f"E-mail envoyé avec succès à {to_email}")
+            return sent
+        except Exception as e:
+            logger.error(f"Erreur lors de l'envoi d'e-mail à {to_email}: {str(e)}")
+            return False
+
+    async def send_batch(self, recipients: List[Dict[str, Any]], subject: str, html_template: str,
+                         plain_template: Optional[str] = None) -> int:
+        """Un appel API par tranche de 1000 destinataires (une personalization chacun)"""
+        from sendgrid.helpers.mail import Personalization, Substitution, To
+
+        sent = 0
+        for start in range(0, len(recipients), SENDGRID_MAX_PERSONALIZATIONS):
+            chunk = recipients[start:start + SENDGRID_MAX_PERSONALIZATIONS]
+            try:
+                mail = self._build_mail(subject, html_template, plain_template)
+                for recipient in chunk:
+                    personalization = Personalization()
+                    personalization.add_to(To(recipient["email"], recipient.get("name")))
+                    for key, value in recipient.get("substitutions", {}).items():
+                        personalization.add_substitution(Substitution(key, str(value)))
+                    mail.add_personalization(personalization)
+
+                if await self._run(self._post, mail):
+                    sent += len(chunk)
+            except Exception as e:
+                logger.error(f"Erreur lors de l'envoi groupé ({len(chunk)} destinataires): {str(e)}")
+
+        logger.info(f"Envoi groupé SendGrid: {sent}/{len(recipients)} destinataires")
+        return sent
+
+
+class SmtpTransport(EmailTransport):
+    """Transport SMTP avec connexion réutilisée (reconnexion automatique)"""
+
+    name = "smtp"
+
+    def __init__(self, host: str, port: int, sender_email: str, sender_name: str,
+                 username: Optional[str] = None, password: Optional[str] = None,
+                 use_tls: bool = False, timeout: float = 30):
+        # Un seul thread: la connexion SMTP n'est pas partageable entre threads
+        super().__init__(sender_email, sender_name, max_workers=1)
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self._connection: Optional[smtplib.SMTP] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> smtplib.SMTP:
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            connection.starttls()
+        if self.username:
+            connection.login(self.username, self.password or "")
+        return connection
+
+    def _build_message(self, to_email: str, subject: str, html_content: str,
+                       plain_content: Optional[str]) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = formataddr((self.sender_name, self.sender_email))
+        message["To"] = to_email
+        message["Subject"] = subject
+        message.set_content(plain_content or "Cet e-mail nécessite un client compatible HTML.")
+        message.add_alternative(html_content, subtype="html")
+        return message
+
+    def _deliver(self, message: EmailMessage) -> bool:
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._connection is None:
+                        self._connection = self._connect()
+                    self._connection.send_message(message)
+                    return True
+                except (smtplib.SMTPServerDisconnected, ConnectionError, OSError):
+                    # Connexion fermée par le serveur: une reconnexion puis abandon
+                    self._connection = None
+                    if attempt:
+                        raise
+        return False
+
+    async def send(self, to_email: str, subject: str, html_content: str,
+                   plain_content: Optional[str] = None) -> bool:
+        try:
+            message = self._build_message(to_email, subject, html_content, plain_content)
+            sent = await self._run(self._deliver, message)
+            if sent:
+                logger.info(f"E-mail SMTP envoyé à {to_email}")
+            return sent
+        except Exception as e:
+            logger.error(f"Erreur SMTP lors de l'envoi à {to_email}: {str(e)}")
+            return False
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                try:
+                    self._connection.quit()
+                except smtplib.SMTPException:
+                    pass
+                self._connection = None
+        super().close()
+
+
+class FileSinkTransport(EmailTransport):
+    """Transport de test: chaque e-mail est écrit dans un fichier .eml"""
+
+    name = "file"
+
+    def __init__(self, directory: str, sender_email: str, sender_name: str):
+        super().__init__(sender_email, sender_name, max_workers=1)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _write(self, message: EmailMessage) -> Path:
+        filename = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.eml"
+        path = self.directory / filename
+        path.write_bytes(bytes(message))
+        return path
+
+    async def send(self, to_email: str, subject: str, html_content: str,
+                   plain_content: Optional[str] = None) -> bool:
+        message = EmailMessage()
+        message["From"] = formataddr((self.sender_name, self.sender_email))
+        message["To"] = to_email
+        message["Subject"] = subject
+        message.set_content(plain_content or "")
+        message.add_alternative(html_content, subtype="html")
+
+        path = await self._run(self._write, message)
+        logger.info(f"E-mail pour {to_email} écrit dans {path}")
+        return True
+
+
+def create_email_transport(sender_email: str, sender_name: str) -> Optional[EmailTransport]:
+    """
+    Instancie le transport configuré.
+
+    Returns:
+        EmailTransport, ou None si aucun transport n'est configuré (e-mails désactivés)
+    """
+    transport = os.getenv("EMAIL_TRANSPORT", "sendgrid").lower()
+
+    if transport == "file":
+        return FileSinkTransport(os.getenv("EMAIL_SINK_DIR", "/tmp/aloria-emails"), sender_email, sender_name)
+
+    if transport == "smtp":
+        return SmtpTransport(
+            host=os.getenv("SMTP_HOST", "localhost"),
+            port=int(os.getenv("SMTP_PORT", "1025")),
+            sender_email=sender_email,
+            sender_name=sender_name,
+            username=os.getenv("SMTP_USERNAME"),
+            password=os.getenv("SMTP_PASSWORD"),
+            use_tls=os.getenv("SMTP_USE_TLS", "false").lower() == "true"
+        )
+
+    api_key = os.getenv("SENDGRID_API_KEY")
+    # Initialiser SendGrid seulement si la clé est valide (pas un placeholder)
+    if api_key and not api_key.startswith("SG.placeholder"):
+        return SendGridTransport(
+            api_key, sender_email, sender_name,
+            max_workers=int(os.getenv("EMAIL_SEND_WORKERS", "4"))
+        )
+
+    return None
@@ -3,48 +3,44 @@ Générateur de factures au format PNG - Design moderne et compact
 ALORIA AGENCY
 """
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 from datetime import datetime
+import io
 import os
 
-def generate_invoice_png(invoice_data: dict, output_path: str) -> str:
+from invoice_resources import PNG_PALETTE, get_png_fonts
+
+def draw_invoice_image(invoice_data: dict) -> Image.Image:
     """
-    Génère une facture moderne au format PNG
+    Dessine une facture moderne (image 800x600)
     
     Args:
         invoice_data: Dict contenant les données de la facture
-        output_path: Chemin complet du fichier PNG à créer
     
     Returns:
-        str: Chemin du fichier généré
+        Image: Facture dessinée
     """
     # Dimensions compactes (800x600px)
     width = 800
     height = 600
     
     # Couleurs ALORIA (bleu nuit + orange)
-    bg_color = (15, 23, 42)  # Bleu nuit #0F172A
-    white = (255, 255, 255)
-    orange = (251, 146, 60)  # Orange #FB923C
-    gray = (148, 163, 184)  # Gris #94A3B8
-    light_bg = (30, 41, 59)  # #1E293B
+    bg_color = PNG_PALETTE["background"]
+    white = PNG_PALETTE["white"]
+    orange = PNG_PALETTE["orange"]
+    gray = PNG_PALETTE["gray"]
+    light_bg = PNG_PALETTE["light_background"]
     
     # Créer l'image
     img = Image.new('RGB', (width, height), bg_color)
     draw = ImageDraw.Draw(img)
     
-    # Charger les polices (utiliser polices système par défaut)
-    try:
-        font_title = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 32)
-        font_large = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 24)
-        font_medium = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 18)
-        font_small = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 14)
-    except:
-        # Fallback si les polices ne sont pas disponibles
-        font_title = ImageFont.load_default()
-        font_large = ImageFont.load_default()
-        font_medium = ImageFont.load_default()
-        font_small = ImageFont.load_default()
+    # Polices (chargées une fois par processus)
+    fonts = get_png_fonts()
+    font_title = fonts["title"]
+    font_large = fonts["large"]
+    font_medium = fonts["medium"]
+    font_small = fonts["small"]
     
     # === HEADER ===
     # Logo/Nom entreprise
@@ -113,10 +109,39 @@ def generate_invoice_png(invoice_data: dict, output_path: str) -> str:
     # === WATERMARK ===
     draw.text((width - 150, height - 30), "PAYE", fill=(orange[0], orange[1], orange[2], 128), font=font_large)
     
+    return img
+
+
+def render_invoice_png_bytes(invoice_data: dict) -> bytes:
+    """
+    Génère une facture moderne au format PNG, en mémoire (stockage par services/invoice_store)
+    
+    Args:
+        invoice_data: Dict contenant les données de la facture
+    
+    Returns:
+        bytes: Contenu du PNG
+    """
+    buffer = io.BytesIO()
+    draw_invoice_image(invoice_data).save(buffer, 'PNG', quality=95)
+    return buffer.getvalue()
+
+
+def generate_invoice_png(invoice_data: dict, output_path: str) -> str:
+    """
+    Génère une facture moderne au format PNG
+    
+    Args:
+        invoice_data: Dict contenant les données de la facture
+        output_path: Chemin complet du fichier PNG à créer
+    
+    Returns:
+        str: Chemin du fichier généré
+    """
     # Créer le dossier si nécessaire
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
     # Sauvegarder l'image
-    img.save(output_path, 'PNG', quality=95)
+    draw_invoice_image(invoice_data).save(output_path, 'PNG', quality=95)
     
     return output_path
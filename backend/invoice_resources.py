@@ -0,0 +1,146 @@
+"""
+Ressources partagées des générateurs de factures - ALORIA AGENCY
+Polices, styles ReportLab et palettes chargés une seule fois par processus
+(au premier rendu, ou au démarrage de chaque processus du pool de rendu via preload()).
+"""
+
+import os
+from functools import lru_cache
+
+from PIL import ImageFont
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import TableStyle
+
+FONT_DIR = os.environ.get("INVOICE_FONT_DIR", "/usr/share/fonts/truetype/dejavu")
+
+# Couleurs ALORIA (bleu nuit + orange)
+PDF_PALETTE = {
+    "navy": colors.HexColor('#1E3A8A'),
+    "orange": colors.HexColor('#F97316'),
+    "light_gray": colors.HexColor('#F3F4F6'),
+    "confirmed": '#10B981',
+    "pending": '#F59E0B',
+}
+
+PNG_PALETTE = {
+    "background": (15, 23, 42),  # Bleu nuit #0F172A
+    "white": (255, 255, 255),
+    "orange": (251, 146, 60),  # Orange #FB923C
+    "gray": (148, 163, 184),  # Gris #94A3B8
+    "light_background": (30, 41, 59),  # #1E293B
+}
+
+
+@lru_cache(maxsize=1)
+def get_pdf_styles() -> dict:
+    """Styles de paragraphes et de tableaux de la facture PDF professionnelle"""
+    styles = getSampleStyleSheet()
+    navy, orange = PDF_PALETTE["navy"], PDF_PALETTE["orange"]
+    return {
+        "title": ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            textColor=navy,
+            spaceAfter=30,
+            alignment=1  # Centré
+        ),
+        "heading": ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=16,
+            textColor=navy,
+            spaceAfter=12
+        ),
+        "normal": ParagraphStyle(
+            'CustomNormal',
+            parent=styles['Normal'],
+            fontSize=11,
+            textColor=colors.black,
+            spaceAfter=6
+        ),
+        "footer": ParagraphStyle(
+            'Footer',
+            parent=styles['Normal'],
+            fontSize=9,
+            textColor=colors.grey,
+            alignment=1  # Centré
+        ),
+        "separator": TableStyle([
+            ('LINEBELOW', (0, 0), (-1, -1), 2, orange)
+        ]),
+        "client_table": TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), PDF_PALETTE["light_gray"]),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 10),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
+        ]),
+        "service_table": TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), navy),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 10),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+            ('TOPPADDING', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+        ]),
+        "total_table": TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), orange),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
+            ('ALIGN', (0, 0), (0, 0), 'RIGHT'),
+            ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 14),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 10),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+            ('TOPPADDING', (0, 0), (-1, -1), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ]),
+    }
+
+
+@lru_cache(maxsize=1)
+def get_png_fonts() -> dict:
+    """Polices TrueType de la facture PNG (police par défaut de Pillow si DejaVu est absente)"""
+    try:
+        bold = os.path.join(FONT_DIR, "DejaVuSans-Bold.ttf")
+        regular = os.path.join(FONT_DIR, "DejaVuSans.ttf")
+        return {
+            "title": ImageFont.truetype(bold, 32),
+            "large": ImageFont.truetype(bold, 24),
+            "medium": ImageFont.truetype(regular, 18),
+            "small": ImageFont.truetype(regular, 14),
+        }
+    except OSError:
+        default = ImageFont.load_default()
+        return {"title": default, "large": default, "medium": default, "small": default}
+
+
+def preload():
+    """Charge toutes les ressources (initialiseur des processus du pool de rendu)"""
+    get_pdf_styles()
+    get_png_fonts()
+
+
+def reset():
+    """Oublie les ressources chargées (benchmark à froid, changement de polices)"""
+    get_pdf_styles.cache_clear()
+    get_png_fonts.cache_clear()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Script de migration pour construire la collection chat_conversations
+Recalcule un résumé par paire de participants depuis l'historique chat_messages:
+dernier message, date du dernier message et compteurs de non-lus par participant.
+Le script est idempotent: chaque résumé est entièrement remplacé.
+"""
+
+import asyncio
+import os
+from motor.motor_asyncio import AsyncIOMotorClient
+from datetime import datetime, timezone
+
+from services.chat_service import conversation_key
+
+async def migrate_chat_conversations():
+    """Reconstruire les résumés de conversations depuis chat_messages"""
+
+    # Connexion à MongoDB
+    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+    db_name = os.environ.get('DB_NAME', 'aloria')
+
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+
+    print("🔄 Début de la construction des conversations chat...")
+    print(f"📊 Base de données: {db_name}")
+
+    conversations = {}
+    message_count = 0
+    error_count = 0
+
+    # Parcours en flux de l'historique, du plus ancien au plus récent
+    async for message in db.chat_messages.find({}, {"_id": 0}).sort("timestamp", 1):
+        sender_id = message.get('sender_id')
+        receiver_id = message.get('receiver_id')
+
+        if not sender_id or not receiver_id:
+            print(f"  ⚠️  Message {message.get('id')} sans expéditeur/destinataire - ignoré")
+            error_count += 1
+            continue
+
+        message_count += 1
+        key, participant_ids = conversation_key(sender_id, receiver_id)
+
+        conversation = conversations.setdefault(key, {
+            "id": key,
+            "participant_ids": participant_ids,
+            "participants": {},
+            "unread": {pid: 0 for pid in participant_ids},
+            "created_at": message.get('timestamp')
+        })
+
+        conversation["participants"][sender_id] = {
+            "name": message.get('sender_name'),
+            "role": message.get('sender_role')
+        }
+        conversation["participants"][receiver_id] = {
+            "name": message.get('receiver_name'),
+            "role": message.get('receiver_role')
+        }
+        conversation["last_message"] = message.get('message')
+        conversation["last_message_time"] = message.get('timestamp')
+        conversation["last_message_id"] = message.get('id')
+        conversation["last_sender_id"] = sender_id
+
+        if not message.get('read_status'):
+            conversation["unread"][receiver_id] = conversation["unread"].get(receiver_id, 0) + 1
+
+    print(f"📋 Messages parcourus: {message_count}")
+    print(f"📋 Conversations trouvées: {len(conversations)}")
+
+    written_count = 0
+    now = datetime.now(timezone.utc).isoformat()
+
+    for key, conversation in conversations.items():
+        conversation["updated_at"] = now
+        await db.chat_conversations.replace_one({"id": key}, conversation, upsert=True)
+        written_count += 1
+
+    print("\n" + "="*60)
+    print(f"✅ Migration terminée!")
+    print(f"📊 Statistiques:")
+    print(f"   - Messages parcourus: {message_count}")
+    print(f"   - Conversations écrites: {written_count}")
+    print(f"   - Messages ignorés: {error_count}")
+    print("="*60)
+
+    client.close()
+
+if __name__ == "__main__":
+    asyncio.run(migrate_chat_conversations())
@@ -3,15 +3,15 @@ Générateur de factures PDF professionnel pour ALORIA AGENCY
 Utilise ReportLab pour créer des factures élégantes et conformes
 """
 
-from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
+from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer, Image
 from reportlab.pdfgen import canvas
 from datetime import datetime
 import io
 
+from invoice_resources import PDF_PALETTE, get_pdf_styles
+
 
 def generate_professional_invoice_pdf(invoice_data: dict) -> bytes:
     """
@@ -43,32 +43,11 @@ def generate_professional_invoice_pdf(invoice_data: dict) -> bytes:
     # Container pour les éléments
     elements = []
     
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#1E3A8A'),  # Bleu nuit
-        spaceAfter=30,
-        alignment=1  # Centré
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        textColor=colors.HexColor('#1E3A8A'),
-        spaceAfter=12
-    )
-    
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontSize=11,
-        textColor=colors.black,
-        spaceAfter=6
-    )
+    # Styles (chargés une fois par processus)
+    styles = get_pdf_styles()
+    title_style = styles["title"]
+    heading_style = styles["heading"]
+    normal_style = styles["normal"]
     
     # ====================
     # EN-TÊTE - ALORIA AGENCY
@@ -94,9 +73,7 @@ def generate_professional_invoice_pdf(invoice_data: dict) -> bytes:
     # Ligne de séparation
     line_data = [['']]
     line_table = Table(line_data, colWidths=[17*cm])
-    line_table.setStyle(TableStyle([
-        ('LINEBELOW', (0, 0), (-1, -1), 2, colors.HexColor('#F97316'))  # Orange
-    ]))
+    line_table.setStyle(styles["separator"])
     elements.append(line_table)
     elements.append(Spacer(1, 0.5*cm))
     
@@ -119,7 +96,7 @@ def generate_professional_invoice_pdf(invoice_data: dict) -> bytes:
     
     # Statut
     status = invoice_data.get('status', 'En attente')
-    status_color = '#10B981' if status.lower() == 'confirmed' else '#F59E0B'
+    status_color = PDF_PALETTE["confirmed"] if status.lower() == 'confirmed' else PDF_PALETTE["pending"]
     status_p = Paragraph(f"<b>Statut:</b> <font color='{status_color}'>{status.capitalize()}</font>", normal_style)
     elements.append(status_p)
     
@@ -142,21 +119,7 @@ def generate_professional_invoice_pdf(invoice_data: dict) -> bytes:
         client_data.append(['Téléphone:', invoice_data.get('client_phone')])
     
     client_table = Table(client_data, colWidths=[4*cm, 13*cm])
-    client_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#F3F4F6')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 10),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
-    ]))
+    client_table.setStyle(styles["client_table"])
     elements.append(client_table)
     
     elements.append(Spacer(1, 1*cm))
@@ -177,22 +140,7 @@ def generate_professional_invoice_pdf(invoice_data: dict) -> bytes:
     ]
     
     service_table = Table(service_data, colWidths=[12*cm, 5*cm])
-    service_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1E3A8A')),  # Bleu nuit
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 10),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-    ]))
+    service_table.setStyle(styles["service_table"])
     elements.append(service_table)
     
     elements.append(Spacer(1, 0.5*cm))
@@ -205,19 +153,7 @@ def generate_professional_invoice_pdf(invoice_data: dict) -> bytes:
     ]
     
     total_table = Table(total_data, colWidths=[12*cm, 5*cm])
-    total_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#F97316')),  # Orange
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (0, 0), 'RIGHT'),
-        ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 14),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 10),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-    ]))
+    total_table.setStyle(styles["total_table"])
     elements.append(total_table)
     
     elements.append(Spacer(1, 0.5*cm))
@@ -232,13 +168,7 @@ def generate_professional_invoice_pdf(invoice_data: dict) -> bytes:
     # ====================
     # PIED DE PAGE
     # ====================
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=9,
-        textColor=colors.grey,
-        alignment=1  # Centré
-    )
+    footer_style = styles["footer"]
     
     footer_text = """
     <b>Merci de votre confiance</b><br/>
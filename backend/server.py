@@ -1,5 +1,5 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Query, Response, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
@@ -33,7 +33,9 @@ try:
         send_user_welcome_email, 
         send_case_update_email,
         send_prospect_assignment_notification,
-        send_consultant_appointment_notification
+        send_consultant_appointment_notification,
+        send_custom_email,
+        email_service as aloria_email_service
     )
     EMAIL_SERVICE_AVAILABLE = True
 except ImportError as e:
@@ -46,11 +48,14 @@ from services.user_service import (
     verify_user_permissions,
     get_user_by_id,
     get_user_by_email,
+    get_users_by_ids,
+    resolve_user_names,
     log_user_activity
 )
 from services.client_service import (
     create_client_profile,
     verify_client_dashboard_accessible,
+    resolve_case_client_names,
     set_workflows
 )
 from services.assignment_service import (
@@ -65,8 +70,53 @@ from services.credentials_service import (
 from services.notification_service import (
     send_creation_notifications,
     send_welcome_email_notification,
-    create_notification
+    create_notifications_bulk,
+    mark_notification_read as mark_notification_as_read
 )
+from services.notification_engine import notification_engine, set_notification_emitter
+from services.unread_counters import (
+    COUNTER_CHAT,
+    COUNTER_MESSAGES,
+    COUNTER_NOTIFICATIONS,
+    decrement_unread,
+    get_unread_count,
+    get_unread_counts,
+    increment_unread,
+    set_unread_emitter
+)
+from services.index_service import ensure_indexes, get_index_usage
+from services.retention_service import run_retention_policies, sync_notification_ttl
+from services.search_service import (
+    SEARCH_CATEGORIES, TYPE_CASE, TYPE_CLIENT, TYPE_USER, TYPE_VISITOR,
+    ensure_search_index, queue_reindex, rebuild_search_index, reindex_with_dependents, search as search_index
+)
+from services.ledger_service import (
+    PaymentStatus, SOURCE_PAYMENT, SOURCE_WITHDRAWAL, get_company_balance, reconcile_ledger, record_ledger_entry
+)
+from services.stats_service import (
+    get_admin_dashboard_stats as get_cached_admin_dashboard_stats, get_manager_dashboard_stats, invalidate_dashboard_stats
+)
+from services.chat_service import record_chat_message, mark_conversation_read, list_conversations
+from services.presence_service import ROLE_ROOM_PREFIX, create_presence_backend, user_room, role_room
+from services.realtime_manager import create_client_manager
+from services.job_queue import (
+    enqueue_job,
+    register_job_handler,
+    job_workers,
+    list_dead_jobs,
+    retry_dead_job
+)
+from services.user_cache import user_cache, invalidate_cached_user, invalidate_role_members
+from services.employee_name_index import employee_name_index
+from services.invoice_store import create_blob_store
+from services.render_pool import render_pool, RenderPoolSaturated, RenderTimeout
+from services.invoice_export import build_export_query, stream_invoice_zip
+from services.invoice_service import (
+    set_invoice_store, get_or_render_invoice_pdf, read_invoice_artifact, get_invoice_artifact,
+    store_invoice_artifact, get_invoice_png, cleanup_orphan_artifacts, KIND_PNG, PNG_CONTENT_TYPE
+)
+from utils.pagination import NEXT_CURSOR_HEADER, encode_cursor, keyset_filter, merge_filters
+from utils.http_cache import RangeNotSatisfiable, etag_matches, parse_byte_range
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -76,6 +126,9 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Fichiers de factures rendus (INVOICE_STORE=local|gridfs)
+set_invoice_store(create_blob_store(db))
+
 # Security
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
@@ -84,7 +137,9 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
 # WebSocket/SocketIO Setup
+# SOCKETIO_MANAGER=redis|mongo: diffusion des émissions entre workers uvicorn
 sio = socketio.AsyncServer(
+    client_manager=create_client_manager(),
     cors_allowed_origins="*",
     logger=True,
     engineio_logger=True,
@@ -92,6 +147,8 @@ sio = socketio.AsyncServer(
     ping_timeout=60,
     ping_interval=25
 )
+set_notification_emitter(sio.emit)
+set_unread_emitter(sio.emit)
 
 # Create the main app
 app = FastAPI()
@@ -111,7 +168,25 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # WebSocket connection management
-connected_users = {}  # {user_id: sid}
+# Registre de présence: user_id -> {sids} et sid -> user_id (multi-appareils)
+presence = create_presence_backend()
+
+async def emit_to_user(event: str, data: dict, user_id: str):
+    """Émet un événement vers toutes les connexions d'un utilisateur (room user:{id})"""
+    await sio.emit(event, data, room=user_room(user_id))
+
+async def refresh_role_room(user_id: str):
+    """Aligne la room de rôle des connexions locales d'un utilisateur après changement de rôle/statut"""
+    user = await db.users.find_one({"id": user_id}, {"_id": 0, "role": 1, "is_active": 1})
+    for sid in await presence.get_sids(user_id):
+        rooms = sio.rooms(sid)
+        if not rooms:
+            continue  # Connexion gérée par un autre worker
+        for room in rooms:
+            if room.startswith("role:"):
+                await sio.leave_room(sid, room)
+        if user and user.get("is_active", True):
+            await sio.enter_room(sid, role_room(user["role"]))
 
 # WebSocket Events
 @sio.event
@@ -121,11 +196,8 @@ async def connect(sid, environ):
 @sio.event
 async def disconnect(sid):
     logger.info(f"Client {sid} disconnected")
-    # Remove from connected users
-    for user_id, user_sid in list(connected_users.items()):
-        if user_sid == sid:
-            del connected_users[user_id]
-            break
+    # Remove from connected users (la room est quittée automatiquement)
+    await presence.remove(sid)
 
 @sio.event
 async def authenticate(sid, data):
@@ -140,7 +212,21 @@ async def authenticate(sid, data):
         user_id = payload.get("sub")
         
         if user_id:
-            connected_users[user_id] = sid
+            # Ré-authentification sous une autre identité: quitter la room de la précédente
+            previous_user_id = await presence.get_user(sid)
+            if previous_user_id and previous_user_id != user_id:
+                await sio.leave_room(sid, user_room(previous_user_id))
+            await presence.add(user_id, sid)
+            await sio.enter_room(sid, user_room(user_id))
+            # Room du rôle: diffusions à tous les managers/superadmins en une émission.
+            # Les rooms de rôle d'une authentification précédente sont quittées d'abord
+            # (sinon un client ré-authentifié recevrait les diffusions aux managers).
+            for room in sio.rooms(sid):
+                if room.startswith(ROLE_ROOM_PREFIX):
+                    await sio.leave_room(sid, room)
+            user = await db.users.find_one({"id": user_id, "is_active": True}, {"_id": 0, "role": 1})
+            if user:
+                await sio.enter_room(sid, role_room(user["role"]))
             await sio.emit('authenticated', {'user_id': user_id}, room=sid)
             logger.info(f"User {user_id} authenticated with session {sid}")
         else:
@@ -151,11 +237,7 @@ async def authenticate(sid, data):
 @sio.event 
 async def send_message(sid, data):
     try:
-        sender_id = None
-        for user_id, user_sid in connected_users.items():
-            if user_sid == sid:
-                sender_id = user_id
-                break
+        sender_id = await presence.get_user(sid)
                 
         if not sender_id:
             await sio.emit('error', {'message': 'Not authenticated'}, room=sid)
@@ -191,18 +273,18 @@ async def send_message(sid, data):
         }
         
         await db.chat_messages.insert_one(message_dict)
+        await record_chat_message(db, message_dict)
+        await increment_unread(db, receiver_id, COUNTER_CHAT)
         
-        # Send to receiver if online
-        receiver_sid = connected_users.get(receiver_id)
-        if receiver_sid:
-            await sio.emit('new_message', {
-                'id': message_id,
-                'sender_id': sender_id,
-                'sender_name': sender["full_name"],
-                'sender_role': sender["role"],
-                'message': message_text,
-                'timestamp': message_dict["timestamp"]
-            }, room=receiver_sid)
+        # Send to receiver (toutes ses connexions)
+        await emit_to_user('new_message', {
+            'id': message_id,
+            'sender_id': sender_id,
+            'sender_name': sender["full_name"],
+            'sender_role': sender["role"],
+            'message': message_text,
+            'timestamp': message_dict["timestamp"]
+        }, receiver_id)
             
         # Confirm to sender
         await sio.emit('message_sent', {
@@ -291,9 +373,15 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid authentication")
         
-        user = await db.users.find_one({"id": user_id}, {"_id": 0})
+        user = user_cache.get(user_id)
         if user is None:
-            raise HTTPException(status_code=401, detail="User not found")
+            user = await db.users.find_one({"id": user_id}, {"_id": 0})
+            if user is None:
+                raise HTTPException(status_code=401, detail="User not found")
+            user_cache.set(user_id, user)
+        
+        if not user.get("is_active", True):
+            raise HTTPException(status_code=401, detail="Compte désactivé")
         return user
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
@@ -534,7 +622,7 @@ class PaymentDeclarationResponse(BaseModel):
     currency: str
     description: Optional[str]
     payment_method: str
-    status: str  # "pending", "confirmed", "rejected"
+    status: str  # PaymentStatus: "pending", "CONFIRMED" ("confirmed" historique), "REJECTED"
     declared_at: str
     confirmed_at: Optional[str]
     confirmed_by: Optional[str]
@@ -1056,6 +1144,8 @@ async def register(user_data: UserCreate):
     }
     
     await db.users.insert_one(user_dict)
+    await queue_reindex(db, TYPE_USER, user_dict["id"])
+    invalidate_role_members(user_data.role)
     
     # Create token
     access_token = create_access_token({"sub": user_id, "role": user_data.role})
@@ -1138,6 +1228,8 @@ async def create_first_superadmin(
     }
     
     await db.users.insert_one(superadmin_dict)
+    await queue_reindex(db, TYPE_USER, superadmin_dict["id"])
+    invalidate_role_members("SUPERADMIN")
     
     # Log la création
     await log_activity(
@@ -1173,6 +1265,7 @@ async def change_password(password_data: PasswordChange, current_user: dict = De
         {"id": current_user["id"]},
         {"$set": {"password": new_hashed_password}}
     )
+    invalidate_cached_user(current_user["id"])
     
     return {"message": "Mot de passe mis à jour avec succès"}
 
@@ -1305,7 +1398,19 @@ async def create_client(client_data: ClientCreate, current_user: dict = Depends(
     )
 
 @api_router.get("/clients", response_model=List[ClientResponse])
-async def get_clients(current_user: dict = Depends(get_current_user)):
+async def get_clients(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    after: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Liste des clients, triée par date de création.
+    
+    Sans `limit`, tous les clients visibles sont renvoyés. Avec `limit`, la page est
+    bornée et le curseur de la page suivante est renvoyé dans l'en-tête X-Next-Cursor
+    (à repasser dans `after`).
+    """
     # Manager sees all clients, Employee sees only their clients
     query = {}
     if current_user["role"] == "EMPLOYEE":
@@ -1313,26 +1418,40 @@ async def get_clients(current_user: dict = Depends(get_current_user)):
     elif current_user["role"] == "CLIENT":
         query["user_id"] = current_user["id"]
     
-    clients = await db.clients.find(query, {"_id": 0}).to_list(1000)
+    cursor = db.clients.find(
+        merge_filters(query, keyset_filter("created_at", after)),
+        {"_id": 0}
+    ).sort([("created_at", 1), ("id", 1)])
+    if limit:
+        cursor = cursor.limit(limit)
+    clients = await cursor.to_list(None)
+    
+    if limit and len(clients) == limit:
+        last = clients[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.get("created_at"), last["id"])
+    
+    # Une seule requête $in pour les utilisateurs clients ET les employés assignés
+    user_ids = set()
+    for client in clients:
+        if not client.get("full_name") or not client.get("email") or not client.get("phone"):
+            user_ids.add(client.get("user_id"))
+        user_ids.add(client.get("assigned_employee_id"))
+    users = await get_users_by_ids(db, user_ids, {"full_name": 1, "email": 1, "phone": 1})
     
     # Enrich with employee names and add defaults for missing fields
     for client in clients:
         # CORRECTION: Récupérer les données manquantes depuis users si nécessaire
-        if not client.get("full_name") or not client.get("email") or not client.get("phone"):
-            user = await db.users.find_one({"id": client.get("user_id")})
-            if user:
-                if not client.get("full_name"):
-                    client["full_name"] = user.get("full_name", "")
-                if not client.get("email"):
-                    client["email"] = user.get("email", "")
-                if not client.get("phone"):
-                    client["phone"] = user.get("phone", "")
+        user = users.get(client.get("user_id"))
+        if user:
+            if not client.get("full_name"):
+                client["full_name"] = user.get("full_name", "")
+            if not client.get("email"):
+                client["email"] = user.get("email", "")
+            if not client.get("phone"):
+                client["phone"] = user.get("phone", "")
         
-        if client.get("assigned_employee_id"):
-            employee = await db.users.find_one({"id": client["assigned_employee_id"]})
-            client["assigned_employee_name"] = employee["full_name"] if employee else None
-        else:
-            client["assigned_employee_name"] = None
+        employee = users.get(client.get("assigned_employee_id"))
+        client["assigned_employee_name"] = employee["full_name"] if employee else None
         
         # Add default values for missing fields (backwards compatibility)
         if "current_status" not in client:
@@ -1383,43 +1502,57 @@ async def get_client(client_id: str, current_user: dict = Depends(get_current_us
 
 # Case Management
 @api_router.get("/cases", response_model=List[CaseResponse])
-async def get_cases(current_user: dict = Depends(get_current_user)):
-    # Get clients based on role
+async def get_cases(
+    response: Response,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    country: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    after: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Liste des dossiers, triée par date de création.
+    
+    Les filtres `status` et `country` sont appliqués côté MongoDB. Avec `limit`, la page
+    est bornée et le curseur de la page suivante est renvoyé dans l'en-tête X-Next-Cursor
+    (à repasser dans `after`).
+    """
+    # CORRECTION CRITIQUE: Les cases utilisent client_id = user_id (pas client.id)
+    query = {}
     if current_user["role"] == "MANAGER":
-        clients = await db.clients.find({}, {"_id": 0}).to_list(1000)
+        pass  # Manager: tous les dossiers
     elif current_user["role"] == "EMPLOYEE":
-        clients = await db.clients.find({"assigned_employee_id": current_user["id"]}, {"_id": 0}).to_list(1000)
+        # EMPLOYEE: chercher avec les user_id de ses clients
+        clients = await db.clients.find(
+            {"assigned_employee_id": current_user["id"]}, {"_id": 0, "user_id": 1}
+        ).to_list(None)
+        query["client_id"] = {"$in": [c["user_id"] for c in clients if c.get("user_id")]}
     else:  # CLIENT
-        clients = await db.clients.find({"user_id": current_user["id"]}, {"_id": 0}).to_list(1000)
-    
-    # CORRECTION CRITIQUE: Les cases utilisent client_id = user_id (pas client.id)
-    # Pour CLIENT: chercher directement avec current_user["id"]
-    # Pour MANAGER/EMPLOYEE: chercher avec user_id des clients
-    if current_user["role"] == "CLIENT":
         # CLIENT: chercher les cases avec son user_id directement
-        cases = await db.cases.find({"client_id": current_user["id"]}, {"_id": 0}).to_list(1000)
-    else:
-        # MANAGER/EMPLOYEE: chercher avec les user_id des clients
-        user_ids = [c["user_id"] for c in clients]
-        cases = await db.cases.find({"client_id": {"$in": user_ids}}, {"_id": 0}).to_list(1000)
+        query["client_id"] = current_user["id"]
     
-    # Enrich with client names
-    client_map = {}
-    for client in clients:
-        user = await db.users.find_one({"id": client["user_id"]})
-        if user:
-            # Map both client_id and user_id to handle different case structures
-            client_map[client["id"]] = user["full_name"]
-            client_map[client["user_id"]] = user["full_name"]
+    if status_filter:
+        query["status"] = status_filter
+    if country:
+        query["country"] = country
+    
+    cursor = db.cases.find(
+        merge_filters(query, keyset_filter("created_at", after)),
+        {"_id": 0}
+    ).sort([("created_at", 1), ("id", 1)])
+    if limit:
+        cursor = cursor.limit(limit)
+    cases = await cursor.to_list(None)
+    
+    if limit and len(cases) == limit:
+        last = cases[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.get("created_at"), last["id"])
+    
+    # Enrich with client names (requêtes groupées, pas de N+1)
+    client_names = await resolve_case_client_names(db, [case.get("client_id") for case in cases])
     
     for case in cases:
-        # Try multiple strategies to get client name
-        client_name = (
-            client_map.get(case.get("client_id")) or 
-            client_map.get(case.get("user_id")) or
-            "Unknown"
-        )
-        case["client_name"] = client_name
+        case["client_name"] = client_names.get(case.get("client_id"), "Unknown")
         # Ensure all required fields have default values
         if "notes" not in case:
             case["notes"] = ""
@@ -1443,8 +1576,8 @@ async def get_case(case_id: str, current_user: dict = Depends(get_current_user))
         raise HTTPException(status_code=403, detail="Access denied")
     
     # Get client name
-    user = await db.users.find_one({"id": client["user_id"]})
-    case["client_name"] = user["full_name"] if user else "Unknown"
+    names = await resolve_user_names(db, [client["user_id"]], default="Unknown")
+    case["client_name"] = names.get(client["user_id"], "Unknown")
     
     return CaseResponse(**case)
 
@@ -1464,14 +1597,16 @@ async def update_case(case_id: str, update_data: CaseUpdate, current_user: dict
         raise HTTPException(status_code=404, detail="Client non trouvé")
     
     # Get client user info for notifications
-    user = await db.users.find_one({"id": client["user_id"]})
-    client_name = user["full_name"] if user else "Unknown"
+    names = await resolve_user_names(db, [client["user_id"]])
+    client_name = names.get(client["user_id"], "Unknown")
     
     # Manager can update everything
     update_dict = {k: v for k, v in update_data.model_dump().items() if v is not None}
     update_dict["updated_at"] = datetime.now(timezone.utc).isoformat()
     
     await db.cases.update_one({"id": case_id}, {"$set": update_dict})
+    invalidate_dashboard_stats()
+    await queue_reindex(db, TYPE_CASE, case_id)
     
     # Update client progress if step is updated
     if update_data.current_step_index is not None:
@@ -1486,6 +1621,7 @@ async def update_case(case_id: str, update_data: CaseUpdate, current_user: dict
                 "updated_at": datetime.now(timezone.utc).isoformat()
             }}
         )
+        await queue_reindex(db, TYPE_CLIENT, case["client_id"])
         
         # Create notifications for case update
         
@@ -1509,29 +1645,25 @@ async def update_case(case_id: str, update_data: CaseUpdate, current_user: dict
             )
         
         # Send WebSocket updates
-        client_sid = connected_users.get(client["user_id"])
-        if client_sid:
-            await sio.emit('case_updated', {
+        await emit_to_user('case_updated', {
+            'case_id': case_id,
+            'client_name': client_name,
+            'current_step': update_data.current_step_index,
+            'progress': progress,
+            'status': update_data.status or case["status"],
+            'updated_by': current_user["full_name"]
+        }, client["user_id"])
+        
+        # Notify assigned employee via WebSocket
+        if client.get("assigned_employee_id"):
+            await emit_to_user('case_updated', {
                 'case_id': case_id,
                 'client_name': client_name,
                 'current_step': update_data.current_step_index,
                 'progress': progress,
                 'status': update_data.status or case["status"],
                 'updated_by': current_user["full_name"]
-            }, room=client_sid)
-        
-        # Notify assigned employee via WebSocket
-        if client.get("assigned_employee_id"):
-            employee_sid = connected_users.get(client["assigned_employee_id"])
-            if employee_sid:
-                await sio.emit('case_updated', {
-                    'case_id': case_id,
-                    'client_name': client_name,
-                    'current_step': update_data.current_step_index,
-                    'progress': progress,
-                    'status': update_data.status or case["status"],
-                    'updated_by': current_user["full_name"]
-                }, room=employee_sid)
+            }, client["assigned_employee_id"])
     
     # Get updated case
     updated_case = await db.cases.find_one({"id": case_id}, {"_id": 0})
@@ -1592,6 +1724,7 @@ async def send_message(message_data: MessageCreate, current_user: dict = Depends
     }
     
     await db.messages.insert_one(message_dict)
+    await increment_unread(db, message_data.receiver_id, COUNTER_MESSAGES)
     
     # Get sender and receiver names
     sender = await db.users.find_one({"id": current_user["id"]})
@@ -1630,70 +1763,84 @@ async def get_messages(client_id: str, current_user: dict = Depends(get_current_
         msg["receiver_name"] = user_cache[msg["receiver_id"]]
     
     # Mark messages as read if current user is receiver
-    await db.messages.update_many(
-        {"client_id": client_id, "receiver_id": current_user["id"]},
+    result = await db.messages.update_many(
+        {"client_id": client_id, "receiver_id": current_user["id"], "read_status": False},
         {"$set": {"read_status": True}}
     )
+    await decrement_unread(db, current_user["id"], COUNTER_MESSAGES, result.modified_count)
     
     return [MessageResponse(**msg) for msg in messages]
 
 @api_router.get("/messages/unread", response_model=int)
-async def get_unread_count(current_user: dict = Depends(get_current_user)):
-    count = await db.messages.count_documents({
-        "receiver_id": current_user["id"],
-        "read_status": False
-    })
-    return count
+async def get_unread_messages_count(current_user: dict = Depends(get_current_user)):
+    # Compteur maintenu à l'écriture (services/unread_counters.py)
+    return await get_unread_count(db, current_user["id"], COUNTER_MESSAGES)
+
+@api_router.get("/unread-counts")
+async def get_all_unread_counts(current_user: dict = Depends(get_current_user)):
+    """Tous les compteurs de non-lus en une lecture (mêmes valeurs que l'événement 'unread_counts')"""
+    return await get_unread_counts(db, current_user["id"])
 
 # Chat API
 @api_router.get("/chat/conversations", response_model=List[ChatConversation])
 async def get_chat_conversations(current_user: dict = Depends(get_current_user)):
-    # Get all conversations for current user
-    messages = await db.chat_messages.find({
-        "$or": [
-            {"sender_id": current_user["id"]}, 
-            {"receiver_id": current_user["id"]}
-        ]
-    }, {"_id": 0}).sort("timestamp", -1).to_list(1000)
-    
-    # Group by participant
-    conversations = {}
-    for msg in messages:
-        other_user_id = msg["receiver_id"] if msg["sender_id"] == current_user["id"] else msg["sender_id"]
-        other_user_name = msg["receiver_name"] if msg["sender_id"] == current_user["id"] else msg["sender_name"]  
-        other_user_role = msg["receiver_role"] if msg["sender_id"] == current_user["id"] else msg["sender_role"]
-        
-        if other_user_id not in conversations:
-            conversations[other_user_id] = {
-                "participant_id": other_user_id,
-                "participant_name": other_user_name,
-                "participant_role": other_user_role,
-                "last_message": msg["message"],
-                "last_message_time": msg["timestamp"],
-                "unread_count": 0
-            }
-            
-        # Count unread messages from this participant
-        if msg["receiver_id"] == current_user["id"] and not msg["read_status"]:
-            conversations[other_user_id]["unread_count"] += 1
-    
-    return [ChatConversation(**conv) for conv in conversations.values()]
+    # Lecture indexée des résumés 'chat_conversations' (maintenus à chaque envoi/lecture)
+    conversations = await list_conversations(db, current_user["id"])
+    return [ChatConversation(**conv) for conv in conversations]
 
 @api_router.get("/chat/messages/{participant_id}", response_model=List[ChatMessage])
-async def get_chat_messages(participant_id: str, current_user: dict = Depends(get_current_user)):
-    # Get messages between current user and participant
-    messages = await db.chat_messages.find({
+async def get_chat_messages(
+    participant_id: str,
+    response: Response,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Historique d'une conversation, par pages (chronologique dans chaque page).
+    
+    Sans curseur, renvoie les `limit` messages les plus récents. `before` charge les
+    messages plus anciens (défilement infini), `after` les messages plus récents.
+    Le curseur de la page suivante dans la même direction est renvoyé dans
+    l'en-tête X-Next-Cursor. Seuls les messages livrés sont marqués comme lus.
+    """
+    if before and after:
+        raise HTTPException(status_code=400, detail="Utilisez 'before' ou 'after', pas les deux")
+    
+    # Le tri décroissant charge les plus récents en premier; 'after' remonte dans le temps
+    direction = 1 if after else -1
+    conversation_filter = {
         "$or": [
             {"sender_id": current_user["id"], "receiver_id": participant_id},
             {"sender_id": participant_id, "receiver_id": current_user["id"]}
         ]
-    }, {"_id": 0}).sort("timestamp", 1).to_list(1000)
+    }
     
-    # Mark messages as read
-    await db.chat_messages.update_many(
-        {"sender_id": participant_id, "receiver_id": current_user["id"]},
-        {"$set": {"read_status": True}}
-    )
+    messages = await db.chat_messages.find(
+        merge_filters(conversation_filter, keyset_filter("timestamp", after or before, direction)),
+        {"_id": 0}
+    ).sort([("timestamp", direction), ("id", direction)]).limit(limit).to_list(limit)
+    
+    if len(messages) == limit:
+        last = messages[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.get("timestamp"), last["id"])
+    
+    if direction == -1:
+        messages.reverse()
+    
+    # Mark delivered messages as read (page uniquement)
+    unread_ids = [
+        msg["id"] for msg in messages
+        if msg["receiver_id"] == current_user["id"] and not msg.get("read_status")
+    ]
+    if unread_ids:
+        result = await db.chat_messages.update_many(
+            {"id": {"$in": unread_ids}, "receiver_id": current_user["id"], "read_status": False},
+            {"$set": {"read_status": True}}
+        )
+        await mark_conversation_read(db, current_user["id"], participant_id, result.modified_count)
+        await decrement_unread(db, current_user["id"], COUNTER_CHAT, result.modified_count)
     
     return [ChatMessage(**msg) for msg in messages]
 
@@ -1750,6 +1897,8 @@ async def send_chat_message(message_data: ChatMessageCreate, current_user: dict
     }
     
     await db.chat_messages.insert_one(message_dict)
+    await record_chat_message(db, message_dict)
+    await increment_unread(db, message_data.receiver_id, COUNTER_CHAT)
     
     # Create notification for message
     await create_notification(
@@ -1760,26 +1909,21 @@ async def send_chat_message(message_data: ChatMessageCreate, current_user: dict
         related_id=message_id
     )
     
-    # Send via WebSocket if receiver is online
-    receiver_sid = connected_users.get(message_data.receiver_id)
-    if receiver_sid:
-        await sio.emit('new_message', {
-            'id': message_id,
-            'sender_id': current_user["id"],
-            'sender_name': current_user["full_name"],
-            'sender_role': current_user["role"],
-            'message': message_data.message,
-            'timestamp': message_dict["timestamp"]
-        }, room=receiver_sid)
+    # Send via WebSocket to every receiver connection
+    await emit_to_user('new_message', {
+        'id': message_id,
+        'sender_id': current_user["id"],
+        'sender_name': current_user["full_name"],
+        'sender_role': current_user["role"],
+        'message': message_data.message,
+        'timestamp': message_dict["timestamp"]
+    }, message_data.receiver_id)
     
     return ChatMessage(**message_dict)
 
 @api_router.get("/chat/unread-count")
 async def get_unread_chat_count(current_user: dict = Depends(get_current_user)):
-    count = await db.chat_messages.count_documents({
-        "receiver_id": current_user["id"],
-        "read_status": False
-    })
+    count = await get_unread_count(db, current_user["id"], COUNTER_CHAT)
     return {"unread_count": count}
 
 # Visitors
@@ -1804,6 +1948,7 @@ async def create_visitor(visitor_data: VisitorCreate, current_user: dict = Depen
     }
     
     await db.visitors.insert_one(visitor_dict)
+    await queue_reindex(db, TYPE_VISITOR, visitor_dict["id"])
     return VisitorResponse(**visitor_dict)
 
 @api_router.get("/visitors", response_model=List[VisitorResponse])
@@ -1824,6 +1969,7 @@ async def checkout_visitor(visitor_id: str, current_user: dict = Depends(get_cur
         {"id": visitor_id},
         {"$set": {"departure_time": datetime.now(timezone.utc).isoformat()}}
     )
+    await queue_reindex(db, TYPE_VISITOR, visitor_id)
     return {"message": "Visitor checked out"}
 
 # Dashboard Stats
@@ -1832,45 +1978,9 @@ async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "MANAGER":
         raise HTTPException(status_code=403, detail="Only managers can view dashboard stats")
     
-    # Get all cases
-    cases = await db.cases.find({}, {"_id": 0}).to_list(10000)
-    
-    # Calculate stats
-    total_cases = len(cases)
-    cases_by_status = {}
-    cases_by_country = {}
-    
-    active_cases = 0
-    completed_cases = 0
-    pending_cases = 0
-    
-    for case in cases:
-        status = case["status"]
-        country = case["country"]
-        
-        cases_by_status[status] = cases_by_status.get(status, 0) + 1
-        cases_by_country[country] = cases_by_country.get(country, 0) + 1
-        
-        if status in ["In Progress", "Under Review"]:
-            active_cases += 1
-        elif status in ["Approved", "Completed"]:
-            completed_cases += 1
-        elif status in ["New", "Documents Pending"]:
-            pending_cases += 1
-    
-    total_clients = await db.clients.count_documents({})
-    total_employees = await db.users.count_documents({"role": "EMPLOYEE"})
-    
-    return DashboardStats(
-        total_cases=total_cases,
-        active_cases=active_cases,
-        completed_cases=completed_cases,
-        pending_cases=pending_cases,
-        total_clients=total_clients,
-        total_employees=total_employees,
-        cases_by_country=cases_by_country,
-        cases_by_status=cases_by_status
-    )
+    # Agrégation sur status/country uniquement, mémorisée par rôle (services/stats_service.py)
+    stats = await get_manager_dashboard_stats(db, current_user["role"])
+    return DashboardStats(**stats)
 
 # Employee Management
 @api_router.get("/employees", response_model=List[UserResponse])
@@ -1892,6 +2002,9 @@ async def toggle_employee_status(employee_id: str, current_user: dict = Depends(
     
     new_status = not employee.get("is_active", True)
     await db.users.update_one({"id": employee_id}, {"$set": {"is_active": new_status}})
+    invalidate_cached_user(employee_id)
+    await refresh_role_room(employee_id)
+    await queue_reindex(db, TYPE_USER, employee_id)
     
     return {"message": f"Employee {'activated' if new_status else 'deactivated'}"}
 
@@ -1914,6 +2027,7 @@ async def reassign_client(client_id: str, new_employee_id: str, current_user: di
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Client not found")
     
+    await queue_reindex(db, TYPE_CLIENT, client_id)
     return {"message": "Client reassigned successfully"}
 
 # Workflows
@@ -2107,34 +2221,29 @@ async def create_user_advanced(user_data: UserCreateRequest, current_user: dict
             payment_method=None
         )
     
-    # 4. Envoyer toutes les notifications (SERVICE RÉUTILISABLE)
-    await send_creation_notifications(
-        db=db,
-        created_user_id=user_id,
-        created_user_role=user_data.role.value,
-        created_user_name=user_data.full_name,
-        created_user_email=user_data.email,
-        created_by_id=current_user["id"],
-        created_by_role=current_user["role"],
-        created_by_name=current_user["full_name"],
-        additional_context=client_data if client_data else {}
+    # 4. Envoyer toutes les notifications (SERVICE RÉUTILISABLE, en arrière-plan)
+    await enqueue_job(
+        db,
+        "notifications.user_created",
+        {
+            "created_user_id": user_id,
+            "created_user_role": user_data.role.value,
+            "created_user_name": user_data.full_name,
+            "created_user_email": user_data.email,
+            "created_by_id": current_user["id"],
+            "created_by_role": current_user["role"],
+            "created_by_name": current_user["full_name"],
+            "additional_context": client_data if client_data else {}
+        },
+        idempotency_key=f"user-created-notifications:{user_id}"
     )
     
-    # 5. Envoyer l'email de bienvenue si demandé
+    # 5. Envoyer l'email de bienvenue si demandé (en arrière-plan)
+    # Sans SendGrid, le mot de passe temporaire est renvoyé à l'administrateur
     email_sent = False
-    if user_data.send_email:
-        email_sent = await send_welcome_email_notification(
-            email=user_data.email,
-            full_name=user_data.full_name,
-            role=user_data.role.value,
-            temporary_password=temp_password
-        )
-        
-        if email_sent:
-            await db.users.update_one(
-                {"id": user_id},
-                {"$set": {"welcome_email_sent": True, "welcome_email_sent_at": datetime.now(timezone.utc).isoformat()}}
-            )
+    if user_data.send_email and email_delivery_configured():
+        await enqueue_user_welcome_email(user_id, user_data.email, user_data.full_name, user_data.role.value, temp_password)
+        email_sent = True  # Envoi programmé
     
     # 6. Générer la réponse avec credentials (SERVICE RÉUTILISABLE)
     credentials = generate_credentials_response(
@@ -2153,7 +2262,7 @@ async def create_user_advanced(user_data: UserCreateRequest, current_user: dict
         full_name=user_data.full_name,
         phone=user_data.phone,
         role=user_data.role.value,
-        temporary_password=temp_password if not user_data.send_email else None,
+        temporary_password=temp_password if not email_sent else None,
         email_sent=email_sent
     )
 
@@ -2220,7 +2329,7 @@ async def declare_payment(payment_data: PaymentDeclaration, current_user: dict =
         "currency": payment_data.currency,
         "description": payment_data.description,
         "payment_method": payment_data.payment_method,
-        "status": "pending",
+        "status": PaymentStatus.PENDING.value,
         "declared_at": datetime.now(timezone.utc).isoformat(),
         "confirmed_at": None,
         "confirmed_by": None,
@@ -2228,39 +2337,32 @@ async def declare_payment(payment_data: PaymentDeclaration, current_user: dict =
     }
     
     await db.payment_declarations.insert_one(payment_dict)
-    
-    # Notifier le manager
-    managers = await db.users.find({"role": "MANAGER", "is_active": True}).to_list(100)
-    for manager in managers:
-        await create_notification(
-            user_id=manager["id"],
-            title=f"Nouveau paiement déclaré - {current_user['full_name']}",
-            message=f"Montant: {payment_data.amount} {payment_data.currency} - Méthode: {payment_data.payment_method}",
-            type="payment_declaration",
-            related_id=payment_id
-        )
-        
-        # WebSocket en temps réel
-        manager_sid = connected_users.get(manager["id"])
-        if manager_sid:
-            await sio.emit('payment_declared', {
-                'payment_id': payment_id,
-                'client_name': current_user["full_name"],
-                'amount': payment_data.amount,
-                'currency': payment_data.currency,
-                'payment_method': payment_data.payment_method
-            }, room=manager_sid)
+    invalidate_dashboard_stats()
+    
+    # Notifier les managers (une écriture, une émission vers la room du rôle)
+    await create_notifications_bulk(db, [], {
+        "title": f"Nouveau paiement déclaré - {current_user['full_name']}",
+        "message": f"Montant: {payment_data.amount} {payment_data.currency} - Méthode: {payment_data.payment_method}",
+        "type": "payment_declaration",
+        "related_id": payment_id
+    }, roles=["MANAGER"])
+    
+    # WebSocket en temps réel
+    await sio.emit('payment_declared', {
+        'payment_id': payment_id,
+        'client_name': current_user["full_name"],
+        'amount': payment_data.amount,
+        'currency': payment_data.currency,
+        'payment_method': payment_data.payment_method
+    }, room=role_room("MANAGER"))
     
     # Notifier aussi tous les SuperAdmin des nouvelles déclarations
-    superadmins = await db.users.find({"role": "SUPERADMIN", "is_active": True}).to_list(10)
-    for superadmin in superadmins:
-        await create_notification(
-            user_id=superadmin["id"],
-            title="💳 Nouvelle déclaration de paiement",
-            message=f"Client: {current_user['full_name']} - Montant: {payment_data.amount} {payment_data.currency} (En attente de validation)",
-            type="admin_payment_declared",
-            related_id=payment_id
-        )
+    await create_notifications_bulk(db, [], {
+        "title": "💳 Nouvelle déclaration de paiement",
+        "message": f"Client: {current_user['full_name']} - Montant: {payment_data.amount} {payment_data.currency} (En attente de validation)",
+        "type": "admin_payment_declared",
+        "related_id": payment_id
+    }, roles=["SUPERADMIN"])
     
     # Log activité
     await log_activity(
@@ -2277,8 +2379,6 @@ async def declare_payment(payment_data: PaymentDeclaration, current_user: dict =
 async def generate_invoice_png(payment_id: str, invoice_number: str):
     """Génère une facture PNG moderne et compacte pour le paiement confirmé"""
     try:
-        from invoice_generator_png import generate_invoice_png as create_png
-        
         payment = await db.payment_declarations.find_one({"id": payment_id})
         if not payment:
             return
@@ -2304,17 +2404,25 @@ async def generate_invoice_png(payment_id: str, invoice_number: str):
             "created_at": datetime.now(timezone.utc).isoformat()
         }
         
-        await db.invoices.insert_one(invoice_record)
+        # Idempotent: la tâche de rendu peut être rejouée après un échec
+        await db.invoices.update_one(
+            {"invoice_number": invoice_number},
+            {"$setOnInsert": invoice_record},
+            upsert=True
+        )
         
-        # Générer le fichier PNG physique
-        png_path = f"/app/backend/invoices/{invoice_number}.png"
+        # Tâche rejouée: PNG déjà stocké
+        if await get_invoice_artifact(db, invoice_number, KIND_PNG):
+            return
         
-        # Créer l'image PNG moderne
-        create_png(invoice_data, png_path)
-        logger.info(f"✅ Facture PNG {invoice_number} générée avec succès à {png_path}")
+        # Créer l'image PNG moderne (processus de rendu, hors de la boucle d'événements)
+        png_bytes = await render_pool.render_png(invoice_data)
+        artifact = await store_invoice_artifact(db, invoice_number, png_bytes, KIND_PNG, PNG_CONTENT_TYPE)
+        logger.info(f"✅ Facture PNG {invoice_number} générée avec succès ({artifact['key']})")
         
     except Exception as e:
         logger.error(f"❌ Erreur génération facture PNG: {e}", exc_info=True)
+        raise
 
 @api_router.get("/payments/client-history", response_model=List[PaymentDeclarationResponse])
 async def get_client_payment_history(current_user: dict = Depends(get_current_user)):
@@ -2329,9 +2437,47 @@ async def get_client_payment_history(current_user: dict = Depends(get_current_us
     
     return [PaymentDeclarationResponse(**payment) for payment in payments]
 
+async def invoice_artifact_response(request: Request, artifact: dict, filename: str) -> Response:
+    """
+    Réponse HTTP d'un fichier de facture stocké: ETag (sha256) / If-None-Match (304),
+    Range (206 ou 416), sinon le fichier entier.
+    """
+    etag = f'"{artifact["sha256"]}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=0, must-revalidate",
+        "Content-Disposition": f"attachment; filename={filename}"
+    }
+    
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    size = artifact["size"]
+    try:
+        byte_range = parse_byte_range(request.headers.get("range"), size)
+    except RangeNotSatisfiable:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    
+    if byte_range:
+        start, end = byte_range
+        return Response(
+            content=await read_invoice_artifact(artifact, start, end),
+            status_code=206,
+            media_type=artifact["content_type"],
+            headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}"}
+        )
+    
+    return Response(
+        content=await read_invoice_artifact(artifact),
+        media_type=artifact["content_type"],
+        headers=headers
+    )
+
 @api_router.get("/invoices/{invoice_number}")
-async def download_invoice(invoice_number: str, current_user: dict = Depends(get_current_user)):
-    """Télécharger une facture PDF"""
+async def download_invoice(invoice_number: str, request: Request, current_user: dict = Depends(get_current_user)):
+    """Télécharger une facture PNG (URL pdf_invoice_url des paiements: /invoices/<numéro>.png)"""
+    invoice_number = invoice_number.removesuffix(".png")
     # Vérifier que l'utilisateur a le droit de télécharger cette facture
     invoice = await db.invoices.find_one({"invoice_number": invoice_number})
     if not invoice:
@@ -2349,18 +2495,11 @@ async def download_invoice(invoice_number: str, current_user: dict = Depends(get
     elif current_user["role"] not in ["MANAGER", "SUPERADMIN"]:
         raise HTTPException(status_code=403, detail="Accès refusé")
     
-    png_path = f"/app/backend/invoices/{invoice_number}.png"
-    
-    # Vérifier que le fichier existe
-    import os
-    if not os.path.exists(png_path):
+    artifact = await get_invoice_png(db, invoice_number)
+    if not artifact:
         raise HTTPException(status_code=404, detail="Fichier de facture non trouvé")
     
-    return FileResponse(
-        path=png_path,
-        media_type="image/png",
-        filename=f"Facture_{invoice_number}.png"
-    )
+    return await invoice_artifact_response(request, artifact, f"Facture_{invoice_number}.png")
 
 @api_router.get("/payments/manager-history", response_model=List[PaymentDeclarationResponse])
 async def get_manager_payment_history(current_user: dict = Depends(get_current_user)):
@@ -2461,76 +2600,8 @@ async def get_admin_dashboard_stats(current_user: dict = Depends(get_current_use
     if current_user["role"] != "SUPERADMIN":
         raise HTTPException(status_code=403, detail="Accès SuperAdmin requis")
     
-    # Compter les utilisateurs par rôle
-    total_users = await db.users.count_documents({"is_active": True})
-    managers = await db.users.count_documents({"role": "MANAGER", "is_active": True})
-    employees = await db.users.count_documents({"role": "EMPLOYEE", "is_active": True})
-    clients = await db.users.count_documents({"role": "CLIENT", "is_active": True})
-    
-    # Compter les éléments métier
-    total_cases = await db.cases.count_documents({})
-    active_cases = await db.cases.count_documents({"status": {"$nin": ["Terminated", "Rejected"]}})
-    total_payments = await db.payment_declarations.count_documents({})
-    pending_payments = await db.payment_declarations.count_documents({"status": "pending"})
-    
-    # Paiements consultation (50k CFA)
-    consultation_payments_list = await db.payments.find({"type": "consultation"}).to_list(1000)
-    consultation_count = len(consultation_payments_list)
-    consultation_total = sum(p.get("amount", 0) for p in consultation_payments_list)
-    
-    # === FINANCES - État des comptes ===
-    # Total des paiements confirmés (entrées d'argent)
-    confirmed_payments = await db.payment_declarations.find({"status": "confirmed"}).to_list(10000)
-    total_payments_amount = sum(p.get("amount", 0) for p in confirmed_payments)
-    
-    # Total des retraits (sorties d'argent)
-    withdrawals = await db.withdrawals.find({}).to_list(10000)
-    total_withdrawals = sum(w.get("amount", 0) for w in withdrawals)
-    
-    # Solde actuel (entrées - sorties)
-    current_balance = total_payments_amount - total_withdrawals
-    
-    # Activités récentes
-    recent_activities = await db.user_activities.find(
-        {}, {"_id": 0}
-    ).sort("timestamp", -1).limit(10).to_list(10)
-    
-    # Connexions aujourd'hui
-    today = datetime.now(timezone.utc).date().isoformat()
-    daily_logins = await db.user_activities.count_documents({
-        "action": "login",
-        "timestamp": {"$regex": f"^{today}"}
-    })
-    
-    return {
-        "users": {
-            "total": total_users,
-            "managers": managers,
-            "employees": employees,
-            "clients": clients
-        },
-        "business": {
-            "total_cases": total_cases,
-            "active_cases": active_cases,
-            "total_payments": total_payments,
-            "pending_payments": pending_payments
-        },
-        "finances": {
-            "total_payments_amount": total_payments_amount,
-            "total_withdrawals": total_withdrawals,
-            "current_balance": current_balance,
-            "currency": "CFA"
-        },
-        "consultations": {
-            "total_count": consultation_count,
-            "total_amount": consultation_total,
-            "currency": "CFA"
-        },
-        "activity": {
-            "daily_logins": daily_logins,
-            "recent_activities": recent_activities
-        }
-    }
+    # Agrégations $facet en parallèle, mémorisées quelques secondes (services/stats_service.py)
+    return await get_cached_admin_dashboard_stats(db)
 
 @api_router.patch("/admin/users/{user_id}")
 async def admin_update_user(
@@ -2558,6 +2629,9 @@ async def admin_update_user(
     if update_dict:
         update_dict["updated_at"] = datetime.now(timezone.utc).isoformat()
         await db.users.update_one({"id": user_id}, {"$set": update_dict})
+        invalidate_cached_user(user_id)
+        await refresh_role_room(user_id)
+        await queue_reindex(db, TYPE_USER, user_id)
         
         # Log l'action
         await log_activity(
@@ -2595,6 +2669,9 @@ async def admin_delete_user(user_id: str, current_user: dict = Depends(get_curre
             "deleted_by": current_user["id"]
         }}
     )
+    invalidate_cached_user(user_id)
+    await refresh_role_room(user_id)
+    await queue_reindex(db, TYPE_USER, user_id)
     
     # Log l'action
     await log_activity(
@@ -2609,6 +2686,62 @@ async def admin_delete_user(user_id: str, current_user: dict = Depends(get_curre
     
     return {"message": "Utilisateur supprimé avec succès"}
 
+@api_router.get("/admin/indexes/usage")
+async def get_admin_index_usage(current_user: dict = Depends(get_current_user)):
+    """SuperAdmin consulte l'utilisation des index MongoDB ($indexStats)"""
+    if current_user["role"] != "SUPERADMIN":
+        raise HTTPException(status_code=403, detail="Accès SuperAdmin requis")
+    
+    usage = await get_index_usage(db)
+    unused = [u for u in usage if u["accesses"] == 0 and u["name"] != "_id_"]
+    missing = [u for u in usage if u.get("missing")]
+    
+    return {
+        "indexes": usage,
+        "unused_count": len(unused),
+        "missing_count": len(missing)
+    }
+
+@api_router.get("/admin/cache-stats")
+async def get_admin_cache_stats(current_user: dict = Depends(get_current_user)):
+    """SuperAdmin consulte les compteurs du cache utilisateurs"""
+    if current_user["role"] != "SUPERADMIN":
+        raise HTTPException(status_code=403, detail="Accès SuperAdmin requis")
+    
+    return {"user_cache": user_cache.stats()}
+
+@api_router.get("/admin/jobs/dead")
+async def get_dead_jobs(current_user: dict = Depends(get_current_user)):
+    """SuperAdmin consulte les tâches d'arrière-plan en lettre morte"""
+    if current_user["role"] != "SUPERADMIN":
+        raise HTTPException(status_code=403, detail="Accès SuperAdmin requis")
+    
+    jobs = await list_dead_jobs(db)
+    for job in jobs:
+        for field in ("run_at", "created_at", "updated_at", "failed_at"):
+            if isinstance(job.get(field), datetime):
+                job[field] = job[field].isoformat()
+    return jobs
+
+@api_router.post("/admin/jobs/{job_id}/retry")
+async def retry_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """SuperAdmin relance une tâche en lettre morte"""
+    if current_user["role"] != "SUPERADMIN":
+        raise HTTPException(status_code=403, detail="Accès SuperAdmin requis")
+    
+    if not await retry_dead_job(db, job_id):
+        raise HTTPException(status_code=404, detail="Tâche en lettre morte non trouvée (ou données sensibles effacées)")
+    return {"message": "Tâche relancée", "job_id": job_id}
+
+@api_router.post("/admin/search/reindex")
+async def rebuild_search(current_user: dict = Depends(get_current_user)):
+    """SuperAdmin reconstruit l'index de recherche globale"""
+    if current_user["role"] != "SUPERADMIN":
+        raise HTTPException(status_code=403, detail="Accès SuperAdmin requis")
+    
+    job_id = await enqueue_job(db, "search.rebuild", {})
+    return {"message": "Reconstruction de l'index planifiée", "job_id": job_id}
+
 # APIs de recherche intelligente
 @api_router.get("/search/global")
 async def global_search(
@@ -2622,133 +2755,14 @@ async def global_search(
     if len(query.strip()) < 2:
         return {"results": [], "total": 0}
     
-    results = []
-    
-    # Construire le pattern de recherche (insensible à la casse)
-    search_pattern = {"$regex": query, "$options": "i"}
-    
-    # Recherche dans les utilisateurs (si autorisé)
-    if (category is None or category == "users") and current_user["role"] in ["MANAGER", "SUPERADMIN"]:
-        users = await db.users.find({
-            "$or": [
-                {"full_name": search_pattern},
-                {"email": search_pattern},
-                {"phone": search_pattern}
-            ],
-            "is_active": True
-        }, {"_id": 0, "password": 0}).limit(limit).to_list(limit)
-        
-        for user in users:
-            results.append({
-                "type": "user",
-                "id": user["id"],
-                "title": user["full_name"],
-                "subtitle": f"{user['email']} - {user['role']}",
-                "data": user
-            })
-    
-    # Recherche dans les clients
-    if (category is None or category == "clients") and current_user["role"] in ["MANAGER", "EMPLOYEE", "SUPERADMIN"]:
-        # Pour les employés, limiter aux clients assignés
-        client_filter = {}
-        if current_user["role"] == "EMPLOYEE":
-            client_filter["assigned_employee_id"] = current_user["id"]
-        
-        clients = await db.clients.find(client_filter, {"_id": 0}).to_list(1000)
-        client_ids = [c["id"] for c in clients]
-        
-        # Rechercher dans les utilisateurs clients correspondants
-        client_users = await db.users.find({
-            "id": {"$in": [c["user_id"] for c in clients]},
-            "$or": [
-                {"full_name": search_pattern},
-                {"email": search_pattern},
-                {"phone": search_pattern}
-            ]
-        }, {"_id": 0, "password": 0}).limit(limit).to_list(limit)
-        
-        for client_user in client_users:
-            client_data = next((c for c in clients if c["user_id"] == client_user["id"]), None)
-            if client_data:
-                results.append({
-                    "type": "client",
-                    "id": client_data["id"],
-                    "title": client_user["full_name"],
-                    "subtitle": f"{client_data['country']} - {client_data['visa_type']} - {client_data['current_status']}",
-                    "data": {**client_user, **client_data}
-                })
-    
-    # Recherche dans les dossiers/cas
-    if (category is None or category == "cases") and current_user["role"] in ["MANAGER", "EMPLOYEE", "SUPERADMIN"]:
-        case_filter = {}
-        if current_user["role"] == "EMPLOYEE":
-            # Limiter aux cas des clients assignés à cet employé
-            employee_clients = await db.clients.find(
-                {"assigned_employee_id": current_user["id"]}, {"_id": 0}
-            ).to_list(1000)
-            case_filter["client_id"] = {"$in": [c["id"] for c in employee_clients]}
-        
-        # Recherche par status, country, visa_type, notes
-        case_filter["$or"] = [
-            {"status": search_pattern},
-            {"country": search_pattern},
-            {"visa_type": search_pattern},
-            {"notes": search_pattern}
-        ]
-        
-        cases = await db.cases.find(case_filter, {"_id": 0}).sort("updated_at", -1).limit(limit).to_list(limit)
-        
-        for case in cases:
-            # Récupérer le nom du client
-            client = await db.clients.find_one({"id": case["client_id"]})
-            client_name = "Client inconnu"
-            if client:
-                client_user = await db.users.find_one({"id": client["user_id"]})
-                if client_user:
-                    client_name = client_user["full_name"]
-            
-            results.append({
-                "type": "case",
-                "id": case["id"],
-                "title": f"Dossier {client_name}",
-                "subtitle": f"{case['country']} - {case['visa_type']} - {case['status']}",
-                "data": {**case, "client_name": client_name}
-            })
-    
-    # Recherche dans les visiteurs
-    if (category is None or category == "visitors") and current_user["role"] in ["MANAGER", "EMPLOYEE", "SUPERADMIN"]:
-        visitors = await db.visitors.find({
-            "$or": [
-                {"name": search_pattern},
-                {"company": search_pattern},
-                {"purpose": search_pattern}
-            ]
-        }, {"_id": 0}).sort("created_at", -1).limit(limit).to_list(limit)
-        
-        for visitor in visitors:
-            results.append({
-                "type": "visitor",
-                "id": visitor["id"],
-                "title": visitor["name"],
-                "subtitle": f"{visitor.get('company', 'N/A')} - {visitor['purpose']} - {visitor['arrival_time'][:10]}",
-                "data": visitor
-            })
-    
-    # Trier les résultats par pertinence (nom exact en premier)
-    def sort_key(item):
-        title_lower = item["title"].lower()
-        query_lower = query.lower()
-        if title_lower == query_lower:
-            return 0  # Correspondance exacte
-        elif title_lower.startswith(query_lower):
-            return 1  # Commence par la query
-        else:
-            return 2  # Contient la query
-    
-    results.sort(key=sort_key)
+    # Index dénormalisé, filtré par rôle et classé par pertinence (services/search_service.py)
+    categories = [SEARCH_CATEGORIES[category]] if category in SEARCH_CATEGORIES else None
+    results = await search_index(
+        db, query, current_user["role"], current_user["id"], categories=categories, limit=limit
+    )
     
     return {
-        "results": results[:limit],
+        "results": results,
         "total": len(results),
         "query": query
     }
@@ -2830,32 +2844,8 @@ async def get_visitor_stats(current_user: dict = Depends(get_current_user)):
 
 # Notifications API
 async def create_notification(user_id: str, title: str, message: str, type: str, related_id: str = None):
-    """Helper function to create notifications"""
-    notification_id = str(uuid.uuid4())
-    notification_dict = {
-        "id": notification_id,
-        "user_id": user_id,
-        "title": title,
-        "message": message,
-        "type": type,
-        "related_id": related_id,
-        "read": False,
-        "created_at": datetime.now(timezone.utc).isoformat()
-    }
-    await db.notifications.insert_one(notification_dict)
-    
-    # Send real-time notification via WebSocket
-    user_sid = connected_users.get(user_id)
-    if user_sid:
-        await sio.emit('new_notification', {
-            'id': notification_id,
-            'title': title,
-            'message': message,
-            'type': type,
-            'created_at': notification_dict["created_at"]
-        }, room=user_sid)
-    
-    return notification_id
+    """Helper function to create notifications (moteur partagé: persistance + temps réel)"""
+    return await notification_engine.notify(db, user_id, title, message, type, related_id)
 
 @api_router.get("/notifications", response_model=List[NotificationResponse])
 async def get_notifications(current_user: dict = Depends(get_current_user)):
@@ -2867,22 +2857,15 @@ async def get_notifications(current_user: dict = Depends(get_current_user)):
 
 @api_router.patch("/notifications/{notification_id}/read")
 async def mark_notification_read(notification_id: str, current_user: dict = Depends(get_current_user)):
-    result = await db.notifications.update_one(
-        {"id": notification_id, "user_id": current_user["id"]},
-        {"$set": {"read": True}}
-    )
-    
-    if result.modified_count == 0:
+    marked = await mark_notification_as_read(db, notification_id, current_user["id"])
+    if marked is None:
         raise HTTPException(status_code=404, detail="Notification non trouvée")
     
     return {"message": "Notification marquée comme lue"}
 
 @api_router.get("/notifications/unread-count")
 async def get_unread_notifications_count(current_user: dict = Depends(get_current_user)):
-    count = await db.notifications.count_documents({
-        "user_id": current_user["id"],
-        "read": False
-    })
+    count = await get_unread_count(db, current_user["id"], COUNTER_NOTIFICATIONS)
     return {"unread_count": count}
 
 # ==================== V3 NEW ENDPOINTS ====================
@@ -2894,49 +2877,8 @@ async def get_current_balance(current_user: dict = Depends(get_current_user)):
     if current_user["role"] not in ["SUPERADMIN", "MANAGER"]:
         raise HTTPException(status_code=403, detail="Accès refusé")
     
-    # Calculer le solde en temps réel
-    # Total des paiements confirmés
-    payments_pipeline = [
-        {"$match": {"status": "CONFIRMED"}},
-        {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
-    ]
-    payments_result = await db.payment_declarations.aggregate(payments_pipeline).to_list(1)
-    total_payments = payments_result[0]["total"] if payments_result else 0.0
-    
-    # Total des retraits
-    withdrawals_pipeline = [
-        {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
-    ]
-    withdrawals_result = await db.withdrawals.aggregate(withdrawals_pipeline).to_list(1)
-    total_withdrawals = withdrawals_result[0]["total"] if withdrawals_result else 0.0
-    
-    current_balance = total_payments - total_withdrawals
-    
-    # Mettre à jour le solde dans la base
-    await db.company_balance.update_one(
-        {},
-        {
-            "$set": {
-                "current_balance": current_balance,
-                "total_payments": total_payments,
-                "total_withdrawals": total_withdrawals,
-                "last_updated": datetime.now(timezone.utc).isoformat(),
-                "last_calculation": {
-                    "total_payments": total_payments,
-                    "total_withdrawals": total_withdrawals,
-                    "balance": current_balance
-                }
-            }
-        },
-        upsert=True
-    )
-    
-    return BalanceResponse(
-        current_balance=current_balance,
-        total_payments=total_payments,
-        total_withdrawals=total_withdrawals,
-        last_updated=datetime.now(timezone.utc).isoformat()
-    )
+    # Solde matérialisé, tenu à jour par le grand livre (services/ledger_service.py)
+    return BalanceResponse(**await get_company_balance(db))
 
 @api_router.post("/withdrawals", response_model=WithdrawalResponse)
 async def create_withdrawal(withdrawal_data: WithdrawalCreate, current_user: dict = Depends(get_current_user)):
@@ -2959,6 +2901,8 @@ async def create_withdrawal(withdrawal_data: WithdrawalCreate, current_user: dic
     }
     
     await db.withdrawals.insert_one(withdrawal_dict)
+    await record_ledger_entry(db, SOURCE_WITHDRAWAL, withdrawal_id, withdrawal_data.amount, created_by=current_user["id"])
+    invalidate_dashboard_stats()
     
     # Log de l'activité
     await log_activity(
@@ -3022,7 +2966,7 @@ async def confirm_payment_with_code(
     if not payment:
         raise HTTPException(status_code=404, detail="Paiement non trouvé")
     
-    if payment["status"] != "pending":
+    if PaymentStatus.normalize(payment["status"]) != PaymentStatus.PENDING:
         raise HTTPException(status_code=400, detail="Ce paiement a déjà été traité")
     
     if confirmation_data.action == "REJECTED":
@@ -3031,13 +2975,14 @@ async def confirm_payment_with_code(
         
         # Rejeter le paiement
         update_dict = {
-            "status": "REJECTED",
+            "status": PaymentStatus.REJECTED.value,
             "rejection_reason": confirmation_data.rejection_reason,
             "confirmed_by": current_user["id"],
             "confirmed_at": datetime.now(timezone.utc).isoformat()
         }
         
         await db.payment_declarations.update_one({"id": payment_id}, {"$set": update_dict})
+        invalidate_dashboard_stats()
         
         # Notifier le client du rejet
         await create_notification(
@@ -3094,7 +3039,7 @@ async def confirm_payment_with_code(
                 await db.payment_declarations.update_one(
                     {"id": payment_id}, 
                     {"$set": {
-                        "status": "REJECTED",
+                        "status": PaymentStatus.REJECTED.value,
                         "rejection_reason": "Code de vérification du paiement invalide (3 tentatives échouées)",
                         "confirmed_by": current_user["id"],
                         "confirmed_at": datetime.now(timezone.utc).isoformat()
@@ -3126,13 +3071,17 @@ async def confirm_payment_with_code(
         invoice_number = f"ALO-{datetime.now().strftime('%Y%m%d')}-{payment_id[:8].upper()}"
         
         update_dict = {
-            "status": "CONFIRMED",
+            "status": PaymentStatus.CONFIRMED.value,
             "confirmed_by": current_user["id"],
             "confirmed_at": datetime.now(timezone.utc).isoformat(),
             "invoice_number": invoice_number
         }
         
         await db.payment_declarations.update_one({"id": payment_id}, {"$set": update_dict})
+        await record_ledger_entry(
+            db, SOURCE_PAYMENT, payment_id, payment["amount"], payment.get("currency", "CFA"), current_user["id"]
+        )
+        invalidate_dashboard_stats()
         
         # Générer le PDF de la facture
         payment_data_for_pdf = {
@@ -3142,37 +3091,40 @@ async def confirm_payment_with_code(
             "manager_name": current_user["full_name"]
         }
         
-        try:
-            # Générer la facture PNG
-            await generate_invoice_png(payment_id, invoice_number)
-            # Store PNG URL
-            png_url = f"/invoices/{invoice_number}.png"
-            await db.payment_declarations.update_one(
-                {"id": payment_id}, 
-                {"$set": {"pdf_invoice_url": png_url}}
-            )
-        except Exception as e:
-            logger.error(f"Erreur génération PDF: {e}")
+        # Générer la facture PNG (en arrière-plan, l'URL est enregistrée après le rendu)
+        await enqueue_job(
+            db,
+            "invoice.render_png",
+            {"payment_id": payment_id, "invoice_number": invoice_number},
+            idempotency_key=f"invoice-render:{invoice_number}"
+        )
+        # Rendu anticipé du PDF: le premier téléchargement est servi depuis le magasin
+        await enqueue_job(
+            db,
+            "invoice.render_pdf",
+            {"payment_id": payment_id},
+            idempotency_key=f"invoice-pdf:{payment_id}"
+        )
         
         # Notifier le client de la confirmation
-        await create_notification(
-            user_id=payment["client_id"],
+        await enqueue_notifications(
             title="Paiement confirmé",
             message=f"Votre paiement de {payment['amount']} {payment['currency']} a été confirmé. Facture N° {invoice_number}",
             type="payment_confirmed",
-            related_id=payment_id
+            related_id=payment_id,
+            user_ids=[payment["client_id"]],
+            idempotency_key=f"payment-confirmed-client:{payment_id}"
         )
         
         # Notifier tous les SuperAdmin des paiements confirmés
-        superadmins = await db.users.find({"role": "SUPERADMIN", "is_active": True}).to_list(10)
-        for superadmin in superadmins:
-            await create_notification(
-                user_id=superadmin["id"],
-                title="💰 Paiement confirmé",
-                message=f"Paiement de {payment['amount']} {payment['currency']} confirmé par {current_user['full_name']} - Client: {payment.get('client_name', payment['client_id'])}",
-                type="admin_payment_confirmed",
-                related_id=payment_id
-            )
+        await enqueue_notifications(
+            title="💰 Paiement confirmé",
+            message=f"Paiement de {payment['amount']} {payment['currency']} confirmé par {current_user['full_name']} - Client: {payment.get('client_name', payment['client_id'])}",
+            type="admin_payment_confirmed",
+            related_id=payment_id,
+            roles=["SUPERADMIN"],
+            idempotency_key=f"payment-confirmed-superadmins:{payment_id}"
+        )
     
     # Log de l'activité
     await log_activity(
@@ -3197,7 +3149,7 @@ async def get_pending_payments(current_user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Accès refusé")
     
     payments = await db.payment_declarations.find(
-        {"status": "pending"}, {"_id": 0}
+        {"status": PaymentStatus.PENDING.query()}, {"_id": 0}
     ).sort("declared_at", 1).to_list(100)
     
     return [PaymentDeclarationResponse(**p) for p in payments]
@@ -3238,10 +3190,12 @@ async def get_consultation_payments(current_user: dict = Depends(get_current_use
     }
 
 @api_router.get("/payments/{payment_id}/invoice")
-async def download_invoice(payment_id: str, current_user: dict = Depends(get_current_user)):
-    """Télécharger la facture PDF professionnelle pour un paiement confirmé"""
-    from fastapi.responses import Response
-    from professional_invoice_generator import generate_professional_invoice_pdf
+async def download_invoice(payment_id: str, request: Request, current_user: dict = Depends(get_current_user)):
+    """
+    Télécharger la facture PDF professionnelle pour un paiement confirmé.
+    Le PDF est rendu une seule fois puis servi depuis le magasin de factures
+    (ETag / If-None-Match, Range).
+    """
     
     # Récupérer le paiement depuis payment_declarations
     payment = await db.payment_declarations.find_one({"id": payment_id}, {"_id": 0})
@@ -3249,8 +3203,8 @@ async def download_invoice(payment_id: str, current_user: dict = Depends(get_cur
         raise HTTPException(status_code=404, detail="Paiement non trouvé")
     
     # Vérifier que le paiement est confirmé
-    payment_status = payment.get("status", "").lower()
-    if payment_status != "confirmed":
+    payment_status = PaymentStatus.normalize(payment.get("status"))
+    if payment_status != PaymentStatus.CONFIRMED:
         raise HTTPException(status_code=400, detail="Le paiement n'est pas confirmé")
     
     invoice_number = payment.get("invoice_number")
@@ -3289,47 +3243,59 @@ async def download_invoice(payment_id: str, current_user: dict = Depends(get_cur
     elif current_user["role"] not in ["MANAGER", "SUPERADMIN"]:
         raise HTTPException(status_code=403, detail="Accès non autorisé")
     
-    # Récupérer les informations du client
-    client = await db.clients.find_one({"id": client_id}) or await db.clients.find_one({"user_id": client_id})
-    user = await db.users.find_one({"id": client_id}) if client_id else None
-    
-    client_name = "Client"
-    client_email = None
-    client_phone = None
-    
-    if client:
-        client_name = client.get("full_name") or user.get("full_name", "Client") if user else "Client"
-        client_email = client.get("email") or user.get("email") if user else None
-        client_phone = client.get("phone") or user.get("phone") if user else None
-    elif user:
-        client_name = user.get("full_name", "Client")
-        client_email = user.get("email")
-        client_phone = user.get("phone")
-    
-    # Préparer les données de la facture
-    invoice_data = {
-        'invoice_number': invoice_number,
-        'client_name': client_name,
-        'client_email': client_email,
-        'client_phone': client_phone,
-        'amount': payment.get('amount', 0),
-        'currency': payment.get('currency', 'CFA'),
-        'payment_method': payment.get('payment_method', 'N/A'),
-        'description': payment.get('description', 'Services d\'immigration et conseil'),
-        'created_at': payment.get('created_at', datetime.now(timezone.utc).isoformat()),
-        'status': 'Confirmé' if payment_status == 'confirmed' else 'En attente'
-    }
+    artifact = await get_or_render_invoice_pdf(db, payment)
+    return await invoice_artifact_response(request, artifact, f"Facture_{invoice_number}.pdf")
+
+def parse_export_date(value: Optional[str], end_of_day: bool = False) -> Optional[datetime]:
+    """Date ISO (AAAA-MM-JJ ou date-heure) d'un filtre d'export, en UTC"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Date invalide: {value}")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    else:
+        parsed = parsed.astimezone(timezone.utc)  # declared_at est stocké en UTC
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1)  # Date seule: journée incluse
+    return parsed
+
+@api_router.get("/payments/invoices/export")
+async def export_invoices_zip(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    status_filter: str = Query(PaymentStatus.CONFIRMED.value, alias="status"),
+    client_id: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Manager/SuperAdmin exporte les factures PDF d'une période dans une archive ZIP
+    diffusée au fil de l'eau (factures en cache réutilisées, les autres rendues par le pool).
+    Dates sur declared_at; end_date incluse pour une date seule.
+    """
+    if current_user["role"] not in ["MANAGER", "SUPERADMIN"]:
+        raise HTTPException(status_code=403, detail="Accès refusé")
     
-    # Générer le PDF professionnel
-    pdf_bytes = generate_professional_invoice_pdf(invoice_data)
+    payment_status = PaymentStatus.normalize(status_filter)
+    if payment_status is None:
+        raise HTTPException(status_code=400, detail=f"Statut invalide: {status_filter}")
+    start = parse_export_date(start_date)
+    end = parse_export_date(end_date, end_of_day=True)
     
-    # Retourner le PDF
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename=Facture_{invoice_number}.pdf"
-        }
+    query = build_export_query(start, end, payment_status, client_id)
+    await log_activity(
+        user_id=current_user["id"],
+        action="export_invoices",
+        details={"start_date": start_date, "end_date": end_date, "status": payment_status.value, "client_id": client_id}
+    )
+    
+    period = "_".join(part[:10] for part in (start_date, end_date) if part) or "toutes"
+    return StreamingResponse(
+        stream_invoice_zip(db, query),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=Factures_{period}.zip"}
     )
 
 # Contact Messages & CRM
@@ -3346,33 +3312,12 @@ async def create_contact_message(message_data: ContactMessageCreate):
     assigned_employee_name = None
     
     if message_data.how_did_you_know == "Par une personne" and message_data.referred_by_employee:
-        # Recherche de l'employé par nom (recherche flexible)
-        employee_name_parts = message_data.referred_by_employee.strip().lower().split()
-        if employee_name_parts:
-            # Construire une requête de recherche flexible
-            name_query = {
-                "$and": [
-                    {"role": "EMPLOYEE"},
-                    {"is_active": True},
-                    {
-                        "$or": [
-                            {"full_name": {"$regex": message_data.referred_by_employee, "$options": "i"}},
-                            {
-                                "$and": [
-                                    {"full_name": {"$regex": employee_name_parts[0], "$options": "i"}},
-                                    {"full_name": {"$regex": employee_name_parts[-1], "$options": "i"}} if len(employee_name_parts) > 1 else {}
-                                ]
-                            }
-                        ]
-                    }
-                ]
-            }
-            
-            employee = await db.users.find_one(name_query)
-            if employee:
-                assigned_employee_id = employee["id"]
-                assigned_employee_name = employee["full_name"]
-                logger.info(f"Attribution automatique du prospect {message_data.name} à l'employé {assigned_employee_name}")
+        # Index en mémoire des noms d'employés (normalisés, similarité de trigrammes)
+        employee = await employee_name_index.find_employee(db, message_data.referred_by_employee)
+        if employee:
+            assigned_employee_id = employee["id"]
+            assigned_employee_name = employee["full_name"]
+            logger.info(f"Attribution automatique du prospect {message_data.name} à l'employé {assigned_employee_name} (score {employee['score']})")
     
     message_dict = {
         "id": message_id,
@@ -3402,45 +3347,38 @@ async def create_contact_message(message_data: ContactMessageCreate):
     
     await db.contact_messages.insert_one(message_dict)
     
-    # Envoi automatique d'e-mail de bienvenue au prospect
+    # Envoi automatique d'e-mail de bienvenue au prospect (en arrière-plan)
     if EMAIL_SERVICE_AVAILABLE:
-        try:
-            email_sent = await send_prospect_email(message_data.model_dump())
-            if email_sent:
-                logger.info(f"E-mail de bienvenue envoyé à {message_data.email}")
-                # Mettre à jour le message pour indiquer l'envoi d'e-mail
-                await db.contact_messages.update_one(
-                    {"id": message_id},
-                    {"$set": {"welcome_email_sent": True, "welcome_email_sent_at": datetime.now(timezone.utc).isoformat()}}
-                )
-            else:
-                logger.warning(f"Échec envoi e-mail de bienvenue à {message_data.email}")
-        except Exception as e:
-            logger.error(f"Erreur envoi e-mail prospect {message_data.email}: {e}")
+        await enqueue_job(
+            db,
+            "email.prospect_welcome",
+            {"message_id": message_id, "prospect": message_data.model_dump()},
+            idempotency_key=f"prospect-welcome:{message_id}"
+        )
     
     # Notifier les managers du nouveau lead
-    managers = await db.users.find({"role": "MANAGER", "is_active": True}).to_list(10)
-    for manager in managers:
-        notification_message = f"{message_data.name} ({message_data.country}) - Score: {lead_score}%"
-        if assigned_employee_name:
-            notification_message += f" - Assigné à: {assigned_employee_name}"
-        
-        await create_notification(
-            user_id=manager["id"],
-            title="Nouveau contact prospect",
-            message=notification_message,
-            type="new_lead",
-            related_id=message_id
-        )
+    notification_message = f"{message_data.name} ({message_data.country}) - Score: {lead_score}%"
+    if assigned_employee_name:
+        notification_message += f" - Assigné à: {assigned_employee_name}"
+    
+    await enqueue_notifications(
+        title="Nouveau contact prospect",
+        message=notification_message,
+        type="new_lead",
+        related_id=message_id,
+        roles=["MANAGER"],
+        idempotency_key=f"new-lead-managers:{message_id}"
+    )
     
     # Si un employé est assigné automatiquement, le notifier aussi
     if assigned_employee_id:
-        await create_notification(
-            user_id=assigned_employee_id,
+        await enqueue_notifications(
             title="🎯 Nouveau prospect vous est assigné",
             message=f"{message_data.name} vous a été recommandé par {message_data.referred_by_employee}. Score: {lead_score}% - Priorité de contact!",
             type="assigned_lead",
-            related_id=message_id
+            related_id=message_id,
+            user_ids=[assigned_employee_id],
+            idempotency_key=f"new-lead-assignee:{message_id}"
         )
     
     # Log de l'activité
@@ -3733,15 +3671,12 @@ async def assign_prospect_to_consultant(
         raise HTTPException(status_code=500, detail="Erreur lors de l'affectation")
     
     # Notifier le SuperAdmin
-    superadmins = await db.users.find({"role": "SUPERADMIN", "is_active": True}).to_list(10)
-    for admin in superadmins:
-        await create_notification(
-            user_id=admin["id"],
-            title="💰 Paiement Consultation 50,000 CFA",
-            message=f"{prospect['name']} a payé 50,000 CFA pour consultation. Méthode: {payment_data.payment_method}. Confirmé par {current_user['full_name']}.",
-            type="payment_consultation",
-            related_id=message_id
-        )
+    await create_notifications_bulk(db, [], {
+        "title": "💰 Paiement Consultation 50,000 CFA",
+        "message": f"{prospect['name']} a payé 50,000 CFA pour consultation. Méthode: {payment_data.payment_method}. Confirmé par {current_user['full_name']}.",
+        "type": "payment_consultation",
+        "related_id": message_id
+    }, roles=["SUPERADMIN"])
     
     # Log activity
     await log_activity(
@@ -4014,33 +3949,32 @@ async def convert_prospect_to_client(
         }
     )
     
-    # 7. Envoyer toutes les notifications (SERVICE RÉUTILISABLE)
-    await send_creation_notifications(
-        db=db,
-        created_user_id=user_id,
-        created_user_role="CLIENT",
-        created_user_name=prospect["name"],
-        created_user_email=prospect["email"],
-        created_by_id=current_user["id"],
-        created_by_role=current_user["role"],
-        created_by_name=current_user["full_name"],
-        additional_context={
-            "country": country,
-            "visa_type": visa_type,
-            "assigned_employee_id": current_user["id"],
-            "converted_from_prospect": True,
-            "prospect_id": message_id,
-            "first_payment": first_payment
-        }
+    # 7. Envoyer toutes les notifications (SERVICE RÉUTILISABLE, en arrière-plan)
+    await enqueue_job(
+        db,
+        "notifications.user_created",
+        {
+            "created_user_id": user_id,
+            "created_user_role": "CLIENT",
+            "created_user_name": prospect["name"],
+            "created_user_email": prospect["email"],
+            "created_by_id": current_user["id"],
+            "created_by_role": current_user["role"],
+            "created_by_name": current_user["full_name"],
+            "additional_context": {
+                "country": country,
+                "visa_type": visa_type,
+                "assigned_employee_id": current_user["id"],
+                "converted_from_prospect": True,
+                "prospect_id": message_id,
+                "first_payment": first_payment
+            }
+        },
+        idempotency_key=f"user-created-notifications:{user_id}"
     )
     
-    # 8. Envoyer l'email de bienvenue
-    await send_welcome_email_notification(
-        email=prospect["email"],
-        full_name=prospect["name"],
-        role="CLIENT",
-        temporary_password=temp_password
-    )
+    # 8. Envoyer l'email de bienvenue (en arrière-plan)
+    await enqueue_user_welcome_email(user_id, prospect["email"], prospect["name"], "CLIENT", temp_password)
     
     # 9. Logger l'activité
     await log_activity(
@@ -4094,6 +4028,8 @@ async def update_user_profile(
         {"id": current_user["id"]},
         {"$set": update_dict}
     )
+    invalidate_cached_user(current_user["id"])
+    await queue_reindex(db, TYPE_USER, current_user["id"])
     
     return {"message": "Profil mis à jour avec succès"}
 
@@ -4132,6 +4068,7 @@ async def change_password(
             "password_changed_at": datetime.now(timezone.utc).isoformat()
         }}
     )
+    invalidate_cached_user(current_user["id"])
     
     return {"message": "Mot de passe modifié avec succès"}
 
@@ -4161,6 +4098,7 @@ async def forgot_password(email_data: dict):
             "password_reset_at": datetime.now(timezone.utc).isoformat()
         }}
     )
+    invalidate_cached_user(user["id"])
     
     # Envoyer l'email avec le nouveau mot de passe
     if EMAIL_SERVICE_AVAILABLE:
@@ -4176,13 +4114,11 @@ async def forgot_password(email_data: dict):
             logger.error(f"Erreur envoi email réinitialisation à {email}: {e}")
     
     # Créer une notification dans l'app
-    from services.notification_service import create_notification
     await create_notification(
-        db=db,
         user_id=user["id"],
         title="🔑 Mot de passe réinitialisé",
         message=f"Votre mot de passe a été réinitialisé. Nouveau mot de passe temporaire: {temp_password}. Changez-le dès votre connexion.",
-        notification_type="password_reset"
+        type="password_reset"
     )
     
     return {
@@ -4196,11 +4132,9 @@ async def send_password_reset_email(user_data):
         return False
     
     try:
-        from_email = os.environ.get('SENDGRID_FROM_EMAIL', 'noreply@aloria-agency.com')
-        
-        message = Mail(
-            from_email=from_email,
-            to_emails=user_data['email'],
+        # Transport non bloquant partagé (client SendGrid réutilisé)
+        return await send_custom_email(
+            to_email=user_data['email'],
             subject='Réinitialisation de votre mot de passe ALORIA AGENCY',
             html_content=f"""
             <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
@@ -4226,10 +4160,6 @@ async def send_password_reset_email(user_data):
             </div>
             """
         )
-        
-        sg = SendGridAPIClient(os.environ.get('SENDGRID_API_KEY'))
-        response = sg.send(message)
-        return response.status_code in [200, 201, 202]
     except Exception as e:
         logger.error(f"SendGrid error for password reset {user_data['email']}: {e}")
         return False
@@ -4261,113 +4191,6 @@ async def get_company_info():
     """Obtenir les informations de l'entreprise (API publique)"""
     return CompanyInfo(**COMPANY_DATA)
 
-# Search Enhancement
-@api_router.get("/search/global")
-async def global_search(
-    q: str,
-    category: str = "all",
-    limit: int = 10,
-    current_user: dict = Depends(get_current_user)
-):
-    """Recherche globale intelligente"""
-    if len(q.strip()) < 2:
-        return []
-    
-    results = []
-    query_regex = {"$regex": q, "$options": "i"}
-    
-    # Recherche dans les clients
-    if category in ["all", "clients"]:
-        clients_query = {}
-        if current_user["role"] == "EMPLOYEE":
-            clients_query["assigned_employee_id"] = current_user["id"]
-        
-        clients_query["$or"] = [
-            {"country": query_regex},
-            {"visa_type": query_regex},
-            {"current_status": query_regex}
-        ]
-        
-        clients = await db.clients.find(clients_query, {"_id": 0}).limit(limit//3).to_list(limit//3)
-        
-        for client in clients:
-            user = await db.users.find_one({"id": client["user_id"]})
-            if user and q.lower() in user["full_name"].lower():
-                results.append({
-                    "id": client["id"],
-                    "title": user["full_name"],
-                    "description": f"{client['country']} - {client['visa_type']} - {client['current_status']}",
-                    "category": "clients",
-                    "url": f"/clients/{client['id']}"
-                })
-    
-    # Recherche dans les dossiers
-    if category in ["all", "cases"]:
-        cases = await db.cases.find({
-            "$or": [
-                {"country": query_regex},
-                {"visa_type": query_regex},
-                {"status": query_regex}
-            ]
-        }, {"_id": 0}).limit(limit//3).to_list(limit//3)
-        
-        for case in cases:
-            client = await db.clients.find_one({"id": case["client_id"]})
-            if client:
-                user = await db.users.find_one({"id": client["user_id"]})
-                client_name = user["full_name"] if user else "Client inconnu"
-                results.append({
-                    "id": case["id"],
-                    "title": f"Dossier {client_name}",
-                    "description": f"{case['country']} - {case['visa_type']} - Étape {case['current_step_index']}",
-                    "category": "cases",
-                    "url": f"/cases/{case['id']}"
-                })
-    
-    # Recherche dans les utilisateurs (Manager/SuperAdmin seulement)
-    if category in ["all", "users"] and current_user["role"] in ["MANAGER", "SUPERADMIN"]:
-        users = await db.users.find({
-            "$or": [
-                {"full_name": query_regex},
-                {"email": query_regex},
-                {"role": query_regex}
-            ],
-            "role": {"$ne": "CLIENT"}  # Exclure les clients de la recherche utilisateurs
-        }, {"_id": 0}).limit(limit//3).to_list(limit//3)
-        
-        for user in users:
-            results.append({
-                "id": user["id"],
-                "title": user["full_name"],
-                "description": f"{user['role']} - {user['email']}",
-                "category": "users",
-                "url": f"/users/{user['id']}"
-            })
-    
-    # Recherche dans les visiteurs (Employee/Manager)
-    if category in ["all", "visitors"] and current_user["role"] in ["EMPLOYEE", "MANAGER"]:
-        visitors = await db.visitors.find({
-            "$or": [
-                {"name": query_regex},
-                {"company": query_regex},
-                {"purpose": query_regex}
-            ]
-        }, {"_id": 0}).limit(limit//3).to_list(limit//3)
-        
-        for visitor in visitors:
-            results.append({
-                "id": visitor["id"],
-                "title": visitor["name"],
-                "description": f"{visitor.get('company', 'Particulier')} - {visitor['purpose']}",
-                "category": "visitors",
-                "url": f"/visitors/{visitor['id']}"
-            })
-    
-    # Trier par pertinence (simple)
-    results.sort(key=lambda x: q.lower() in x["title"].lower(), reverse=True)
-    
-    return results[:limit]
-
 # Sequential Case Progression Validation
 @api_router.patch("/cases/{case_id}/progress", response_model=CaseResponse)
 async def update_case_progress_sequential(
@@ -4415,6 +4238,8 @@ async def update_case_progress_sequential(
         update_dict["notes"] = progress_data.notes
     
     await db.cases.update_one({"id": case_id}, {"$set": update_dict})
+    invalidate_dashboard_stats()
+    await queue_reindex(db, TYPE_CASE, case_id)
     
     # Mettre à jour le client
     await db.clients.update_one(
@@ -4425,6 +4250,7 @@ async def update_case_progress_sequential(
             "updated_at": datetime.now(timezone.utc).isoformat()
         }}
     )
+    await queue_reindex(db, TYPE_CLIENT, case["client_id"])
     
     # Log de l'activité
     await log_activity(
@@ -4440,22 +4266,35 @@ async def update_case_progress_sequential(
     
     # Obtenir le dossier mis à jour
     updated_case = await db.cases.find_one({"id": case_id}, {"_id": 0})
-    client = await db.clients.find_one({"id": case["client_id"]})
-    if client:
-        user = await db.users.find_one({"id": client["user_id"]})
-        updated_case["client_name"] = user["full_name"] if user else "Client inconnu"
+    client_names = await resolve_case_client_names(db, [case.get("client_id")], default="Client inconnu")
+    updated_case["client_name"] = client_names.get(case.get("client_id"), "Client inconnu")
     
     return CaseResponse(**updated_case)
 
 # Include router
 app.include_router(api_router)
 
+@app.exception_handler(RenderPoolSaturated)
+async def render_pool_saturated_handler(request: Request, exc: RenderPoolSaturated):
+    """File de rendu des factures pleine: le client réessaie plus tard"""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Génération de factures saturée, réessayez dans quelques secondes"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(RenderTimeout)
+async def render_timeout_handler(request: Request, exc: RenderTimeout):
+    """Rendu d'une facture trop long"""
+    return JSONResponse(status_code=504, content={"detail": "La génération de la facture a pris trop de temps"})
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Automated Task: Check 48h consultation alerts
@@ -4502,7 +4341,154 @@ async def auto_check_48h_alerts():
     except Exception as e:
         logger.error(f"❌ Error in auto_check_48h_alerts: {e}")
 
+# ============================================================================
+# TÂCHES D'ARRIÈRE-PLAN (collection 'jobs', voir services/job_queue.py)
+# ============================================================================
+
+def email_delivery_configured() -> bool:
+    """True si les e-mails peuvent réellement partir (sinon inutile de réessayer)"""
+    return EMAIL_SERVICE_AVAILABLE and aloria_email_service.is_configured
+
+async def enqueue_notifications(
+    title: str,
+    message: str,
+    type: str,
+    related_id: str = None,
+    user_ids: List[str] = None,
+    roles: List[str] = None,
+    idempotency_key: str = None
+):
+    """Programme une notification vers des utilisateurs et/ou tous les utilisateurs actifs de rôles donnés"""
+    await enqueue_job(
+        db,
+        "notifications.send",
+        {
+            "title": title,
+            "message": message,
+            "type": type,
+            "related_id": related_id,
+            "user_ids": user_ids or [],
+            "roles": roles or []
+        },
+        idempotency_key=idempotency_key
+    )
+
+async def enqueue_user_welcome_email(user_id: str, email: str, full_name: str, role: str, temporary_password: str):
+    """Programme l'e-mail de bienvenue (le mot de passe temporaire est effacé après envoi ou abandon)"""
+    await enqueue_job(
+        db,
+        "email.user_welcome",
+        {
+            "user_id": user_id,
+            "email": email,
+            "full_name": full_name,
+            "role": role,
+            "temporary_password": temporary_password
+        },
+        idempotency_key=f"user-welcome:{user_id}",
+        redact_on_success=True
+    )
+
+async def job_send_prospect_email(db, payload: dict):
+    """Tâche: e-mail de bienvenue au prospect (formulaire de contact)"""
+    if not email_delivery_configured():
+        return {"sent": False, "reason": "SendGrid non configuré"}
+    
+    prospect = payload["prospect"]
+    if not await send_prospect_email(prospect):
+        raise RuntimeError(f"Échec envoi e-mail de bienvenue à {prospect.get('email')}")
+    
+    await db.contact_messages.update_one(
+        {"id": payload["message_id"]},
+        {"$set": {"welcome_email_sent": True, "welcome_email_sent_at": datetime.now(timezone.utc).isoformat()}}
+    )
+    logger.info(f"E-mail de bienvenue envoyé à {prospect.get('email')}")
+    return {"sent": True}
+
+async def job_send_user_welcome_email(db, payload: dict):
+    """Tâche: e-mail de bienvenue avec identifiants d'un nouvel utilisateur"""
+    if not email_delivery_configured():
+        return {"sent": False, "reason": "SendGrid non configuré"}
+    
+    sent = await send_welcome_email_notification(
+        email=payload["email"],
+        full_name=payload["full_name"],
+        role=payload["role"],
+        temporary_password=payload["temporary_password"]
+    )
+    if not sent:
+        raise RuntimeError(f"Échec envoi e-mail de bienvenue à {payload['email']}")
+    
+    await db.users.update_one(
+        {"id": payload["user_id"]},
+        {"$set": {"welcome_email_sent": True, "welcome_email_sent_at": datetime.now(timezone.utc).isoformat()}}
+    )
+    return {"sent": True}
+
+async def job_send_creation_notifications(db, payload: dict):
+    """Tâche: notifications de création d'utilisateur (service réutilisable)"""
+    await send_creation_notifications(db=db, **payload)
+
+async def job_send_notifications(db, payload: dict):
+    """Tâche: notification vers une liste d'utilisateurs et/ou des rôles"""
+    notification_ids = await create_notifications_bulk(
+        db,
+        payload.get("user_ids", []),
+        {
+            "title": payload["title"],
+            "message": payload["message"],
+            "type": payload["type"],
+            "related_id": payload.get("related_id")
+        },
+        roles=payload.get("roles")
+    )
+    return {"recipients": len(notification_ids)}
+
+async def job_render_invoice_png(db, payload: dict):
+    """Tâche: rendu de la facture PNG d'un paiement confirmé"""
+    invoice_number = payload["invoice_number"]
+    await generate_invoice_png(payload["payment_id"], invoice_number)
+    await db.payment_declarations.update_one(
+        {"id": payload["payment_id"]},
+        {"$set": {"pdf_invoice_url": f"/invoices/{invoice_number}.png"}}
+    )
+
+async def job_render_invoice_pdf(db, payload: dict):
+    """Tâche: rendu et stockage du PDF d'un paiement confirmé"""
+    payment = await db.payment_declarations.find_one({"id": payload["payment_id"]}, {"_id": 0})
+    if payment and payment.get("invoice_number"):
+        await get_or_render_invoice_pdf(db, payment)
+
+async def job_reindex_search(db, payload: dict):
+    """Tâche: mise à jour de l'index de recherche après une écriture"""
+    await reindex_with_dependents(db, payload["type"], payload["ids"])
+
+async def job_rebuild_search_index(db, payload: dict):
+    """Tâche: reconstruction complète de l'index de recherche (ou seulement s'il est vide)"""
+    if payload.get("if_empty"):
+        await ensure_search_index(db)
+    else:
+        await rebuild_search_index(db)
+
+register_job_handler("email.prospect_welcome", job_send_prospect_email)
+register_job_handler("email.user_welcome", job_send_user_welcome_email)
+register_job_handler("notifications.user_created", job_send_creation_notifications)
+register_job_handler("notifications.send", job_send_notifications)
+register_job_handler("invoice.render_png", job_render_invoice_png)
+register_job_handler("invoice.render_pdf", job_render_invoice_pdf)
+register_job_handler("search.reindex", job_reindex_search)
+register_job_handler("search.rebuild", job_rebuild_search_index)
+
 # Setup startup event
+@app.on_event("startup")
+async def startup_indexes():
+    """Appliquer le registre d'index MongoDB (idempotent)"""
+    try:
+        await ensure_indexes(db)
+        await sync_notification_ttl(db)  # Durée du TTL des notifications lues, ou suppression si désactivé
+    except Exception as e:
+        logger.error(f"❌ Error while ensuring MongoDB indexes: {e}")
+
 @app.on_event("startup")
 async def startup_scheduler():
     """Démarrer le scheduler pour les tâches automatiques"""
@@ -4514,13 +4500,74 @@ async def startup_scheduler():
         name='Check 48h consultation alerts',
         replace_existing=True
     )
+    # Ajouter tâche: rétention (TTL notifications lues, archivage JSONL.gz) chaque nuit
+    scheduler.add_job(
+        run_retention_policies,
+        CronTrigger(hour=3, minute=15),
+        args=[db],
+        id='retention_policies',
+        name='Apply data retention policies',
+        replace_existing=True
+    )
+    # Ajouter tâche: réconciliation du grand livre avec les paiements/retraits (dès le démarrage puis chaque heure)
+    scheduler.add_job(
+        reconcile_ledger,
+        CronTrigger(minute=30),
+        args=[db],
+        id='ledger_reconciliation',
+        name='Reconcile ledger with payments and withdrawals',
+        next_run_time=datetime.now(timezone.utc),
+        replace_existing=True
+    )
+    # Ajouter tâche: suppression des fichiers de factures orphelins chaque nuit
+    scheduler.add_job(
+        cleanup_orphan_artifacts,
+        CronTrigger(hour=3, minute=45),
+        args=[db],
+        id='invoice_artifact_cleanup',
+        name='Remove orphaned invoice artifacts',
+        replace_existing=True
+    )
     scheduler.start()
-    logger.info("✅ Scheduler started - 48h alerts will be checked every hour")
+    logger.info("✅ Scheduler started - 48h alerts will be checked every hour, retention and invoice cleanup run nightly, ledger reconciled hourly")
+
+@app.on_event("startup")
+async def startup_job_workers():
+    """Démarrer les workers de la file de tâches (e-mails, factures, notifications)"""
+    job_workers.start(db, concurrency=int(os.environ.get("JOB_WORKERS", "2")))
+
+@app.on_event("startup")
+async def startup_employee_name_index():
+    """Construire l'index des noms d'employés (attribution des prospects recommandés)"""
+    try:
+        await employee_name_index.refresh(db)
+    except Exception as e:
+        logger.error(f"❌ Error while building employee name index: {e}")
+
+@app.on_event("startup")
+async def startup_search_index():
+    """Construire l'index de recherche au premier démarrage (en arrière-plan)"""
+    await enqueue_job(db, "search.rebuild", {"if_empty": True})
+
+@app.on_event("startup")
+async def startup_notification_engine():
+    """Activer le tampon d'écriture des notifications (regroupement en insert_many)"""
+    notification_engine.start(db)
+
+@app.on_event("startup")
+async def startup_render_pool():
+    """Démarrer les processus de rendu des factures"""
+    render_pool.start()
 
 # Setup shutdown event
 @app.on_event("shutdown")
 async def shutdown_db_client():
     scheduler.shutdown()
+    await job_workers.stop()
+    await notification_engine.stop()
+    render_pool.shutdown()
+    if EMAIL_SERVICE_AVAILABLE and aloria_email_service.transport:
+        aloria_email_service.transport.close()
     client.close()
 
 # Mount Socket.IO sur un path spécifique pour ne pas écraser les routes API
@@ -4,7 +4,11 @@ from .user_service import create_user_account, verify_user_permissions, get_user
 from .client_service import create_client_profile, verify_client_dashboard_accessible
 from .assignment_service import assign_client_to_employee, find_least_busy_employee, reassign_client
 from .credentials_service import generate_temporary_password, generate_credentials_response
-from .notification_service import send_creation_notifications, send_welcome_email_notification
+from .notification_service import send_creation_notifications, send_welcome_email_notification, create_notifications_bulk
+from .notification_engine import notification_engine
+from .index_service import ensure_indexes, get_index_usage
+from .chat_service import record_chat_message, list_conversations
+from .job_queue import enqueue_job, register_job_handler
 
 __all__ = [
     'create_user_account',
@@ -18,5 +22,13 @@ __all__ = [
     'generate_temporary_password',
     'generate_credentials_response',
     'send_creation_notifications',
-    'send_welcome_email_notification'
+    'send_welcome_email_notification',
+    'create_notifications_bulk',
+    'notification_engine',
+    'ensure_indexes',
+    'get_index_usage',
+    'record_chat_message',
+    'list_conversations',
+    'enqueue_job',
+    'register_job_handler'
 ]
@@ -8,6 +8,8 @@ Gère l'auto-affectation, l'affectation manuelle et le load balancing.
 import logging
 from typing import Dict, Optional
 
+from .search_service import TYPE_CLIENT, queue_reindex
+
 logger = logging.getLogger(__name__)
 
 
@@ -191,6 +193,7 @@ async def reassign_client(
     )
     
     # Mettre à jour les cases associés
+    await queue_reindex(db, TYPE_CLIENT, client_id)
     client = await db.clients.find_one({"id": client_id})
     if client:
         await db.cases.update_many(
@@ -0,0 +1,153 @@
+"""
+Service de conversations chat - ALORIA AGENCY
+
+Maintient la collection 'chat_conversations': un document résumé par paire de
+participants (dernier message, date, compteur de non-lus par participant).
+La liste des conversations devient ainsi une seule lecture indexée au lieu d'un
+regroupement en Python de tout l'historique 'chat_messages'.
+
+Structure d'un document:
+    id: clé de la paire ("<id_min>:<id_max>")
+    participant_ids: [id_min, id_max]
+    participants: {user_id: {"name": ..., "role": ...}}
+    unread: {user_id: nombre de messages non lus par cet utilisateur}
+    last_message, last_message_time, last_message_id, last_sender_id
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def conversation_key(user_a: str, user_b: str) -> Tuple[str, List[str]]:
+    """
+    Clé canonique d'une conversation, indépendante de l'ordre des participants.
+
+    Returns:
+        Tuple (clé, [id_min, id_max])
+    """
+    participant_ids = sorted([user_a, user_b])
+    return ":".join(participant_ids), participant_ids
+
+
+def build_conversation_update(message: Dict) -> Tuple[Dict, Dict]:
+    """
+    Construit le filtre et la mise à jour (upsert) résumant un nouveau message.
+
+    Args:
+        message: Document 'chat_messages' (sender_*, receiver_*, message, timestamp)
+
+    Returns:
+        Tuple (filtre, mise à jour) à passer à update_one(..., upsert=True)
+    """
+    sender_id = message["sender_id"]
+    receiver_id = message["receiver_id"]
+    key, participant_ids = conversation_key(sender_id, receiver_id)
+
+    update = {
+        "$set": {
+            "participant_ids": participant_ids,
+            f"participants.{sender_id}": {
+                "name": message.get("sender_name"),
+                "role": message.get("sender_role")
+            },
+            f"participants.{receiver_id}": {
+                "name": message.get("receiver_name"),
+                "role": message.get("receiver_role")
+            },
+            "last_message": message.get("message"),
+            "last_message_time": message.get("timestamp"),
+            "last_message_id": message.get("id"),
+            "last_sender_id": sender_id,
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        },
+        "$inc": {f"unread.{receiver_id}": 1},
+        "$setOnInsert": {"created_at": datetime.now(timezone.utc).isoformat()}
+    }
+
+    if sender_id != receiver_id:
+        # Le compteur de l'expéditeur existe dès la création (lecture simplifiée)
+        update["$setOnInsert"][f"unread.{sender_id}"] = 0
+
+    return {"id": key}, update
+
+
+def conversation_for_user(conversation: Dict, user_id: str) -> Dict:
+    """
+    Présente un document 'chat_conversations' du point de vue d'un participant.
+
+    Returns:
+        Dict au format ChatConversation (participant_id, participant_name, ...)
+    """
+    participant_ids = conversation.get("participant_ids", [])
+    others = [pid for pid in participant_ids if pid != user_id]
+    other_id = others[0] if others else user_id
+    other = conversation.get("participants", {}).get(other_id, {})
+
+    return {
+        "participant_id": other_id,
+        "participant_name": other.get("name") or "",
+        "participant_role": other.get("role") or "",
+        "last_message": conversation.get("last_message"),
+        "last_message_time": conversation.get("last_message_time"),
+        "unread_count": max(0, conversation.get("unread", {}).get(user_id, 0))
+    }
+
+
+async def record_chat_message(db, message: Dict):
+    """
+    Met à jour atomiquement le résumé de conversation après l'insertion d'un message.
+
+    Args:
+        db: Instance de la base de données
+        message: Document inséré dans 'chat_messages'
+    """
+    query, update = build_conversation_update(message)
+    await db.chat_conversations.update_one(query, update, upsert=True)
+
+
+async def mark_conversation_read(db, user_id: str, participant_id: str, count: Optional[int] = None):
+    """
+    Met à jour le compteur de non-lus de user_id dans sa conversation avec participant_id.
+
+    Args:
+        db: Instance de la base de données
+        user_id: Utilisateur qui lit les messages
+        participant_id: Autre participant
+        count: Nombre de messages marqués lus (None = remise à zéro)
+    """
+    key, _ = conversation_key(user_id, participant_id)
+    field = f"unread.{user_id}"
+
+    if count is None:
+        await db.chat_conversations.update_one({"id": key}, {"$set": {field: 0}})
+        return
+    if count <= 0:
+        return
+
+    # Décrément borné à 0 (pipeline de mise à jour, atomique)
+    await db.chat_conversations.update_one(
+        {"id": key},
+        [{"$set": {field: {"$max": [0, {"$subtract": [{"$ifNull": [f"${field}", 0]}, count]}]}}}]
+    )
+
+
+async def list_conversations(db, user_id: str, limit: int = 1000) -> List[Dict]:
+    """
+    Liste les conversations d'un utilisateur, la plus récente en premier.
+
+    Args:
+        db: Instance de la base de données
+        user_id: ID de l'utilisateur
+        limit: Nombre maximum de conversations
+
+    Returns:
+        Liste de dicts au format ChatConversation
+    """
+    conversations = await db.chat_conversations.find(
+        {"participant_ids": user_id}, {"_id": 0}
+    ).sort("last_message_time", -1).limit(limit).to_list(limit)
+
+    return [conversation_for_user(conversation, user_id) for conversation in conversations]
@@ -13,6 +13,9 @@ import logging
 from datetime import datetime, timezone
 from typing import Dict, Optional, List
 
+from .ledger_service import PaymentStatus, SOURCE_PAYMENT, record_ledger_entry
+from .search_service import TYPE_CLIENT, queue_reindex
+
 logger = logging.getLogger(__name__)
 
 # Workflows par pays et type de visa (importé depuis server.py)
@@ -165,6 +168,7 @@ async def create_client_profile(
     }
     
     await db.cases.insert_one(case_dict)
+    await queue_reindex(db, TYPE_CLIENT, client_id)
     logger.info(f"Dossier (case) créé: {case_id} pour client {full_name}")
     
     # 4. Enregistrer le premier paiement si fourni
@@ -282,7 +286,7 @@ async def record_first_payment(
         "currency": "CFA",
         "payment_method": payment_method,
         "description": "Premier versement pour création de dossier client",
-        "status": "confirmed",
+        "status": PaymentStatus.CONFIRMED.value,
         "invoice_number": invoice_num,
         "created_at": datetime.now(timezone.utc).isoformat(),
         "declared_at": datetime.now(timezone.utc).isoformat(),
@@ -291,6 +295,7 @@ async def record_first_payment(
     }
     
     await db.payment_declarations.insert_one(payment_dict)
+    await record_ledger_entry(db, SOURCE_PAYMENT, payment_id, amount, created_by=confirmed_by)
     return payment_id
 
 
@@ -325,6 +330,44 @@ async def verify_client_dashboard_accessible(db, user_id: str) -> bool:
     return True
 
 
+async def resolve_case_client_names(db, client_ids, default: Optional[str] = "Unknown") -> Dict[str, str]:
+    """
+    Résout le nom du client de plusieurs dossiers en au plus trois requêtes.
+    
+    Les dossiers référencent le client soit par user_id (convention actuelle),
+    soit par l'id du profil client (anciens dossiers): les IDs non trouvés
+    dans 'users' sont recherchés dans 'clients' puis résolus via leur user_id.
+    
+    Args:
+        db: Instance de la base de données
+        client_ids: Valeurs 'client_id' des dossiers
+        default: Nom attribué aux clients introuvables
+    
+    Returns:
+        Dict {client_id: nom du client}
+    """
+    from .user_service import resolve_user_names
+    
+    ids = {client_id for client_id in client_ids if client_id}
+    names = await resolve_user_names(db, ids)
+    
+    missing = ids - names.keys()
+    if missing:
+        profiles = await db.clients.find(
+            {"id": {"$in": list(missing)}}, {"_id": 0, "id": 1, "user_id": 1}
+        ).to_list(None)
+        profile_names = await resolve_user_names(db, [p.get("user_id") for p in profiles])
+        for profile in profiles:
+            name = profile_names.get(profile.get("user_id"))
+            if name:
+                names[profile["id"]] = name
+    
+    for client_id in ids:
+        names.setdefault(client_id, default)
+    
+    return names
+
+
 async def get_client_dashboard_data(db, user_id: str) -> Dict:
     """
     Récupère toutes les données nécessaires pour le dashboard client.
@@ -0,0 +1,174 @@
+"""
+Index des noms d'employés - ALORIA AGENCY
+
+Attribue un prospect à l'employé cité dans le formulaire de contact public
+("referred_by_employee") sans requête $regex sur la saisie utilisateur.
+
+Index en mémoire des employés actifs, construit au démarrage et reconstruit
+paresseusement après invalidation (invalidate_cached_user / invalidate_role_members)
+ou expiration (TTL). Les noms sont normalisés comme la recherche globale
+("Hélène" == "helene") puis comparés par similarité de trigrammes, ce qui tolère
+les fautes de frappe ("Hélene Mbraga").
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from .search_service import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Similarité minimale (coefficient de Dice sur les trigrammes) pour attribuer un prospect
+DEFAULT_MATCH_THRESHOLD = 0.6
+
+# Longueur minimale d'un mot pour compter comme préfixe d'un nom ("Mar" oui, "Ma" non)
+MIN_PREFIX_LENGTH = 3
+
+
+def trigrams(text: str) -> Set[str]:
+    """Trigrammes d'un texte normalisé, mots bornés par des espaces ("ana" -> "  a", " an", "ana", "na ")"""
+    grams: Set[str] = set()
+    for token in text.split():
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def dice(a: Set[str], b: Set[str]) -> float:
+    """Coefficient de Dice entre deux ensembles de trigrammes"""
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def token_score(query_tokens: List[str], name_tokens: List[str]) -> float:
+    """
+    Score mot à mot: chaque mot de la requête est comparé au mot du nom le plus proche
+    (un préfixe d'au moins MIN_PREFIX_LENGTH lettres compte comme une correspondance:
+    "Marie" cite "Marie Ngono").
+
+    Returns:
+        float: Moyenne des meilleures similarités (0 à 1)
+    """
+    if not query_tokens or not name_tokens:
+        return 0.0
+    total = 0.0
+    for query_token in query_tokens:
+        best = 0.0
+        for name_token in name_tokens:
+            if len(query_token) >= MIN_PREFIX_LENGTH and name_token.startswith(query_token):
+                best = 1.0
+                break
+            best = max(best, dice(trigrams(query_token), trigrams(name_token)))
+        total += best
+    return total / len(query_tokens)
+
+
+class EmployeeNameIndex:
+    """Index trigramme -> employés actifs, avec reconstruction paresseuse"""
+
+    def __init__(self, ttl_seconds: float = 300.0, threshold: float = DEFAULT_MATCH_THRESHOLD):
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self._names: Dict[str, Tuple[str, str, List[str]]] = {}
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._expires_at = 0.0
+        self._refresh_lock = asyncio.Lock()
+        self.rebuilds = 0
+
+    def load(self, employees: List[Dict]):
+        """
+        Remplace le contenu de l'index.
+
+        Args:
+            employees: Documents {"id", "full_name"} des employés actifs
+        """
+        names, postings = {}, defaultdict(set)
+        for employee in employees:
+            normalized = normalize_text(employee.get("full_name"))
+            if not normalized:
+                continue
+            names[employee["id"]] = (employee["full_name"], normalized, normalized.split())
+            for gram in trigrams(normalized):
+                postings[gram].add(employee["id"])
+        self._names, self._postings = names, postings
+        self._expires_at = time.monotonic() + self.ttl_seconds
+        self.rebuilds += 1
+
+    async def refresh(self, db):
+        """Recharge les employés actifs depuis MongoDB"""
+        employees = await db.users.find(
+            {"role": "EMPLOYEE", "is_active": True}, {"_id": 0, "id": 1, "full_name": 1}
+        ).to_list(None)
+        self.load(employees)
+        logger.debug(f"Index des noms d'employés reconstruit ({len(self._names)} employés)")
+
+    def invalidate(self):
+        """Force la reconstruction à la prochaine recherche"""
+        self._expires_at = 0.0
+
+    def match(self, text: Optional[str]) -> Optional[Dict]:
+        """
+        Employé le plus proche d'un nom saisi.
+
+        Args:
+            text: Nom cité par le prospect
+
+        Returns:
+            Dict {"id", "full_name", "score"} ou None si aucun employé n'atteint le seuil
+            ou si plusieurs employés obtiennent le meilleur score (saisie ambiguë)
+        """
+        normalized = normalize_text(text)
+        if not normalized:
+            return None
+        query_grams = trigrams(normalized)
+        query_tokens = normalized.split()
+
+        # Candidats: employés partageant au moins un trigramme
+        candidates: Set[str] = set()
+        for gram in query_grams:
+            candidates |= self._postings.get(gram, set())
+
+        scored = []
+        for employee_id in candidates:
+            full_name, name_normalized, name_tokens = self._names[employee_id]
+            score = round(max(dice(query_grams, trigrams(name_normalized)), token_score(query_tokens, name_tokens)), 3)
+            if score >= self.threshold:
+                scored.append((score, employee_id, full_name))
+        if not scored:
+            return None
+
+        scored.sort(reverse=True)
+        if len(scored) > 1 and scored[1][0] == scored[0][0]:
+            logger.info(f"Nom d'employé ambigu, prospect non attribué: {text!r}")
+            return None
+        score, employee_id, full_name = scored[0]
+        return {"id": employee_id, "full_name": full_name, "score": score}
+
+    async def find_employee(self, db, text: Optional[str]) -> Optional[Dict]:
+        """
+        Comme match(), en reconstruisant l'index s'il est expiré ou invalidé.
+
+        Une seule reconstruction à la fois: les requêtes concurrentes attendent
+        celle en cours au lieu de relancer chacune un parcours des employés.
+        """
+        if self._expires_at < time.monotonic():
+            async with self._refresh_lock:
+                if self._expires_at < time.monotonic():
+                    await self.refresh(db)
+        return self.match(text)
+
+    def stats(self) -> Dict:
+        """Taille et nombre de reconstructions pour le monitoring"""
+        return {"employees": len(self._names), "trigrams": len(self._postings), "rebuilds": self.rebuilds}
+
+
+# Instance partagée par create_contact_message et les points d'invalidation
+employee_name_index = EmployeeNameIndex(
+    ttl_seconds=float(os.environ.get("EMPLOYEE_NAME_INDEX_TTL_SECONDS", "300")),
+    threshold=float(os.environ.get("EMPLOYEE_MATCH_THRESHOLD", str(DEFAULT_MATCH_THRESHOLD)))
+)
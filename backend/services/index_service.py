@@ -0,0 +1,262 @@
+"""
+Service de gestion des index MongoDB - ALORIA AGENCY
+
+Registre déclaratif de TOUS les index utilisés par server.py et les services.
+Chaque entrée correspond à une forme de requête réelle (find, sort, count_documents).
+Le registre est appliqué au démarrage de façon idempotente: un index déjà présent
+avec la même définition est ignoré par MongoDB.
+"""
+
+import logging
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+from .retention_service import NOTIFICATION_READ_TTL_DAYS, NOTIFICATION_READ_TTL_INDEX
+
+logger = logging.getLogger(__name__)
+
+
+def notification_read_ttl_indexes(days: int = NOTIFICATION_READ_TTL_DAYS) -> List[Dict]:
+    """Index TTL des notifications lues (aucun si la rétention est désactivée, days <= 0)"""
+    if days <= 0:
+        return []
+    return [
+        {"keys": [("read_at", ASCENDING)], "name": NOTIFICATION_READ_TTL_INDEX,
+         "expireAfterSeconds": days * 24 * 3600, "partialFilterExpression": {"read": True}},
+    ]
+
+
+# Registre déclaratif: collection -> liste d'index
+# Chaque index: keys (liste de (champ, direction)), name, options MongoDB supplémentaires
+INDEX_REGISTRY: Dict[str, List[Dict]] = {
+    "users": [
+        # get_current_user: find_one({"id": ...}) à CHAQUE requête authentifiée
+        {"keys": [("id", ASCENDING)], "name": "users_id_unique", "unique": True},
+        # login, register, forgot_password: find_one({"email": ...})
+        {"keys": [("email", ASCENDING)], "name": "users_email_unique", "unique": True},
+        # Listes par rôle (managers, employés actifs, superadmins à notifier)
+        {"keys": [("role", ASCENDING), ("is_active", ASCENDING)], "name": "users_role_active"},
+        # /admin/users: sort("created_at", -1)
+        {"keys": [("created_at", DESCENDING)], "name": "users_created_at"},
+    ],
+    "clients": [
+        {"keys": [("id", ASCENDING)], "name": "clients_id_unique", "unique": True},
+        {"keys": [("user_id", ASCENDING)], "name": "clients_user_id"},
+        # Employé: find({"assigned_employee_id": ...}) paginé par (created_at, id)
+        {"keys": [("assigned_employee_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)], "name": "clients_assigned_employee_created"},
+        # GET /clients: pagination par curseur (created_at, id)
+        {"keys": [("created_at", ASCENDING), ("id", ASCENDING)], "name": "clients_created_id"},
+    ],
+    "cases": [
+        {"keys": [("id", ASCENDING)], "name": "cases_id_unique", "unique": True},
+        # get_cases: find({"client_id": ...}) paginé par (created_at, id)
+        {"keys": [("client_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)], "name": "cases_client_created"},
+        # get_cases (manager): pagination par curseur (created_at, id), filtres statut/pays
+        {"keys": [("created_at", ASCENDING), ("id", ASCENDING)], "name": "cases_created_id"},
+        {"keys": [("status", ASCENDING), ("country", ASCENDING), ("created_at", ASCENDING)], "name": "cases_status_country_created"},
+        # Recherche: find(...).sort("updated_at", -1)
+        {"keys": [("client_id", ASCENDING), ("updated_at", DESCENDING)], "name": "cases_client_updated"},
+        # Statistiques dashboard par statut
+        {"keys": [("status", ASCENDING)], "name": "cases_status"},
+    ],
+    "notifications": [
+        {"keys": [("id", ASCENDING)], "name": "notifications_id"},
+        # get_notifications: find({"user_id": ...}).sort("created_at", -1)
+        {"keys": [("user_id", ASCENDING), ("created_at", DESCENDING)], "name": "notifications_user_created"},
+        # unread-count: count_documents({"user_id": ..., "read": False})
+        {"keys": [("user_id", ASCENDING), ("read", ASCENDING)], "name": "notifications_user_read"},
+        # Rétention: suppression des notifications lues (read_at posé à la lecture)
+        *notification_read_ttl_indexes(),
+    ],
+    "chat_messages": [
+        {"keys": [("id", ASCENDING)], "name": "chat_messages_id"},
+        # Historique d'une conversation: {sender_id, receiver_id} paginé par (timestamp, id)
+        {"keys": [("sender_id", ASCENDING), ("receiver_id", ASCENDING), ("timestamp", DESCENDING), ("id", DESCENDING)], "name": "chat_sender_receiver_ts_id"},
+        # Conversations et non-lus côté destinataire
+        {"keys": [("receiver_id", ASCENDING), ("read_status", ASCENDING)], "name": "chat_receiver_read"},
+        {"keys": [("receiver_id", ASCENDING), ("timestamp", DESCENDING)], "name": "chat_receiver_ts"},
+        {"keys": [("sender_id", ASCENDING), ("timestamp", DESCENDING)], "name": "chat_sender_ts"},
+    ],
+    "chat_conversations": [
+        # Une conversation par paire de participants (clé "<id_min>:<id_max>")
+        {"keys": [("id", ASCENDING)], "name": "chat_conversations_id_unique", "unique": True},
+        # /chat/conversations: find({"participant_ids": ...}).sort("last_message_time", -1)
+        {"keys": [("participant_ids", ASCENDING), ("last_message_time", DESCENDING)], "name": "chat_conversations_participant_time"},
+    ],
+    "unread_counters": [
+        # Un document de compteurs par utilisateur (initialisation concurrente sans doublon)
+        {"keys": [("user_id", ASCENDING)], "name": "unread_counters_user_unique", "unique": True},
+    ],
+    "messages": [
+        {"keys": [("client_id", ASCENDING), ("created_at", ASCENDING)], "name": "messages_client_created"},
+        {"keys": [("receiver_id", ASCENDING), ("read_status", ASCENDING)], "name": "messages_receiver_read"},
+    ],
+    "payment_declarations": [
+        {"keys": [("id", ASCENDING)], "name": "payment_declarations_id_unique", "unique": True},
+        # Historique client: find({"user_id": ...}).sort("declared_at", -1)
+        {"keys": [("user_id", ASCENDING), ("declared_at", DESCENDING)], "name": "payment_declarations_user_declared"},
+        # Paiements en attente / confirmés
+        {"keys": [("status", ASCENDING), ("declared_at", DESCENDING)], "name": "payment_declarations_status_declared"},
+        {"keys": [("declared_at", DESCENDING)], "name": "payment_declarations_declared"},
+    ],
+    "invoices": [
+        {"keys": [("invoice_number", ASCENDING)], "name": "invoices_number"},
+        {"keys": [("payment_id", ASCENDING)], "name": "invoices_payment_id"},
+    ],
+    "invoice_artifacts": [
+        # Un fichier rendu par facture et par type (le premier enregistré fait foi)
+        {"keys": [("invoice_number", ASCENDING), ("kind", ASCENDING)], "name": "invoice_artifacts_number_kind_unique", "unique": True},
+    ],
+    "payments": [
+        # Paiements consultation: find({"type": "consultation"}).sort("created_at", -1)
+        {"keys": [("type", ASCENDING), ("created_at", DESCENDING)], "name": "payments_type_created"},
+    ],
+    "search_index": [
+        # /search/global: {"prefixes": {"$all": [...]}, "type": ..., "owner_id": ...}
+        {"keys": [("prefixes", ASCENDING), ("type", ASCENDING)], "name": "search_index_prefixes_type"},
+        # Reconstruction: suppression des entrées non rafraîchies
+        {"keys": [("indexed_at", ASCENDING)], "name": "search_index_indexed_at"},
+    ],
+    "ledger_entries": [
+        # Une écriture par opération source (idempotence des enregistrements)
+        {"keys": [("source_type", ASCENDING), ("source_id", ASCENDING)], "name": "ledger_entries_source_unique", "unique": True},
+        {"keys": [("created_at", DESCENDING)], "name": "ledger_entries_created"},
+        # Réconciliation: écritures pas encore reportées dans le solde matérialisé
+        {"keys": [("recorded_at", ASCENDING)], "name": "ledger_entries_unapplied_recorded",
+         "partialFilterExpression": {"applied": False}},
+    ],
+    "withdrawals": [
+        {"keys": [("manager_id", ASCENDING), ("withdrawal_date", DESCENDING)], "name": "withdrawals_manager_date"},
+        {"keys": [("withdrawal_date", DESCENDING)], "name": "withdrawals_date"},
+    ],
+    "contact_messages": [
+        {"keys": [("id", ASCENDING)], "name": "contact_messages_id"},
+        {"keys": [("assigned_to", ASCENDING), ("created_at", DESCENDING)], "name": "contact_messages_assigned_created"},
+        {"keys": [("status", ASCENDING), ("created_at", DESCENDING)], "name": "contact_messages_status_created"},
+    ],
+    "visitors": [
+        {"keys": [("created_at", DESCENDING)], "name": "visitors_created"},
+        {"keys": [("id", ASCENDING)], "name": "visitors_id"},
+    ],
+    "user_activities": [
+        {"keys": [("timestamp", DESCENDING)], "name": "user_activities_ts"},
+        {"keys": [("user_id", ASCENDING), ("timestamp", DESCENDING)], "name": "user_activities_user_ts"},
+        # Connexions du jour: {"action": "login", "timestamp": ...}
+        {"keys": [("action", ASCENDING), ("timestamp", DESCENDING)], "name": "user_activities_action_ts"},
+    ],
+    "activity_logs": [
+        {"keys": [("timestamp", DESCENDING)], "name": "activity_logs_ts"},
+        {"keys": [("user_id", ASCENDING), ("timestamp", DESCENDING)], "name": "activity_logs_user_ts"},
+    ],
+    "jobs": [
+        {"keys": [("id", ASCENDING)], "name": "jobs_id_unique", "unique": True},
+        # Idempotence: une seule tâche par clé (tâches sans clé ignorées)
+        {"keys": [("idempotency_key", ASCENDING)], "name": "jobs_idempotency_key_unique", "unique": True, "sparse": True},
+        # claim_next_job: {status: pending, run_at <= now} trié par run_at
+        {"keys": [("status", ASCENDING), ("run_at", ASCENDING)], "name": "jobs_status_run_at"},
+        # Reprise des tâches dont le bail a expiré
+        {"keys": [("status", ASCENDING), ("locked_until", ASCENDING)], "name": "jobs_status_locked_until"},
+        # Lettres mortes triées par date d'échec
+        {"keys": [("status", ASCENDING), ("failed_at", DESCENDING)], "name": "jobs_status_failed_at"},
+        # Purge automatique des tâches terminées après 7 jours
+        {"keys": [("finished_at", ASCENDING)], "name": "jobs_finished_ttl",
+         "expireAfterSeconds": 7 * 24 * 3600, "partialFilterExpression": {"status": "done"}},
+    ],
+    "custom_workflows": [
+        {"keys": [("country", ASCENDING), ("visa_type", ASCENDING)], "name": "custom_workflows_country_visa"},
+    ],
+}
+
+
+async def ensure_indexes(db, registry: Dict[str, List[Dict]] = None) -> Dict:
+    """
+    Applique le registre d'index de façon idempotente.
+
+    Un échec sur un index (ex: doublons existants empêchant un index unique)
+    est journalisé et n'interrompt pas le démarrage.
+
+    Args:
+        db: Instance de la base de données
+        registry: Registre à appliquer (INDEX_REGISTRY par défaut)
+
+    Returns:
+        Dict contenant:
+        - created: noms des index appliqués
+        - failed: liste de {collection, name, error}
+    """
+    registry = registry or INDEX_REGISTRY
+    created = []
+    failed = []
+
+    for collection_name, indexes in registry.items():
+        collection = db[collection_name]
+        for spec in indexes:
+            options = {k: v for k, v in spec.items() if k != "keys"}
+            try:
+                await collection.create_index(spec["keys"], **options)
+                created.append(spec["name"])
+            except OperationFailure as e:
+                logger.error(f"❌ Index {collection_name}.{spec['name']} non créé: {e}")
+                failed.append({
+                    "collection": collection_name,
+                    "name": spec["name"],
+                    "error": str(e)
+                })
+
+    logger.info(f"✅ Index MongoDB vérifiés: {len(created)} appliqués, {len(failed)} en échec")
+    return {"created": created, "failed": failed}
+
+
+async def get_index_usage(db, registry: Dict[str, List[Dict]] = None) -> List[Dict]:
+    """
+    Rapporte l'utilisation des index via $indexStats pour chaque collection du registre.
+
+    Args:
+        db: Instance de la base de données
+        registry: Registre de référence (INDEX_REGISTRY par défaut)
+
+    Returns:
+        Liste de {collection, name, key, accesses, since, registered}
+        triée par nombre d'accès croissant (les index inutiles en premier)
+    """
+    registry = registry or INDEX_REGISTRY
+    usage = []
+
+    for collection_name, indexes in registry.items():
+        registered_names = {spec["name"] for spec in indexes}
+        try:
+            stats = await db[collection_name].aggregate([{"$indexStats": {}}]).to_list(None)
+        except OperationFailure as e:
+            logger.warning(f"$indexStats indisponible pour {collection_name}: {e}")
+            continue
+
+        seen = set()
+        for stat in stats:
+            seen.add(stat["name"])
+            accesses = stat.get("accesses", {})
+            since = accesses.get("since")
+            usage.append({
+                "collection": collection_name,
+                "name": stat["name"],
+                "key": dict(stat.get("key", {})),
+                "accesses": accesses.get("ops", 0),
+                "since": since.isoformat() if since else None,
+                "registered": stat["name"] in registered_names
+            })
+
+        # Index déclarés mais absents (création échouée)
+        for name in registered_names - seen:
+            usage.append({
+                "collection": collection_name,
+                "name": name,
+                "key": {},
+                "accesses": None,
+                "since": None,
+                "registered": True,
+                "missing": True
+            })
+
+    usage.sort(key=lambda u: (u["accesses"] is not None, u["accesses"] or 0))
+    return usage
@@ -0,0 +1,167 @@
+"""
+Service d'export des factures - ALORIA AGENCY
+
+Archive ZIP des factures PDF d'une période pour la comptabilité, diffusée au fil
+de l'eau: chaque PDF est ajouté puis immédiatement envoyé au client, la mémoire
+reste constante quel que soit le nombre de factures.
+
+Les PDF déjà rendus sont relus depuis le magasin de factures; les autres sont
+rendus en parallèle par le pool de processus (fenêtre bornée) puis mis en cache.
+L'archive se termine par 'factures.csv' (récapitulatif, erreurs éventuelles).
+"""
+
+import io
+import csv
+import codecs
+import asyncio
+import zipfile
+import logging
+import tempfile
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator, Dict, Optional
+
+from .ledger_service import PaymentStatus
+from .invoice_service import get_or_render_invoice_pdf, read_invoice_artifact
+from .render_pool import render_pool, RenderPoolSaturated
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "factures.csv"
+MANIFEST_FIELDS = ["invoice_number", "declared_at", "confirmed_at", "client_name", "amount", "currency", "status", "file"]
+SATURATION_RETRY_SECONDS = 1.0
+
+
+class ZipStreamSink(io.RawIOBase):
+    """Flux non positionnable dans lequel zipfile écrit; drain() récupère les octets produits"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def build_export_query(start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                       status: PaymentStatus = PaymentStatus.CONFIRMED, client_id: Optional[str] = None) -> Dict:
+    """
+    Filtre des déclarations de paiement à exporter (seulement celles qui ont une facture).
+
+    Args:
+        start_date: Déclarées à partir de cette date (incluse)
+        end_date: Déclarées avant cette date (exclue)
+        status: Statut de paiement
+        client_id: Client (id du profil ou id utilisateur)
+
+    Returns:
+        Dict: Filtre MongoDB sur payment_declarations
+    """
+    query = {
+        "status": status.query(),
+        "invoice_number": {"$exists": True, "$ne": None}
+    }
+    declared_at = {}
+    if start_date:
+        declared_at["$gte"] = start_date.isoformat()
+    if end_date:
+        declared_at["$lt"] = end_date.isoformat()
+    if declared_at:
+        query["declared_at"] = declared_at
+    if client_id:
+        query["$or"] = [{"client_id": client_id}, {"user_id": client_id}]
+    return query
+
+
+async def _invoice_pdf(db, payment: Dict) -> bytes:
+    """PDF d'une facture (cache ou rendu), en patientant si le pool est saturé"""
+    while True:
+        try:
+            artifact = await get_or_render_invoice_pdf(db, payment)
+            return await read_invoice_artifact(artifact)
+        except RenderPoolSaturated:
+            # L'export ne doit pas échouer en cours de flux: il laisse passer les téléchargements
+            await asyncio.sleep(SATURATION_RETRY_SECONDS)
+
+
+def _manifest_row(payment: Dict, file_name: str) -> Dict:
+    return {
+        "invoice_number": payment.get("invoice_number"),
+        "declared_at": payment.get("declared_at"),
+        "confirmed_at": payment.get("confirmed_at"),
+        "client_name": payment.get("client_name"),
+        "amount": payment.get("amount"),
+        "currency": payment.get("currency"),
+        "status": payment.get("status"),
+        "file": file_name
+    }
+
+
+async def stream_invoice_zip(db, query: Dict, concurrency: Optional[int] = None) -> AsyncIterator[bytes]:
+    """
+    Archive ZIP des factures correspondant au filtre, produite morceau par morceau.
+
+    Args:
+        db: Instance de la base de données
+        query: Filtre (build_export_query)
+        concurrency: Factures préparées en parallèle (défaut: processus du pool)
+
+    Yields:
+        bytes: Morceaux successifs de l'archive
+    """
+    window = concurrency or max(1, render_pool.max_workers)
+    sink = ZipStreamSink()
+    # Récapitulatif sur disque au-delà de 1 Mo
+    manifest = tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode="w+", encoding="utf-8", newline="")
+    writer = csv.DictWriter(manifest, fieldnames=MANIFEST_FIELDS)
+    writer.writeheader()
+    counts = {"exported": 0, "failed": 0}
+    pending = deque()
+    # PDF déjà compressés: stockage sans recompression
+    archive = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED)
+
+    async def flush_oldest():
+        payment, task = pending.popleft()
+        file_name = f"Facture_{payment['invoice_number']}.pdf"
+        try:
+            archive.writestr(file_name, await task)
+            counts["exported"] += 1
+        except Exception as e:
+            logger.error(f"❌ Export de la facture {payment['invoice_number']} impossible: {e}")
+            file_name = f"ERREUR: {e}"
+            counts["failed"] += 1
+        writer.writerow(_manifest_row(payment, file_name))
+
+    try:
+        cursor = db.payment_declarations.find(query, {"_id": 0}).sort("declared_at", 1)
+        async for payment in cursor:
+            pending.append((payment, asyncio.create_task(_invoice_pdf(db, payment))))
+            if len(pending) >= window:
+                await flush_oldest()
+                yield sink.drain()
+        while pending:
+            await flush_oldest()
+            yield sink.drain()
+
+        manifest.seek(0)
+        with archive.open(MANIFEST_NAME, mode="w") as entry:
+            entry.write(codecs.BOM_UTF8)  # Ouverture correcte dans Excel
+            for line in manifest:
+                entry.write(line.encode("utf-8"))
+        archive.close()
+        logger.info(f"📦 Export ZIP terminé: {counts['exported']} factures, {counts['failed']} erreurs")
+        yield sink.drain()
+    finally:
+        # Client déconnecté en cours d'export: abandonner les rendus en cours
+        for _, task in pending:
+            task.cancel()
+        manifest.close()
@@ -0,0 +1,280 @@
+"""
+Service de factures - ALORIA AGENCY
+
+Une facture confirmée est immuable: son PDF est rendu une seule fois (tâche
+'invoice.render_pdf' à la confirmation, ou à la première demande), stocké dans le
+magasin de blobs (services/invoice_store.py) sous une clé adressée par contenu,
+et référencé dans la collection 'invoice_artifacts':
+    {"invoice_number", "kind": "pdf", "key", "sha256", "size", "content_type", "created_at"}
+
+Les téléchargements suivants coûtent une lecture de fichier (ETag = sha256).
+La facture PNG (kind "png") suit le même chemin; les fichiers de l'ancien répertoire
+backend/invoices sont importés dans le magasin à leur première lecture.
+
+cleanup_orphan_artifacts() supprime (tâche planifiée) les fichiers qu'aucune
+facture ne référence plus.
+"""
+
+import os
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .ledger_service import PaymentStatus
+from .render_pool import render_pool
+from .invoice_store import shard_prefix
+
+logger = logging.getLogger(__name__)
+
+KIND_PDF = "pdf"
+KIND_PNG = "png"
+PDF_CONTENT_TYPE = "application/pdf"
+PNG_CONTENT_TYPE = "image/png"
+
+# Répertoire historique des factures (chemins /app/backend/invoices/<numéro>.png)
+LEGACY_INVOICE_DIR = os.environ.get(
+    "INVOICE_LEGACY_DIR", str(Path(__file__).resolve().parent.parent / "invoices")
+)
+# Un blob plus récent peut précéder de peu son enregistrement: il n'est jamais supprimé
+ORPHAN_GRACE_HOURS = 24
+CLEANUP_BATCH_SIZE = 500
+
+# Magasin de blobs, injecté par server.py via set_invoice_store()
+_store = None
+
+
+def set_invoice_store(store):
+    """Configure le magasin de blobs des factures (LocalBlobStore ou GridFSBlobStore)"""
+    global _store
+    _store = store
+
+
+def get_invoice_store():
+    """Magasin de blobs configuré"""
+    if _store is None:
+        raise RuntimeError("Magasin de factures non configuré (set_invoice_store)")
+    return _store
+
+
+def artifact_key(invoice_number: str, sha256: str, kind: str = KIND_PDF) -> str:
+    """Clé adressée par contenu d'un fichier de facture, dans le répertoire de son mois"""
+    return f"{shard_prefix(invoice_number)}/{invoice_number}-{sha256[:16]}.{kind}"
+
+
+async def build_invoice_data(db, payment: Dict) -> Dict:
+    """
+    Données de la facture PDF professionnelle d'un paiement (client résolu par
+    client_id ou user_id).
+
+    Args:
+        db: Instance de la base de données
+        payment: Déclaration de paiement
+
+    Returns:
+        Dict: invoice_data attendu par generate_professional_invoice_pdf
+    """
+    client_id = payment.get("client_id") or payment.get("user_id")
+    client = await db.clients.find_one({"id": client_id}) or await db.clients.find_one({"user_id": client_id})
+    user = await db.users.find_one({"id": client_id}) if client_id else None
+
+    client_name = "Client"
+    client_email = None
+    client_phone = None
+
+    if client:
+        client_name = client.get("full_name") or user.get("full_name", "Client") if user else "Client"
+        client_email = client.get("email") or user.get("email") if user else None
+        client_phone = client.get("phone") or user.get("phone") if user else None
+    elif user:
+        client_name = user.get("full_name", "Client")
+        client_email = user.get("email")
+        client_phone = user.get("phone")
+
+    confirmed = PaymentStatus.normalize(payment.get("status")) == PaymentStatus.CONFIRMED
+    return {
+        'invoice_number': payment.get("invoice_number"),
+        'client_name': client_name,
+        'client_email': client_email,
+        'client_phone': client_phone,
+        'amount': payment.get('amount', 0),
+        'currency': payment.get('currency', 'CFA'),
+        'payment_method': payment.get('payment_method', 'N/A'),
+        'description': payment.get('description', 'Services d\'immigration et conseil'),
+        'created_at': payment.get('created_at', datetime.now(timezone.utc).isoformat()),
+        'status': 'Confirmé' if confirmed else 'En attente'
+    }
+
+
+async def render_invoice_pdf(invoice_data: Dict) -> bytes:
+    """Rendu ReportLab de la facture PDF professionnelle (pool de processus)"""
+    return await render_pool.render_pdf(invoice_data)
+
+
+async def get_invoice_artifact(db, invoice_number: str, kind: str = KIND_PDF) -> Optional[Dict]:
+    """Fichier déjà rendu d'une facture, ou None"""
+    return await db.invoice_artifacts.find_one({"invoice_number": invoice_number, "kind": kind}, {"_id": 0})
+
+
+async def store_invoice_artifact(db, invoice_number: str, data: bytes, kind: str = KIND_PDF,
+                                 content_type: str = PDF_CONTENT_TYPE) -> Dict:
+    """
+    Stocke un fichier de facture et l'enregistre (le premier enregistré fait foi).
+
+    Args:
+        db: Instance de la base de données
+        invoice_number: Numéro de facture
+        data: Contenu du fichier
+        kind: Type de fichier (extension)
+        content_type: Type MIME servi
+
+    Returns:
+        Dict: Enregistrement invoice_artifacts retenu
+    """
+    store = get_invoice_store()
+    sha256 = hashlib.sha256(data).hexdigest()
+    key = artifact_key(invoice_number, sha256, kind)
+    await store.put(key, data)
+
+    artifact = {
+        "invoice_number": invoice_number,
+        "kind": kind,
+        "key": key,
+        "sha256": sha256,
+        "size": len(data),
+        "content_type": content_type,
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+    result = await db.invoice_artifacts.update_one(
+        {"invoice_number": invoice_number, "kind": kind},
+        {"$setOnInsert": artifact},
+        upsert=True
+    )
+    if result.upserted_id is None:
+        # Rendu concurrent déjà enregistré: il fait foi, ce blob est superflu
+        existing = await get_invoice_artifact(db, invoice_number, kind)
+        if existing and existing["key"] != key:
+            await store.delete(key)
+        return existing or artifact
+    return artifact
+
+
+async def get_or_render_invoice_pdf(db, payment: Dict) -> Dict:
+    """
+    PDF de la facture d'un paiement confirmé, rendu et stocké à la première demande.
+
+    Args:
+        db: Instance de la base de données
+        payment: Déclaration de paiement (avec invoice_number)
+
+    Returns:
+        Dict: Enregistrement invoice_artifacts (key, sha256, size, content_type)
+    """
+    invoice_number = payment["invoice_number"]
+    artifact = await get_invoice_artifact(db, invoice_number)
+    if artifact and await get_invoice_store().exists(artifact["key"]):
+        return artifact
+    if artifact:
+        # Blob perdu (volume remplacé...): nouveau rendu
+        logger.warning(f"⚠️ Fichier de la facture {invoice_number} introuvable, nouveau rendu")
+        await db.invoice_artifacts.delete_one({"invoice_number": invoice_number, "kind": KIND_PDF})
+
+    pdf_bytes = await render_invoice_pdf(await build_invoice_data(db, payment))
+    artifact = await store_invoice_artifact(db, invoice_number, pdf_bytes)
+    logger.info(f"✅ Facture PDF {invoice_number} rendue et stockée ({artifact['size']} octets)")
+    return artifact
+
+
+async def read_invoice_artifact(artifact: Dict, start: int = 0, end: Optional[int] = None) -> bytes:
+    """Contenu (ou intervalle [start, end]) d'un fichier de facture"""
+    return await get_invoice_store().read(artifact["key"], start, end)
+
+
+async def get_invoice_png(db, invoice_number: str) -> Optional[Dict]:
+    """
+    Facture PNG stockée, importée depuis le répertoire historique si nécessaire.
+
+    Args:
+        db: Instance de la base de données
+        invoice_number: Numéro de facture
+
+    Returns:
+        Dict: Enregistrement invoice_artifacts, ou None si la facture n'a jamais été rendue
+    """
+    artifact = await get_invoice_artifact(db, invoice_number, KIND_PNG)
+    if artifact and await get_invoice_store().exists(artifact["key"]):
+        return artifact
+
+    if Path(invoice_number).name != invoice_number:
+        return None  # Numéro de facture avec séparateurs de chemin
+    legacy_path = Path(LEGACY_INVOICE_DIR) / f"{invoice_number}.png"
+    if not await asyncio.to_thread(legacy_path.is_file):
+        return None
+    if artifact:
+        await db.invoice_artifacts.delete_one({"invoice_number": invoice_number, "kind": KIND_PNG})
+    data = await asyncio.to_thread(legacy_path.read_bytes)
+    logger.info(f"📥 Facture PNG {invoice_number} importée depuis {LEGACY_INVOICE_DIR}")
+    return await store_invoice_artifact(db, invoice_number, data, KIND_PNG, PNG_CONTENT_TYPE)
+
+
+async def _referenced_invoice_numbers(db, invoice_numbers: List[str]) -> set:
+    """Numéros encore référencés par une facture ou une déclaration de paiement"""
+    referenced = set(await db.invoices.distinct("invoice_number", {"invoice_number": {"$in": invoice_numbers}}))
+    missing = [number for number in invoice_numbers if number not in referenced]
+    if missing:
+        referenced.update(await db.payment_declarations.distinct(
+            "invoice_number", {"invoice_number": {"$in": missing}}
+        ))
+    return referenced
+
+
+async def cleanup_orphan_artifacts(db, grace_hours: float = ORPHAN_GRACE_HOURS) -> Dict:
+    """
+    Supprime les fichiers de factures orphelins:
+    - enregistrements invoice_artifacts dont la facture n'existe plus (ni dans
+      'invoices' ni dans 'payment_declarations'), avec leur blob
+    - blobs sans enregistrement (rendu interrompu, rendu concurrent perdant...),
+      plus anciens que grace_hours
+
+    Args:
+        db: Instance de la base de données
+        grace_hours: Âge minimal d'un blob non enregistré avant suppression
+
+    Returns:
+        Dict: {"records_removed", "blobs_removed"}
+    """
+    store = get_invoice_store()
+    report = {"records_removed": 0, "blobs_removed": 0}
+    known_keys = set()
+
+    batch = []
+    cursor = db.invoice_artifacts.find({}, {"_id": 0, "invoice_number": 1, "kind": 1, "key": 1})
+    async for artifact in cursor:
+        batch.append(artifact)
+        if len(batch) >= CLEANUP_BATCH_SIZE:
+            await _cleanup_artifact_batch(db, store, batch, known_keys, report)
+            batch = []
+    if batch:
+        await _cleanup_artifact_batch(db, store, batch, known_keys, report)
+
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=grace_hours)
+    for blob in await store.list_blobs():
+        if blob["key"] not in known_keys and blob["modified_at"] < cutoff:
+            await store.delete(blob["key"])
+            report["blobs_removed"] += 1
+
+    logger.info(f"🧹 Fichiers de factures orphelins supprimés: {report}")
+    return report
+
+
+async def _cleanup_artifact_batch(db, store, artifacts: List[Dict], known_keys: set, report: Dict):
+    referenced = await _referenced_invoice_numbers(db, list({a["invoice_number"] for a in artifacts}))
+    for artifact in artifacts:
+        if artifact["invoice_number"] in referenced:
+            known_keys.add(artifact["key"])
+            continue
+        await store.delete(artifact["key"])
+        await db.invoice_artifacts.delete_one({"invoice_number": artifact["invoice_number"], "kind": artifact["kind"]})
+        report["records_removed"] += 1
@@ -0,0 +1,149 @@
+"""
+Stockage des fichiers de factures - ALORIA AGENCY
+
+Magasin de blobs interchangeable (variable INVOICE_STORE):
+- "local" (défaut): fichiers sous INVOICE_STORE_ROOT, écriture atomique (fichier
+  temporaire puis renommage), I/O disque exécutées hors de la boucle asyncio
+- "gridfs": bucket GridFS 'invoice_blobs' de la base MongoDB
+
+Les clés sont adressées par contenu et réparties par année/mois de facturation
+("2024/01/<numéro>-<sha256[:16]>.pdf"): un blob n'est jamais réécrit, ce qui permet
+de le servir avec un ETag stable, et aucun répertoire ne contient toutes les factures.
+"""
+
+import os
+import re
+import asyncio
+import logging
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROOT = Path(__file__).resolve().parent.parent / "invoices" / "artifacts"
+
+# Numéros de facture "ALO-AAAAMMJJ-XXXXXXXX" (date de confirmation)
+INVOICE_DATE_PATTERN = re.compile(r"^[A-Z]+-(\d{4})(\d{2})\d{2}-")
+UNDATED_SHARD = "autres"
+
+
+def shard_prefix(invoice_number: str) -> str:
+    """Sous-répertoire année/mois d'une facture, déduit de son numéro"""
+    match = INVOICE_DATE_PATTERN.match(invoice_number or "")
+    return f"{match.group(1)}/{match.group(2)}" if match else UNDATED_SHARD
+
+
+class LocalBlobStore:
+    """Blobs dans un répertoire local"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root.resolve() not in path.parents:
+            raise ValueError(f"Clé de blob invalide: {key}")
+        return path
+
+    def _write(self, key: str, data: bytes):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def _read(self, key: str, start: int, end: Optional[int]) -> bytes:
+        with open(self._path(key), "rb") as blob:
+            blob.seek(start)
+            return blob.read() if end is None else blob.read(end - start + 1)
+
+    async def put(self, key: str, data: bytes):
+        """Écrit un blob (atomique: jamais de fichier partiel visible)"""
+        await asyncio.to_thread(self._write, key, data)
+
+    async def read(self, key: str, start: int = 0, end: Optional[int] = None) -> bytes:
+        """Lit un blob, ou l'intervalle d'octets [start, end] inclus"""
+        return await asyncio.to_thread(self._read, key, start, end)
+
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(self._path(key).is_file)
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self._path(key).unlink, True)
+
+    async def list_blobs(self) -> List[Dict]:
+        """Tous les blobs: {"key" (chemin relatif à la racine), "size", "modified_at"}"""
+        def walk():
+            if not self.root.is_dir():
+                return []
+            blobs = []
+            for path in self.root.rglob("*"):
+                if path.is_file() and not path.name.startswith(".tmp-"):
+                    stat = path.stat()
+                    blobs.append({
+                        "key": path.relative_to(self.root).as_posix(),
+                        "size": stat.st_size,
+                        "modified_at": datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+                    })
+            return blobs
+        return await asyncio.to_thread(walk)
+
+
+class GridFSBlobStore:
+    """Blobs dans un bucket GridFS (partagés entre serveurs sans volume commun)"""
+
+    def __init__(self, db, bucket_name: str = "invoice_blobs"):
+        from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+        self._files = db[f"{bucket_name}.files"]
+        self._bucket = AsyncIOMotorGridFSBucket(db, bucket_name=bucket_name)
+
+    async def put(self, key: str, data: bytes):
+        if await self.exists(key):
+            return  # Adressé par contenu: déjà présent
+        await self._bucket.upload_from_stream(key, data)
+
+    async def read(self, key: str, start: int = 0, end: Optional[int] = None) -> bytes:
+        stream = await self._bucket.open_download_stream_by_name(key)
+        stream.seek(start)
+        return await stream.read() if end is None else await stream.read(end - start + 1)
+
+    async def exists(self, key: str) -> bool:
+        return await self._files.find_one({"filename": key}, {"_id": 1}) is not None
+
+    async def delete(self, key: str):
+        async for grid_file in self._files.find({"filename": key}, {"_id": 1}):
+            await self._bucket.delete(grid_file["_id"])
+
+    async def list_blobs(self) -> List[Dict]:
+        blobs = []
+        async for grid_file in self._files.find({}, {"filename": 1, "length": 1, "uploadDate": 1}):
+            blobs.append({
+                "key": grid_file["filename"],
+                "size": grid_file["length"],
+                "modified_at": grid_file["uploadDate"].replace(tzinfo=timezone.utc)
+            })
+        return blobs
+
+
+def create_blob_store(db):
+    """
+    Magasin de blobs configuré par l'environnement.
+
+    Args:
+        db: Instance de la base de données (utilisée par GridFS)
+    """
+    backend = os.environ.get("INVOICE_STORE", "local").lower()
+    if backend == "gridfs":
+        logger.info("🗄️ Factures stockées dans GridFS (bucket invoice_blobs)")
+        return GridFSBlobStore(db)
+    root = os.environ.get("INVOICE_STORE_ROOT", str(DEFAULT_ROOT))
+    logger.info(f"🗄️ Factures stockées dans {root}")
+    return LocalBlobStore(root)
@@ -0,0 +1,296 @@
+"""
+Service de file de tâches durable - ALORIA AGENCY
+
+Les effets de bord lents ou faillibles (e-mails SendGrid, rendu de factures,
+diffusion de notifications) sont persistés dans la collection 'jobs' puis exécutés
+par des workers asyncio en arrière-plan. Les endpoints enregistrent la tâche et
+répondent immédiatement.
+
+Garanties:
+- Durabilité: une tâche survit à un redémarrage (bail expiré = tâche reprise)
+- Idempotence: idempotency_key unique (index sparse), un doublon n'est pas ré-enregistré
+- Reprises: backoff exponentiel jusqu'à max_attempts
+- Lettres mortes: statut "dead" après épuisement des tentatives, relançable par un admin
+
+Les handlers sont enregistrés par type via register_job_handler() et reçoivent
+(db, payload). L'exécution est "au moins une fois": un handler doit tolérer d'être
+rejoué après un échec partiel.
+"""
+
+import os
+import uuid
+import random
+import asyncio
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+# Statuts d'une tâche
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_DEAD = "dead"
+
+DEFAULT_MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 15 * 60
+# Durée du bail d'un worker sur une tâche: au-delà, la tâche est reprise par un autre
+LEASE_SECONDS = 5 * 60
+
+JobHandler = Callable[[object, Dict], Awaitable[Optional[Dict]]]
+_handlers: Dict[str, JobHandler] = {}
+
+
+class PermanentJobError(Exception):
+    """Erreur définitive: la tâche passe directement en lettre morte, sans reprise"""
+    pass
+
+
+def register_job_handler(job_type: str, handler: JobHandler):
+    """
+    Enregistre le handler d'un type de tâche.
+
+    Args:
+        job_type: Type de tâche (ex: "email.prospect_welcome")
+        handler: Coroutine (db, payload) -> résultat optionnel
+    """
+    _handlers[job_type] = handler
+
+
+def compute_backoff(attempts: int, base: float = BACKOFF_BASE_SECONDS,
+                    cap: float = BACKOFF_MAX_SECONDS, jitter: float = 0.1) -> float:
+    """
+    Délai avant la prochaine tentative (exponentiel, borné, avec gigue).
+
+    Args:
+        attempts: Nombre de tentatives déjà effectuées (>= 1)
+        base: Délai après la première tentative
+        cap: Délai maximum
+        jitter: Fraction aléatoire ajoutée (évite les reprises synchronisées)
+
+    Returns:
+        float: Délai en secondes
+    """
+    delay = min(cap, base * (2 ** max(0, attempts - 1)))
+    return delay + delay * jitter * random.random()
+
+
+async def enqueue_job(
+    db,
+    job_type: str,
+    payload: Dict,
+    idempotency_key: Optional[str] = None,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    delay_seconds: float = 0,
+    redact_on_success: bool = False
+) -> str:
+    """
+    Enregistre une tâche à exécuter en arrière-plan.
+
+    Args:
+        db: Instance de la base de données
+        job_type: Type de tâche (doit avoir un handler enregistré)
+        payload: Données passées au handler (sérialisables BSON)
+        idempotency_key: Clé unique; si une tâche existe déjà avec cette clé,
+                         elle est renvoyée au lieu d'en créer une nouvelle
+        max_attempts: Nombre maximum de tentatives avant lettre morte
+        delay_seconds: Délai avant la première exécution
+        redact_on_success: Effacer le payload après succès ou lettre morte (données sensibles);
+                           une tâche ainsi effacée n'est plus relançable
+
+    Returns:
+        str: ID de la tâche (existante si doublon d'idempotency_key)
+    """
+    now = datetime.now(timezone.utc)
+    job = {
+        "id": str(uuid.uuid4()),
+        "type": job_type,
+        "payload": payload,
+        "status": JOB_PENDING,
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "run_at": now + timedelta(seconds=delay_seconds),
+        "redact_on_success": redact_on_success,
+        "last_error": None,
+        "created_at": now,
+        "updated_at": now
+    }
+    # Champ absent (et non null) sans clé: l'index unique sparse l'ignore
+    if idempotency_key:
+        job["idempotency_key"] = idempotency_key
+
+    try:
+        await db.jobs.insert_one(job)
+    except DuplicateKeyError:
+        existing = await db.jobs.find_one({"idempotency_key": idempotency_key}, {"_id": 0, "id": 1})
+        logger.info(f"Tâche {job_type} déjà enregistrée (clé {idempotency_key})")
+        return existing["id"] if existing else job["id"]
+
+    job_workers.wake()
+    return job["id"]
+
+
+async def claim_next_job(db, worker_id: str) -> Optional[Dict]:
+    """
+    Réserve atomiquement la prochaine tâche exécutable.
+
+    Une tâche est exécutable si elle est en attente et due, ou si le bail du
+    worker qui l'exécutait a expiré (worker arrêté en cours d'exécution).
+
+    Returns:
+        Dict de la tâche réservée ou None
+    """
+    now = datetime.now(timezone.utc)
+    return await db.jobs.find_one_and_update(
+        {"$or": [
+            {"status": JOB_PENDING, "run_at": {"$lte": now}},
+            {"status": JOB_RUNNING, "locked_until": {"$lt": now}}
+        ]},
+        {
+            "$set": {
+                "status": JOB_RUNNING,
+                "locked_by": worker_id,
+                "locked_until": now + timedelta(seconds=LEASE_SECONDS),
+                "updated_at": now
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("run_at", 1)],
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def run_job(db, job: Dict) -> str:
+    """
+    Exécute une tâche réservée et enregistre son issue.
+
+    Returns:
+        str: Nouveau statut (done, pending pour reprise, ou dead)
+    """
+    now = datetime.now(timezone.utc)
+    handler = _handlers.get(job["type"])
+
+    try:
+        if handler is None:
+            raise PermanentJobError(f"Aucun handler pour le type {job['type']}")
+        result = await handler(db, job.get("payload") or {})
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        permanent = isinstance(e, PermanentJobError)
+
+        if permanent or job["attempts"] >= job.get("max_attempts", DEFAULT_MAX_ATTEMPTS):
+            dead = {"status": JOB_DEAD, "last_error": error, "failed_at": now, "updated_at": now}
+            if job.get("redact_on_success"):
+                # Abandon définitif: les données sensibles ne sont pas conservées
+                dead.update({"payload": {}, "payload_redacted": True})
+            await db.jobs.update_one(
+                {"id": job["id"]},
+                {"$set": dead, "$unset": {"locked_by": "", "locked_until": ""}}
+            )
+            logger.error(f"❌ Tâche {job['type']} {job['id']} en lettre morte après {job['attempts']} tentative(s): {error}")
+            return JOB_DEAD
+
+        delay = compute_backoff(job["attempts"])
+        await db.jobs.update_one(
+            {"id": job["id"]},
+            {"$set": {"status": JOB_PENDING, "last_error": error,
+                      "run_at": now + timedelta(seconds=delay), "updated_at": now},
+             "$unset": {"locked_by": "", "locked_until": ""}}
+        )
+        logger.warning(f"⚠️ Tâche {job['type']} {job['id']} échouée (tentative {job['attempts']}), reprise dans {delay:.0f}s: {error}")
+        return JOB_PENDING
+
+    update = {"status": JOB_DONE, "result": result, "finished_at": now, "updated_at": now}
+    if job.get("redact_on_success"):
+        update["payload"] = {}
+    await db.jobs.update_one(
+        {"id": job["id"]},
+        {"$set": update, "$unset": {"locked_by": "", "locked_until": ""}}
+    )
+    return JOB_DONE
+
+
+async def list_dead_jobs(db, limit: int = 100) -> List[Dict]:
+    """Tâches en lettre morte, les plus récentes en premier"""
+    return await db.jobs.find(
+        {"status": JOB_DEAD}, {"_id": 0, "payload": 0}
+    ).sort("failed_at", -1).limit(limit).to_list(limit)
+
+
+async def retry_dead_job(db, job_id: str) -> bool:
+    """
+    Remet une tâche en lettre morte dans la file (tentatives remises à zéro).
+    Une tâche dont le payload a été effacé n'est pas relançable.
+
+    Returns:
+        bool: True si la tâche a été relancée
+    """
+    now = datetime.now(timezone.utc)
+    result = await db.jobs.update_one(
+        {"id": job_id, "status": JOB_DEAD, "payload_redacted": {"$ne": True}},
+        {"$set": {"status": JOB_PENDING, "attempts": 0, "run_at": now, "updated_at": now}}
+    )
+    if result.modified_count:
+        job_workers.wake()
+    return bool(result.modified_count)
+
+
+class JobWorkerPool:
+    """Pool de coroutines qui consomment la collection 'jobs'"""
+
+    def __init__(self, poll_interval: float = 5.0):
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._db = None
+
+    def wake(self):
+        """Réveille les workers en attente (nouvelle tâche enregistrée)"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self, db, concurrency: int = 2):
+        """Démarre `concurrency` workers dans la boucle asyncio courante"""
+        if self._tasks:
+            return
+        self._db = db
+        self._wakeup = asyncio.Event()
+        for index in range(concurrency):
+            worker_id = f"{os.getpid()}-{index}-{uuid.uuid4().hex[:6]}"
+            self._tasks.append(asyncio.create_task(self._run(worker_id)))
+        logger.info(f"✅ File de tâches démarrée ({concurrency} worker(s))")
+
+    async def stop(self):
+        """Arrête les workers (les tâches en cours seront reprises à l'expiration du bail)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self, worker_id: str):
+        while True:
+            try:
+                job = await claim_next_job(self._db, worker_id)
+                if job is None:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await run_job(self._db, job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Erreur du worker {worker_id}: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+
+# Pool partagé, démarré au startup de l'application
+job_workers = JobWorkerPool(poll_interval=float(os.environ.get("JOB_POLL_INTERVAL_SECONDS", "5")))
@@ -0,0 +1,297 @@
+"""
+Service de grand livre (ledger) et solde de l'entreprise - ALORIA AGENCY
+
+Chaque mouvement d'argent est une écriture immuable de 'ledger_entries':
+    {"id", "source_type": "payment" | "withdrawal", "source_id", "amount", "delta",
+     "currency", "created_by", "created_at", "recorded_at", "applied"}
+
+- source_type + source_id est unique: enregistrer deux fois la même source est sans effet
+- delta est signé (+ paiement confirmé, - retrait)
+- applied passe à True une fois l'écriture reportée dans le solde matérialisé
+  (absent sur les écritures antérieures: considérées comme reportées)
+
+Le solde matérialisé (collection 'company_balance', document unique) est mis à jour
+par $inc atomique à chaque nouvelle écriture: GET /balance/current est une simple
+lecture. La réconciliation planifiée (reconcile_ledger) ajoute les écritures
+manquantes à partir des collections brutes et corrige un éventuel écart du solde.
+"""
+
+import uuid
+import logging
+from enum import Enum
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+SOURCE_PAYMENT = "payment"
+SOURCE_WITHDRAWAL = "withdrawal"
+
+# Document unique du solde (même filtre que les versions précédentes)
+BALANCE_FILTER: Dict = {}
+BALANCE_FIELDS = ("current_balance", "total_payments", "total_withdrawals")
+
+# Tentatives de correction du solde quand un $inc concurrent le modifie
+RECONCILE_ATTEMPTS = 3
+
+# Écriture non reportée au-delà de ce délai: enregistrement interrompu (processus arrêté)
+UNAPPLIED_GRACE_SECONDS = 600
+
+
+class PaymentStatus(str, Enum):
+    """
+    Statut d'une déclaration de paiement.
+
+    Les valeurs sont celles écrites par les endpoints (et attendues par le frontend).
+    Des documents historiques contiennent d'autres casses ("confirmed"): les requêtes
+    utilisent variants() et la lecture normalize(), sans réécrire les données.
+    """
+    PENDING = "pending"
+    CONFIRMED = "CONFIRMED"
+    REJECTED = "REJECTED"
+
+    @classmethod
+    def normalize(cls, value: Optional[str]) -> Optional["PaymentStatus"]:
+        """Statut correspondant à une valeur stockée, quelle que soit sa casse"""
+        if not value:
+            return None
+        for status in cls:
+            if status.value.lower() == value.lower():
+                return status
+        return None
+
+    def variants(self) -> List[str]:
+        """Valeurs stockées possibles, pour un filtre {"status": {"$in": ...}}"""
+        return sorted({self.value, self.value.lower(), self.value.upper()})
+
+    def query(self) -> Dict:
+        """Filtre MongoDB sur ce statut (toutes casses)"""
+        return {"$in": self.variants()}
+
+
+def build_ledger_entry(
+    source_type: str,
+    source_id: str,
+    amount: float,
+    currency: str = "CFA",
+    created_by: Optional[str] = None,
+    created_at: Optional[str] = None
+) -> Dict:
+    """
+    Construit une écriture de grand livre.
+
+    Args:
+        source_type: SOURCE_PAYMENT (entrée) ou SOURCE_WITHDRAWAL (sortie)
+        source_id: ID du paiement ou du retrait
+        amount: Montant positif
+        currency: Devise
+        created_by: Auteur de l'opération
+        created_at: Date ISO de l'opération (défaut: maintenant)
+
+    Returns:
+        Dict: Écriture prête à insérer
+    """
+    amount = float(amount or 0)
+    return {
+        "id": str(uuid.uuid4()),
+        "source_type": source_type,
+        "source_id": source_id,
+        "amount": amount,
+        "delta": -amount if source_type == SOURCE_WITHDRAWAL else amount,
+        "currency": currency,
+        "created_by": created_by,
+        "created_at": created_at or datetime.now(timezone.utc).isoformat(),
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "applied": False
+    }
+
+
+def _balance_increment(entries: List[Dict]) -> Dict:
+    """Incréments du solde matérialisé pour des écritures"""
+    payments = sum(e["amount"] for e in entries if e["source_type"] == SOURCE_PAYMENT)
+    withdrawals = sum(e["amount"] for e in entries if e["source_type"] == SOURCE_WITHDRAWAL)
+    return {
+        "current_balance": payments - withdrawals,
+        "total_payments": payments,
+        "total_withdrawals": withdrawals
+    }
+
+
+async def _apply_to_balance(db, entries: List[Dict]):
+    if not entries:
+        return
+    await db.company_balance.update_one(
+        BALANCE_FILTER,
+        {
+            "$inc": _balance_increment(entries),
+            "$set": {"last_updated": datetime.now(timezone.utc).isoformat()}
+        },
+        upsert=True
+    )
+
+
+async def _insert_and_apply(db, entry: Dict) -> bool:
+    """Insère une écriture, la reporte dans le solde puis la marque reportée (False si doublon)"""
+    try:
+        await db.ledger_entries.insert_one(entry)
+    except DuplicateKeyError:
+        return False
+    await _apply_to_balance(db, [entry])
+    await db.ledger_entries.update_one({"id": entry["id"]}, {"$set": {"applied": True}})
+    return True
+
+
+async def record_ledger_entry(
+    db,
+    source_type: str,
+    source_id: str,
+    amount: float,
+    currency: str = "CFA",
+    created_by: Optional[str] = None
+) -> bool:
+    """
+    Ajoute l'écriture d'une opération et met à jour le solde matérialisé.
+
+    Args:
+        db: Instance de la base de données
+        source_type: SOURCE_PAYMENT ou SOURCE_WITHDRAWAL
+        source_id: ID du paiement ou du retrait
+        amount: Montant positif
+        currency: Devise
+        created_by: Auteur de l'opération
+
+    Returns:
+        bool: False si l'opération était déjà enregistrée
+    """
+    entry = build_ledger_entry(source_type, source_id, amount, currency, created_by)
+    return await _insert_and_apply(db, entry)
+
+
+async def get_company_balance(db) -> Dict:
+    """
+    Solde matérialisé de l'entreprise (une lecture, aucune écriture).
+
+    Returns:
+        Dict: current_balance, total_payments, total_withdrawals, last_updated
+    """
+    balance = await db.company_balance.find_one(BALANCE_FILTER, {"_id": 0}) or {}
+    return {
+        "current_balance": float(balance.get("current_balance", 0.0)),
+        "total_payments": float(balance.get("total_payments", 0.0)),
+        "total_withdrawals": float(balance.get("total_withdrawals", 0.0)),
+        "last_updated": balance.get("last_updated") or datetime.now(timezone.utc).isoformat()
+    }
+
+
+async def _missing_entries(db, source_type: str, collection: str, query: Dict, date_field: str) -> List[Dict]:
+    """Écritures absentes du grand livre pour les documents sources d'une collection"""
+    recorded = set(await db.ledger_entries.distinct("source_id", {"source_type": source_type}))
+    sources = await db[collection].find(
+        query, {"_id": 0, "id": 1, "amount": 1, "currency": 1, date_field: 1}
+    ).to_list(None)
+    return [
+        build_ledger_entry(
+            source_type, source["id"], source.get("amount", 0), source.get("currency", "CFA"),
+            created_by="reconciliation", created_at=source.get(date_field)
+        )
+        for source in sources
+        if source.get("id") and source["id"] not in recorded
+    ]
+
+
+async def _ledger_totals(db) -> Dict:
+    """Totaux recalculés à partir du grand livre"""
+    rows = await db.ledger_entries.aggregate([
+        {"$group": {"_id": "$source_type", "total": {"$sum": "$amount"}}}
+    ]).to_list(None)
+    totals = {row["_id"]: row["total"] for row in rows}
+    payments = totals.get(SOURCE_PAYMENT, 0.0)
+    withdrawals = totals.get(SOURCE_WITHDRAWAL, 0.0)
+    return {
+        "current_balance": payments - withdrawals,
+        "total_payments": payments,
+        "total_withdrawals": withdrawals
+    }
+
+
+async def _correct_balance(db) -> float:
+    """
+    Corrige le solde matérialisé depuis le grand livre sans écraser une écriture concurrente.
+
+    Le solde est lu avant le grand livre, puis l'écart est appliqué par $inc à condition que
+    last_updated n'ait pas changé entre-temps; sinon la lecture est recommencée.
+    Tant qu'une écriture insérée n'est pas encore reportée dans le solde (applied False),
+    la correction est reportée: le $inc de l'endpoint est en cours et serait compté deux fois.
+
+    Returns:
+        float: Écart constaté sur current_balance (matérialisé - grand livre)
+    """
+    # Écritures jamais reportées (enregistrement interrompu): le recalcul ci-dessous
+    # corrige le solde qu'elles y aient été ajoutées ou non
+    cutoff = (datetime.now(timezone.utc) - timedelta(seconds=UNAPPLIED_GRACE_SECONDS)).isoformat()
+    stale = await db.ledger_entries.update_many(
+        {"applied": False, "recorded_at": {"$lt": cutoff}}, {"$set": {"applied": True}}
+    )
+    if stale.modified_count:
+        logger.warning(f"⚠️ {stale.modified_count} écriture(s) non reportée(s) dans le solde: recalcul")
+
+    drift = 0.0
+    for _ in range(RECONCILE_ATTEMPTS):
+        snapshot = await db.company_balance.find_one(BALANCE_FILTER, {"_id": 0}) or {}
+        expected = await _ledger_totals(db)
+        increment = {field: expected[field] - float(snapshot.get(field, 0.0)) for field in BALANCE_FIELDS}
+        drift = round(-increment["current_balance"], 2)
+        if not any(round(value, 2) for value in increment.values()):
+            return drift
+        if await db.ledger_entries.find_one({"applied": False}, {"_id": 0, "id": 1}):
+            logger.info("🧾 Écriture en cours de report dans le solde: correction reportée au prochain passage")
+            return drift
+
+        result = await db.company_balance.update_one(
+            {**BALANCE_FILTER, "last_updated": snapshot.get("last_updated")},
+            {"$inc": increment, "$set": {"last_updated": datetime.now(timezone.utc).isoformat()}},
+            upsert=not snapshot
+        )
+        if result.matched_count or result.upserted_id is not None:
+            logger.warning(f"⚠️ Écart du solde matérialisé ({drift} CFA): correction depuis le grand livre")
+            return drift
+
+    logger.warning("⚠️ Solde modifié pendant la réconciliation: correction reportée au prochain passage")
+    return drift
+
+
+async def reconcile_ledger(db) -> Dict:
+    """
+    Vérifie le grand livre contre les collections brutes (tâche planifiée).
+
+    1. Ajoute les écritures manquantes (paiements confirmés, retraits sans écriture),
+       y compris l'historique antérieur au grand livre au premier passage
+    2. Recalcule le solde depuis le grand livre et corrige le solde matérialisé en cas d'écart
+       (par $inc conditionnel, voir _correct_balance)
+
+    Returns:
+        Dict: {"missing_payments", "missing_withdrawals", "drift"}
+    """
+    missing_payments = await _missing_entries(
+        db, SOURCE_PAYMENT, "payment_declarations", {"status": PaymentStatus.CONFIRMED.query()}, "confirmed_at"
+    )
+    missing_withdrawals = await _missing_entries(
+        db, SOURCE_WITHDRAWAL, "withdrawals", {}, "withdrawal_date"
+    )
+
+    for entry in missing_payments + missing_withdrawals:
+        # Doublon: enregistrée entre-temps par l'endpoint (qui met aussi à jour le solde)
+        await _insert_and_apply(db, entry)
+
+    drift = await _correct_balance(db)
+
+    report = {
+        "missing_payments": len(missing_payments),
+        "missing_withdrawals": len(missing_withdrawals),
+        "drift": drift
+    }
+    if missing_payments or missing_withdrawals or drift:
+        logger.info(f"🧾 Réconciliation du grand livre: {report}")
+    return report
@@ -0,0 +1,360 @@
+"""
+Moteur de notifications - ALORIA AGENCY
+
+Point d'entrée unique pour créer des notifications in-app. Il gère:
+- la persistance (collection 'notifications')
+- la diffusion temps réel (événement Socket.IO 'new_notification')
+- le compteur de non-lus du destinataire (services/unread_counters.py)
+- le regroupement des écritures: tampon write-behind qui regroupe les rafales
+  en un insert_many, vidé toutes les NOTIFICATION_FLUSH_INTERVAL_MS ou dès que
+  NOTIFICATION_MAX_BATCH notifications sont en attente
+- la limitation par type: au plus N notifications d'un type par utilisateur
+  sur une fenêtre glissante (NOTIFICATION_RATE_LIMITS, ex: "message=10/60")
+
+L'événement temps réel est émis APRÈS l'écriture: une notification reçue est
+toujours visible via GET /notifications.
+
+Le tampon n'est actif qu'entre start() et stop() (startup/shutdown de l'application);
+hors de cette fenêtre (scripts, tâches isolées) chaque notification est écrite
+immédiatement. stop() vide le tampon.
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from .presence_service import role_room, user_room
+from .unread_counters import COUNTER_NOTIFICATIONS, increment_unread, increment_unread_many
+from .user_cache import role_members_cache
+
+logger = logging.getLogger(__name__)
+
+# Limites par défaut: (nombre maximum, fenêtre en secondes) par utilisateur et par type
+DEFAULT_RATE_LIMITS: Dict[str, Tuple[int, float]] = {
+    "message": (10, 60),
+}
+
+# Nombre d'échecs d'écriture avant abandon d'une notification du tampon
+MAX_FLUSH_ATTEMPTS = 3
+
+
+def parse_rate_limits(spec: str) -> Dict[str, Tuple[int, float]]:
+    """
+    Analyse une configuration de limites "type=max/secondes,type2=max/secondes".
+
+    Args:
+        spec: Chaîne de configuration (ex: "message=10/60,urgent_followup_48h=20/3600")
+
+    Returns:
+        Dict type -> (max, fenêtre en secondes)
+    """
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        notification_type, _, rule = item.partition("=")
+        count, _, window = rule.partition("/")
+        try:
+            limits[notification_type.strip()] = (int(count), float(window))
+        except ValueError:
+            logger.warning(f"⚠️ Limite de notifications ignorée (format attendu type=max/secondes): {item}")
+    return limits
+
+
+def build_notification(
+    user_id: str,
+    title: str,
+    message: str,
+    notification_type: str,
+    related_id: Optional[str] = None,
+    created_at: Optional[str] = None,
+    batch_id: Optional[str] = None
+) -> Dict:
+    """Document notification tel que stocké dans la collection 'notifications'"""
+    notification = {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "title": title,
+        "message": message,
+        "type": notification_type,
+        "related_id": related_id,
+        "read": False,
+        "created_at": created_at or datetime.now(timezone.utc).isoformat()
+    }
+    if batch_id:
+        notification["batch_id"] = batch_id
+    return notification
+
+
+def notification_event(notification: Dict) -> Dict:
+    """Charge utile de l'événement Socket.IO 'new_notification'"""
+    event = {
+        "title": notification["title"],
+        "message": notification["message"],
+        "type": notification["type"],
+        "created_at": notification["created_at"]
+    }
+    if notification.get("batch_id"):
+        event["batch_id"] = notification["batch_id"]
+        event["related_id"] = notification.get("related_id")
+    else:
+        event["id"] = notification["id"]
+    return event
+
+
+class NotificationRateLimiter:
+    """Fenêtre glissante par (utilisateur, type); les types sans limite passent toujours"""
+
+    def __init__(self, limits: Dict[str, Tuple[int, float]]):
+        self.limits = dict(limits)
+        self._events: Dict[Tuple[str, str], Deque[float]] = {}
+        self.dropped = 0
+
+    def allow(self, user_id: str, notification_type: str, now: Optional[float] = None) -> bool:
+        """True si la notification peut être créée (et la comptabilise)"""
+        limit = self.limits.get(notification_type)
+        if limit is None:
+            return True
+
+        max_count, window = limit
+        now = time.monotonic() if now is None else now
+        events = self._events.setdefault((user_id, notification_type), deque())
+        while events and events[0] <= now - window:
+            events.popleft()
+
+        if len(events) >= max_count:
+            self.dropped += 1
+            return False
+        events.append(now)
+        return True
+
+    def prune(self, now: Optional[float] = None):
+        """Supprime les compteurs inactifs (appelé à chaque vidage du tampon)"""
+        now = time.monotonic() if now is None else now
+        for key in [k for k, events in self._events.items()
+                    if not events or events[-1] <= now - self.limits[k[1]][1]]:
+            del self._events[key]
+
+
+class NotificationEngine:
+    """
+    Moteur de notifications partagé (instance module: notification_engine).
+
+    Args:
+        flush_interval: Délai maximum (secondes) avant écriture d'une notification tamponnée
+        max_batch: Taille du tampon déclenchant un vidage immédiat
+        rate_limits: Limites par type {type: (max, fenêtre en secondes)}
+    """
+
+    def __init__(self, flush_interval: float = 0.05, max_batch: int = 500,
+                 rate_limits: Optional[Dict[str, Tuple[int, float]]] = None):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.rate_limiter = NotificationRateLimiter(DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits)
+        self._emitter: Optional[Callable[..., Awaitable]] = None
+        self._db = None
+        self._buffer: List[Tuple[Dict, int]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.written = 0
+
+    def set_emitter(self, emitter: Optional[Callable[..., Awaitable]]):
+        """Émetteur Socket.IO (event, data, room=...) - typiquement sio.emit"""
+        self._emitter = emitter
+
+    @property
+    def buffering(self) -> bool:
+        return self._task is not None
+
+    def start(self, db):
+        """Active le tampon write-behind dans la boucle asyncio courante"""
+        if self._task is not None:
+            return
+        self._db = db
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"✅ Moteur de notifications démarré (vidage toutes les {self.flush_interval * 1000:.0f} ms)")
+
+    async def stop(self):
+        """Désactive le tampon après l'avoir vidé"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await self.flush()
+
+    async def notify(
+        self,
+        db,
+        user_id: str,
+        title: str,
+        message: str,
+        notification_type: str = "info",
+        related_id: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Crée une notification pour un utilisateur.
+
+        Args:
+            db: Instance de la base de données
+            user_id: ID de l'utilisateur destinataire
+            title: Titre de la notification
+            message: Message de la notification
+            notification_type: Type de notification
+            related_id: ID de l'entité liée (optionnel)
+
+        Returns:
+            ID de la notification, ou None si la limite de son type est atteinte
+        """
+        if not self.rate_limiter.allow(user_id, notification_type):
+            logger.debug(f"Notification {notification_type} limitée pour {user_id}")
+            return None
+
+        notification = build_notification(user_id, title, message, notification_type, related_id)
+
+        if self.buffering and db is self._db:
+            self._buffer.append((notification, 0))
+            if len(self._buffer) >= self.max_batch:
+                self._wakeup.set()
+            return notification["id"]
+
+        await db.notifications.insert_one(notification)
+        self.written += 1
+        await self._emit(notification_event(notification), [user_room(user_id)])
+        await increment_unread(db, user_id, COUNTER_NOTIFICATIONS)
+        return notification["id"]
+
+    async def notify_many(
+        self,
+        db,
+        recipients: List[str],
+        payload: Dict,
+        roles: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Crée une même notification pour plusieurs destinataires en une seule écriture.
+
+        Les utilisateurs actifs des rôles donnés sont résolus via le cache rôle -> IDs.
+        L'événement temps réel est émis une seule fois vers les rooms de rôle et les
+        rooms des destinataires explicites. Les diffusions ne sont pas limitées par type.
+
+        Args:
+            db: Instance de la base de données
+            recipients: IDs des utilisateurs destinataires explicites
+            payload: {"title", "message", "type", "related_id" (optionnel)}
+            roles: Rôles dont tous les utilisateurs actifs sont destinataires
+
+        Returns:
+            List[str]: IDs des notifications créées
+        """
+        user_ids = list(recipients)
+        for role in roles or []:
+            user_ids.extend(await role_members_cache.get_active_user_ids(db, role))
+        user_ids = list(dict.fromkeys(user_ids))  # Sans doublons, ordre conservé
+        if not user_ids:
+            return []
+
+        created_at = datetime.now(timezone.utc).isoformat()
+        batch_id = str(uuid.uuid4())
+        notifications = [
+            build_notification(user_id, payload["title"], payload["message"], payload["type"],
+                               payload.get("related_id"), created_at, batch_id)
+            for user_id in user_ids
+        ]
+        await db.notifications.insert_many(notifications, ordered=False)
+        self.written += len(notifications)
+
+        rooms = [role_room(role) for role in roles or []] + [user_room(user_id) for user_id in recipients]
+        await self._emit(notification_event(notifications[0]), rooms)
+        await increment_unread_many(db, user_ids, COUNTER_NOTIFICATIONS)
+
+        logger.info(f"Notification {payload['type']} créée pour {len(notifications)} destinataire(s)")
+        return [n["id"] for n in notifications]
+
+    async def flush(self) -> int:
+        """
+        Écrit les notifications tamponnées (un insert_many) puis les émet.
+
+        Returns:
+            int: Nombre de notifications écrites
+        """
+        if not self._buffer:
+            return 0
+
+        pending, self._buffer = self._buffer, []
+        notifications = [notification for notification, _ in pending]
+        try:
+            await self._db.notifications.insert_many(notifications, ordered=False)
+        except Exception as e:
+            retry = [(n, attempts + 1) for n, attempts in pending if attempts + 1 < MAX_FLUSH_ATTEMPTS]
+            self._buffer = retry + self._buffer
+            logger.error(f"❌ Écriture de {len(pending)} notification(s) échouée ({len(retry)} reprogrammée(s)): {e}")
+            return 0
+
+        self.flushes += 1
+        self.written += len(notifications)
+        for notification in notifications:
+            await self._emit(notification_event(notification), [user_room(notification["user_id"])])
+        try:
+            await increment_unread_many(self._db, [n["user_id"] for n in notifications], COUNTER_NOTIFICATIONS)
+        except Exception as e:
+            logger.error(f"❌ Mise à jour des compteurs de non-lus échouée: {e}")
+        self.rate_limiter.prune()
+        return len(notifications)
+
+    async def _emit(self, event: Dict, rooms: List[str]):
+        if self._emitter is None or not rooms:
+            return
+        try:
+            await self._emitter('new_notification', event, room=rooms if len(rooms) > 1 else rooms[0])
+        except Exception as e:
+            # Les notifications sont persistées: elles restent visibles via l'API
+            logger.error(f"Erreur émission temps réel ({event.get('type')}): {e}")
+
+    async def _run(self):
+        while True:
+            try:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Erreur du moteur de notifications: {e}")
+                await asyncio.sleep(self.flush_interval)
+
+    def stats(self) -> Dict:
+        """Compteurs pour le monitoring"""
+        return {
+            "buffering": self.buffering,
+            "buffered": len(self._buffer),
+            "flushes": self.flushes,
+            "written": self.written,
+            "rate_limited": self.rate_limiter.dropped
+        }
+
+
+# Moteur partagé par server.py et notification_service
+notification_engine = NotificationEngine(
+    flush_interval=float(os.environ.get("NOTIFICATION_FLUSH_INTERVAL_MS", "50")) / 1000,
+    max_batch=int(os.environ.get("NOTIFICATION_MAX_BATCH", "500")),
+    rate_limits={**DEFAULT_RATE_LIMITS, **parse_rate_limits(os.environ.get("NOTIFICATION_RATE_LIMITS", ""))}
+)
+
+
+def set_notification_emitter(emitter: Optional[Callable[..., Awaitable]]):
+    """
+    Configure l'émetteur Socket.IO utilisé pour la diffusion temps réel.
+
+    Args:
+        emitter: Coroutine (event, data, room=...) - typiquement sio.emit
+    """
+    notification_engine.set_emitter(emitter)
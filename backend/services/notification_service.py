@@ -3,12 +3,17 @@ Service de notifications - ALORIA AGENCY
 
 Ce service centralise l'envoi de TOUTES les notifications lors de la création d'utilisateurs.
 Garantit que toutes les parties prenantes sont notifiées de manière cohérente.
+
+La création, la diffusion temps réel, le regroupement des écritures et la limitation
+par type sont délégués au moteur partagé (services/notification_engine.py).
 """
 
-import uuid
 import logging
 from datetime import datetime, timezone
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+
+from .notification_engine import notification_engine
+from .unread_counters import COUNTER_NOTIFICATIONS, decrement_unread
 
 logger = logging.getLogger(__name__)
 
@@ -28,9 +33,9 @@ async def create_notification(
     message: str,
     notification_type: str = "info",
     related_id: str = None
-):
+) -> Optional[str]:
     """
-    Crée une notification dans la base de données.
+    Crée une notification (persistance + temps réel) via le moteur de notifications.
     
     Args:
         db: Instance de la base de données
@@ -39,19 +44,63 @@ async def create_notification(
         message: Message de la notification
         notification_type: Type de notification
         related_id: ID de l'entité liée (optionnel)
+    
+    Returns:
+        ID de la notification, ou None si la limite de son type est atteinte
     """
-    notification = {
-        "id": str(uuid.uuid4()),
-        "user_id": user_id,
-        "title": title,
-        "message": message,
-        "type": notification_type,
-        "related_id": related_id,
-        "read": False,
-        "created_at": datetime.now(timezone.utc).isoformat()
-    }
-    await db.notifications.insert_one(notification)
-    logger.info(f"Notification créée pour {user_id}: {title}")
+    notification_id = await notification_engine.notify(
+        db, user_id, title, message, notification_type, related_id
+    )
+    if notification_id:
+        logger.info(f"Notification créée pour {user_id}: {title}")
+    return notification_id
+
+
+async def mark_notification_read(db, notification_id: str, user_id: str) -> Optional[bool]:
+    """
+    Marque une notification comme lue (une seule fois: le compteur de non-lus
+    n'est décrémenté qu'au premier appel).
+    
+    Args:
+        db: Instance de la base de données
+        notification_id: ID de la notification
+        user_id: ID du destinataire
+    
+    Returns:
+        True si elle vient d'être lue, False si elle l'était déjà, None si introuvable
+    """
+    result = await db.notifications.update_one(
+        {"id": notification_id, "user_id": user_id, "read": {"$ne": True}},
+        # read_at (Date): point de départ de l'expiration TTL des notifications lues
+        {"$set": {"read": True, "read_at": datetime.now(timezone.utc)}}
+    )
+    if result.modified_count:
+        await decrement_unread(db, user_id, COUNTER_NOTIFICATIONS, 1)
+        return True
+    
+    existing = await db.notifications.find_one({"id": notification_id, "user_id": user_id}, {"_id": 1})
+    return False if existing else None
+
+
+async def create_notifications_bulk(
+    db,
+    recipients: List[str],
+    payload: Dict,
+    roles: Optional[List[str]] = None
+) -> List[str]:
+    """
+    Crée une même notification pour plusieurs destinataires en une seule écriture.
+    
+    Args:
+        db: Instance de la base de données
+        recipients: IDs des utilisateurs destinataires explicites
+        payload: {"title", "message", "type", "related_id" (optionnel)}
+        roles: Rôles dont tous les utilisateurs actifs sont destinataires
+    
+    Returns:
+        List[str]: IDs des notifications créées
+    """
+    return await notification_engine.notify_many(db, recipients, payload, roles)
 
 
 async def send_creation_notifications(
@@ -286,19 +335,14 @@ async def notify_superadmins(
     related_id: str = None
 ):
     """Envoie une notification à tous les superadmins actifs"""
-    superadmins = await db.users.find({"role": "SUPERADMIN", "is_active": True}).to_list(20)
-    
-    for superadmin in superadmins:
-        await create_notification(
-            db=db,
-            user_id=superadmin["id"],
-            title=title,
-            message=message,
-            notification_type=notification_type,
-            related_id=related_id
-        )
+    notification_ids = await create_notifications_bulk(db, [], {
+        "title": title,
+        "message": message,
+        "type": notification_type,
+        "related_id": related_id
+    }, roles=["SUPERADMIN"])
     
-    logger.info(f"Notification envoyée à {len(superadmins)} superadmin(s)")
+    logger.info(f"Notification envoyée à {len(notification_ids)} superadmin(s)")
 
 
 async def send_welcome_email_notification(
@@ -0,0 +1,170 @@
+"""
+Service de présence temps réel (Socket.IO) - ALORIA AGENCY
+
+Registre des connexions: user_id -> ensemble de sids (multi-onglets, multi-appareils)
+et sid -> user_id (résolution en O(1) à la déconnexion et à l'envoi de messages).
+
+Les émissions ne ciblent pas un sid mais la room Socket.IO de l'utilisateur
+(user_room), que chaque connexion authentifiée rejoint: tous les appareils reçoivent
+les événements. Chaque connexion rejoint aussi la room de son rôle (role_room), pour
+les diffusions à tout un rôle en une seule émission.
+
+Deux backends interchangeables:
+- InMemoryPresenceBackend (défaut): propre au processus
+- RedisPresenceBackend: partagé entre workers, compatible avec tout client
+  asynchrone exposant l'API Redis (redis.asyncio, fakeredis, ...)
+
+Sélection via PRESENCE_BACKEND=memory|redis (REDIS_URL pour Redis).
+"""
+
+import os
+import logging
+from typing import Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+
+def user_room(user_id: str) -> str:
+    """Nom de la room Socket.IO regroupant toutes les connexions d'un utilisateur"""
+    return f"user:{user_id}"
+
+
+ROLE_ROOM_PREFIX = "role:"
+
+
+def role_room(role: str) -> str:
+    """Nom de la room Socket.IO regroupant les connexions des utilisateurs d'un rôle"""
+    return f"{ROLE_ROOM_PREFIX}{role}"
+
+
+class InMemoryPresenceBackend:
+    """Registre de présence en mémoire (un seul processus)"""
+
+    def __init__(self):
+        self._sids_by_user: Dict[str, Set[str]] = {}
+        self._user_by_sid: Dict[str, str] = {}
+
+    async def add(self, user_id: str, sid: str):
+        """Associe une connexion à un utilisateur (ré-authentification incluse)"""
+        previous = self._user_by_sid.get(sid)
+        if previous and previous != user_id:
+            await self.remove(sid)
+        self._user_by_sid[sid] = user_id
+        self._sids_by_user.setdefault(user_id, set()).add(sid)
+
+    async def remove(self, sid: str) -> Optional[str]:
+        """Retire une connexion; retourne l'utilisateur associé (ou None)"""
+        user_id = self._user_by_sid.pop(sid, None)
+        if user_id is None:
+            return None
+        sids = self._sids_by_user.get(user_id)
+        if sids is not None:
+            sids.discard(sid)
+            if not sids:
+                del self._sids_by_user[user_id]
+        return user_id
+
+    async def get_user(self, sid: str) -> Optional[str]:
+        """Utilisateur authentifié sur cette connexion"""
+        return self._user_by_sid.get(sid)
+
+    async def get_sids(self, user_id: str) -> Set[str]:
+        """Connexions actives d'un utilisateur"""
+        return set(self._sids_by_user.get(user_id, ()))
+
+    async def is_online(self, user_id: str) -> bool:
+        """True si l'utilisateur a au moins une connexion active"""
+        return bool(self._sids_by_user.get(user_id))
+
+    async def online_users(self) -> Set[str]:
+        """Utilisateurs ayant au moins une connexion active"""
+        return set(self._sids_by_user)
+
+
+class RedisPresenceBackend:
+    """
+    Registre de présence partagé via Redis.
+
+    Clés utilisées:
+    - {prefix}:user:{user_id}  SET des sids de l'utilisateur
+    - {prefix}:sids            HASH sid -> user_id
+    - {prefix}:online          SET des utilisateurs connectés
+    """
+
+    def __init__(self, redis_client, prefix: str = "aloria:presence"):
+        self.redis = redis_client
+        self.prefix = prefix
+        self._sids_key = f"{prefix}:sids"
+        self._online_key = f"{prefix}:online"
+
+    def _user_key(self, user_id: str) -> str:
+        return f"{self.prefix}:user:{user_id}"
+
+    @staticmethod
+    def _decode(value):
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    async def add(self, user_id: str, sid: str):
+        """Associe une connexion à un utilisateur (ré-authentification incluse)"""
+        previous = self._decode(await self.redis.hget(self._sids_key, sid))
+        if previous and previous != user_id:
+            await self.remove(sid)
+        await self.redis.hset(self._sids_key, sid, user_id)
+        await self.redis.sadd(self._user_key(user_id), sid)
+        await self.redis.sadd(self._online_key, user_id)
+
+    async def remove(self, sid: str) -> Optional[str]:
+        """Retire une connexion; retourne l'utilisateur associé (ou None)"""
+        user_id = self._decode(await self.redis.hget(self._sids_key, sid))
+        if user_id is None:
+            return None
+        await self.redis.hdel(self._sids_key, sid)
+        await self.redis.srem(self._user_key(user_id), sid)
+        if not await self.redis.scard(self._user_key(user_id)):
+            await self.redis.srem(self._online_key, user_id)
+        return user_id
+
+    async def get_user(self, sid: str) -> Optional[str]:
+        """Utilisateur authentifié sur cette connexion"""
+        return self._decode(await self.redis.hget(self._sids_key, sid))
+
+    async def get_sids(self, user_id: str) -> Set[str]:
+        """Connexions actives d'un utilisateur (tous workers confondus)"""
+        return {self._decode(sid) for sid in await self.redis.smembers(self._user_key(user_id))}
+
+    async def is_online(self, user_id: str) -> bool:
+        """True si l'utilisateur a au moins une connexion active"""
+        return bool(await self.redis.scard(self._user_key(user_id)))
+
+    async def online_users(self) -> Set[str]:
+        """Utilisateurs ayant au moins une connexion active"""
+        return {self._decode(user_id) for user_id in await self.redis.smembers(self._online_key)}
+
+
+def create_presence_backend():
+    """
+    Instancie le backend de présence selon la configuration.
+
+    Retombe sur le backend mémoire si Redis est demandé mais indisponible.
+
+    Returns:
+        InMemoryPresenceBackend ou RedisPresenceBackend
+    """
+    backend = os.environ.get("PRESENCE_BACKEND", "memory").lower()
+
+    if backend == "redis":
+        if not REDIS_AVAILABLE:
+            logger.warning("⚠️ PRESENCE_BACKEND=redis mais le paquet 'redis' n'est pas installé - présence en mémoire")
+            return InMemoryPresenceBackend()
+        redis_url = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+        logger.info(f"✅ Présence Socket.IO partagée via Redis ({redis_url})")
+        return RedisPresenceBackend(aioredis.from_url(redis_url))
+
+    return InMemoryPresenceBackend()
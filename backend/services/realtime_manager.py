@@ -0,0 +1,150 @@
+"""
+Diffusion temps réel multi-workers (Socket.IO) - ALORIA AGENCY
+
+Avec plusieurs workers uvicorn, une connexion Socket.IO n'existe que dans le
+processus qui l'a acceptée: un sio.emit() fait dans un autre worker n'atteint
+personne. Le client_manager de python-socketio résout ce problème en publiant
+chaque émission sur un bus partagé, relayée par tous les workers.
+
+Modes (variable SOCKETIO_MANAGER):
+- none (défaut): un seul processus, gestionnaire en mémoire de python-socketio
+- redis: socketio.AsyncRedisManager (SOCKETIO_REDIS_URL, sinon REDIS_URL)
+- mongo: MongoPubSubManager, bus sur une collection plafonnée (capped) lue
+  par curseur tailable dans l'ordre d'insertion; ne nécessite que la base MongoDB existante
+"""
+
+import os
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+import socketio
+from engineio import json
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+logger = logging.getLogger(__name__)
+
+
+class MongoPubSubManager(AsyncPubSubManager):
+    """
+    Gestionnaire pub/sub Socket.IO sur une collection MongoDB plafonnée.
+
+    Chaque émission est insérée dans la collection; chaque worker suit la
+    collection avec un curseur tailable (TAILABLE_AWAIT) et relaie les messages
+    publiés par les autres workers. La collection plafonnée recycle l'espace
+    automatiquement: aucune purge n'est nécessaire.
+
+    Args:
+        url: URL de connexion MongoDB
+        db_name: Nom de la base
+        channel: Nom du canal (doit être identique sur tous les workers)
+        collection: Nom de la collection plafonnée
+        size_bytes: Taille maximale de la collection plafonnée
+        write_only: True pour seulement émettre (scripts, tâches)
+    """
+    name = 'mongopubsub'
+
+    def __init__(self, url: str, db_name: str, channel: str = 'socketio',
+                 collection: str = 'socketio_pubsub', size_bytes: int = 16 * 1024 * 1024,
+                 write_only: bool = False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.mongo_url = url
+        self.db_name = db_name
+        self.collection_name = collection
+        self.size_bytes = size_bytes
+        self._client = None
+        self._collection = None
+
+    async def _get_collection(self):
+        """Connexion paresseuse (dans la boucle asyncio du serveur) et création de la collection"""
+        if self._collection is not None:
+            return self._collection
+
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from pymongo.errors import CollectionInvalid
+
+        self._client = AsyncIOMotorClient(self.mongo_url)
+        db = self._client[self.db_name]
+        try:
+            await db.create_collection(self.collection_name, capped=True, size=self.size_bytes)
+            # Un curseur tailable sur une collection vide meurt immédiatement
+            await db[self.collection_name].insert_one({
+                "channel": self.channel,
+                "data": None,
+                "created_at": datetime.now(timezone.utc)
+            })
+        except CollectionInvalid:
+            pass  # Déjà créée par un autre worker
+
+        self._collection = db[self.collection_name]
+        return self._collection
+
+    async def _publish(self, data):
+        collection = await self._get_collection()
+        await collection.insert_one({
+            "channel": self.channel,
+            "data": json.dumps(data),
+            "created_at": datetime.now(timezone.utc)
+        })
+
+    async def _listen(self):
+        from pymongo import CursorType
+
+        collection = await self._get_collection()
+
+        # Ne relayer que les messages publiés après le démarrage de ce worker
+        last = await collection.find_one({}, sort=[("$natural", -1)])
+        last_id = last["_id"] if last else None
+
+        while True:
+            # Reprise dans l'ordre d'insertion ($natural) et non par {"_id": {"$gt": ...}}:
+            # les ObjectId générés par des processus différents ne sont pas monotones.
+            # Le curseur relit la collection et saute jusqu'au dernier document vu; si
+            # celui-ci a été recyclé, tous les documents restants sont plus récents.
+            try:
+                skipping = last_id is not None and await collection.find_one({"_id": last_id}, {"_id": 1}) is not None
+                cursor = collection.find({}, cursor_type=CursorType.TAILABLE_AWAIT)
+                while cursor.alive:
+                    async for document in cursor:
+                        if skipping:
+                            skipping = document["_id"] != last_id
+                            continue
+                        last_id = document["_id"]
+                        if document.get("channel") == self.channel and document.get("data"):
+                            yield document["data"]
+                    # Fin des données atteinte sans retrouver le dernier document (recyclé entre-temps)
+                    skipping = False
+            except Exception as e:
+                self._get_logger().error(f"Bus Socket.IO MongoDB interrompu: {e}")
+            await asyncio.sleep(1)
+
+
+def create_client_manager(write_only: bool = False):
+    """
+    Instancie le client_manager Socket.IO selon la configuration.
+
+    Args:
+        write_only: True pour un émetteur externe (ne relaie pas les messages reçus)
+
+    Returns:
+        AsyncRedisManager, MongoPubSubManager, ou None (gestionnaire par défaut)
+    """
+    mode = os.environ.get("SOCKETIO_MANAGER", "none").lower()
+    channel = os.environ.get("SOCKETIO_CHANNEL", "aloria-socketio")
+
+    if mode == "redis":
+        redis_url = os.environ.get("SOCKETIO_REDIS_URL") or os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+        logger.info(f"✅ Diffusion Socket.IO multi-workers via Redis ({redis_url})")
+        return socketio.AsyncRedisManager(redis_url, channel=channel, write_only=write_only)
+
+    if mode == "mongo":
+        logger.info("✅ Diffusion Socket.IO multi-workers via MongoDB (collection plafonnée)")
+        return MongoPubSubManager(
+            url=os.environ["MONGO_URL"],
+            db_name=os.environ["DB_NAME"],
+            channel=channel,
+            size_bytes=int(os.environ.get("SOCKETIO_MONGO_CAPPED_BYTES", str(16 * 1024 * 1024))),
+            write_only=write_only
+        )
+
+    return None
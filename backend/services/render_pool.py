@@ -0,0 +1,172 @@
+"""
+Service de rendu des factures - ALORIA AGENCY
+
+Le rendu ReportLab (PDF) et Pillow (PNG) est CPU-bound: exécuté dans un
+gestionnaire async, il bloque la boucle d'événements pour tous les utilisateurs
+connectés. Les rendus sont donc confiés à un ProcessPoolExecutor:
+- file bornée: au-delà de max_pending rendus en cours ou en attente,
+  RenderPoolSaturated (réponse HTTP 429 avec Retry-After)
+- délai par tâche: RenderTimeout si le rendu dépasse timeout_seconds
+- pool recréé si un processus de rendu meurt (BrokenProcessPool)
+- ressources (polices, styles) préchargées dans chaque processus (invoice_resources)
+
+Configuration: RENDER_POOL_WORKERS, RENDER_POOL_MAX_PENDING, RENDER_TIMEOUT_SECONDS.
+"""
+
+import os
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RenderPoolSaturated(Exception):
+    """Trop de rendus en cours: le client doit réessayer plus tard"""
+
+    def __init__(self, retry_after: int = 5):
+        super().__init__("File de rendu des factures saturée")
+        self.retry_after = retry_after
+
+
+class RenderTimeout(Exception):
+    """Rendu d'une facture trop long"""
+
+
+# Fonctions exécutées dans les processus de rendu (importables, donc sérialisables)
+
+def init_render_worker():
+    """Initialiseur des processus: polices et styles chargés avant le premier rendu"""
+    import invoice_resources
+
+    invoice_resources.preload()
+
+
+def render_pdf_bytes(invoice_data: Dict) -> bytes:
+    """Facture PDF professionnelle (ReportLab)"""
+    from professional_invoice_generator import generate_professional_invoice_pdf
+
+    return generate_professional_invoice_pdf(invoice_data)
+
+
+def render_png_bytes(invoice_data: Dict) -> bytes:
+    """Facture PNG (Pillow)"""
+    from invoice_generator_png import render_invoice_png_bytes
+
+    return render_invoice_png_bytes(invoice_data)
+
+
+class InvoiceRenderPool:
+    """ProcessPoolExecutor avec file bornée, délai par tâche et contre-pression"""
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 16, timeout_seconds: float = 30.0,
+                 initializer: Optional[Callable] = None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout_seconds = timeout_seconds
+        self.initializer = initializer
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def start(self):
+        """Démarre les processus de rendu (idempotent)"""
+        if self._executor is None:
+            # spawn: pas de fork d'un processus déjà multi-thread (Motor, APScheduler)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=self.initializer
+            )
+            logger.info(f"🖨️ Pool de rendu des factures démarré ({self.max_workers} processus)")
+
+    def shutdown(self, wait: bool = True):
+        """Arrête les processus de rendu"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    def _release(self, _future):
+        self._pending -= 1
+
+    def _release_from(self, loop):
+        def callback(future):
+            try:
+                loop.call_soon_threadsafe(self._release, future)
+            except RuntimeError:
+                pass  # Boucle fermée (arrêt du serveur)
+        return callback
+
+    async def run(self, fn: Callable, *args):
+        """
+        Exécute fn(*args) dans un processus de rendu.
+
+        Args:
+            fn: Fonction de niveau module (sérialisable)
+            *args: Arguments sérialisables
+
+        Returns:
+            Résultat de fn
+
+        Raises:
+            RenderPoolSaturated: File pleine (max_pending atteint)
+            RenderTimeout: Délai dépassé
+        """
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise RenderPoolSaturated()
+        self.start()
+
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BrokenProcessPool:
+            logger.warning("⚠️ Pool de rendu cassé, redémarrage")
+            self.shutdown(wait=False)
+            self.start()
+            future = self._executor.submit(fn, *args)
+
+        # La place dans la file n'est libérée qu'à la fin réelle du rendu,
+        # y compris après un délai dépassé (le processus travaille encore)
+        self._pending += 1
+        future.add_done_callback(self._release_from(loop))
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise RenderTimeout(f"Rendu interrompu après {self.timeout_seconds}s")
+        self.completed += 1
+        return result
+
+    async def render_pdf(self, invoice_data: Dict) -> bytes:
+        """Facture PDF professionnelle"""
+        return await self.run(render_pdf_bytes, invoice_data)
+
+    async def render_png(self, invoice_data: Dict) -> bytes:
+        """Facture PNG"""
+        return await self.run(render_png_bytes, invoice_data)
+
+    def stats(self) -> Dict:
+        """Occupation et compteurs pour le monitoring"""
+        return {
+            "workers": self.max_workers,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts
+        }
+
+
+# Instance partagée par les téléchargements et les tâches de rendu
+render_pool = InvoiceRenderPool(
+    max_workers=int(os.environ.get("RENDER_POOL_WORKERS", str(max(1, (os.cpu_count() or 2) // 2)))),
+    max_pending=int(os.environ.get("RENDER_POOL_MAX_PENDING", "16")),
+    timeout_seconds=float(os.environ.get("RENDER_TIMEOUT_SECONDS", "30")),
+    initializer=init_render_worker
+)
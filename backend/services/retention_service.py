@@ -0,0 +1,213 @@
+"""
+Service de rétention des données - ALORIA AGENCY
+
+Borne la taille des collections qui grossissent indéfiniment:
+- notifications lues: supprimées par MongoDB (index TTL sur read_at, champ Date
+  posé à la lecture) après NOTIFICATION_READ_TTL_DAYS jours
+- journaux d'activité (user_activities, activity_logs) et messages de chat lus:
+  archivés à froid en fichiers JSONL.gz puis supprimés de la base
+
+Archives: {ARCHIVE_DIR}/{collection}/{AAAA-MM}.jsonl.gz, un document JSON par ligne,
+regroupés par mois du document. Chaque lot est ajouté comme un membre gzip
+(lisible par gzip.open / zcat). L'écriture précède la suppression: en cas d'arrêt
+brutal un lot peut être archivé deux fois, jamais perdu.
+
+Les politiques sont exécutées par le scheduler APScheduler (voir server.py).
+Une durée de 0 jour désactive une politique.
+"""
+
+import os
+import json
+import gzip
+import asyncio
+import logging
+from pathlib import Path
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional
+
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+DAY_SECONDS = 24 * 3600
+
+NOTIFICATION_READ_TTL_DAYS = int(os.environ.get("NOTIFICATION_READ_TTL_DAYS", "30"))
+NOTIFICATION_READ_TTL_INDEX = "notifications_read_at_ttl"
+
+ARCHIVE_DIR = os.environ.get("ARCHIVE_DIR", str(Path(__file__).resolve().parent.parent / "archives"))
+ARCHIVE_BATCH_SIZE = int(os.environ.get("ARCHIVE_BATCH_SIZE", "1000"))
+
+# Politiques d'archivage: collection -> champ de date (ISO), rétention, filtre supplémentaire
+ARCHIVE_POLICIES: Dict[str, Dict] = {
+    "user_activities": {
+        "date_field": "timestamp",
+        "retention_days": int(os.environ.get("ACTIVITY_RETENTION_DAYS", "180")),
+    },
+    "activity_logs": {
+        "date_field": "timestamp",
+        "retention_days": int(os.environ.get("ACTIVITY_RETENTION_DAYS", "180")),
+    },
+    "chat_messages": {
+        "date_field": "timestamp",
+        # Désactivé par défaut: l'historique de chat est consulté par les clients
+        "retention_days": int(os.environ.get("CHAT_RETENTION_DAYS", "0")),
+        # Seuls les messages lus sont archivés (compteurs de non-lus inchangés)
+        "filter": {"read_status": True},
+    },
+}
+
+
+def archive_path(root: str, collection: str, month: str) -> Path:
+    """Fichier d'archive d'une collection pour un mois (AAAA-MM)"""
+    return Path(root) / collection / f"{month}.jsonl.gz"
+
+
+def group_by_month(documents: List[Dict], date_field: str) -> Dict[str, List[Dict]]:
+    """Regroupe des documents par mois de leur date ISO ("inconnu" si absente)"""
+    groups: Dict[str, List[Dict]] = {}
+    for document in documents:
+        value = document.get(date_field)
+        if isinstance(value, datetime):
+            month = value.strftime("%Y-%m")
+        elif isinstance(value, str) and len(value) >= 7:
+            month = value[:7]
+        else:
+            month = "inconnu"
+        groups.setdefault(month, []).append(document)
+    return groups
+
+
+def write_archive(root: str, collection: str, documents: List[Dict], date_field: str) -> int:
+    """
+    Ajoute des documents aux archives JSONL.gz (bloquant: à exécuter dans un thread).
+
+    Returns:
+        int: Nombre de documents écrits
+    """
+    written = 0
+    for month, group in group_by_month(documents, date_field).items():
+        path = archive_path(root, collection, month)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, "at", encoding="utf-8") as archive:
+            for document in group:
+                archive.write(json.dumps(document, default=str, ensure_ascii=False) + "\n")
+                written += 1
+    return written
+
+
+async def archive_collection(
+    db,
+    collection: str,
+    date_field: str,
+    retention_days: int,
+    extra_filter: Optional[Dict] = None,
+    root: str = ARCHIVE_DIR,
+    batch_size: int = ARCHIVE_BATCH_SIZE
+) -> int:
+    """
+    Archive puis supprime les documents plus anciens que la rétention, par lots.
+
+    Args:
+        db: Instance de la base de données
+        collection: Collection à archiver
+        date_field: Champ de date ISO (comparaison lexicographique, UTC)
+        retention_days: Âge maximum conservé en base (0 = politique désactivée)
+        extra_filter: Filtre supplémentaire (ex: messages lus uniquement)
+        root: Répertoire des archives
+        batch_size: Documents par lot
+
+    Returns:
+        int: Nombre de documents archivés
+    """
+    if retention_days <= 0:
+        return 0
+
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=retention_days)).isoformat()
+    query = {**(extra_filter or {}), date_field: {"$lt": cutoff}}
+    archived = 0
+
+    while True:
+        documents = await db[collection].find(query).sort(date_field, 1).limit(batch_size).to_list(batch_size)
+        if not documents:
+            break
+
+        ids = [document.pop("_id") for document in documents]
+        for document, object_id in zip(documents, ids):
+            document["_archived_id"] = str(object_id)
+
+        await asyncio.to_thread(write_archive, root, collection, documents, date_field)
+        await db[collection].delete_many({"_id": {"$in": ids}})
+        archived += len(documents)
+
+        if len(documents) < batch_size:
+            break
+
+    if archived:
+        logger.info(f"🗄️ {archived} document(s) de {collection} archivé(s) (avant {cutoff[:10]})")
+    return archived
+
+
+async def sync_notification_ttl(db, days: int = NOTIFICATION_READ_TTL_DAYS):
+    """
+    Aligne la durée de l'index TTL des notifications lues sur la configuration.
+
+    ensure_indexes() crée l'index; collMod met à jour expireAfterSeconds si la
+    configuration a changé depuis sa création. Avec days <= 0 (politique désactivée),
+    un index créé auparavant est supprimé.
+    """
+    if days <= 0:
+        try:
+            await db.notifications.drop_index(NOTIFICATION_READ_TTL_INDEX)
+            logger.info("🗑️ Index TTL des notifications lues supprimé (rétention désactivée)")
+        except OperationFailure:
+            pass  # Index absent
+        return
+    try:
+        await db.command(
+            "collMod", "notifications",
+            index={"name": NOTIFICATION_READ_TTL_INDEX, "expireAfterSeconds": days * DAY_SECONDS}
+        )
+    except OperationFailure as e:
+        logger.warning(f"⚠️ TTL des notifications lues non mis à jour: {e}")
+
+
+async def backfill_notification_read_at(db) -> int:
+    """
+    Date de lecture des notifications lues avant l'introduction de read_at
+    (sinon l'index TTL ne les supprimerait jamais).
+
+    Returns:
+        int: Nombre de notifications mises à jour
+    """
+    result = await db.notifications.update_many(
+        {"read": True, "read_at": {"$exists": False}},
+        {"$set": {"read_at": datetime.now(timezone.utc)}}
+    )
+    return result.modified_count
+
+
+async def run_retention_policies(db, root: str = ARCHIVE_DIR) -> Dict:
+    """
+    Exécute toutes les politiques de rétention (tâche planifiée quotidienne).
+
+    Returns:
+        Dict: {"notifications_dated": int, "archived": {collection: int}}
+    """
+    report = {"notifications_dated": 0, "archived": {}}
+
+    await sync_notification_ttl(db)
+    if NOTIFICATION_READ_TTL_DAYS > 0:
+        report["notifications_dated"] = await backfill_notification_read_at(db)
+
+    for collection, policy in ARCHIVE_POLICIES.items():
+        try:
+            report["archived"][collection] = await archive_collection(
+                db, collection, policy["date_field"], policy["retention_days"],
+                extra_filter=policy.get("filter"), root=root
+            )
+        except Exception as e:
+            logger.error(f"❌ Archivage de {collection} échoué: {e}")
+            report["archived"][collection] = None
+
+    logger.info(f"✅ Politiques de rétention appliquées: {report}")
+    return report
@@ -0,0 +1,431 @@
+"""
+Service de recherche globale - ALORIA AGENCY
+
+Index dénormalisé 'search_index': un document par entité recherchable
+(utilisateur, client, dossier, visiteur):
+    {"_id": "<type>:<id>", "type", "entity_id", "title", "title_norm", "subtitle",
+     "tokens": [...], "prefixes": [...], "owner_id", "data", "indexed_at"}
+
+- tokens: mots normalisés (minuscules, sans accents, ponctuation retirée)
+- prefixes: préfixes de chaque mot (MIN_PREFIX à MAX_PREFIX caractères), index multikey
+- owner_id: employé assigné (clients et dossiers), pour le filtrage par rôle
+
+Une requête "hel ngo" devient {"prefixes": {"$all": ["hel", "ngo"]}}: recherche
+par index, sans $regex. Le classement (titre exact, titre commençant par la requête,
+mots complets) est calculé par l'agrégation, seuls `limit` résultats sont transférés.
+
+L'index est maintenu à l'écriture via la tâche 'search.reindex' (queue_reindex) et
+reconstruit entièrement par rebuild_search_index (démarrage si vide, endpoint admin).
+"""
+
+import re
+import logging
+import unicodedata
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from pymongo import DeleteOne, ReplaceOne
+
+logger = logging.getLogger(__name__)
+
+TYPE_USER = "user"
+TYPE_CLIENT = "client"
+TYPE_CASE = "case"
+TYPE_VISITOR = "visitor"
+
+# Catégorie de l'API (?category=) -> type indexé
+SEARCH_CATEGORIES = {"users": TYPE_USER, "clients": TYPE_CLIENT, "cases": TYPE_CASE, "visitors": TYPE_VISITOR}
+
+# Rôles autorisés à rechercher chaque type
+SEARCH_ROLES = {
+    TYPE_USER: {"MANAGER", "SUPERADMIN"},
+    TYPE_CLIENT: {"MANAGER", "EMPLOYEE", "SUPERADMIN"},
+    TYPE_CASE: {"MANAGER", "EMPLOYEE", "SUPERADMIN"},
+    TYPE_VISITOR: {"MANAGER", "EMPLOYEE", "SUPERADMIN"},
+}
+
+# Un employé ne voit que les clients et dossiers qui lui sont assignés
+OWNER_SCOPED_ROLES = {"EMPLOYEE"}
+OWNER_SCOPED_TYPES = {TYPE_CLIENT, TYPE_CASE}
+
+MIN_PREFIX = 2
+MAX_PREFIX = 20
+
+REBUILD_BATCH_SIZE = 1000
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_NON_DIGIT = re.compile(r"\D")
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """
+    Normalise un texte pour la recherche: minuscules, accents retirés,
+    ponctuation remplacée par des espaces ("Hélène N'Go" -> "helene n go").
+    """
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    folded = "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+    return _NON_ALNUM.sub(" ", folded).strip()
+
+
+def tokenize(*texts: Optional[str]) -> List[str]:
+    """Mots normalisés distincts de plusieurs textes, dans l'ordre d'apparition"""
+    tokens: Dict[str, None] = {}
+    for text in texts:
+        for token in normalize_text(text).split():
+            tokens[token] = None
+    return list(tokens)
+
+
+def phone_tokens(phone: Optional[str]) -> List[str]:
+    """Numéro de téléphone en un seul mot de chiffres ("+237 699 12" -> "23769912")"""
+    digits = _NON_DIGIT.sub("", phone or "")
+    return [digits] if len(digits) >= MIN_PREFIX else []
+
+
+def prefix_ngrams(tokens: Iterable[str]) -> List[str]:
+    """Préfixes (MIN_PREFIX..MAX_PREFIX caractères) de chaque mot, sans doublon"""
+    prefixes: Dict[str, None] = {}
+    for token in tokens:
+        for length in range(MIN_PREFIX, min(len(token), MAX_PREFIX) + 1):
+            prefixes[token[:length]] = None
+    return list(prefixes)
+
+
+def query_terms(query: str) -> List[str]:
+    """Termes d'une requête, tronqués à MAX_PREFIX (les mots d'une lettre sont ignorés)"""
+    return [token[:MAX_PREFIX] for token in tokenize(query) if len(token) >= MIN_PREFIX]
+
+
+def build_search_document(
+    entity_type: str,
+    entity_id: str,
+    title: str,
+    subtitle: str,
+    tokens: List[str],
+    data: Dict,
+    owner_id: Optional[str] = None
+) -> Dict:
+    """
+    Construit un document de l'index.
+
+    Args:
+        entity_type: user, client, case ou visitor
+        entity_id: ID de l'entité
+        title: Titre affiché (pris en compte dans le classement)
+        subtitle: Sous-titre affiché
+        tokens: Mots recherchables (voir tokenize)
+        data: Données renvoyées au client avec le résultat
+        owner_id: Employé assigné (filtrage des employés)
+
+    Returns:
+        Dict: Document prêt pour un upsert
+    """
+    tokens = list(dict.fromkeys(tokens))
+    return {
+        "_id": f"{entity_type}:{entity_id}",
+        "type": entity_type,
+        "entity_id": entity_id,
+        "title": title,
+        "title_norm": normalize_text(title),
+        "subtitle": subtitle,
+        "tokens": tokens,
+        "prefixes": prefix_ngrams(tokens),
+        "owner_id": owner_id,
+        "data": data,
+        "indexed_at": datetime.now(timezone.utc)
+    }
+
+
+def _public_user(user: Optional[Dict]) -> Dict:
+    return {k: v for k, v in (user or {}).items() if k not in ("_id", "password")}
+
+
+def build_user_document(user: Dict) -> Optional[Dict]:
+    """Document d'un utilisateur actif (None: à retirer de l'index)"""
+    if not user.get("is_active", True):
+        return None
+    return build_search_document(
+        TYPE_USER, user["id"], user.get("full_name", ""),
+        f"{user.get('email', '')} - {user.get('role', '')}",
+        tokenize(user.get("full_name"), user.get("email")) + phone_tokens(user.get("phone")),
+        _public_user(user)
+    )
+
+
+def build_client_document(client: Dict, user: Optional[Dict]) -> Dict:
+    """Document d'un profil client (nom, e-mail et téléphone de son compte)"""
+    user = user or {}
+    name = user.get("full_name") or client.get("full_name", "")
+    client_data = {k: v for k, v in client.items() if k != "_id"}
+    return build_search_document(
+        TYPE_CLIENT, client["id"], name,
+        f"{client.get('country', '')} - {client.get('visa_type', '')} - {client.get('current_status', '')}",
+        tokenize(name, user.get("email") or client.get("email"))
+        + phone_tokens(user.get("phone") or client.get("phone")),
+        {**_public_user(user), **client_data},
+        owner_id=client.get("assigned_employee_id")
+    )
+
+
+def build_case_document(case: Dict, client_name: str, owner_id: Optional[str]) -> Dict:
+    """Document d'un dossier (les étapes du workflow ne sont pas dénormalisées)"""
+    case_data = {k: v for k, v in case.items() if k not in ("_id", "workflow_steps")}
+    return build_search_document(
+        TYPE_CASE, case["id"], f"Dossier {client_name}",
+        f"{case.get('country', '')} - {case.get('visa_type', '')} - {case.get('status', '')}",
+        tokenize(client_name, case.get("status"), case.get("country"), case.get("visa_type"), case.get("notes")),
+        {**case_data, "client_name": client_name},
+        owner_id=owner_id or case.get("assigned_employee_id")
+    )
+
+
+def build_visitor_document(visitor: Dict) -> Dict:
+    """Document d'un visiteur"""
+    return build_search_document(
+        TYPE_VISITOR, visitor["id"], visitor.get("name", ""),
+        f"{visitor.get('company') or 'N/A'} - {visitor.get('purpose', '')} - {(visitor.get('arrival_time') or '')[:10]}",
+        tokenize(visitor.get("name"), visitor.get("company"), visitor.get("purpose")),
+        {k: v for k, v in visitor.items() if k != "_id"}
+    )
+
+
+async def _build_documents(db, entity_type: str, sources: List[Dict]) -> List[Dict]:
+    """Documents d'index d'un lot d'entités (jointures résolues par lot)"""
+    if entity_type == TYPE_USER:
+        return [build_user_document(user) for user in sources]
+
+    if entity_type == TYPE_CLIENT:
+        user_ids = [c.get("user_id") for c in sources if c.get("user_id")]
+        users = await db.users.find({"id": {"$in": user_ids}}, {"_id": 0, "password": 0}).to_list(None)
+        users_by_id = {u["id"]: u for u in users}
+        return [build_client_document(c, users_by_id.get(c.get("user_id"))) for c in sources]
+
+    if entity_type == TYPE_CASE:
+        from .client_service import resolve_case_client_names
+
+        client_ids = [c.get("client_id") for c in sources if c.get("client_id")]
+        names = await resolve_case_client_names(db, client_ids, default="Client inconnu")
+        # Anciens dossiers sans assigned_employee_id: employé du profil client
+        profiles = await db.clients.find(
+            {"$or": [{"user_id": {"$in": client_ids}}, {"id": {"$in": client_ids}}]},
+            {"_id": 0, "id": 1, "user_id": 1, "assigned_employee_id": 1}
+        ).to_list(None)
+        owners = {}
+        for profile in profiles:
+            owners[profile.get("user_id")] = profile.get("assigned_employee_id")
+            owners[profile.get("id")] = profile.get("assigned_employee_id")
+        return [
+            build_case_document(
+                case, names.get(case.get("client_id"), "Client inconnu"), owners.get(case.get("client_id"))
+            )
+            for case in sources
+        ]
+
+    return [build_visitor_document(visitor) for visitor in sources]
+
+
+SOURCE_COLLECTIONS = {TYPE_USER: "users", TYPE_CLIENT: "clients", TYPE_CASE: "cases", TYPE_VISITOR: "visitors"}
+
+
+async def reindex_entities(db, entity_type: str, entity_ids: List[str]) -> int:
+    """
+    Met à jour l'index pour des entités (supprimées de l'index si absentes ou inactives).
+
+    Args:
+        db: Instance de la base de données
+        entity_type: user, client, case ou visitor
+        entity_ids: IDs des entités modifiées
+
+    Returns:
+        int: Nombre de documents indexés
+    """
+    entity_ids = [entity_id for entity_id in dict.fromkeys(entity_ids) if entity_id]
+    if not entity_ids:
+        return 0
+
+    sources = await db[SOURCE_COLLECTIONS[entity_type]].find(
+        {"id": {"$in": entity_ids}}, {"_id": 0}
+    ).to_list(None)
+    documents = [d for d in await _build_documents(db, entity_type, sources) if d]
+    indexed = {d["entity_id"] for d in documents}
+
+    operations = [ReplaceOne({"_id": d["_id"]}, d, upsert=True) for d in documents]
+    operations += [
+        DeleteOne({"_id": f"{entity_type}:{entity_id}"}) for entity_id in entity_ids if entity_id not in indexed
+    ]
+    await db.search_index.bulk_write(operations, ordered=False)
+    return len(documents)
+
+
+async def reindex_with_dependents(db, entity_type: str, entity_ids: List[str]) -> int:
+    """
+    Réindexe des entités et celles qui en dénormalisent des champs:
+    utilisateur -> profils clients -> dossiers (nom du client, employé assigné).
+
+    Returns:
+        int: Nombre total de documents indexés
+    """
+    count = await reindex_entities(db, entity_type, entity_ids)
+
+    if entity_type == TYPE_USER:
+        profiles = await db.clients.find({"user_id": {"$in": entity_ids}}, {"_id": 0, "id": 1}).to_list(None)
+        if profiles:
+            count += await reindex_with_dependents(db, TYPE_CLIENT, [p["id"] for p in profiles])
+    elif entity_type == TYPE_CLIENT:
+        profiles = await db.clients.find(
+            {"id": {"$in": entity_ids}}, {"_id": 0, "id": 1, "user_id": 1}
+        ).to_list(None)
+        client_refs = [ref for p in profiles for ref in (p["id"], p.get("user_id")) if ref]
+        cases = await db.cases.find({"client_id": {"$in": client_refs}}, {"_id": 0, "id": 1}).to_list(None)
+        count += await reindex_entities(db, TYPE_CASE, [c["id"] for c in cases])
+
+    return count
+
+
+async def rebuild_search_index(db, batch_size: int = REBUILD_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Reconstruit tout l'index à partir des collections sources, par lots.
+
+    Returns:
+        Dict {type: nombre de documents indexés}
+    """
+    report = {}
+    started_at = datetime.now(timezone.utc)
+    for entity_type, collection in SOURCE_COLLECTIONS.items():
+        count = 0
+        batch: List[Dict] = []
+        async for source in db[collection].find({}, {"_id": 0}):
+            batch.append(source)
+            if len(batch) >= batch_size:
+                count += await _upsert_batch(db, entity_type, batch)
+                batch = []
+        if batch:
+            count += await _upsert_batch(db, entity_type, batch)
+        report[entity_type] = count
+
+    # Entités supprimées ou désactivées depuis la dernière reconstruction
+    await db.search_index.delete_many({"indexed_at": {"$lt": started_at}})
+    logger.info(f"🔎 Index de recherche reconstruit: {report}")
+    return report
+
+
+async def _upsert_batch(db, entity_type: str, sources: List[Dict]) -> int:
+    documents = [d for d in await _build_documents(db, entity_type, sources) if d]
+    if documents:
+        await db.search_index.bulk_write(
+            [ReplaceOne({"_id": d["_id"]}, d, upsert=True) for d in documents], ordered=False
+        )
+    return len(documents)
+
+
+async def ensure_search_index(db):
+    """Construit l'index au démarrage s'il est vide (premier déploiement)"""
+    if await db.search_index.estimated_document_count() == 0:
+        await rebuild_search_index(db)
+
+
+async def queue_reindex(db, entity_type: str, *entity_ids: str):
+    """
+    Planifie la mise à jour de l'index après une écriture (tâche 'search.reindex').
+
+    Args:
+        db: Instance de la base de données
+        entity_type: user, client, case ou visitor
+        entity_ids: IDs des entités modifiées
+    """
+    from .job_queue import enqueue_job
+
+    ids = [entity_id for entity_id in entity_ids if entity_id]
+    if not ids:
+        return
+    try:
+        await enqueue_job(db, "search.reindex", {"type": entity_type, "ids": ids})
+    except Exception as e:
+        # L'index est reconstruit par l'endpoint admin: une écriture ne doit pas échouer pour lui
+        logger.error(f"Erreur planification de l'indexation {entity_type} {ids}: {e}")
+
+
+def scope_filter(role: str, user_id: str, categories: Optional[Iterable[str]] = None) -> Optional[Dict]:
+    """
+    Filtre des types visibles pour un rôle (None si aucun type n'est autorisé).
+
+    Args:
+        role: Rôle de l'utilisateur courant
+        user_id: ID de l'utilisateur courant (restriction des employés)
+        categories: Types demandés (défaut: tous)
+    """
+    types = [t for t in (categories or SEARCH_ROLES) if role in SEARCH_ROLES.get(t, ())]
+    if not types:
+        return None
+
+    if role not in OWNER_SCOPED_ROLES:
+        return {"type": {"$in": types}}
+
+    clauses = []
+    open_types = [t for t in types if t not in OWNER_SCOPED_TYPES]
+    owned_types = [t for t in types if t in OWNER_SCOPED_TYPES]
+    if open_types:
+        clauses.append({"type": {"$in": open_types}})
+    if owned_types:
+        clauses.append({"type": {"$in": owned_types}, "owner_id": user_id})
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+def build_search_pipeline(terms: List[str], scope: Dict, limit: int) -> List[Dict]:
+    """
+    Pipeline de recherche et de classement.
+
+    Score: titre identique à la requête (100), titre commençant par la requête (50),
+    puis 10 par terme correspondant à un mot complet; à score égal, titre le plus court.
+    Tous les candidats sont classés avant la coupe: MongoDB fusionne $sort et $limit
+    en un tri top-k, la mémoire reste bornée par limit.
+    """
+    phrase = " ".join(terms)
+    return [
+        {"$match": {"prefixes": {"$all": terms}, **scope}},
+        {"$addFields": {"score": {"$add": [
+            {"$cond": [{"$eq": ["$title_norm", phrase]}, 100, 0]},
+            {"$cond": [{"$eq": [{"$indexOfCP": ["$title_norm", phrase]}, 0]}, 50, 0]},
+            {"$multiply": [10, {"$size": {"$setIntersection": ["$tokens", terms]}}]},
+        ]}, "title_length": {"$strLenCP": "$title_norm"}}},
+        {"$sort": {"score": -1, "title_length": 1, "_id": 1}},
+        {"$limit": limit},
+        {"$project": {"_id": 0, "type": 1, "entity_id": 1, "title": 1, "subtitle": 1, "data": 1, "score": 1}},
+    ]
+
+
+async def search(
+    db,
+    query: str,
+    role: str,
+    user_id: str,
+    categories: Optional[Iterable[str]] = None,
+    limit: int = 20
+) -> List[Dict]:
+    """
+    Recherche dans l'index, filtrée selon le rôle et classée par pertinence.
+
+    Args:
+        db: Instance de la base de données
+        query: Texte saisi
+        role: Rôle de l'utilisateur courant
+        user_id: ID de l'utilisateur courant
+        categories: Types à rechercher (défaut: tous ceux autorisés)
+        limit: Nombre maximum de résultats
+
+    Returns:
+        List[Dict]: Résultats {"type", "id", "title", "subtitle", "data", "score"}
+    """
+    terms = query_terms(query)
+    scope = scope_filter(role, user_id, categories)
+    if not terms or scope is None or limit <= 0:
+        return []
+
+    hits = await db.search_index.aggregate(build_search_pipeline(terms, scope, limit)).to_list(limit)
+    return [
+        {"type": hit["type"], "id": hit["entity_id"], "title": hit["title"],
+         "subtitle": hit["subtitle"], "data": hit["data"], "score": hit["score"]}
+        for hit in hits
+    ]
@@ -0,0 +1,316 @@
+"""
+Service de statistiques des tableaux de bord - ALORIA AGENCY
+
+Chaque tableau de bord est calculé par des agrégations MongoDB ($facet/$group)
+exécutées en parallèle (asyncio.gather): aucun document métier n'est chargé en
+Python, seuls les totaux transitent sur le réseau.
+
+Les résultats sont mémorisés dans un cache TTL court (StatsCache), partagé par
+les requêtes concurrentes: une seule agrégation en vol par clé.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .ledger_service import PaymentStatus
+
+logger = logging.getLogger(__name__)
+
+ADMIN_DASHBOARD_KEY = "admin_dashboard"
+MANAGER_DASHBOARD_KEY = "dashboard:{role}"
+
+# Statuts de dossier terminés (exclus des dossiers actifs du SuperAdmin)
+CLOSED_CASE_STATUSES = ["Terminated", "Rejected"]
+
+# Regroupement des statuts pour le tableau de bord Manager
+ACTIVE_CASE_STATUSES = ["In Progress", "Under Review"]
+COMPLETED_CASE_STATUSES = ["Approved", "Completed"]
+PENDING_CASE_STATUSES = ["New", "Documents Pending"]
+
+
+class StatsCache:
+    """
+    Cache TTL des statistiques calculées, avec dédoublonnage des calculs concurrents.
+
+    Chaque clé a un numéro de génération incrémenté par invalidate(): un calcul
+    commencé avant une invalidation n'est pas mémorisé (totaux antérieurs à l'écriture).
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, tuple] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._generations: Dict[str, int] = {}
+        self._global_generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _generation(self, key: str) -> Tuple[int, int]:
+        return self._global_generation, self._generations.get(key, 0)
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Dict]]) -> Dict:
+        """
+        Retourne la valeur en cache, ou la calcule une seule fois pour tous les appelants.
+
+        Args:
+            key: Clé du tableau de bord
+            compute: Coroutine de calcul (appelée sans argument)
+
+        Returns:
+            Dict: Statistiques
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] >= time.monotonic():
+            self.hits += 1
+            return entry[1]
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        generation = self._generation(key)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            value = await compute()
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Évite "exception never retrieved" sans autre appelant
+            raise
+        else:
+            if self._generation(key) == generation:
+                self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            future.set_result(value)
+            return value
+        finally:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+    def invalidate(self, key: Optional[str] = None):
+        """Retire une clé (ou toutes les clés) du cache, calculs en cours compris"""
+        if key is None:
+            self._global_generation += 1
+            self._entries.clear()
+            self._pending.clear()
+        else:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self._entries.pop(key, None)
+            self._pending.pop(key, None)
+
+    def stats(self) -> Dict:
+        """Compteurs de hit/miss pour le monitoring"""
+        return {
+            "keys": len(self._entries),
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+# Instance partagée par les endpoints de tableau de bord
+stats_cache = StatsCache(ttl_seconds=float(os.environ.get("DASHBOARD_STATS_TTL_SECONDS", "30")))
+
+
+def invalidate_dashboard_stats(key: Optional[str] = None):
+    """
+    Hook d'invalidation à appeler après une écriture qui modifie les totaux
+    (confirmation de paiement, retrait...).
+
+    Args:
+        key: Tableau de bord concerné (None = tous)
+    """
+    stats_cache.invalidate(key)
+
+
+def day_range(day: Optional[datetime] = None) -> Tuple[str, str]:
+    """
+    Bornes ISO [début, lendemain) d'une journée UTC, pour une requête par intervalle
+    sur un champ de date ISO (utilise l'index, contrairement à un $regex).
+    """
+    day = (day or datetime.now(timezone.utc)).date()
+    return day.isoformat(), (day + timedelta(days=1)).isoformat()
+
+
+async def _aggregate_one(collection, pipeline: List[Dict]) -> Dict:
+    """Premier (unique) document d'une agrégation, {} si vide"""
+    results = await collection.aggregate(pipeline).to_list(1)
+    return results[0] if results else {}
+
+
+def _facet_count(facet: Dict, name: str) -> int:
+    """Valeur d'une branche {"$count": "n"} d'un $facet (absente si aucun document)"""
+    values = facet.get(name) or []
+    return values[0]["n"] if values else 0
+
+
+def _facet_sum(facet: Dict, name: str, field: str = "total") -> float:
+    """Valeur d'une branche $group de somme d'un $facet"""
+    values = facet.get(name) or []
+    return values[0][field] if values else 0
+
+
+async def compute_admin_dashboard_stats(db) -> Dict:
+    """
+    Statistiques globales du SuperAdmin (une agrégation par collection, en parallèle).
+
+    Args:
+        db: Instance de la base de données
+
+    Returns:
+        Dict: Même structure que la réponse historique de /admin/dashboard-stats
+    """
+    day_start, day_end = day_range()
+
+    users_facet, cases_facet, declarations_facet, withdrawals, consultations, recent_activities, daily_logins = await asyncio.gather(
+        _aggregate_one(db.users, [
+            {"$match": {"is_active": True}},
+            {"$project": {"_id": 0, "role": 1}},
+            {"$facet": {
+                "total": [{"$count": "n"}],
+                "by_role": [{"$group": {"_id": "$role", "n": {"$sum": 1}}}],
+            }},
+        ]),
+        _aggregate_one(db.cases, [
+            {"$project": {"_id": 0, "status": 1}},
+            {"$facet": {
+                "total": [{"$count": "n"}],
+                "active": [{"$match": {"status": {"$nin": CLOSED_CASE_STATUSES}}}, {"$count": "n"}],
+            }},
+        ]),
+        _aggregate_one(db.payment_declarations, [
+            {"$project": {"_id": 0, "status": 1, "amount": 1}},
+            {"$facet": {
+                "total": [{"$count": "n"}],
+                "pending": [{"$match": {"status": PaymentStatus.PENDING.query()}}, {"$count": "n"}],
+                "confirmed": [
+                    {"$match": {"status": PaymentStatus.CONFIRMED.query()}},
+                    {"$group": {"_id": None, "total": {"$sum": "$amount"}}},
+                ],
+            }},
+        ]),
+        _aggregate_one(db.withdrawals, [
+            {"$group": {"_id": None, "total": {"$sum": "$amount"}}},
+        ]),
+        _aggregate_one(db.payments, [
+            {"$match": {"type": "consultation"}},
+            {"$group": {"_id": None, "count": {"$sum": 1}, "total": {"$sum": "$amount"}}},
+        ]),
+        db.user_activities.find({}, {"_id": 0}).sort("timestamp", -1).limit(10).to_list(10),
+        db.user_activities.count_documents({
+            "action": "login",
+            "timestamp": {"$gte": day_start, "$lt": day_end}
+        }),
+    )
+
+    users_by_role = {row["_id"]: row["n"] for row in users_facet.get("by_role", [])}
+    total_payments_amount = _facet_sum(declarations_facet, "confirmed")
+    total_withdrawals = withdrawals.get("total", 0)
+
+    return {
+        "users": {
+            "total": _facet_count(users_facet, "total"),
+            "managers": users_by_role.get("MANAGER", 0),
+            "employees": users_by_role.get("EMPLOYEE", 0),
+            "clients": users_by_role.get("CLIENT", 0)
+        },
+        "business": {
+            "total_cases": _facet_count(cases_facet, "total"),
+            "active_cases": _facet_count(cases_facet, "active"),
+            "total_payments": _facet_count(declarations_facet, "total"),
+            "pending_payments": _facet_count(declarations_facet, "pending")
+        },
+        "finances": {
+            "total_payments_amount": total_payments_amount,
+            "total_withdrawals": total_withdrawals,
+            "current_balance": total_payments_amount - total_withdrawals,
+            "currency": "CFA"
+        },
+        "consultations": {
+            "total_count": consultations.get("count", 0),
+            "total_amount": consultations.get("total", 0),
+            "currency": "CFA"
+        },
+        "activity": {
+            "daily_logins": daily_logins,
+            "recent_activities": recent_activities
+        }
+    }
+
+
+async def get_admin_dashboard_stats(db) -> Dict:
+    """Statistiques du SuperAdmin, servies depuis le cache TTL"""
+    return await stats_cache.get_or_compute(ADMIN_DASHBOARD_KEY, lambda: compute_admin_dashboard_stats(db))
+
+
+async def count_cases_by(db) -> Dict[str, Dict[str, int]]:
+    """
+    Nombre de dossiers par statut et par pays, en une agrégation.
+
+    Seuls status et country sont projetés: les workflow_steps embarqués ne quittent
+    jamais le serveur MongoDB.
+
+    Returns:
+        Dict: {"status": {statut: n}, "country": {pays: n}}
+    """
+    facet = await _aggregate_one(db.cases, [
+        {"$project": {"_id": 0, "status": 1, "country": 1}},
+        {"$facet": {
+            "status": [{"$group": {"_id": "$status", "n": {"$sum": 1}}}],
+            "country": [{"$group": {"_id": "$country", "n": {"$sum": 1}}}],
+        }},
+    ])
+    return {
+        name: {row["_id"]: row["n"] for row in facet.get(name, []) if row["_id"] is not None}
+        for name in ("status", "country")
+    }
+
+
+def summarize_case_statuses(cases_by_status: Dict[str, int]) -> Dict[str, int]:
+    """Totaux actifs / terminés / en attente à partir du décompte par statut"""
+    def total(statuses):
+        return sum(cases_by_status.get(status, 0) for status in statuses)
+
+    return {
+        "total_cases": sum(cases_by_status.values()),
+        "active_cases": total(ACTIVE_CASE_STATUSES),
+        "completed_cases": total(COMPLETED_CASE_STATUSES),
+        "pending_cases": total(PENDING_CASE_STATUSES),
+    }
+
+
+async def compute_manager_dashboard_stats(db) -> Dict:
+    """
+    Statistiques du tableau de bord Manager (champs du modèle DashboardStats).
+
+    Args:
+        db: Instance de la base de données
+
+    Returns:
+        Dict: total/active/completed/pending_cases, total_clients, total_employees,
+        cases_by_country, cases_by_status
+    """
+    cases_by, total_clients, total_employees = await asyncio.gather(
+        count_cases_by(db),
+        db.clients.count_documents({}),
+        db.users.count_documents({"role": "EMPLOYEE"}),
+    )
+    return {
+        **summarize_case_statuses(cases_by["status"]),
+        "total_clients": total_clients,
+        "total_employees": total_employees,
+        "cases_by_country": cases_by["country"],
+        "cases_by_status": cases_by["status"],
+    }
+
+
+async def get_manager_dashboard_stats(db, role: str) -> Dict:
+    """Statistiques du tableau de bord d'un rôle, mémorisées par rôle (cache TTL)"""
+    return await stats_cache.get_or_compute(
+        MANAGER_DASHBOARD_KEY.format(role=role), lambda: compute_manager_dashboard_stats(db)
+    )
@@ -0,0 +1,234 @@
+"""
+Compteurs de non-lus par utilisateur - ALORIA AGENCY
+
+Un document par utilisateur dans 'unread_counters':
+    {"user_id", "notifications": int, "chat": int, "messages": int, "updated_at"}
+
+- notifications: notifications in-app non lues (collection 'notifications')
+- chat: messages de chat non lus (collection 'chat_messages')
+- messages: messages de dossier non lus (collection 'messages')
+
+Les compteurs sont incrémentés à l'insertion et décrémentés (borné à 0) à la lecture,
+puis poussés au client via l'événement Socket.IO 'unread_counts'. Les endpoints
+d'unread-count deviennent une lecture d'un seul document.
+
+Initialisation paresseuse: un compteur absent est calculé par count_documents à la
+première lecture. Il est d'abord créé à 0 (nom listé dans "pending", ignoré à la lecture)
+pour que les incréments concurrents s'y appliquent, puis l'écart avec le comptage est
+ajouté par $inc conditionné à updated_at (voir _initialize_counter).
+"""
+
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from .presence_service import user_room
+
+logger = logging.getLogger(__name__)
+
+COUNTER_NOTIFICATIONS = "notifications"
+COUNTER_CHAT = "chat"
+COUNTER_MESSAGES = "messages"
+
+# Requête de comptage initial de chaque compteur
+COUNTER_SOURCES = {
+    COUNTER_NOTIFICATIONS: ("notifications", lambda user_id: {"user_id": user_id, "read": False}),
+    COUNTER_CHAT: ("chat_messages", lambda user_id: {"receiver_id": user_id, "read_status": False}),
+    COUNTER_MESSAGES: ("messages", lambda user_id: {"receiver_id": user_id, "read_status": False}),
+}
+
+# Essais de l'ajout conditionnel du comptage initial (le dernier est inconditionnel)
+INIT_ATTEMPTS = 3
+
+# Émetteur temps réel (sio.emit), injecté par server.py via set_unread_emitter()
+_emitter: Optional[Callable[..., Awaitable]] = None
+
+
+def set_unread_emitter(emitter: Optional[Callable[..., Awaitable]]):
+    """
+    Configure l'émetteur Socket.IO utilisé pour pousser les compteurs.
+
+    Args:
+        emitter: Coroutine (event, data, room=...) - typiquement sio.emit
+    """
+    global _emitter
+    _emitter = emitter
+
+
+def counters_view(document: Optional[Dict]) -> Dict[str, int]:
+    """Compteurs initialisés d'un document (valeurs bornées à 0)"""
+    if not document:
+        return {}
+    pending = document.get("pending") or []
+    return {
+        name: max(0, int(document[name]))
+        for name in COUNTER_SOURCES if name in document and name not in pending
+    }
+
+
+async def _push(user_id: str, document: Optional[Dict]):
+    counts = counters_view(document)
+    if _emitter is None or not counts:
+        return
+    try:
+        await _emitter('unread_counts', counts, room=user_room(user_id))
+    except Exception as e:
+        logger.error(f"Erreur émission des compteurs de non-lus pour {user_id}: {e}")
+
+
+async def _initialize_counter(db, user_id: str, name: str) -> int:
+    """
+    Initialise un compteur sans perdre d'incrément concurrent.
+
+    1. Le champ est créé à 0 et marqué "pending": les incréments suivants s'y appliquent
+    2. L'écart entre le comptage des non-lus et la valeur du champ est ajouté par $inc,
+       seulement si updated_at n'a pas changé depuis la lecture (sinon nouvel essai)
+
+    Un compteur resté "pending" (processus interrompu) est repris à la lecture suivante.
+
+    Returns:
+        int: Valeur du compteur
+    """
+    collection, build_query = COUNTER_SOURCES[name]
+    try:
+        await db.unread_counters.update_one(
+            {"user_id": user_id, name: {"$exists": False}},
+            {"$set": {name: 0, "updated_at": datetime.now(timezone.utc)}, "$addToSet": {"pending": name}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        pass  # Document créé en parallèle (index unique sur user_id)
+
+    count = 0
+    for attempt in range(INIT_ATTEMPTS):
+        document = await db.unread_counters.find_one({"user_id": user_id}, {"_id": 0}) or {}
+        count = await db[collection].count_documents(build_query(user_id))
+        query = {"user_id": user_id}
+        if attempt < INIT_ATTEMPTS - 1:
+            query["updated_at"] = document.get("updated_at")
+        result = await db.unread_counters.update_one(query, {
+            "$inc": {name: count - int(document.get(name, 0))},
+            "$set": {"updated_at": datetime.now(timezone.utc)},
+            "$pull": {"pending": name}
+        })
+        if result.matched_count:
+            break
+    return count
+
+
+async def get_unread_counts(db, user_id: str) -> Dict[str, int]:
+    """
+    Compteurs de non-lus d'un utilisateur (initialise les compteurs absents).
+
+    Args:
+        db: Instance de la base de données
+        user_id: ID de l'utilisateur
+
+    Returns:
+        Dict {"notifications", "chat", "messages"}
+    """
+    document = await db.unread_counters.find_one({"user_id": user_id}, {"_id": 0})
+    counts = counters_view(document)
+
+    for name in COUNTER_SOURCES:
+        if name not in counts:
+            counts[name] = await _initialize_counter(db, user_id, name)
+
+    return counts
+
+
+async def get_unread_count(db, user_id: str, counter: str) -> int:
+    """Valeur d'un seul compteur (voir get_unread_counts)"""
+    return (await get_unread_counts(db, user_id))[counter]
+
+
+async def increment_unread(db, user_id: str, counter: str, amount: int = 1):
+    """
+    Incrémente un compteur (initialisé ou en cours d'initialisation) et pousse la nouvelle valeur.
+
+    Args:
+        db: Instance de la base de données
+        user_id: Destinataire
+        counter: notifications, chat ou messages
+        amount: Incrément
+    """
+    if amount <= 0:
+        return
+    document = await db.unread_counters.find_one_and_update(
+        {"user_id": user_id, counter: {"$exists": True}},
+        {"$inc": {counter: amount}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    await _push(user_id, document)
+
+
+async def increment_unread_many(db, user_ids: Iterable[str], counter: str):
+    """
+    Incrémente un compteur pour plusieurs destinataires (un bulk_write) et pousse les valeurs.
+
+    Args:
+        db: Instance de la base de données
+        user_ids: Destinataires (un destinataire répété est incrémenté d'autant)
+        counter: notifications, chat ou messages
+    """
+    increments = Counter(user_ids)
+    if not increments:
+        return
+
+    now = datetime.now(timezone.utc)
+    await db.unread_counters.bulk_write([
+        UpdateOne(
+            {"user_id": user_id, counter: {"$exists": True}},
+            {"$inc": {counter: amount}, "$set": {"updated_at": now}}
+        )
+        for user_id, amount in increments.items()
+    ], ordered=False)
+
+    if _emitter is None:
+        return
+    documents = await db.unread_counters.find(
+        {"user_id": {"$in": list(increments)}}, {"_id": 0}
+    ).to_list(len(increments))
+    for document in documents:
+        await _push(document["user_id"], document)
+
+
+async def decrement_unread(db, user_id: str, counter: str, amount: int):
+    """
+    Décrémente un compteur (borné à 0, pipeline atomique) et pousse la nouvelle valeur.
+
+    Args:
+        db: Instance de la base de données
+        user_id: Lecteur
+        counter: notifications, chat ou messages
+        amount: Nombre de documents marqués lus
+    """
+    if amount <= 0:
+        return
+    document = await db.unread_counters.find_one_and_update(
+        {"user_id": user_id, counter: {"$exists": True}},
+        [{"$set": {
+            counter: {"$max": [0, {"$subtract": [f"${counter}", amount]}]},
+            "updated_at": datetime.now(timezone.utc)
+        }}],
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    await _push(user_id, document)
+
+
+async def reset_unread_counters(db, user_ids: Optional[List[str]] = None) -> int:
+    """
+    Supprime les compteurs (recalculés à la prochaine lecture), ex: après une purge.
+
+    Returns:
+        int: Nombre de documents supprimés
+    """
+    query = {"user_id": {"$in": user_ids}} if user_ids is not None else {}
+    result = await db.unread_counters.delete_many(query)
+    return result.deleted_count
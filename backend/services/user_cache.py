@@ -0,0 +1,175 @@
+"""
+Cache des utilisateurs authentifiés - ALORIA AGENCY
+
+Évite un aller-retour MongoDB (db.users.find_one) à chaque requête authentifiée.
+Cache LRU borné avec expiration (TTL), propre au processus.
+
+Toute modification d'un utilisateur (statut, rôle, profil, mot de passe) DOIT appeler
+invalidate_cached_user() pour que le changement prenne effet immédiatement.
+
+Le module maintient aussi la liste rôle -> IDs des utilisateurs actifs (RoleMembersCache),
+utilisée par les diffusions de notifications à tout un rôle. Elle est invalidée par
+invalidate_cached_user() et, à la création d'un utilisateur, par invalidate_role_members().
+Les mêmes hooks invalident l'index des noms d'employés (employee_name_index).
+"""
+
+import os
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from .employee_name_index import employee_name_index
+
+logger = logging.getLogger(__name__)
+
+
+class UserCache:
+    """Cache LRU + TTL des documents utilisateurs, indexé par user id"""
+
+    def __init__(self, max_size: int = 1000, ttl_seconds: float = 60.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, user_id: str) -> Optional[Dict]:
+        """Retourne une copie de l'utilisateur en cache, ou None si absent/expiré"""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            del self._entries[user_id]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return dict(user)
+
+    def set(self, user_id: str, user: Dict):
+        """Ajoute ou remplace un utilisateur, en évinçant le moins récemment utilisé si plein"""
+        if self.max_size <= 0:
+            return
+        self._entries[user_id] = (time.monotonic() + self.ttl_seconds, dict(user))
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, user_id: str):
+        """Retire un utilisateur du cache"""
+        if self._entries.pop(user_id, None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        """Vide entièrement le cache"""
+        self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Compteurs de hit/miss pour le monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+
+class RoleMembersCache:
+    """Cache rôle -> IDs des utilisateurs actifs, avec expiration (TTL)"""
+
+    def __init__(self, ttl_seconds: float = 300.0):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, tuple] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get_active_user_ids(self, db, role: str) -> List[str]:
+        """
+        IDs des utilisateurs actifs d'un rôle (une requête MongoDB au plus par TTL).
+
+        Args:
+            db: Instance de la base de données
+            role: Rôle recherché (MANAGER, SUPERADMIN, ...)
+
+        Returns:
+            List[str]: IDs des utilisateurs actifs
+        """
+        entry = self._entries.get(role)
+        if entry is not None and entry[0] >= time.monotonic():
+            self.hits += 1
+            return list(entry[1])
+
+        self.misses += 1
+        users = await db.users.find(
+            {"role": role, "is_active": True}, {"_id": 0, "id": 1}
+        ).to_list(None)
+        user_ids = [u["id"] for u in users]
+        self._entries[role] = (time.monotonic() + self.ttl_seconds, tuple(user_ids))
+        return user_ids
+
+    def invalidate(self, role: Optional[str] = None):
+        """Retire un rôle (ou tous les rôles) du cache"""
+        if role is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(role, None)
+
+    def stats(self) -> Dict:
+        """Compteurs de hit/miss pour le monitoring"""
+        return {
+            "roles": len(self._entries),
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+# Instance partagée par get_current_user et les points d'invalidation
+user_cache = UserCache(
+    max_size=int(os.environ.get("USER_CACHE_MAX_SIZE", "1000")),
+    ttl_seconds=float(os.environ.get("USER_CACHE_TTL_SECONDS", "60"))
+)
+
+# Instance partagée par les diffusions de notifications par rôle
+role_members_cache = RoleMembersCache(
+    ttl_seconds=float(os.environ.get("ROLE_MEMBERS_CACHE_TTL_SECONDS", "300"))
+)
+
+
+def invalidate_cached_user(user_id: str):
+    """
+    Hook d'invalidation à appeler après toute modification d'un utilisateur.
+
+    Args:
+        user_id: ID de l'utilisateur modifié
+    """
+    user_cache.invalidate(user_id)
+    # Le rôle ou le statut a pu changer: les listes par rôle sont recalculées
+    role_members_cache.invalidate()
+    employee_name_index.invalidate()
+    logger.debug(f"Cache utilisateur invalidé pour {user_id}")
+
+
+def invalidate_role_members(role: Optional[str] = None):
+    """
+    Hook d'invalidation à appeler après la création d'un utilisateur.
+
+    Args:
+        role: Rôle du nouvel utilisateur (None = tous les rôles)
+    """
+    role_members_cache.invalidate(role)
+    if role in (None, "EMPLOYEE"):
+        employee_name_index.invalidate()
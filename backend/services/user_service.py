@@ -11,6 +11,9 @@ from datetime import datetime, timezone
 from typing import Dict, Optional
 from passlib.context import CryptContext
 
+from .user_cache import invalidate_cached_user, invalidate_role_members
+from .search_service import TYPE_USER, queue_reindex
+
 logger = logging.getLogger(__name__)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -105,6 +108,8 @@ async def create_user_account(
     
     # 5. Insérer dans la base de données
     await db.users.insert_one(user_dict)
+    invalidate_role_members(role)
+    await queue_reindex(db, TYPE_USER, user_id)
     
     logger.info(f"Utilisateur créé avec succès: {email} (rôle: {role}, ID: {user_id})")
     
@@ -157,6 +162,56 @@ async def get_user_by_id(db, user_id: str) -> Optional[Dict]:
     return user
 
 
+async def get_users_by_ids(db, user_ids, projection: Dict = None) -> Dict[str, Dict]:
+    """
+    Récupère plusieurs utilisateurs en UNE seule requête ($in).
+    
+    Remplace les boucles de find_one (requêtes N+1) lors de l'enrichissement de listes.
+    
+    Args:
+        db: Instance de la base de données
+        user_ids: IDs des utilisateurs (les valeurs vides et doublons sont ignorés)
+        projection: Champs à retourner (par défaut: tout sauf _id et password)
+    
+    Returns:
+        Dict {user_id: utilisateur} pour les utilisateurs trouvés
+    """
+    ids = list({user_id for user_id in user_ids if user_id})
+    if not ids:
+        return {}
+    
+    if projection is None:
+        projection = {"_id": 0, "password": 0}
+    else:
+        projection = {**projection, "_id": 0, "id": 1}
+    
+    users = await db.users.find({"id": {"$in": ids}}, projection).to_list(None)
+    return {user["id"]: user for user in users}
+
+
+async def resolve_user_names(db, user_ids, default: Optional[str] = None) -> Dict[str, str]:
+    """
+    Résout les noms complets d'un ensemble d'utilisateurs en UNE seule requête ($in).
+    
+    Args:
+        db: Instance de la base de données
+        user_ids: IDs des utilisateurs à résoudre
+        default: Nom attribué aux IDs introuvables (None = IDs introuvables omis)
+    
+    Returns:
+        Dict {user_id: full_name}
+    """
+    users = await get_users_by_ids(db, user_ids, projection={"full_name": 1})
+    names = {user_id: user.get("full_name") for user_id, user in users.items()}
+    
+    if default is not None:
+        for user_id in user_ids:
+            if user_id and user_id not in names:
+                names[user_id] = default
+    
+    return names
+
+
 async def get_user_by_email(db, email: str) -> Optional[Dict]:
     """
     Récupère un utilisateur par son email.
@@ -187,6 +242,7 @@ async def deactivate_user(db, user_id: str) -> bool:
         {"id": user_id},
         {"$set": {"is_active": False, "deactivated_at": datetime.now(timezone.utc).isoformat()}}
     )
+    invalidate_cached_user(user_id)
     return result.modified_count > 0
 
 
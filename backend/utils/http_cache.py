@@ -0,0 +1,63 @@
+"""
+Validation HTTP et requêtes partielles pour les fichiers servis par l'API.
+
+- ETag / If-None-Match (RFC 9110 §13.1.2): 304 si le client possède déjà la version
+- Range (RFC 9110 §14): un seul intervalle "bytes=début-fin", "bytes=début-" ou "bytes=-suffixe"
+"""
+
+from typing import Optional, Tuple
+
+
+class RangeNotSatisfiable(ValueError):
+    """Intervalle hors du fichier (réponse 416)"""
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Vrai si l'en-tête If-None-Match désigne l'ETag courant (ou '*')"""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or any(
+        candidate.removeprefix("W/") == etag.removeprefix("W/") for candidate in candidates
+    )
+
+
+def parse_byte_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Intervalle demandé par l'en-tête Range.
+
+    Args:
+        range_header: Valeur de l'en-tête Range
+        size: Taille du fichier en octets
+
+    Returns:
+        (début, fin) inclus, ou None pour servir le fichier entier
+        (en-tête absent, unité inconnue, intervalle invalide ou plusieurs intervalles)
+
+    Raises:
+        RangeNotSatisfiable: Intervalle hors du fichier
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+
+    start_text, _, end_text = range_header[len("bytes="):].strip().partition("-")
+    try:
+        start = int(start_text) if start_text else None
+        end = int(end_text) if end_text else None
+    except ValueError:
+        return None
+
+    if start is None:
+        # Suffixe "bytes=-N": les N derniers octets
+        if end is None:
+            return None
+        if end <= 0 or size == 0:
+            raise RangeNotSatisfiable(range_header)
+        return max(0, size - end), size - 1
+    if end is None:
+        end = size - 1
+    elif end < start:
+        return None  # Intervalle invalide: ignoré (RFC 9110), fichier entier
+    if start >= size:
+        raise RangeNotSatisfiable(range_header)
+    return start, min(end, size - 1)
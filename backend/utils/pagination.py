@@ -0,0 +1,81 @@
+"""
+Pagination par curseur (keyset) - ALORIA AGENCY
+
+Un curseur est une chaîne opaque encodant (valeur de tri, id) du dernier document
+renvoyé. La page suivante est obtenue par une comparaison indexée sur ces deux champs,
+ce qui garde une latence constante quelle que soit la profondeur de la page
+(contrairement à skip/offset).
+"""
+
+import base64
+import json
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+# En-tête HTTP portant le curseur de la page suivante (la réponse reste une liste)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: Any, doc_id: str) -> str:
+    """Encode (valeur de tri, id) en curseur opaque"""
+    raw = json.dumps([sort_value, doc_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    """
+    Décode un curseur produit par encode_cursor.
+
+    Raises:
+        HTTPException 400: Si le curseur est invalide
+    """
+    try:
+        sort_value, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return sort_value, str(doc_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
+
+def keyset_filter(sort_field: str, cursor: Optional[str], direction: int = 1, id_field: str = "id") -> Dict:
+    """
+    Construit le filtre MongoDB qui sélectionne les documents situés après le curseur.
+
+    Args:
+        sort_field: Champ de tri principal (ex: created_at)
+        cursor: Curseur de la page précédente (None = première page)
+        direction: 1 pour un tri croissant, -1 pour un tri décroissant
+        id_field: Champ de départage (unique)
+
+    Returns:
+        Dict: Filtre à combiner avec la requête métier ({} si pas de curseur)
+    """
+    if not cursor:
+        return {}
+
+    sort_value, doc_id = decode_cursor(cursor)
+    op = "$gt" if direction == 1 else "$lt"
+
+    if sort_value is None:
+        # Les valeurs nulles sont triées en premier (ordre croissant) ou en dernier
+        if direction == 1:
+            return {"$or": [
+                {sort_field: {"$ne": None}},
+                {sort_field: None, id_field: {op: doc_id}}
+            ]}
+        return {sort_field: None, id_field: {op: doc_id}}
+
+    return {"$or": [
+        {sort_field: {op: sort_value}},
+        {sort_field: sort_value, id_field: {op: doc_id}}
+    ]}
+
+
+def merge_filters(*filters: Dict) -> Dict:
+    """Combine plusieurs filtres MongoDB avec $and en ignorant les filtres vides"""
+    non_empty = [f for f in filters if f]
+    if not non_empty:
+        return {}
+    if len(non_empty) == 1:
+        return non_empty[0]
+    return {"$and": non_empty}
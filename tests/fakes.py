@@ -0,0 +1,310 @@
+"""
+Collections MongoDB en mémoire partagées par les tests (API Motor utilisée par les services).
+
+Couvre les filtres (égalité, $in, $nin, $ne, $exists, $lt/$lte/$gt/$gte, $all, $or), les
+mises à jour ($set, $unset, $inc, $addToSet, $pull, $setOnInsert, pipeline $set avec
+$max/$subtract) et compte les appels par méthode dans `calls`.
+"""
+
+import copy
+from collections import Counter
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+_COMPARISONS = {
+    "$lt": lambda value, operand: value < operand,
+    "$lte": lambda value, operand: value <= operand,
+    "$gt": lambda value, operand: value > operand,
+    "$gte": lambda value, operand: value >= operand,
+}
+
+
+def _get(document: Dict, path: str):
+    value = document
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _has(document: Dict, path: str) -> bool:
+    value = document
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return False
+        value = value[part]
+    return True
+
+
+def _equals(value, expected) -> bool:
+    if isinstance(value, list) and not isinstance(expected, list):
+        return expected in value
+    return value == expected
+
+
+def matches(document: Dict, query: Optional[Dict]) -> bool:
+    """Vrai si le document satisfait le filtre MongoDB"""
+    for key, condition in (query or {}).items():
+        if key == "$or":
+            if not any(matches(document, sub) for sub in condition):
+                return False
+            continue
+        value = _get(document, key)
+        if isinstance(condition, dict) and any(op.startswith("$") for op in condition):
+            for operator, operand in condition.items():
+                if operator == "$exists":
+                    if _has(document, key) != bool(operand):
+                        return False
+                elif operator == "$in":
+                    if not any(_equals(value, candidate) for candidate in operand):
+                        return False
+                elif operator == "$nin":
+                    if any(_equals(value, candidate) for candidate in operand):
+                        return False
+                elif operator == "$ne":
+                    if _equals(value, operand):
+                        return False
+                elif operator == "$all":
+                    if not isinstance(value, list) or not all(item in value for item in operand):
+                        return False
+                elif operator in _COMPARISONS:
+                    if value is None or not _COMPARISONS[operator](value, operand):
+                        return False
+                else:
+                    raise NotImplementedError(f"Opérateur non simulé: {operator}")
+        elif not _equals(value, condition):
+            return False  # None correspond aussi à un champ absent, comme MongoDB
+    return True
+
+
+def _evaluate(document: Dict, expression):
+    if isinstance(expression, str) and expression.startswith("$"):
+        return _get(document, expression[1:])
+    if isinstance(expression, dict) and len(expression) == 1:
+        operator, arguments = next(iter(expression.items()))
+        values = [_evaluate(document, argument) for argument in arguments]
+        if operator == "$max":
+            return max(values)
+        if operator == "$subtract":
+            return values[0] - values[1]
+        raise NotImplementedError(f"Expression non simulée: {operator}")
+    return expression
+
+
+def apply_update(document: Dict, update, inserting: bool = False):
+    """Applique une mise à jour (opérateurs ou pipeline) au document, en place"""
+    if isinstance(update, list):
+        for stage in update:
+            for field, expression in stage["$set"].items():
+                document[field] = _evaluate(document, expression)
+        return
+    if inserting:
+        document.update(copy.deepcopy(update.get("$setOnInsert", {})))
+    document.update(copy.deepcopy(update.get("$set", {})))
+    for field in update.get("$unset", {}):
+        document.pop(field, None)
+    for field, amount in update.get("$inc", {}).items():
+        document[field] = document.get(field, 0) + amount
+    for field, value in update.get("$addToSet", {}).items():
+        values = document.setdefault(field, [])
+        if value not in values:
+            values.append(value)
+    for field, value in update.get("$pull", {}).items():
+        document[field] = [item for item in document.get(field, []) if item != value]
+
+
+def _project(document: Dict, projection: Optional[Dict]) -> Dict:
+    result = copy.deepcopy(document)
+    if projection and projection.get("_id") == 0:
+        result.pop("_id", None)
+    return result
+
+
+class FakeCursor:
+    """Curseur Motor: sort, limit, skip, to_list et itération asynchrone"""
+
+    def __init__(self, documents: List[Dict]):
+        self.documents = documents
+
+    def sort(self, key, direction=1):
+        keys = key if isinstance(key, list) else [(key, direction)]
+        for field, order in reversed(keys):
+            self.documents.sort(key=lambda document: (_get(document, field) is not None, _get(document, field)),
+                                reverse=order < 0)
+        return self
+
+    def skip(self, count: int):
+        self.documents = self.documents[count:]
+        return self
+
+    def limit(self, count: int):
+        if count:
+            self.documents = self.documents[:count]
+        return self
+
+    async def to_list(self, length=None):
+        return self.documents[:length] if length else list(self.documents)
+
+    def __aiter__(self):
+        self._iterator = iter(self.documents)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    """
+    Collection en mémoire.
+
+    Args:
+        documents: Documents initiaux
+        unique: Index uniques, chacun un tuple de champs (clés absentes ou nulles ignorées, comme sparse)
+        aggregate_result: Résultat renvoyé par aggregate() (pipelines enregistrés dans `pipelines`)
+    """
+
+    def __init__(self, documents: Iterable[Dict] = (), unique: Sequence[Sequence[str]] = (),
+                 aggregate_result: Optional[List[Dict]] = None):
+        self.documents = [dict(document) for document in documents]
+        self.unique = [tuple(fields) for fields in unique]
+        self.aggregate_result = aggregate_result or []
+        self.pipelines = []
+        self.calls = Counter()
+
+    def _check_unique(self, candidate: Dict):
+        for fields in self.unique:
+            key = tuple(_get(candidate, field) for field in fields)
+            if None in key:
+                continue
+            for document in self.documents:
+                if tuple(_get(document, field) for field in fields) == key:
+                    raise DuplicateKeyError(f"{'_'.join(fields)} unique")
+
+    def _matching(self, query) -> List[Dict]:
+        return [document for document in self.documents if matches(document, query)]
+
+    def _upsert(self, query: Dict, update) -> Dict:
+        document = {key: value for key, value in query.items()
+                    if not key.startswith("$") and not isinstance(value, dict)}
+        apply_update(document, update, inserting=True)
+        self._check_unique(document)
+        self.documents.append(document)
+        return document
+
+    def find(self, query: Optional[Dict] = None, projection: Optional[Dict] = None, **kwargs) -> FakeCursor:
+        self.calls["find"] += 1
+        return FakeCursor([_project(document, projection) for document in self._matching(query)])
+
+    async def find_one(self, query: Optional[Dict] = None, projection: Optional[Dict] = None, sort=None):
+        self.calls["find_one"] += 1
+        found = self._matching(query)
+        if sort:
+            found = FakeCursor(found).sort(sort).documents
+        return _project(found[0], projection) if found else None
+
+    async def count_documents(self, query: Optional[Dict] = None) -> int:
+        self.calls["count_documents"] += 1
+        return len(self._matching(query))
+
+    async def distinct(self, field: str, query: Optional[Dict] = None) -> List:
+        self.calls["distinct"] += 1
+        values = []
+        for document in self._matching(query):
+            value = _get(document, field)
+            if value is not None and value not in values:
+                values.append(value)
+        return values
+
+    async def insert_one(self, document: Dict):
+        self.calls["insert_one"] += 1
+        self._check_unique(document)
+        self.documents.append(copy.deepcopy(document))
+        return SimpleNamespace(inserted_id=document.get("_id", document.get("id")))
+
+    async def insert_many(self, documents: Iterable[Dict], ordered: bool = True):
+        self.calls["insert_many"] += 1
+        documents = list(documents)
+        for document in documents:
+            self._check_unique(document)
+            self.documents.append(copy.deepcopy(document))
+        return SimpleNamespace(inserted_ids=[document.get("id") for document in documents])
+
+    async def update_one(self, query: Dict, update, upsert: bool = False):
+        self.calls["update_one"] += 1
+        found = self._matching(query)
+        if found:
+            apply_update(found[0], update)
+            return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+        if upsert:
+            document = self._upsert(query, update)
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=document.get("id", True))
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+
+    async def update_many(self, query: Dict, update, upsert: bool = False):
+        self.calls["update_many"] += 1
+        found = self._matching(query)
+        for document in found:
+            apply_update(document, update)
+        return SimpleNamespace(matched_count=len(found), modified_count=len(found), upserted_id=None)
+
+    async def find_one_and_update(self, query: Dict, update, projection: Optional[Dict] = None, sort=None,
+                                  upsert: bool = False, return_document=ReturnDocument.BEFORE):
+        self.calls["find_one_and_update"] += 1
+        found = self._matching(query)
+        if sort:
+            found = FakeCursor(found).sort(sort).documents
+        if not found:
+            if not upsert:
+                return None
+            document = self._upsert(query, update)
+            return _project(document, projection) if return_document == ReturnDocument.AFTER else None
+        before = _project(found[0], projection)
+        apply_update(found[0], update)
+        return _project(found[0], projection) if return_document == ReturnDocument.AFTER else before
+
+    async def delete_one(self, query: Dict):
+        self.calls["delete_one"] += 1
+        found = self._matching(query)
+        if found:
+            self.documents.remove(found[0])
+        return SimpleNamespace(deleted_count=len(found[:1]))
+
+    async def delete_many(self, query: Dict):
+        self.calls["delete_many"] += 1
+        found = self._matching(query)
+        self.documents = [document for document in self.documents if document not in found]
+        return SimpleNamespace(deleted_count=len(found))
+
+    async def bulk_write(self, requests, ordered: bool = True):
+        self.calls["bulk_write"] += 1
+        for request in requests:
+            await self.update_one(request._filter, request._doc, upsert=bool(request._upsert))
+
+    def aggregate(self, pipeline: List[Dict]) -> FakeCursor:
+        self.calls["aggregate"] += 1
+        self.pipelines.append(pipeline)
+        return FakeCursor(copy.deepcopy(self.aggregate_result))
+
+
+class FakeDb:
+    """Base en mémoire: db.<nom> et db["<nom>"]; une collection absente est créée vide"""
+
+    def __init__(self, **collections: FakeCollection):
+        self.__dict__.update(collections)
+
+    def __getattr__(self, name: str) -> FakeCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        collection = FakeCollection()
+        setattr(self, name, collection)
+        return collection
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        return getattr(self, name)
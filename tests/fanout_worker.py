@@ -0,0 +1,21 @@
+"""Application Socket.IO minimale lancée par test_realtime_fanout dans chaque worker"""
+
+import socketio
+
+from services.presence_service import user_room
+from services.realtime_manager import create_client_manager
+
+sio = socketio.AsyncServer(async_mode="asgi", client_manager=create_client_manager())
+app = socketio.ASGIApp(sio)
+
+
+@sio.event
+async def join(sid, data):
+    await sio.enter_room(sid, user_room(data["user_id"]))
+    return "ok"
+
+
+@sio.event
+async def publish(sid, data):
+    await sio.emit("new_notification", data["payload"], room=user_room(data["user_id"]))
+    return "ok"
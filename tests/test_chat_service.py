@@ -0,0 +1,61 @@
+"""Tests des résumés de conversations chat"""
+
+from services.chat_service import (
+    build_conversation_update,
+    conversation_for_user,
+    conversation_key,
+)
+
+
+def _message(sender="u-b", receiver="u-a"):
+    return {
+        "id": "m1",
+        "sender_id": sender,
+        "sender_name": "Bob",
+        "sender_role": "EMPLOYEE",
+        "receiver_id": receiver,
+        "receiver_name": "Alice",
+        "receiver_role": "CLIENT",
+        "message": "Bonjour",
+        "timestamp": "2024-01-01T10:00:00+00:00",
+        "read_status": False,
+    }
+
+
+def test_conversation_key_is_order_independent():
+    assert conversation_key("u-a", "u-b") == conversation_key("u-b", "u-a")
+    assert conversation_key("u-b", "u-a") == ("u-a:u-b", ["u-a", "u-b"])
+
+
+def test_update_increments_receiver_unread_only():
+    query, update = build_conversation_update(_message())
+    assert query == {"id": "u-a:u-b"}
+    assert update["$inc"] == {"unread.u-a": 1}
+    assert update["$setOnInsert"]["unread.u-b"] == 0
+    assert update["$set"]["last_message"] == "Bonjour"
+    assert update["$set"]["participants.u-a"] == {"name": "Alice", "role": "CLIENT"}
+
+
+def test_update_has_no_conflicting_paths_for_self_message():
+    _, update = build_conversation_update(_message(sender="u-a", receiver="u-a"))
+    paths = [path for op in update.values() for path in op]
+    assert len(paths) == len(set(paths))
+
+
+def test_conversation_for_user_shows_other_participant():
+    _, update = build_conversation_update(_message())
+    conversation = {
+        "participant_ids": ["u-a", "u-b"],
+        "participants": {
+            "u-a": update["$set"]["participants.u-a"],
+            "u-b": update["$set"]["participants.u-b"],
+        },
+        "unread": {"u-a": 3, "u-b": 0},
+        "last_message": "Bonjour",
+        "last_message_time": "2024-01-01T10:00:00+00:00",
+    }
+    view = conversation_for_user(conversation, "u-a")
+    assert view["participant_id"] == "u-b"
+    assert view["participant_name"] == "Bob"
+    assert view["unread_count"] == 3
+    assert conversation_for_user(conversation, "u-b")["unread_count"] == 0
@@ -0,0 +1,87 @@
+"""Tests des gabarits d'e-mails précompilés"""
+
+import asyncio
+
+import pytest
+
+from email_templates import available_templates, country_block, render_email, status_info, visa_block
+from email_transport import EmailTransport
+
+
+class CaptureTransport(EmailTransport):
+    name = "capture"
+
+    def __init__(self):
+        super().__init__("contact@aloria-agency.com", "ALORIA AGENCY", max_workers=1)
+        self.sent = []
+
+    async def send(self, to_email, subject, html_content, plain_content=None):
+        self.sent.append((to_email, subject, html_content))
+        return True
+
+
+def test_render_escapes_values_but_not_html_blocks():
+    subject, html = render_email("consultant_appointment", {
+        "name": "<script>x</script>", "country": "Canada", "visa_type": "Visa",
+        "assigned_by": "Awa", "payment_date": "01/01/2025 à 10:00"
+    })
+    assert "&lt;script&gt;" in html and "<script>" not in html
+    assert subject == "🎉 Rendez-vous programmé avec le consultant ALORIA AGENCY"
+
+    _, html = render_email("prospect_welcome", {
+        "name": "Awa", "country": "Canada", "visa_type": "Visa", "urgency": "Normal", "flag": "🇨🇦",
+        "contact_date": "", "visa_html": "<div>visa</div>", "country_html": country_block("Canada")[1]
+    })
+    assert "<div>visa</div>" in html
+    assert "Spécificités Canada" in html
+
+
+def test_missing_context_key_raises():
+    with pytest.raises(KeyError):
+        render_email("consultant_appointment", {"name": "Awa"})
+
+
+def test_locale_variant_and_fallback():
+    context = {
+        "name": "Awa", "country": "France", "visa_type": "Passeport Talent", "urgency": "Normal",
+        "flag": "🇫🇷", "contact_date": "", "visa_html": "", "country_html": ""
+    }
+    subject, html = render_email("prospect_welcome", context, "en")
+    assert subject.startswith("🌟 Welcome to ALORIA AGENCY")
+    assert '<html lang="en">' in html and "The ALORIA AGENCY team" in html
+
+    # Pas de variante "de": repli sur le français
+    subject, _ = render_email("prospect_welcome", context, "de")
+    assert subject.startswith("🌟 Bienvenue chez ALORIA AGENCY")
+    assert "en" in available_templates()["prospect_welcome"]
+
+
+def test_cached_blocks():
+    assert country_block("Japon") == ("🌍", "")
+    assert country_block("Canada", "en")[1] != country_block("Canada", "fr")[1]
+    assert visa_block("") == ""
+    assert "Passeport Talent" not in visa_block("Passeport Talent")
+    assert visa_block("Permis de Travail temporaire") != ""
+    assert status_info(95)[0] == "🎉"
+    assert status_info(40)[0] == "⚡"
+    assert status_info(0)[0] == "📋"
+
+
+def test_service_renders_case_update_with_notes():
+    from email_service import AloriaEmailService
+
+    transport = CaptureTransport()
+    service = AloriaEmailService(transport)
+    sent = asyncio.run(service.send_case_status_update_email(
+        {"full_name": "Awa", "email": "awa@example.com"},
+        {"id": "c-1", "progress_percentage": 75, "notes": "Pièces <reçues>", "manager_name": "Jean Dupont"}
+    ))
+
+    assert sent
+    to_email, subject, html = transport.sent[0]
+    assert to_email == "awa@example.com"
+    assert subject == "📋 Mise à jour de votre dossier ALORIA - En cours"
+    assert "width: 75%" in html
+    assert "Pièces &lt;reçues&gt;" in html
+    assert "jean.dupont@aloria-agency.com" in html
+    assert "$" not in html
@@ -0,0 +1,64 @@
+"""Tests des transports d'e-mails"""
+
+import asyncio
+import email
+
+import pytest
+
+from email_transport import EmailTransport, FileSinkTransport, apply_substitutions
+
+
+def test_apply_substitutions():
+    assert apply_substitutions("Bonjour -name-, dossier -case-", {"-name-": "Awa", "-case-": 42}) == "Bonjour Awa, dossier 42"
+    assert apply_substitutions(None, {"-name-": "Awa"}) is None
+
+
+def test_transport_without_send_fails_at_construction():
+    class IncompleteTransport(EmailTransport):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        IncompleteTransport("noreply@aloria.com", "ALORIA")
+
+
+def test_file_sink_writes_eml(tmp_path):
+    transport = FileSinkTransport(str(tmp_path), "contact@aloria-agency.com", "ALORIA AGENCY")
+    assert asyncio.run(transport.send("client@example.com", "Sujet", "<p>Bonjour</p>", "Bonjour"))
+
+    files = list(tmp_path.glob("*.eml"))
+    assert len(files) == 1
+    message = email.message_from_bytes(files[0].read_bytes())
+    assert message["To"] == "client@example.com"
+    assert message["Subject"] == "Sujet"
+
+
+def test_file_sink_batch_applies_substitutions(tmp_path):
+    transport = FileSinkTransport(str(tmp_path), "contact@aloria-agency.com", "ALORIA AGENCY")
+    recipients = [
+        {"email": "a@example.com", "substitutions": {"-name-": "Awa"}},
+        {"email": "b@example.com", "substitutions": {"-name-": "Bruno"}},
+    ]
+    assert asyncio.run(transport.send_batch(recipients, "Bonjour -name-", "<p>-name-</p>")) == 2
+
+    subjects = sorted(email.message_from_bytes(f.read_bytes())["Subject"] for f in tmp_path.glob("*.eml"))
+    assert subjects == ["Bonjour Awa", "Bonjour Bruno"]
+
+
+def test_sendgrid_batch_uses_one_call_per_1000_recipients():
+    pytest.importorskip("sendgrid")
+    from email_transport import SendGridTransport
+
+    posted = []
+
+    class RecordingTransport(SendGridTransport):
+        def _post(self, mail):
+            posted.append(mail.get())
+            return True
+
+    transport = RecordingTransport("SG.test", "contact@aloria-agency.com", "ALORIA AGENCY")
+    recipients = [{"email": f"user{i}@example.com", "substitutions": {"-name-": f"U{i}"}} for i in range(1500)]
+
+    assert asyncio.run(transport.send_batch(recipients, "Bonjour", "<p>-name-</p>")) == 1500
+    assert [len(body["personalizations"]) for body in posted] == [1000, 500]
+    first_chunk = {p["to"][0]["email"]: p["substitutions"] for p in posted[0]["personalizations"]}
+    assert first_chunk["user0@example.com"] == {"-name-": "U0"}
@@ -0,0 +1,95 @@
+"""Tests de l'attribution des prospects par nom d'employé (normalisation, trigrammes)"""
+
+import asyncio
+from services.employee_name_index import EmployeeNameIndex, dice, trigrams
+from tests.fakes import FakeCollection, FakeDb
+
+EMPLOYEES = [
+    {"id": "e1", "full_name": "Hélène Mbarga"},
+    {"id": "e2", "full_name": "Marie Ngono"},
+    {"id": "e3", "full_name": "Paul Etoundi"},
+    {"id": "e4", "full_name": "Jean-Pierre Fotso"},
+]
+
+
+def _index():
+    index = EmployeeNameIndex(threshold=0.6)
+    index.load(EMPLOYEES)
+    return index
+
+
+def test_trigrams_and_dice():
+    assert trigrams("ana") == {"  a", " an", "ana", "na "}
+    assert dice(trigrams("helene"), trigrams("helene")) == 1.0
+    assert dice(set(), trigrams("x")) == 0.0
+
+
+def test_accent_and_case_insensitive_match():
+    index = _index()
+    assert index.match("Helene MBARGA")["id"] == "e1"
+    assert index.match("hélène")["id"] == "e1"
+    assert index.match("jean pierre fotso")["id"] == "e4"
+
+
+def test_typos_and_partial_names():
+    index = _index()
+    assert index.match("Hélene Mbraga")["id"] == "e1"
+    assert index.match("Marie")["id"] == "e2"
+    assert index.match("Paul Etoundy")["id"] == "e3"
+
+
+def test_unrelated_or_hostile_input_is_not_attributed():
+    index = _index()
+    assert index.match("Quelqu'un au marché") is None
+    assert index.match("(a+)+$" * 10) is None  # Aucun regex n'est évalué
+    assert index.match("") is None
+
+
+def test_short_prefix_and_ambiguous_names_are_not_attributed():
+    index = EmployeeNameIndex(threshold=0.6)
+    index.load(EMPLOYEES + [{"id": "e5", "full_name": "Martin Manga"}])
+    assert index.match("Ma") is None  # Préfixe trop court
+    assert index.match("Mar") is None  # "Marie Ngono" et "Martin Manga" à égalité
+    assert index.match("Mari")["id"] == "e2"
+
+
+def _employee_users(employees):
+    return FakeCollection({"role": "EMPLOYEE", "is_active": True, **employee} for employee in employees)
+
+
+class SlowUsers(FakeCollection):
+    """Chargement lent: les recherches concurrentes arrivent pendant la reconstruction"""
+
+    def find(self, query=None, projection=None, **kwargs):
+        cursor = super().find(query, projection)
+        to_list = cursor.to_list
+
+        async def slow_to_list(length=None):
+            await asyncio.sleep(0.01)
+            return await to_list(length)
+
+        cursor.to_list = slow_to_list
+        return cursor
+
+
+def test_invalidation_triggers_lazy_rebuild():
+    db = FakeDb(users=_employee_users(EMPLOYEES[:1]))
+    index = EmployeeNameIndex(ttl_seconds=300)
+
+    assert asyncio.run(index.find_employee(db, "Helene"))["id"] == "e1"
+    assert asyncio.run(index.find_employee(db, "Helene"))["id"] == "e1"
+    assert db.users.calls["find"] == 1
+    index.invalidate()
+    asyncio.run(index.find_employee(db, "Helene"))
+    assert db.users.calls["find"] == 2
+
+
+def test_concurrent_lookups_share_one_rebuild():
+    db = FakeDb(users=SlowUsers(_employee_users(EMPLOYEES).documents))
+    index = EmployeeNameIndex(ttl_seconds=300)
+
+    async def scenario():
+        return await asyncio.gather(*(index.find_employee(db, "Marie Ngono") for _ in range(20)))
+
+    assert all(match["id"] == "e2" for match in asyncio.run(scenario()))
+    assert db.users.calls["find"] == 1
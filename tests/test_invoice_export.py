@@ -0,0 +1,83 @@
+"""Tests de l'export ZIP des factures (filtre, flux incrémental, réutilisation du cache)"""
+
+import asyncio
+import csv
+import io
+import zipfile
+from datetime import datetime, timezone
+
+from services import invoice_service
+from services.invoice_export import MANIFEST_NAME, build_export_query, stream_invoice_zip
+from services.invoice_service import set_invoice_store, store_invoice_artifact
+from services.invoice_store import LocalBlobStore
+from services.ledger_service import PaymentStatus
+from tests.fakes import FakeCollection, FakeDb
+
+
+def make_payments(count):
+    return [
+        {"id": f"p{index}", "invoice_number": f"ALO-202401{index + 10:02d}-X", "amount": 1000 * index,
+         "currency": "CFA", "status": "CONFIRMED", "client_name": f"Client {index}",
+         "declared_at": f"2024-01-{index + 10:02d}T10:00:00+00:00"}
+        for index in range(count)
+    ]
+
+
+async def collect(stream):
+    return [chunk async for chunk in stream]
+
+
+def test_build_export_query():
+    query = build_export_query(
+        datetime(2024, 1, 1, tzinfo=timezone.utc), datetime(2024, 2, 1, tzinfo=timezone.utc),
+        PaymentStatus.CONFIRMED, "c1"
+    )
+    assert query["status"] == PaymentStatus.CONFIRMED.query()
+    assert query["declared_at"] == {"$gte": "2024-01-01T00:00:00+00:00", "$lt": "2024-02-01T00:00:00+00:00"}
+    assert query["$or"] == [{"client_id": "c1"}, {"user_id": "c1"}]
+    assert "declared_at" not in build_export_query()
+
+
+def test_export_streams_zip_and_reuses_cached_pdfs(tmp_path, monkeypatch):
+    renders = []
+
+    async def fake_render(invoice_data):
+        renders.append(invoice_data["invoice_number"])
+        return f"%PDF {invoice_data['invoice_number']}".encode()
+
+    monkeypatch.setattr(invoice_service, "render_invoice_pdf", fake_render)
+    set_invoice_store(LocalBlobStore(tmp_path))
+    payments = make_payments(5)
+    db = FakeDb(payment_declarations=FakeCollection(payments))
+
+    async def scenario():
+        await store_invoice_artifact(db, payments[0]["invoice_number"], b"%PDF deja en cache")
+        return await collect(stream_invoice_zip(db, {}, concurrency=2))
+
+    chunks = asyncio.run(scenario())
+    assert len([chunk for chunk in chunks if chunk]) >= 5  # Une facture envoyée à la fois
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    names = archive.namelist()
+    assert names == [f"Facture_{p['invoice_number']}.pdf" for p in payments] + [MANIFEST_NAME]
+    assert archive.read(names[0]) == b"%PDF deja en cache"
+    assert renders == [p["invoice_number"] for p in payments[1:]]
+
+    rows = list(csv.DictReader(io.StringIO(archive.read(MANIFEST_NAME).decode("utf-8-sig"))))
+    assert [row["invoice_number"] for row in rows] == [p["invoice_number"] for p in payments]
+
+
+def test_export_records_failed_invoices_in_manifest(tmp_path, monkeypatch):
+    async def failing_render(invoice_data):
+        if invoice_data["invoice_number"].startswith("ALO-20240111"):
+            raise RuntimeError("police introuvable")
+        return b"%PDF"
+
+    monkeypatch.setattr(invoice_service, "render_invoice_pdf", failing_render)
+    set_invoice_store(LocalBlobStore(tmp_path))
+    db = FakeDb(payment_declarations=FakeCollection(make_payments(3)))
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(asyncio.run(collect(stream_invoice_zip(db, {}))))))
+    assert len(archive.namelist()) == 3  # 2 factures + récapitulatif
+    rows = list(csv.DictReader(io.StringIO(archive.read(MANIFEST_NAME).decode("utf-8-sig"))))
+    assert rows[1]["file"].startswith("ERREUR")
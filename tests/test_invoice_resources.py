@@ -0,0 +1,28 @@
+"""Tests des ressources partagées des générateurs de factures"""
+
+import invoice_resources
+from professional_invoice_generator import generate_professional_invoice_pdf
+from services.render_pool import init_render_worker, render_pool
+
+
+def test_resources_loaded_once_per_process():
+    invoice_resources.reset()
+    styles = invoice_resources.get_pdf_styles()
+    fonts = invoice_resources.get_png_fonts()
+    assert invoice_resources.get_pdf_styles() is styles
+    assert invoice_resources.get_png_fonts() is fonts
+    assert set(fonts) == {"title", "large", "medium", "small"}
+
+    invoice_resources.reset()
+    assert invoice_resources.get_pdf_styles() is not styles
+
+
+def test_shared_styles_render_successive_invoices():
+    invoice_resources.preload()
+    for number in ("ALO-1", "ALO-2"):
+        pdf = generate_professional_invoice_pdf({"invoice_number": number, "client_name": "Client", "amount": 1000})
+        assert pdf.startswith(b"%PDF")
+
+
+def test_render_pool_preloads_resources():
+    assert render_pool.initializer is init_render_worker
@@ -0,0 +1,160 @@
+"""Tests du cache de factures (magasin local, ETag/Range, rendu unique par facture)"""
+
+import asyncio
+
+import pytest
+
+from services import invoice_service
+from services.invoice_service import (
+    KIND_PNG, cleanup_orphan_artifacts, get_invoice_png, get_or_render_invoice_pdf, read_invoice_artifact,
+    set_invoice_store, store_invoice_artifact
+)
+from services.invoice_store import LocalBlobStore, shard_prefix
+from tests.fakes import FakeCollection, FakeDb
+from utils.http_cache import RangeNotSatisfiable, etag_matches, parse_byte_range
+
+
+def make_db():
+    return FakeDb(invoice_artifacts=FakeCollection(unique=[("invoice_number", "kind")]))
+
+
+PAYMENT = {"id": "p1", "invoice_number": "ALO-20240101-ABC", "amount": 1000, "status": "CONFIRMED"}
+
+
+def test_local_store_writes_atomically_and_reads_ranges(tmp_path):
+    store = LocalBlobStore(tmp_path)
+
+    async def scenario():
+        await store.put("a/b.pdf", b"0123456789")
+        assert await store.exists("a/b.pdf")
+        assert await store.read("a/b.pdf") == b"0123456789"
+        assert await store.read("a/b.pdf", 2, 4) == b"234"
+        assert [blob["key"] for blob in await store.list_blobs()] == ["a/b.pdf"]
+        await store.delete("a/b.pdf")
+        return await store.exists("a/b.pdf")
+
+    assert asyncio.run(scenario()) is False
+    assert not list(tmp_path.rglob(".tmp-*"))
+
+
+def test_local_store_rejects_keys_outside_root(tmp_path):
+    with pytest.raises(ValueError):
+        asyncio.run(LocalBlobStore(tmp_path / "root").put("../evil.pdf", b"x"))
+
+
+def test_parse_byte_range():
+    assert parse_byte_range(None, 100) is None
+    assert parse_byte_range("bytes=0-9", 100) == (0, 9)
+    assert parse_byte_range("bytes=90-", 100) == (90, 99)
+    assert parse_byte_range("bytes=-10", 100) == (90, 99)
+    assert parse_byte_range("bytes=50-500", 100) == (50, 99)
+    assert parse_byte_range("bytes=0-1,5-6", 100) is None
+    assert parse_byte_range("items=0-1", 100) is None
+    assert parse_byte_range("bytes=5-2", 100) is None  # fin < début: ignoré, réponse 200
+    assert parse_byte_range("bytes=-", 100) is None
+    with pytest.raises(RangeNotSatisfiable):
+        parse_byte_range("bytes=100-", 100)
+    with pytest.raises(RangeNotSatisfiable):
+        parse_byte_range("bytes=-0", 100)
+
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches(None, '"abc"')
+    assert not etag_matches('"def"', '"abc"')
+
+
+def test_invoice_pdf_rendered_once_and_reused(tmp_path, monkeypatch):
+    renders = []
+
+    async def fake_render(invoice_data):
+        renders.append(invoice_data["invoice_number"])
+        return b"%PDF-1.4 facture"
+
+    monkeypatch.setattr(invoice_service, "render_invoice_pdf", fake_render)
+    set_invoice_store(LocalBlobStore(tmp_path))
+    db = make_db()
+
+    async def scenario():
+        first = await get_or_render_invoice_pdf(db, PAYMENT)
+        second = await get_or_render_invoice_pdf(db, PAYMENT)
+        return first, second, await read_invoice_artifact(second, 0, 3)
+
+    first, second, head = asyncio.run(scenario())
+    assert renders == ["ALO-20240101-ABC"]
+    assert first["key"] == second["key"] and first["key"].startswith("2024/01/ALO-20240101-ABC-")
+    assert second["size"] == len(b"%PDF-1.4 facture")
+    assert head == b"%PDF"
+
+
+def test_missing_blob_is_rendered_again(tmp_path, monkeypatch):
+    renders = []
+
+    async def fake_render(invoice_data):
+        renders.append(1)
+        return b"%PDF-1.4"
+
+    monkeypatch.setattr(invoice_service, "render_invoice_pdf", fake_render)
+    store = LocalBlobStore(tmp_path)
+    set_invoice_store(store)
+    db = make_db()
+
+    async def scenario():
+        artifact = await get_or_render_invoice_pdf(db, PAYMENT)
+        await store.delete(artifact["key"])
+        artifact = await get_or_render_invoice_pdf(db, PAYMENT)
+        return await store.exists(artifact["key"])
+
+    assert asyncio.run(scenario())
+    assert len(renders) == 2
+    assert len(db.invoice_artifacts.documents) == 1
+
+
+def test_shard_prefix_from_invoice_number():
+    assert shard_prefix("ALO-20240315-ABCDEF12") == "2024/03"
+    assert shard_prefix("facture-manuelle") == "autres"
+
+
+def test_legacy_png_imported_into_store(tmp_path, monkeypatch):
+    legacy_dir = tmp_path / "legacy"
+    legacy_dir.mkdir()
+    (legacy_dir / "ALO-20240101-ABC.png").write_bytes(b"\x89PNG ancien")
+    monkeypatch.setattr(invoice_service, "LEGACY_INVOICE_DIR", str(legacy_dir))
+    set_invoice_store(LocalBlobStore(tmp_path / "store"))
+    db = make_db()
+
+    async def scenario():
+        artifact = await get_invoice_png(db, "ALO-20240101-ABC")
+        missing = await get_invoice_png(db, "../legacy/ALO-20240101-ABC")
+        return artifact, missing, await read_invoice_artifact(artifact)
+
+    artifact, missing, data = asyncio.run(scenario())
+    assert artifact["kind"] == KIND_PNG and artifact["key"].startswith("2024/01/")
+    assert data == b"\x89PNG ancien"
+    assert missing is None
+
+
+def test_cleanup_removes_unreferenced_artifacts_and_stray_blobs(tmp_path):
+    store = LocalBlobStore(tmp_path)
+    set_invoice_store(store)
+    db = make_db()
+    db.invoices = FakeCollection([{"invoice_number": "ALO-20240101-KEEP"}])
+    db.payment_declarations = FakeCollection([{"invoice_number": "ALO-20240102-PAID"}])
+
+    async def scenario():
+        kept = await store_invoice_artifact(db, "ALO-20240101-KEEP", b"%PDF 1")
+        paid = await store_invoice_artifact(db, "ALO-20240102-PAID", b"%PDF 2")
+        gone = await store_invoice_artifact(db, "ALO-20240103-GONE", b"%PDF 3")
+        await store.put("2024/01/stray-recent.pdf", b"x")
+        report = await cleanup_orphan_artifacts(db, grace_hours=1)
+        stale = await cleanup_orphan_artifacts(db, grace_hours=-1)
+        return kept, paid, gone, report, stale
+
+    kept, paid, gone, report, stale = asyncio.run(scenario())
+    assert report == {"records_removed": 1, "blobs_removed": 0}
+    assert stale == {"records_removed": 0, "blobs_removed": 1}
+    remaining = {blob.name for blob in tmp_path.rglob("*") if blob.is_file()}
+    assert remaining == {kept["key"].split("/")[-1], paid["key"].split("/")[-1]}
+    assert [d["invoice_number"] for d in db.invoice_artifacts.documents] == ["ALO-20240101-KEEP", "ALO-20240102-PAID"]
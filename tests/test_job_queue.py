@@ -0,0 +1,134 @@
+"""Tests de la file de tâches (backoff, bail, reprises, lettres mortes, idempotence, effacement)"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from services.job_queue import (
+    BACKOFF_MAX_SECONDS, JOB_DEAD, JOB_DONE, JOB_PENDING, JOB_RUNNING, PermanentJobError, claim_next_job,
+    compute_backoff, enqueue_job, register_job_handler, retry_dead_job, run_job
+)
+from tests.fakes import FakeCollection, FakeDb
+
+
+def test_backoff_is_exponential_without_jitter():
+    delays = [compute_backoff(attempt, base=5, jitter=0) for attempt in range(1, 5)]
+    assert delays == [5, 10, 20, 40]
+
+
+def test_backoff_is_capped():
+    assert compute_backoff(50, jitter=0) == BACKOFF_MAX_SECONDS
+
+
+def test_backoff_jitter_stays_within_bounds():
+    for _ in range(100):
+        delay = compute_backoff(3, base=5, jitter=0.1)
+        assert 20 <= delay <= 22
+
+
+def _job_db():
+    return FakeDb(jobs=FakeCollection(unique=[("idempotency_key",)]))
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_idempotency_key_returns_existing_job():
+    db = _job_db()
+
+    async def scenario():
+        first = await enqueue_job(db, "test.noop", {"n": 1}, idempotency_key="cle")
+        second = await enqueue_job(db, "test.noop", {"n": 2}, idempotency_key="cle")
+        third = await enqueue_job(db, "test.noop", {"n": 3})
+        return first, second, third
+
+    first, second, third = _run(scenario())
+    assert first == second != third
+    assert len(db.jobs.documents) == 2
+
+
+def test_claim_takes_due_jobs_and_expired_leases_only():
+    db = _job_db()
+
+    async def scenario():
+        await enqueue_job(db, "test.noop", {}, delay_seconds=3600)
+        due = await enqueue_job(db, "test.noop", {})
+        claimed = await claim_next_job(db, "w1")
+        nothing = await claim_next_job(db, "w2")
+        # Bail expiré (worker arrêté): la tâche est reprise par un autre worker
+        db.jobs.documents[1]["locked_until"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+        reclaimed = await claim_next_job(db, "w2")
+        return due, claimed, nothing, reclaimed
+
+    due, claimed, nothing, reclaimed = _run(scenario())
+    assert claimed["id"] == due and claimed["status"] == JOB_RUNNING and claimed["attempts"] == 1
+    assert nothing is None
+    assert reclaimed["id"] == due and reclaimed["locked_by"] == "w2" and reclaimed["attempts"] == 2
+
+
+def test_failed_job_is_retried_with_backoff_then_dead_lettered():
+    db = _job_db()
+    calls = []
+
+    async def failing(db, payload):
+        calls.append(payload)
+        raise RuntimeError("SendGrid indisponible")
+
+    register_job_handler("test.failing", failing)
+
+    async def scenario():
+        job_id = await enqueue_job(db, "test.failing", {"n": 1}, max_attempts=2)
+        first = await run_job(db, await claim_next_job(db, "w1"))
+        retry_at = db.jobs.documents[0]["run_at"]
+        db.jobs.documents[0]["run_at"] = datetime.now(timezone.utc)
+        second = await run_job(db, await claim_next_job(db, "w1"))
+        return job_id, first, retry_at, second
+
+    job_id, first, retry_at, second = _run(scenario())
+    assert first == JOB_PENDING and retry_at > datetime.now(timezone.utc)
+    assert second == JOB_DEAD and len(calls) == 2
+    job = db.jobs.documents[0]
+    assert "SendGrid indisponible" in job["last_error"] and "locked_by" not in job
+    assert _run(retry_dead_job(db, job_id)) is True
+    assert job["status"] == JOB_PENDING and job["attempts"] == 0
+
+
+def test_permanent_error_skips_retries():
+    db = _job_db()
+
+    async def invalid(db, payload):
+        raise PermanentJobError("adresse invalide")
+
+    register_job_handler("test.permanent", invalid)
+
+    async def scenario():
+        await enqueue_job(db, "test.permanent", {})
+        return await run_job(db, await claim_next_job(db, "w1"))
+
+    assert _run(scenario()) == JOB_DEAD
+
+
+def test_sensitive_payload_redacted_on_success_and_dead_letter():
+    db = _job_db()
+
+    async def ok(db, payload):
+        return {"sent": True}
+
+    async def ko(db, payload):
+        raise PermanentJobError("refusé")
+
+    register_job_handler("test.secret_ok", ok)
+    register_job_handler("test.secret_ko", ko)
+
+    async def scenario():
+        await enqueue_job(db, "test.secret_ok", {"temporary_password": "x"}, redact_on_success=True)
+        await run_job(db, await claim_next_job(db, "w1"))
+        dead_id = await enqueue_job(db, "test.secret_ko", {"temporary_password": "y"}, redact_on_success=True)
+        await run_job(db, await claim_next_job(db, "w1"))
+        return await retry_dead_job(db, dead_id)
+
+    retried = _run(scenario())
+    done, dead = db.jobs.documents
+    assert done["status"] == JOB_DONE and done["payload"] == {}
+    assert dead["status"] == JOB_DEAD and dead["payload"] == {} and dead["payload_redacted"]
+    assert retried is False
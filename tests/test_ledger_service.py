@@ -0,0 +1,138 @@
+"""Tests du grand livre (idempotence, solde matérialisé, réconciliation)"""
+
+import asyncio
+
+from services import ledger_service
+from services.ledger_service import (
+    PaymentStatus, SOURCE_PAYMENT, SOURCE_WITHDRAWAL, get_company_balance, reconcile_ledger, record_ledger_entry
+)
+from tests.fakes import FakeCollection, FakeCursor, FakeDb
+
+
+class FakeLedger(FakeCollection):
+    """Écritures avec l'index unique (source_type, source_id); aggregate() = totaux par type"""
+
+    def __init__(self):
+        super().__init__(unique=[("source_type", "source_id")])
+
+    def aggregate(self, pipeline):
+        totals = {}
+        for entry in self.documents:
+            totals[entry["source_type"]] = totals.get(entry["source_type"], 0) + entry["amount"]
+        return FakeCursor([{"_id": key, "total": total} for key, total in totals.items()])
+
+
+def _fake_db(declarations=(), withdrawals=(), balance=None):
+    return FakeDb(
+        ledger_entries=FakeLedger(),
+        company_balance=FakeCollection([balance] if balance else []),
+        payment_declarations=FakeCollection(declarations),
+        withdrawals=FakeCollection(withdrawals),
+    )
+
+
+def test_payment_status_matches_both_casings():
+    assert PaymentStatus.normalize("confirmed") is PaymentStatus.CONFIRMED
+    assert PaymentStatus.normalize("CONFIRMED") is PaymentStatus.CONFIRMED
+    assert PaymentStatus.normalize("Pending") is PaymentStatus.PENDING
+    assert PaymentStatus.normalize("inconnu") is None
+    assert PaymentStatus.CONFIRMED.query() == {"$in": ["CONFIRMED", "confirmed"]}
+
+
+def test_recording_same_source_twice_is_idempotent():
+    db = _fake_db()
+
+    async def scenario():
+        assert await record_ledger_entry(db, SOURCE_PAYMENT, "p1", 100000)
+        assert not await record_ledger_entry(db, SOURCE_PAYMENT, "p1", 100000)
+        assert await record_ledger_entry(db, SOURCE_WITHDRAWAL, "w1", 25000.5)
+        return await get_company_balance(db)
+
+    balance = asyncio.run(scenario())
+    assert balance["current_balance"] == 74999.5
+    assert balance["total_payments"] == 100000
+    assert balance["total_withdrawals"] == 25000.5
+    assert [e["delta"] for e in db.ledger_entries.documents] == [100000, -25000.5]
+
+
+def test_reconciliation_backfills_history_and_corrects_drift():
+    db = _fake_db(
+        declarations=[
+            {"id": "p1", "amount": 1000, "status": "confirmed"},
+            {"id": "p2", "amount": 2000, "status": "CONFIRMED"},
+            {"id": "p3", "amount": 4000, "status": "pending"},
+        ],
+        withdrawals=[{"id": "w1", "amount": 500}],
+        # Solde hérité de l'ancien calcul (paiements en majuscules uniquement)
+        balance={"current_balance": 1500, "total_payments": 2000, "total_withdrawals": 500},
+    )
+
+    report = asyncio.run(reconcile_ledger(db))
+    assert report["missing_payments"] == 2
+    assert report["missing_withdrawals"] == 1
+    assert report["drift"] == 1500
+
+    balance = asyncio.run(get_company_balance(db))
+    assert (balance["current_balance"], balance["total_payments"], balance["total_withdrawals"]) == (2500, 3000, 500)
+
+    # Deuxième passage: rien à corriger
+    assert asyncio.run(reconcile_ledger(db)) == {"missing_payments": 0, "missing_withdrawals": 0, "drift": 0}
+
+
+def test_reconciliation_does_not_overwrite_concurrent_increment():
+    db = _fake_db(
+        declarations=[{"id": "p1", "amount": 1000, "status": "CONFIRMED"}],
+        balance={"current_balance": 900, "total_payments": 900, "total_withdrawals": 0, "last_updated": "t0"},
+    )
+    asyncio.run(db.ledger_entries.insert_one(
+        {"id": "e1", "source_type": SOURCE_PAYMENT, "source_id": "p1", "amount": 1000, "delta": 1000}
+    ))
+    read_balance = db.company_balance.find_one
+    reads = []
+
+    async def find_one_then_concurrent_payment(query, projection=None):
+        snapshot = await read_balance(query, projection)
+        if not reads:
+            # Paiement confirmé par l'endpoint juste après la lecture du solde
+            await record_ledger_entry(db, SOURCE_PAYMENT, "p2", 500)
+        reads.append(snapshot)
+        return snapshot
+
+    db.company_balance.find_one = find_one_then_concurrent_payment
+    report = asyncio.run(reconcile_ledger(db))
+
+    assert len(reads) == 2  # Première correction refusée (last_updated modifié), puis relue
+    assert report["drift"] == -100
+    balance = db.company_balance.documents[0]
+    assert (balance["current_balance"], balance["total_payments"]) == (1500, 1500)
+
+
+def test_reconciliation_between_insert_and_increment_does_not_double_count(monkeypatch):
+    db = _fake_db(declarations=[{"id": "p1", "amount": 1000, "status": "CONFIRMED"}])
+    apply_to_balance = ledger_service._apply_to_balance
+    reports = []
+
+    async def reconcile_then_apply(db, entries):
+        # La réconciliation s'exécute après l'insertion de l'écriture, avant le $inc de l'endpoint
+        reports.append(await reconcile_ledger(db))
+        await apply_to_balance(db, entries)
+
+    monkeypatch.setattr(ledger_service, "_apply_to_balance", reconcile_then_apply)
+    asyncio.run(record_ledger_entry(db, SOURCE_PAYMENT, "p1", 1000))
+    monkeypatch.setattr(ledger_service, "_apply_to_balance", apply_to_balance)
+
+    assert reports[0]["missing_payments"] == 0
+    assert db.company_balance.documents[0]["current_balance"] == 1000
+    assert db.ledger_entries.documents[0]["applied"] is True
+    assert asyncio.run(reconcile_ledger(db))["drift"] == 0
+
+
+def test_stale_unapplied_entry_is_recomputed():
+    db = _fake_db(balance={"current_balance": 0, "total_payments": 0, "total_withdrawals": 0})
+    # Écriture insérée puis processus arrêté avant le $inc
+    asyncio.run(db.ledger_entries.insert_one({
+        "id": "e1", "source_type": SOURCE_PAYMENT, "source_id": "p1", "amount": 700, "delta": 700,
+        "recorded_at": "2020-01-01T00:00:00+00:00", "applied": False
+    }))
+    assert asyncio.run(reconcile_ledger(db))["drift"] == -700
+    assert db.company_balance.documents[0]["current_balance"] == 700
@@ -0,0 +1,78 @@
+"""Tests de la diffusion groupée des notifications"""
+
+import asyncio
+
+from services.notification_engine import set_notification_emitter
+from services.notification_service import create_notifications_bulk
+from services.user_cache import RoleMembersCache, invalidate_cached_user, role_members_cache
+from tests.fakes import FakeCollection, FakeDb
+
+
+def _db():
+    return FakeDb(
+        users=FakeCollection([
+            {"id": "m1", "role": "MANAGER", "is_active": True},
+            {"id": "m2", "role": "MANAGER", "is_active": True},
+            {"id": "m3", "role": "MANAGER", "is_active": False},
+            {"id": "s1", "role": "SUPERADMIN", "is_active": True},
+        ]),
+    )
+
+
+def test_role_members_cache_queries_once_until_invalidated():
+    db = _db()
+    cache = RoleMembersCache(ttl_seconds=60)
+
+    assert asyncio.run(cache.get_active_user_ids(db, "MANAGER")) == ["m1", "m2"]
+    asyncio.run(cache.get_active_user_ids(db, "MANAGER"))
+    assert db.users.calls["find"] == 1
+
+    cache.invalidate("MANAGER")
+    asyncio.run(cache.get_active_user_ids(db, "MANAGER"))
+    assert db.users.calls["find"] == 2
+    assert cache.stats()["hits"] == 1
+
+
+def test_invalidate_cached_user_clears_role_lists():
+    db = _db()
+    asyncio.run(role_members_cache.get_active_user_ids(db, "SUPERADMIN"))
+    invalidate_cached_user("s1")
+    asyncio.run(role_members_cache.get_active_user_ids(db, "SUPERADMIN"))
+    assert db.users.calls["find"] == 2
+    role_members_cache.invalidate()
+
+
+def test_bulk_insert_and_single_emit():
+    db = _db()
+    emitted = []
+
+    async def emitter(event, data, room=None):
+        emitted.append((event, data, room))
+
+    role_members_cache.invalidate()
+    set_notification_emitter(emitter)
+    try:
+        ids = asyncio.run(create_notifications_bulk(
+            db, ["m1", "c1"], {"title": "T", "message": "M", "type": "payment_declaration"}, roles=["MANAGER"]
+        ))
+    finally:
+        set_notification_emitter(None)
+        role_members_cache.invalidate()
+
+    assert len(ids) == 3  # m1 dédoublonné
+    assert db.notifications.calls["insert_many"] == 1
+    batch = db.notifications.documents
+    assert [n["user_id"] for n in batch] == ["m1", "c1", "m2"]
+    assert len({n["batch_id"] for n in batch}) == 1
+
+    assert len(emitted) == 1
+    event, data, rooms = emitted[0]
+    assert event == "new_notification"
+    assert rooms == ["role:MANAGER", "user:m1", "user:c1"]
+    assert data["batch_id"] == batch[0]["batch_id"]
+
+
+def test_bulk_without_recipients_writes_nothing():
+    db = _db()
+    assert asyncio.run(create_notifications_bulk(db, [], {"title": "T", "message": "M", "type": "x"})) == []
+    assert db.notifications.documents == []
@@ -0,0 +1,107 @@
+"""Tests du moteur de notifications (tampon write-behind, limitation par type)"""
+
+import asyncio
+
+from services.notification_engine import NotificationEngine, NotificationRateLimiter, parse_rate_limits
+from tests.fakes import FakeCollection, FakeDb
+
+
+class FlakyNotifications(FakeCollection):
+    """insert_many échoue `fail_times` fois (MongoDB indisponible)"""
+
+    def __init__(self, fail_times=0):
+        super().__init__()
+        self.fail_times = fail_times
+
+    async def insert_many(self, documents, ordered=True):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError("mongo indisponible")
+        return await super().insert_many(documents, ordered)
+
+
+def test_parse_rate_limits():
+    assert parse_rate_limits("message=10/60, urgent_followup_48h=20/3600") == {
+        "message": (10, 60.0),
+        "urgent_followup_48h": (20, 3600.0),
+    }
+    assert parse_rate_limits("invalide,=") == {}
+
+
+def test_rate_limiter_sliding_window():
+    limiter = NotificationRateLimiter({"message": (2, 60)})
+    assert limiter.allow("u1", "message", now=0)
+    assert limiter.allow("u1", "message", now=1)
+    assert not limiter.allow("u1", "message", now=2)
+    assert limiter.allow("u2", "message", now=2)       # Par utilisateur
+    assert limiter.allow("u1", "case_update", now=2)   # Type non limité
+    assert limiter.allow("u1", "message", now=61)      # Fenêtre glissée
+    assert limiter.dropped == 1
+
+
+def test_without_buffer_writes_immediately_and_emits():
+    db = FakeDb()
+    emitted = []
+
+    async def emitter(event, data, room=None):
+        emitted.append((event, data, room))
+
+    engine = NotificationEngine(rate_limits={})
+    engine.set_emitter(emitter)
+    notification_id = asyncio.run(engine.notify(db, "u1", "Titre", "Message", "case_update", "c1"))
+
+    assert db.notifications.documents[0]["id"] == notification_id
+    assert emitted == [("new_notification", {
+        "title": "Titre", "message": "Message", "type": "case_update",
+        "created_at": db.notifications.documents[0]["created_at"], "id": notification_id
+    }, "user:u1")]
+
+
+def test_buffer_coalesces_burst_into_one_insert_many():
+    db = FakeDb()
+    emitted = []
+
+    async def emitter(event, data, room=None):
+        emitted.append(room)
+
+    async def scenario():
+        engine = NotificationEngine(flush_interval=0.01, rate_limits={})
+        engine.set_emitter(emitter)
+        engine.start(db)
+        for index in range(20):
+            await engine.notify(db, f"u{index}", "T", "M", "case_update")
+        assert db.notifications.documents == []  # Rien d'écrit avant le vidage
+        await asyncio.sleep(0.05)
+        await engine.stop()
+        return engine
+
+    engine = asyncio.run(scenario())
+    assert db.notifications.calls["insert_many"] == 1
+    assert len(db.notifications.documents) == 20
+    assert db.notifications.calls["insert_one"] == 0
+    assert len(emitted) == 20  # Émis après écriture
+    assert engine.stats()["written"] == 20
+
+
+def test_stop_flushes_pending_and_failed_writes_are_retried():
+    db = FakeDb(notifications=FlakyNotifications(fail_times=1))
+
+    async def scenario():
+        engine = NotificationEngine(flush_interval=60, rate_limits={})
+        engine.start(db)
+        await engine.notify(db, "u1", "T", "M", "case_update")
+        assert await engine.flush() == 0  # Échec: reprogrammée
+        await engine.stop()
+
+    asyncio.run(scenario())
+    assert [n["user_id"] for n in db.notifications.documents] == ["u1"]
+
+
+def test_rate_limited_notification_is_not_written():
+    db = FakeDb()
+    engine = NotificationEngine(rate_limits={"message": (1, 60)})
+
+    assert asyncio.run(engine.notify(db, "u1", "T", "M", "message"))
+    assert asyncio.run(engine.notify(db, "u1", "T", "M", "message")) is None
+    assert len(db.notifications.documents) == 1
+    assert engine.stats()["rate_limited"] == 1
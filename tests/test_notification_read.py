@@ -0,0 +1,30 @@
+"""Tests du marquage des notifications comme lues (compteur décrémenté une seule fois)"""
+
+import asyncio
+
+from services import unread_counters
+from services.notification_service import mark_notification_read
+from tests.fakes import FakeCollection, FakeDb
+
+
+def test_marking_twice_decrements_unread_once(monkeypatch):
+    monkeypatch.setattr(unread_counters, "_emitter", None)
+    db = FakeDb(
+        notifications=FakeCollection([
+            {"id": "n1", "user_id": "u1", "read": False},
+            {"id": "n2", "user_id": "u1", "read": False},
+        ]),
+        unread_counters=FakeCollection([{"user_id": "u1", "notifications": 2}])
+    )
+
+    async def scenario():
+        return [
+            await mark_notification_read(db, "n1", "u1"),
+            await mark_notification_read(db, "n1", "u1"),
+            await mark_notification_read(db, "absente", "u1"),
+            await mark_notification_read(db, "n2", "autre"),
+        ]
+
+    assert asyncio.run(scenario()) == [True, False, None, None]
+    assert db.unread_counters.documents[0]["notifications"] == 1
+    assert "read_at" in db.notifications.documents[0]
@@ -0,0 +1,41 @@
+"""Tests des curseurs de pagination keyset"""
+
+import pytest
+from fastapi import HTTPException
+
+from utils.pagination import decode_cursor, encode_cursor, keyset_filter, merge_filters
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("2025-01-01T10:00:00+00:00", "abc")
+    assert decode_cursor(cursor) == ("2025-01-01T10:00:00+00:00", "abc")
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("pas-un-curseur")
+    assert exc.value.status_code == 400
+
+
+def test_keyset_filter_ascending():
+    cursor = encode_cursor("2025-01-01", "id-1")
+    assert keyset_filter("created_at", cursor) == {"$or": [
+        {"created_at": {"$gt": "2025-01-01"}},
+        {"created_at": "2025-01-01", "id": {"$gt": "id-1"}}
+    ]}
+
+
+def test_keyset_filter_descending():
+    cursor = encode_cursor("2025-01-01", "id-1")
+    flt = keyset_filter("timestamp", cursor, direction=-1)
+    assert flt["$or"][0] == {"timestamp": {"$lt": "2025-01-01"}}
+
+
+def test_keyset_filter_without_cursor():
+    assert keyset_filter("created_at", None) == {}
+
+
+def test_merge_filters():
+    assert merge_filters({}, {}) == {}
+    assert merge_filters({"a": 1}, {}) == {"a": 1}
+    assert merge_filters({"a": 1}, {"b": 2}) == {"$and": [{"a": 1}, {"b": 2}]}
@@ -0,0 +1,61 @@
+"""Tests du registre de présence Socket.IO"""
+
+import asyncio
+
+import pytest
+
+from services.presence_service import InMemoryPresenceBackend, RedisPresenceBackend, user_room
+
+
+def _backends():
+    backends = [InMemoryPresenceBackend]
+    try:
+        import fakeredis
+        backends.append(lambda: RedisPresenceBackend(fakeredis.FakeAsyncRedis()))
+    except ImportError:
+        pass
+    return backends
+
+
+@pytest.fixture(params=_backends())
+def presence(request):
+    return request.param()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_user_room_name():
+    assert user_room("abc") == "user:abc"
+
+
+def test_multiple_devices_per_user(presence):
+    async def scenario():
+        await presence.add("u1", "sid-a")
+        await presence.add("u1", "sid-b")
+        assert await presence.get_sids("u1") == {"sid-a", "sid-b"}
+        assert await presence.get_user("sid-b") == "u1"
+
+        assert await presence.remove("sid-a") == "u1"
+        assert await presence.is_online("u1")
+        assert await presence.remove("sid-b") == "u1"
+        assert not await presence.is_online("u1")
+        assert await presence.online_users() == set()
+
+    run(scenario())
+
+
+def test_remove_unknown_sid(presence):
+    assert run(presence.remove("inconnu")) is None
+
+
+def test_reauthentication_moves_sid(presence):
+    async def scenario():
+        await presence.add("u1", "sid-a")
+        await presence.add("u2", "sid-a")
+        assert await presence.get_user("sid-a") == "u2"
+        assert not await presence.is_online("u1")
+        assert await presence.online_users() == {"u2"}
+
+    run(scenario())
@@ -0,0 +1,122 @@
+"""
+Diffusion Socket.IO entre deux workers via le client_manager partagé.
+
+Lance deux processus uvicorn (tests/fanout_worker.py) sur le même bus, connecte un
+client à chacun et vérifie qu'une émission faite dans le worker B atteint la room
+d'un utilisateur connecté au worker A. Ignoré si aucun bus (Redis ou MongoDB)
+n'est joignable.
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("uvicorn")
+requests = pytest.importorskip("requests")
+socketio = pytest.importorskip("socketio")
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _redis_available(url):
+    try:
+        import redis
+        redis.Redis.from_url(url, socket_connect_timeout=0.5).ping()
+        return True
+    except Exception:
+        return False
+
+
+def _mongo_available(url):
+    try:
+        from pymongo import MongoClient
+        MongoClient(url, serverSelectionTimeoutMS=500).admin.command("ping")
+        return True
+    except Exception:
+        return False
+
+
+def _bus_env():
+    redis_url = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+    mongo_url = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+    channel = f"fanout-test-{uuid.uuid4().hex[:8]}"
+
+    if _redis_available(redis_url):
+        return {"SOCKETIO_MANAGER": "redis", "SOCKETIO_REDIS_URL": redis_url, "SOCKETIO_CHANNEL": channel}
+    if _mongo_available(mongo_url):
+        return {"SOCKETIO_MANAGER": "mongo", "MONGO_URL": mongo_url,
+                "DB_NAME": "aloria_fanout_test", "SOCKETIO_CHANNEL": channel}
+    pytest.skip("Aucun bus Socket.IO disponible (Redis ou MongoDB)")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(port, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/socket.io/?EIO=4&transport=polling", timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Worker sur le port {port} non démarré")
+
+
+@pytest.fixture
+def workers():
+    env = {**os.environ, **_bus_env(), "PYTHONPATH": os.pathsep.join([str(ROOT / "backend"), str(ROOT / "tests")])}
+    ports = [_free_port(), _free_port()]
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "fanout_worker:app", "--port", str(port), "--log-level", "warning"],
+            env=env, cwd=str(ROOT / "tests")
+        )
+        for port in ports
+    ]
+    try:
+        for port in ports:
+            _wait_ready(port)
+        yield ports
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=10)
+
+
+def test_emit_reaches_user_connected_to_other_worker(workers):
+    port_a, port_b = workers
+    received = threading.Event()
+    payloads = []
+
+    receiver = socketio.Client()
+    sender = socketio.Client()
+
+    @receiver.on("new_notification")
+    def on_notification(data):
+        payloads.append(data)
+        received.set()
+
+    receiver.connect(f"http://127.0.0.1:{port_a}", transports=["polling"])
+    sender.connect(f"http://127.0.0.1:{port_b}", transports=["polling"])
+    try:
+        assert receiver.call("join", {"user_id": "u1"}) == "ok"
+        # Laisse le listener du bus de chaque worker s'abonner
+        time.sleep(1)
+        assert sender.call("publish", {"user_id": "u1", "payload": {"title": "Bonjour"}}) == "ok"
+
+        assert received.wait(10), "Émission du worker B non reçue par le client du worker A"
+        assert payloads == [{"title": "Bonjour"}]
+    finally:
+        receiver.disconnect()
+        sender.disconnect()
@@ -0,0 +1,72 @@
+"""Tests du bus Socket.IO MongoDB (reprise du curseur tailable dans l'ordre d'insertion)"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("socketio")
+
+from bson import ObjectId
+
+from services.realtime_manager import MongoPubSubManager
+
+
+class FakeTailableCursor:
+    """Curseur tailable: parcourt la collection dans l'ordre d'insertion, peut être interrompu"""
+
+    def __init__(self, documents, fail_at=None):
+        self.documents = documents
+        self.fail_at = fail_at
+        self.alive = True
+
+    def __aiter__(self):
+        self._position = 0
+        return self
+
+    async def __anext__(self):
+        if self._position == self.fail_at:
+            raise ConnectionError("curseur perdu")
+        if self._position >= len(self.documents):
+            self.alive = False
+            raise StopAsyncIteration
+        self._position += 1
+        return self.documents[self._position - 1]
+
+
+class FakeCappedCollection:
+    def __init__(self, documents):
+        self.documents = documents
+        self.last_at_start = documents[-1]
+        self.cursors = 0
+
+    async def find_one(self, query, projection=None, sort=None):
+        if sort:
+            return self.last_at_start  # Dernier document au démarrage du worker
+        return next((d for d in self.documents if d["_id"] == query["_id"]), None)
+
+    def find(self, query, cursor_type=None):
+        self.cursors += 1
+        # Le premier curseur est interrompu après le deuxième document
+        return FakeTailableCursor(self.documents, fail_at=2 if self.cursors == 1 else None)
+
+
+def test_resume_follows_insertion_order_not_object_ids():
+    # ObjectId de deux processus: l'ordre d'insertion ne suit pas l'ordre des _id
+    ids = [ObjectId("000000000000000000000000"), ObjectId("ffffffffffffffffffffff01"),
+           ObjectId("000000000000000000000002"), ObjectId("000000000000000000000003")]
+    collection = FakeCappedCollection([{"_id": ids[0], "channel": "c", "data": None}])
+    manager = MongoPubSubManager("mongodb://localhost", "test", channel="c")
+    manager._collection = collection
+
+    async def scenario():
+        listener = manager._listen()
+        # Publiés après le démarrage du worker
+        collection.documents += [
+            {"_id": ids[1], "channel": "c", "data": "m1"},
+            {"_id": ids[2], "channel": "autre", "data": "x"},
+            {"_id": ids[3], "channel": "c", "data": "m2"},
+        ]
+        return [await asyncio.wait_for(listener.__anext__(), 5) for _ in range(2)]
+
+    assert asyncio.run(scenario()) == ["m1", "m2"]
+    assert collection.cursors == 2
@@ -0,0 +1,83 @@
+"""Tests du pool de rendu des factures (file bornée, délai, rendu réel hors boucle)"""
+
+import asyncio
+import time
+
+import pytest
+
+from services.render_pool import InvoiceRenderPool, RenderPoolSaturated, RenderTimeout
+
+
+def slow_square(value, seconds):
+    time.sleep(seconds)
+    return value * value
+
+
+INVOICE = {
+    "invoice_number": "ALO-20240101-TEST",
+    "client_name": "Hélène Mbarga",
+    "client_email": "helene@example.com",
+    "client_phone": "+237 600000000",
+    "amount": 150000,
+    "currency": "CFA",
+    "payment_method": "Mobile Money",
+    "description": "Consultation",
+    "created_at": "2024-01-01T10:00:00+00:00",
+    "status": "Confirmé"
+}
+
+
+def test_pool_runs_tasks_and_releases_slots():
+    pool = InvoiceRenderPool(max_workers=2, max_pending=4, timeout_seconds=30)
+
+    async def scenario():
+        results = await asyncio.gather(*(pool.run(slow_square, value, 0) for value in range(4)))
+        await asyncio.sleep(0.05)
+        return results, pool.stats()
+
+    try:
+        results, stats = asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+    assert results == [0, 1, 4, 9]
+    assert stats["pending"] == 0 and stats["completed"] == 4
+
+
+def test_pool_rejects_when_saturated():
+    pool = InvoiceRenderPool(max_workers=1, max_pending=1, timeout_seconds=30)
+
+    async def scenario():
+        first = asyncio.create_task(pool.run(slow_square, 2, 0.5))
+        await asyncio.sleep(0)
+        with pytest.raises(RenderPoolSaturated):
+            await pool.run(slow_square, 3, 0)
+        return await first
+
+    try:
+        assert asyncio.run(scenario()) == 4
+    finally:
+        pool.shutdown()
+    assert pool.stats()["rejected"] == 1
+
+
+def test_pool_times_out_slow_renders():
+    pool = InvoiceRenderPool(max_workers=1, max_pending=2, timeout_seconds=0.2)
+
+    async def scenario():
+        with pytest.raises(RenderTimeout):
+            await pool.run(slow_square, 2, 1)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_render_pdf_in_worker_process():
+    pool = InvoiceRenderPool(max_workers=1, max_pending=2, timeout_seconds=60)
+    try:
+        pdf = asyncio.run(pool.render_pdf(INVOICE))
+    finally:
+        pool.shutdown()
+    assert pdf.startswith(b"%PDF")
@@ -0,0 +1,107 @@
+"""Tests de l'archivage à froid (JSONL.gz par mois, suppression après écriture)"""
+
+import asyncio
+import gzip
+import json
+from datetime import datetime, timezone, timedelta
+
+from pymongo.errors import OperationFailure
+
+from services.index_service import notification_read_ttl_indexes
+from services.retention_service import (
+    NOTIFICATION_READ_TTL_INDEX, archive_collection, archive_path, group_by_month, sync_notification_ttl
+)
+from tests.fakes import FakeCollection, FakeDb
+
+
+def _iso(days_ago):
+    return (datetime.now(timezone.utc) - timedelta(days=days_ago)).isoformat()
+
+
+def _read_archive(path):
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        return [json.loads(line) for line in archive]
+
+
+def test_group_by_month():
+    groups = group_by_month([
+        {"timestamp": "2024-01-31T23:00:00+00:00"},
+        {"timestamp": datetime(2024, 2, 1, tzinfo=timezone.utc)},
+        {"timestamp": None},
+    ], "timestamp")
+    assert sorted(groups) == ["2024-01", "2024-02", "inconnu"]
+
+
+def test_archives_old_documents_in_batches_then_deletes(tmp_path):
+    old = [{"_id": index, "timestamp": _iso(200 + index), "action": "login"} for index in range(5)]
+    recent = [{"_id": 99, "timestamp": _iso(1), "action": "login"}]
+    collection = FakeCollection(old + recent)
+    db = FakeDb(user_activities=collection)
+
+    archived = asyncio.run(archive_collection(db, "user_activities", "timestamp", 180, root=str(tmp_path), batch_size=2))
+
+    assert archived == 5
+    assert collection.calls["delete_many"] == 3
+    assert [document["_id"] for document in collection.documents] == [99]
+
+    lines = []
+    for path in (tmp_path / "user_activities").glob("*.jsonl.gz"):
+        lines.extend(_read_archive(path))
+    assert sorted(line["_archived_id"] for line in lines) == ["0", "1", "2", "3", "4"]
+    assert all("_id" not in line for line in lines)
+
+
+def test_appends_to_existing_month_and_respects_filter(tmp_path):
+    collection = FakeCollection([
+        {"_id": 1, "timestamp": "2020-03-01T10:00:00+00:00", "read_status": True},
+        {"_id": 2, "timestamp": "2020-03-02T10:00:00+00:00", "read_status": False},
+    ])
+    db = FakeDb(chat_messages=collection)
+    path = archive_path(str(tmp_path), "chat_messages", "2020-03")
+    path.parent.mkdir(parents=True)
+    with gzip.open(path, "wt", encoding="utf-8") as archive:
+        archive.write(json.dumps({"_archived_id": "0"}) + "\n")
+
+    asyncio.run(archive_collection(
+        db, "chat_messages", "timestamp", 30, extra_filter={"read_status": True}, root=str(tmp_path)
+    ))
+
+    assert [line["_archived_id"] for line in _read_archive(path)] == ["0", "1"]
+    assert [document["_id"] for document in collection.documents] == [2]  # Non lu conservé
+
+
+def test_disabled_policy_is_noop(tmp_path):
+    collection = FakeCollection([{"_id": 1, "timestamp": "2000-01-01T00:00:00+00:00"}])
+    assert asyncio.run(archive_collection(FakeDb(x=collection), "x", "timestamp", 0, root=str(tmp_path))) == 0
+    assert len(collection.documents) == 1
+
+
+class IndexedNotifications(FakeCollection):
+    def __init__(self, indexes):
+        super().__init__()
+        self.indexes = set(indexes)
+
+    async def drop_index(self, name):
+        if name not in self.indexes:
+            raise OperationFailure("index not found")
+        self.indexes.remove(name)
+
+
+class CommandDb(FakeDb):
+    def __init__(self, indexes):
+        super().__init__(notifications=IndexedNotifications(indexes))
+        self.commands = []
+
+    async def command(self, *args, **kwargs):
+        self.commands.append(args)
+
+
+def test_zero_day_retention_registers_no_ttl_and_drops_existing_index():
+    assert notification_read_ttl_indexes(0) == []
+    assert notification_read_ttl_indexes(30)[0]["expireAfterSeconds"] == 30 * 24 * 3600
+
+    db = CommandDb({NOTIFICATION_READ_TTL_INDEX, "notifications_user_read"})
+    asyncio.run(sync_notification_ttl(db, 0))
+    asyncio.run(sync_notification_ttl(db, 0))  # Index déjà absent: sans erreur
+    assert db.notifications.indexes == {"notifications_user_read"}
+    assert db.commands == []  # Aucun collMod avec expireAfterSeconds=0
@@ -0,0 +1,62 @@
+"""Tests de l'index de recherche (normalisation, préfixes, filtrage par rôle)"""
+
+from services.search_service import (
+    build_case_document, build_search_pipeline, build_user_document, normalize_text,
+    prefix_ngrams, query_terms, scope_filter, tokenize
+)
+
+
+def test_normalize_folds_case_accents_and_punctuation():
+    assert normalize_text("Hélène N'Go-ÉTOUNDI") == "helene n go etoundi"
+    assert normalize_text("  Zoë  ") == "zoe"
+    assert normalize_text(None) == ""
+    assert tokenize("Marie Ngono", "marie.ngono@gmail.com") == ["marie", "ngono", "gmail", "com"]
+
+
+def test_prefix_ngrams_and_query_terms():
+    assert prefix_ngrams(["helene", "ng"]) == ["he", "hel", "hele", "helen", "helene", "ng"]
+    assert query_terms("Hél  x NGO") == ["hel", "ngo"]  # Mots d'une lettre ignorés
+    assert query_terms("a" * 40) == ["a" * 20]
+
+
+def test_documents_are_searchable_by_accentless_prefixes():
+    user = {"id": "u1", "full_name": "Hélène Mbarga", "email": "helene@aloria.com",
+            "phone": "+237 699 12 34 56", "role": "EMPLOYEE", "password": "hash", "is_active": True}
+    document = build_user_document(user)
+
+    assert {"hel", "mba", "237699123456"} <= set(document["prefixes"])
+    assert "password" not in document["data"]
+    assert document["title_norm"] == "helene mbarga"
+    assert build_user_document({**user, "is_active": False}) is None
+
+
+def test_case_document_drops_workflow_and_keeps_owner():
+    case = {"id": "c1", "client_id": "u9", "country": "Canada", "visa_type": "Permis de travail",
+            "status": "En cours", "workflow_steps": [{"title": "x" * 1000}], "assigned_employee_id": "e0"}
+    document = build_case_document(case, "Paul Biya", owner_id="e1")
+
+    assert "workflow_steps" not in document["data"]
+    assert document["owner_id"] == "e1"
+    assert document["title"] == "Dossier Paul Biya"
+    assert "can" in document["prefixes"] and "pau" in document["prefixes"]
+
+
+def test_scope_filter_by_role():
+    assert scope_filter("CLIENT", "u1") is None
+    assert scope_filter("MANAGER", "m1", ["user"]) == {"type": {"$in": ["user"]}}
+    assert scope_filter("EMPLOYEE", "e1", ["user"]) is None
+    assert scope_filter("EMPLOYEE", "e1") == {"$or": [
+        {"type": {"$in": ["visitor"]}},
+        {"type": {"$in": ["client", "case"]}, "owner_id": "e1"},
+    ]}
+    assert scope_filter("EMPLOYEE", "e1", ["case"]) == {"type": {"$in": ["case"]}, "owner_id": "e1"}
+
+
+def test_pipeline_matches_on_indexed_prefixes_and_limits_output():
+    pipeline = build_search_pipeline(["hel", "mba"], {"type": {"$in": ["user"]}}, 5)
+    assert pipeline[0] == {"$match": {"prefixes": {"$all": ["hel", "mba"]}, "type": {"$in": ["user"]}}}
+    assert pipeline[-2] == {"$limit": 5}
+    # Le classement précède toute coupe: une correspondance exacte n'est jamais écartée
+    stages = [next(iter(stage)) for stage in pipeline]
+    assert stages.index("$sort") < stages.index("$limit")
+    assert stages.count("$limit") == 1
@@ -0,0 +1,89 @@
+"""Tests de l'authentification Socket.IO (rooms utilisateur et de rôle lors d'une ré-authentification)"""
+
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("socketio")
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "aloria_test")
+
+import jwt  # noqa: E402
+
+import server  # noqa: E402
+from services.presence_service import InMemoryPresenceBackend, role_room, user_room  # noqa: E402
+from tests.fakes import FakeCollection, FakeDb  # noqa: E402
+
+
+class FakeSio:
+    """Rooms par sid, comme le gestionnaire Socket.IO"""
+
+    def __init__(self):
+        self.room_sets = {}
+        self.emitted = []
+
+    def rooms(self, sid, namespace=None):
+        return [sid, *sorted(self.room_sets.get(sid, set()))]
+
+    async def enter_room(self, sid, room, namespace=None):
+        self.room_sets.setdefault(sid, set()).add(room)
+
+    async def leave_room(self, sid, room, namespace=None):
+        self.room_sets.get(sid, set()).discard(room)
+
+    async def emit(self, event, data=None, room=None, **kwargs):
+        self.emitted.append((event, data, room))
+
+
+def _token(user_id):
+    return jwt.encode({"sub": user_id}, server.SECRET_KEY, algorithm=server.ALGORITHM)
+
+
+@pytest.fixture
+def socket_env(monkeypatch):
+    sio = FakeSio()
+    presence = InMemoryPresenceBackend()
+    users = FakeCollection([
+        {"id": "m1", "role": "MANAGER", "is_active": True},
+        {"id": "c1", "role": "CLIENT", "is_active": True},
+        {"id": "x1", "role": "MANAGER", "is_active": False},
+    ])
+    monkeypatch.setattr(server, "sio", sio)
+    monkeypatch.setattr(server, "presence", presence)
+    monkeypatch.setattr(server, "db", FakeDb(users=users))
+    return sio, presence
+
+
+def test_reauthentication_leaves_previous_user_room(socket_env):
+    sio, presence = socket_env
+
+    async def scenario():
+        await server.authenticate("sid-1", {"token": _token("m1")})
+        await server.authenticate("sid-1", {"token": _token("c1")})
+        return await presence.get_user("sid-1"), await presence.get_sids("m1")
+
+    owner, previous_sids = asyncio.run(scenario())
+    assert owner == "c1"
+    assert not previous_sids
+    assert user_room("m1") not in sio.room_sets["sid-1"]
+    assert user_room("c1") in sio.room_sets["sid-1"]
+
+
+def test_reauthentication_leaves_previous_role_room(socket_env):
+    sio, _ = socket_env
+
+    async def scenario():
+        await server.authenticate("sid-1", {"token": _token("m1")})
+        manager_rooms = set(sio.room_sets["sid-1"])
+        await server.authenticate("sid-1", {"token": _token("c1")})
+        client_rooms = set(sio.room_sets["sid-1"])
+        # Compte désactivé: aucune room de rôle
+        await server.authenticate("sid-1", {"token": _token("x1")})
+        return manager_rooms, client_rooms, set(sio.room_sets["sid-1"])
+
+    manager_rooms, client_rooms, inactive_rooms = asyncio.run(scenario())
+    assert role_room("MANAGER") in manager_rooms
+    assert client_rooms == {user_room("c1"), role_room("CLIENT")}
+    assert inactive_rooms == {user_room("x1")}
@@ -0,0 +1,236 @@
+"""Tests des statistiques de tableau de bord (cache TTL, agrégations vs recalcul brut)"""
+
+import asyncio
+import os
+import uuid
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from services.ledger_service import PaymentStatus
+from services.stats_service import (
+    StatsCache, compute_admin_dashboard_stats, compute_manager_dashboard_stats, day_range
+)
+from tests.fakes import FakeCollection, FakeDb
+
+
+def test_day_range_bounds_iso_timestamps():
+    start, end = day_range(datetime(2024, 12, 31, 15, 0, tzinfo=timezone.utc))
+    assert (start, end) == ("2024-12-31", "2025-01-01")
+    assert start <= "2024-12-31T23:59:59.999999+00:00" < end
+    assert not ("2024-12-30T23:59:59+00:00" >= start)
+
+
+def test_cache_serves_within_ttl_and_recomputes_after_invalidation():
+    cache = StatsCache(ttl_seconds=60)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return {"n": len(calls)}
+
+    async def scenario():
+        first = await cache.get_or_compute("k", compute)
+        second = await cache.get_or_compute("k", compute)
+        cache.invalidate("k")
+        third = await cache.get_or_compute("k", compute)
+        return first, second, third
+
+    assert asyncio.run(scenario()) == ({"n": 1}, {"n": 1}, {"n": 2})
+    assert cache.stats()["hits"] == 1
+
+
+def test_concurrent_requests_share_one_computation():
+    cache = StatsCache(ttl_seconds=60)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"ok": True}
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(10)))
+
+    assert asyncio.run(scenario()) == [{"ok": True}] * 10
+    assert len(calls) == 1
+
+
+def test_failed_computation_is_not_cached():
+    cache = StatsCache(ttl_seconds=60)
+
+    async def failing():
+        raise RuntimeError("mongo indisponible")
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await cache.get_or_compute("k", failing)
+        return await cache.get_or_compute("k", lambda: asyncio.sleep(0, result={"ok": True}))
+
+    assert asyncio.run(scenario()) == {"ok": True}
+
+
+def test_invalidation_during_computation_discards_stale_result():
+    cache = StatsCache(ttl_seconds=60)
+    totals = {"balance": 100}
+    started = asyncio.Event()
+
+    async def compute():
+        value = dict(totals)
+        started.set()
+        await asyncio.sleep(0.01)
+        return value
+
+    async def scenario():
+        stale = asyncio.create_task(cache.get_or_compute("k", compute))
+        await started.wait()
+        # Paiement confirmé pendant l'agrégation: hook d'invalidation
+        totals["balance"] = 250
+        cache.invalidate("k")
+        fresh = await cache.get_or_compute("k", compute)
+        return await stale, fresh, await cache.get_or_compute("k", compute)
+
+    stale, fresh, cached = asyncio.run(scenario())
+    assert stale == {"balance": 100}
+    assert fresh == cached == {"balance": 250}
+
+
+def test_global_invalidation_also_discards_in_flight_results():
+    cache = StatsCache(ttl_seconds=60)
+
+    async def scenario():
+        task = asyncio.create_task(cache.get_or_compute("k", lambda: asyncio.sleep(0.01, result={"v": 1})))
+        await asyncio.sleep(0)
+        cache.invalidate()
+        await task
+        return cache.stats()["keys"]
+
+    assert asyncio.run(scenario()) == 0
+
+
+# ---------------------------------------------------------------------------
+# Recalcul brut (ancienne implémentation Python) sur une vraie base MongoDB
+# ---------------------------------------------------------------------------
+
+def _mongo_url():
+    url = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+    try:
+        from pymongo import MongoClient
+        MongoClient(url, serverSelectionTimeoutMS=500).admin.command("ping")
+    except Exception:
+        pytest.skip("MongoDB indisponible")
+    return url
+
+
+async def _brute_force_admin_stats(db):
+    users = await db.users.find({}).to_list(None)
+    cases = await db.cases.find({}).to_list(None)
+    declarations = await db.payment_declarations.find({}).to_list(None)
+    consultations = await db.payments.find({"type": "consultation"}).to_list(None)
+    withdrawals = await db.withdrawals.find({}).to_list(None)
+    activities = await db.user_activities.find({}).to_list(None)
+    today = datetime.now(timezone.utc).date().isoformat()
+
+    active = [u for u in users if u.get("is_active") is True]
+    confirmed_total = sum(
+        p.get("amount", 0) for p in declarations if PaymentStatus.normalize(p.get("status")) == PaymentStatus.CONFIRMED
+    )
+    withdrawals_total = sum(w.get("amount", 0) for w in withdrawals)
+    return {
+        "users": {
+            "total": len(active),
+            "managers": sum(u["role"] == "MANAGER" for u in active),
+            "employees": sum(u["role"] == "EMPLOYEE" for u in active),
+            "clients": sum(u["role"] == "CLIENT" for u in active),
+        },
+        "business": {
+            "total_cases": len(cases),
+            "active_cases": sum(c["status"] not in ("Terminated", "Rejected") for c in cases),
+            "total_payments": len(declarations),
+            "pending_payments": sum(
+                PaymentStatus.normalize(p.get("status")) == PaymentStatus.PENDING for p in declarations
+            ),
+        },
+        "finances": {
+            "total_payments_amount": confirmed_total,
+            "total_withdrawals": withdrawals_total,
+            "current_balance": confirmed_total - withdrawals_total,
+            "currency": "CFA",
+        },
+        "consultations": {
+            "total_count": len(consultations),
+            "total_amount": sum(p.get("amount", 0) for p in consultations),
+            "currency": "CFA",
+        },
+        "daily_logins": sum(
+            a["action"] == "login" and a["timestamp"].startswith(today) for a in activities
+        ),
+    }
+
+
+def test_admin_stats_match_brute_force_recomputation():
+    url = _mongo_url()
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    async def scenario():
+        client = AsyncIOMotorClient(url)
+        db = client[f"aloria_stats_test_{uuid.uuid4().hex[:8]}"]
+        now = datetime.now(timezone.utc)
+        try:
+            await db.users.insert_many([
+                {"id": f"u{i}", "role": role, "is_active": i % 4 != 0}
+                for i, role in enumerate(["MANAGER", "EMPLOYEE", "CLIENT", "CLIENT", "EMPLOYEE"] * 5)
+            ])
+            await db.cases.insert_many([
+                {"id": f"c{i}", "status": status}
+                for i, status in enumerate(["New", "Terminated", "In Progress", "Rejected"] * 6)
+            ])
+            await db.payment_declarations.insert_many([
+                {"id": f"p{i}", "status": status, "amount": 1000 * (i + 1)}
+                for i, status in enumerate(["pending", "confirmed", "CONFIRMED", "rejected"] * 5)
+            ])
+            await db.payments.insert_many([
+                {"type": kind, "amount": 50000} for kind in ["consultation", "consultation", "autre"]
+            ])
+            await db.withdrawals.insert_many([{"amount": 1500}, {"amount": 2500.5}])
+            await db.user_activities.insert_many([
+                {"action": action, "timestamp": (now - timedelta(days=days)).isoformat()}
+                for action, days in [("login", 0), ("login", 0), ("logout", 0), ("login", 1), ("login", 40)]
+            ])
+
+            stats = await compute_admin_dashboard_stats(db)
+            expected = await _brute_force_admin_stats(db)
+        finally:
+            await client.drop_database(db.name)
+            client.close()
+        return stats, expected
+
+    stats, expected = asyncio.run(scenario())
+    for section in ("users", "business", "finances", "consultations"):
+        assert stats[section] == expected[section]
+    assert stats["activity"]["daily_logins"] == expected["daily_logins"]
+    assert len(stats["activity"]["recent_activities"]) == 5
+
+
+def _cases_aggregation():
+    return [{
+        "status": [{"_id": "New", "n": 2}, {"_id": "In Progress", "n": 3}, {"_id": "Approved", "n": 1}],
+        "country": [{"_id": "Canada", "n": 4}, {"_id": "France", "n": 2}, {"_id": None, "n": 0}],
+    }]
+
+
+def test_manager_stats_project_only_status_and_country():
+    db = FakeDb(
+        cases=FakeCollection(aggregate_result=_cases_aggregation()),
+        clients=FakeCollection({"id": f"c{index}"} for index in range(7)),
+        users=FakeCollection([{"role": "EMPLOYEE"}] * 3 + [{"role": "MANAGER"}]),
+    )
+    stats = asyncio.run(compute_manager_dashboard_stats(db))
+
+    assert db.cases.pipelines[0][0] == {"$project": {"_id": 0, "status": 1, "country": 1}}
+    assert stats == {
+        "total_cases": 6, "active_cases": 3, "completed_cases": 1, "pending_cases": 2,
+        "total_clients": 7, "total_employees": 3,
+        "cases_by_country": {"Canada": 4, "France": 2},
+        "cases_by_status": {"New": 2, "In Progress": 3, "Approved": 1},
+    }
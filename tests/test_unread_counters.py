@@ -0,0 +1,82 @@
+"""Tests des compteurs de non-lus (initialisation paresseuse, poussée temps réel)"""
+
+import asyncio
+
+from services import unread_counters
+from services.unread_counters import counters_view, get_unread_counts, increment_unread
+from tests.fakes import FakeCollection, FakeDb
+
+
+def _unread(count, **fields):
+    return FakeCollection([{"user_id": "u1", "receiver_id": "u1", "read": False, "read_status": False, **fields}
+                           for _ in range(count)])
+
+
+def _fake_db(document=None):
+    return FakeDb(
+        unread_counters=FakeCollection([document] if document else [], unique=[("user_id",)]),
+        notifications=_unread(3),
+        chat_messages=_unread(1),
+        messages=_unread(0),
+    )
+
+
+def test_counters_view_clamps_and_skips_uninitialized():
+    assert counters_view(None) == {}
+    assert counters_view({"user_id": "u1", "notifications": -2, "chat": 4}) == {"notifications": 0, "chat": 4}
+
+
+def test_lazy_initialization_counts_once():
+    db = _fake_db()
+    assert asyncio.run(get_unread_counts(db, "u1")) == {"notifications": 3, "chat": 1, "messages": 0}
+    assert asyncio.run(get_unread_counts(db, "u1")) == {"notifications": 3, "chat": 1, "messages": 0}
+    assert db.notifications.calls["count_documents"] == 1
+    assert db.chat_messages.calls["count_documents"] == 1
+
+
+def test_partial_document_only_counts_missing_counters():
+    db = _fake_db({"user_id": "u1", "notifications": 7})
+    assert asyncio.run(get_unread_counts(db, "u1"))["notifications"] == 7
+    assert db.notifications.calls["count_documents"] == 0
+    assert db.messages.calls["count_documents"] == 1
+
+
+def test_increment_pushes_new_values_only_when_initialized():
+    pushed = []
+
+    async def emitter(event, data, room=None):
+        pushed.append((event, data, room))
+
+    unread_counters.set_unread_emitter(emitter)
+    try:
+        db = _fake_db()
+        asyncio.run(increment_unread(db, "u1", "chat"))
+        assert pushed == []  # Aucun compteur: le comptage initial inclura ce message
+
+        asyncio.run(get_unread_counts(db, "u1"))
+        asyncio.run(increment_unread(db, "u1", "chat"))
+    finally:
+        unread_counters.set_unread_emitter(None)
+
+    assert pushed == [("unread_counts", {"notifications": 3, "chat": 2, "messages": 0}, "user:u1")]
+
+
+def test_increment_during_initialization_is_not_lost():
+    db = _fake_db()
+    source = db.chat_messages
+    count_documents = source.count_documents
+
+    async def count_then_new_message(query):
+        count = await count_documents(query)
+        if source.calls["count_documents"] == 1:
+            # Message reçu juste après le comptage, avant l'écriture du compteur
+            await source.insert_one({"receiver_id": "u1", "read_status": False})
+            await increment_unread(db, "u1", "chat")
+        return count
+
+    source.count_documents = count_then_new_message
+    asyncio.run(get_unread_counts(db, "u1"))
+    counters = db.unread_counters.documents[0]
+    assert counters["chat"] == 2
+    assert counters["pending"] == []
+    assert asyncio.run(get_unread_counts(db, "u1"))["chat"] == 2
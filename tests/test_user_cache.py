@@ -0,0 +1,53 @@
+"""Tests du cache LRU + TTL des utilisateurs authentifiés"""
+
+import time
+
+from services.user_cache import UserCache
+
+
+def test_hit_and_miss_counters():
+    cache = UserCache(max_size=10, ttl_seconds=60)
+    assert cache.get("u1") is None
+    cache.set("u1", {"id": "u1", "role": "CLIENT"})
+    assert cache.get("u1")["role"] == "CLIENT"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_returns_copies():
+    cache = UserCache()
+    cache.set("u1", {"id": "u1", "full_name": "Alice"})
+    user = cache.get("u1")
+    user["full_name"] = "Modifié"
+    assert cache.get("u1")["full_name"] == "Alice"
+
+
+def test_lru_eviction():
+    cache = UserCache(max_size=2)
+    cache.set("u1", {"id": "u1"})
+    cache.set("u2", {"id": "u2"})
+    cache.get("u1")  # u1 devient le plus récent
+    cache.set("u3", {"id": "u3"})
+
+    assert cache.get("u2") is None
+    assert cache.get("u1") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry():
+    cache = UserCache(ttl_seconds=0.01)
+    cache.set("u1", {"id": "u1"})
+    time.sleep(0.02)
+    assert cache.get("u1") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_invalidate():
+    cache = UserCache()
+    cache.set("u1", {"id": "u1", "is_active": True})
+    cache.invalidate("u1")
+    assert cache.get("u1") is None
+    assert cache.stats()["invalidations"] == 1